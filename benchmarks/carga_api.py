@@ -0,0 +1,121 @@
+"""
+Teste de carga da API HTTP de reconhecimento (face_detector.api).
+Para cada nível de concorrência, N clientes com conexão keep-alive enviam as
+imagens em sequência durante o tempo pedido; o resultado traz a vazão, as
+latências p50/p95/p99 das respostas 200 e a contagem de cada status (503 =
+recusada com a fila cheia, 504 = prazo excedido).
+
+Uso:
+    python -m benchmarks.carga_api --imagens foto1.jpg foto2.jpg --concorrencia 1 4 16 64 --duracao 20
+    python -m benchmarks.carga_api --imagens ./faces_teste --prazo-ms 1000 --saida carga.json
+"""
+import os
+import json
+import time
+import argparse
+import threading
+import http.client
+from datetime import datetime
+import numpy as np
+
+def carregar_imagens(caminhos):
+    """Lê as imagens informadas (arquivos ou pastas) como bytes"""
+    imagens = []
+    for caminho in caminhos:
+        arquivos = [os.path.join(caminho, nome) for nome in sorted(os.listdir(caminho))] \
+            if os.path.isdir(caminho) else [caminho]
+        for arquivo in arquivos:
+            if arquivo.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp')):
+                with open(arquivo, 'rb') as f:
+                    imagens.append(f.read())
+    return imagens
+
+def cliente(host, porta, imagens, caminho, fim, inicio_cliente, latencias, status, lock):
+    """Envia requisições até o fim do período, registrando latência e status de cada uma"""
+    conexao = http.client.HTTPConnection(host, porta, timeout=60)
+    proxima = inicio_cliente
+    locais = []
+    contagem = {}
+    while time.perf_counter() < fim:
+        imagem = imagens[proxima % len(imagens)]
+        proxima += 1
+        inicio = time.perf_counter()
+        try:
+            conexao.request('POST', caminho, body=imagem, headers={'Content-Type': 'application/octet-stream'})
+            resposta = conexao.getresponse()
+            resposta.read()
+            codigo = resposta.status
+            if resposta.getheader('Connection', '').lower() == 'close':
+                conexao.close()
+        except (OSError, http.client.HTTPException):
+            codigo = 'erro_conexao'
+            conexao.close()
+        duracao = time.perf_counter() - inicio
+        contagem[codigo] = contagem.get(codigo, 0) + 1
+        if codigo == 200:
+            locais.append(duracao)
+    conexao.close()
+    with lock:
+        latencias.extend(locais)
+        for codigo, quantidade in contagem.items():
+            status[str(codigo)] = status.get(str(codigo), 0) + quantidade
+
+def executar_nivel(host, porta, imagens, concorrencia, duracao, prazo_ms):
+    """Executa um nível de concorrência e resume as respostas"""
+    caminho = '/reconhecer' + (f'?prazo_ms={prazo_ms}' if prazo_ms is not None else '')
+    latencias, status, lock = [], {}, threading.Lock()
+    inicio = time.perf_counter()
+    fim = inicio + duracao
+    clientes = [threading.Thread(target=cliente, args=(host, porta, imagens, caminho, fim, i, latencias, status, lock))
+                for i in range(concorrencia)]
+    for thread in clientes:
+        thread.start()
+    for thread in clientes:
+        thread.join()
+    decorrido = time.perf_counter() - inicio
+    
+    resultado = {'concorrencia': concorrencia, 'tempo_s': decorrido, 'status': status,
+                 'requisicoes': sum(status.values()), 'sucesso': len(latencias),
+                 'vazao_rps': len(latencias) / decorrido if decorrido > 0 else 0.0}
+    if latencias:
+        ms = np.array(latencias) * 1000.0
+        resultado.update({'p50_ms': float(np.percentile(ms, 50)), 'p95_ms': float(np.percentile(ms, 95)),
+                          'p99_ms': float(np.percentile(ms, 99)), 'max_ms': float(np.max(ms))})
+    return resultado
+
+def main():
+    """Função principal do teste de carga"""
+    parser = argparse.ArgumentParser(description='Teste de carga da API de reconhecimento')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8090)
+    parser.add_argument('--imagens', nargs='+', required=True, help='Imagens ou pastas de imagens enviadas')
+    parser.add_argument('--concorrencia', nargs='+', type=int, default=[1, 4, 16, 64],
+                        help='Níveis de concorrência (clientes simultâneos)')
+    parser.add_argument('--duracao', type=float, default=20.0, help='Segundos de cada nível')
+    parser.add_argument('--prazo-ms', type=int, default=None, help='Prazo enviado em cada requisição')
+    parser.add_argument('--saida', type=str, default=None, help='Arquivo JSON de resultado')
+    args = parser.parse_args()
+    
+    imagens = carregar_imagens(args.imagens)
+    if not imagens:
+        parser.error("Nenhuma imagem encontrada")
+    
+    resultado = {'data': datetime.now().isoformat(timespec='seconds'),
+                 'parametros': {'imagens': len(imagens), 'duracao': args.duracao, 'prazo_ms': args.prazo_ms},
+                 'niveis': []}
+    print(f"{'clientes':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  status")
+    for concorrencia in args.concorrencia:
+        nivel = executar_nivel(args.host, args.porta, imagens, concorrencia, args.duracao, args.prazo_ms)
+        resultado['niveis'].append(nivel)
+        print(f"{concorrencia:>8} {nivel['vazao_rps']:>8.1f} {nivel.get('p50_ms', 0):>8.1f} "
+              f"{nivel.get('p95_ms', 0):>8.1f} {nivel.get('p99_ms', 0):>8.1f}  "
+              f"{', '.join(f'{codigo}: {n}' for codigo, n in sorted(nivel['status'].items()))}")
+    
+    if args.saida:
+        with open(args.saida, 'w') as arquivo:
+            json.dump(resultado, arquivo, indent=2)
+        print(f"\nResultado salvo em {args.saida}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
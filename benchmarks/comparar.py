@@ -0,0 +1,71 @@
+"""
+Comparação de resultados de benchmark com uma referência salva.
+Aponta regressões dos estágios isolados (latência p50) e do pipeline completo
+(FPS) acima da tolerância e encerra com código 1 se houver alguma.
+
+Uso:
+    python -m benchmarks.comparar referencia.json atual.json --tolerancia 0.10
+"""
+import sys
+import json
+import argparse
+
+def carregar(caminho):
+    """Carrega um resultado gerado por benchmarks.executar"""
+    with open(caminho) as arquivo:
+        return json.load(arquivo)
+
+def comparar(referencia, atual, tolerancia):
+    """
+    Compara dois resultados
+    
+    Returns:
+        Lista de (chave, medida, valor de referência, valor atual, variação, regressão)
+    """
+    linhas = []
+    
+    # Estágios: menor latência é melhor
+    for chave, dados in sorted(atual.get('estagios', {}).items()):
+        base = referencia.get('estagios', {}).get(chave)
+        if not base or not base.get('frames') or not dados.get('frames'):
+            continue
+        variacao = (dados['p50_ms'] - base['p50_ms']) / base['p50_ms'] if base['p50_ms'] > 0 else 0.0
+        linhas.append((chave, 'p50 ms', base['p50_ms'], dados['p50_ms'], variacao, variacao > tolerancia))
+    
+    # Pipeline completo: maior vazão é melhor
+    for cenario, dados in sorted(atual.get('pipeline', {}).items()):
+        base = referencia.get('pipeline', {}).get(cenario)
+        if not base or 'fps' not in base or 'fps' not in dados:
+            continue
+        variacao = (dados['fps'] - base['fps']) / base['fps'] if base['fps'] > 0 else 0.0
+        linhas.append((f"pipeline/{cenario}", 'fps', base['fps'], dados['fps'], variacao, -variacao > tolerancia))
+    
+    return linhas
+
+def main():
+    """Função principal da comparação"""
+    parser = argparse.ArgumentParser(description='Compara um resultado de benchmark com a referência')
+    parser.add_argument('referencia', help='JSON de referência (ex.: resultado da versão anterior)')
+    parser.add_argument('atual', help='JSON a comparar')
+    parser.add_argument('--tolerancia', type=float, default=0.10,
+                        help='Piora relativa tolerada antes de apontar regressão (0.10 = 10%%)')
+    args = parser.parse_args()
+    
+    referencia, atual = carregar(args.referencia), carregar(args.atual)
+    if referencia.get('parametros') != atual.get('parametros'):
+        print("Aviso: os parâmetros dos benchmarks diferem; a comparação pode não ser equivalente")
+    if referencia.get('ambiente') != atual.get('ambiente'):
+        print("Aviso: os resultados foram obtidos em ambientes diferentes")
+    
+    linhas = comparar(referencia, atual, args.tolerancia)
+    print(f"{'medição':<36} {'medida':>7} {'referência':>11} {'atual':>10} {'variação':>9}")
+    for chave, medida, base, valor, variacao, regressao in linhas:
+        print(f"{chave:<36} {medida:>7} {base:>11.2f} {valor:>10.2f} {variacao:>+8.1%}"
+              f"{'  REGRESSÃO' if regressao else ''}")
+    
+    regressoes = sum(1 for linha in linhas if linha[5])
+    print(f"\n{len(linhas)} medições comparadas, {regressoes} regressões (tolerância {args.tolerancia:.0%})")
+    sys.exit(1 if regressoes else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+Benchmarks dos estágios do detector e do pipeline completo com vídeo sintético.
+Os estágios são medidos isoladamente, frame a frame; o pipeline completo roda o
+DetectorController sem interface gráfica lendo um arquivo gerado o mais rápido
+possível (sem limite de FPS, sem descarte de frames na captura e sem prazo no
+escalonador facial). O resultado é salvo em JSON para comparação com
+benchmarks.comparar.
+
+Uso:
+    python -m benchmarks.executar --modo tudo --frames 150 --faces ./faces_teste --saida atual.json
+    python -m benchmarks.executar --modo estagios --cenarios estatico bolhas
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+import cv2
+import numpy as np
+from benchmarks.video_sintetico import CENARIOS, gerar_clipe, gravar_clipe
+
+def resumir(duracoes):
+    """Resume as durações (segundos) de um estágio em latências (ms) e vazão"""
+    if not duracoes:
+        return {'frames': 0}
+    ms = np.array(duracoes) * 1000.0
+    total = float(np.sum(duracoes))
+    return {
+        'frames': len(duracoes),
+        'total_s': total,
+        'media_ms': float(np.mean(ms)),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'fps': len(duracoes) / total if total > 0 else 0.0
+    }
+
+def medir(chamada, frames):
+    """Mede a chamada em cada frame (a geração do frame fica fora da medição)"""
+    duracoes = []
+    for frame in frames:
+        inicio = time.perf_counter()
+        chamada(frame)
+        duracoes.append(time.perf_counter() - inicio)
+    return duracoes
+
+def estagio_movimento(frames, pasta_temporaria):
+    """Detecção de movimento entre frames consecutivos"""
+    from face_detector.services.motion_detector import MotionDetector
+    detector = MotionDetector()
+    anterior = None
+    duracoes = []
+    for frame in frames:
+        if anterior is not None:
+            inicio = time.perf_counter()
+            detector.detectar(frame, anterior)
+            duracoes.append(time.perf_counter() - inicio)
+        anterior = frame
+    return duracoes
+
+def estagio_hash_perceptual(frames, pasta_temporaria):
+    """Hash perceptual usado na supressão de frames duplicados"""
+    from face_detector.utils.image_utils import calcular_hash_perceptual
+    return medir(calcular_hash_perceptual, frames)
+
+def estagio_melhorar_imagem(frames, pasta_temporaria):
+    """Melhoria de imagem aplicada antes da detecção facial"""
+    from face_detector.utils.image_utils import melhorar_imagem
+    return medir(lambda frame: melhorar_imagem(frame, True), frames)
+
+def estagio_renderizar_anotacoes(frames, pasta_temporaria):
+    """Desenho das anotações (cópia do frame incluída)"""
+    from face_detector.models.anotacoes import Anotacoes
+    from face_detector.config.settings import COR_VERDE
+    anotacoes = Anotacoes()
+    anotacoes.adicionar_face((100, 300, 300, 100), "Benchmark: 0.99", COR_VERDE)
+    anotacoes.adicionar_info_tela()
+    return medir(anotacoes.renderizar, frames)
+
+def estagio_salvar_imagem(frames, pasta_temporaria):
+    """Gravação JPEG em disco"""
+    from face_detector.utils.image_utils import salvar_imagem
+    caminho = os.path.join(pasta_temporaria, "salvar_imagem.jpg")
+    return medir(lambda frame: salvar_imagem(frame, caminho), frames)
+
+def estagio_decodificacao(frames, pasta_temporaria):
+    """Vazão do VideoCapture lendo um arquivo sem limite de FPS (intervalo entre leituras)"""
+    from face_detector.services.video_capture import VideoCapture
+    caminho = os.path.join(pasta_temporaria, "decodificacao.avi")
+    gravar_clipe(frames, caminho)
+    captura = VideoCapture(caminho, taxa_fps=0)
+    if not captura.start():
+        raise RuntimeError(f"Não foi possível abrir {caminho}")
+    duracoes = []
+    try:
+        anterior = time.perf_counter()
+        while not (captura.fonte_esgotada and captura.frame_queue.empty()):
+            ret, _ = captura.read()
+            if ret:
+                agora = time.perf_counter()
+                duracoes.append(agora - anterior)
+                anterior = agora
+    finally:
+        captura.stop()
+    return duracoes
+
+def estagio_deteccao_faces(frames, pasta_temporaria):
+    """Localização de faces (melhoria, redução e face_locations)"""
+    from face_detector.services.face_detector import FaceDetector
+    from face_detector.services.modelos import modelos
+    modelos.carregar()  # Carga dos modelos fora da medição
+    detector = FaceDetector(max_workers=1)
+    return medir(detector.localizar_faces, frames)
+
+def estagio_encoding_faces(frames, pasta_temporaria):
+    """Encoding das faces já localizadas (a localização fica fora da medição)"""
+    from face_detector.services.face_detector import FaceDetector
+    from face_detector.services.modelos import modelos
+    detector = FaceDetector(max_workers=1)
+    duracoes = []
+    for frame in frames:
+        rgb_small_frame, face_locations, _ = detector.localizar_faces(frame)
+        if not face_locations:
+            continue
+        inicio = time.perf_counter()
+        modelos.api.face_encodings(rgb_small_frame, face_locations, num_jitters=detector.num_jitters)
+        duracoes.append(time.perf_counter() - inicio)
+    return duracoes
+
+# Estágios medidos isoladamente, na ordem do pipeline
+ESTAGIOS = {
+    'decodificacao': estagio_decodificacao,
+    'hash_perceptual': estagio_hash_perceptual,
+    'movimento': estagio_movimento,
+    'melhorar_imagem': estagio_melhorar_imagem,
+    'deteccao_faces': estagio_deteccao_faces,
+    'encoding_faces': estagio_encoding_faces,
+    'renderizar_anotacoes': estagio_renderizar_anotacoes,
+    'salvar_imagem': estagio_salvar_imagem,
+}
+
+def executar_estagios(cenarios, estagios, args, pasta_temporaria):
+    """Mede cada estágio em cada cenário; falhas (ex.: modelo ausente) são registradas no resultado"""
+    resultados = {}
+    for cenario in cenarios:
+        for nome in estagios:
+            chave = f"{nome}/{cenario}"
+            frames = gerar_clipe(cenario, args.frames, args.resolucao, args.semente, args.faces)
+            try:
+                resultados[chave] = resumir(ESTAGIOS[nome](frames, pasta_temporaria))
+                print(f"{chave:<36} {formatar(resultados[chave])}")
+            except Exception as e:
+                resultados[chave] = {'erro': str(e)}
+                print(f"{chave:<36} erro: {e}")
+    return resultados
+
+def executar_pipeline(cenario, args, pasta_temporaria, gravacao=None):
+    """
+    Executa o DetectorController sem interface gráfica sobre o clipe do cenário
+    ou sobre uma gravação de frames reproduzida o mais rápido possível
+    
+    O controlador roda na thread principal (handlers de sinal); uma thread auxiliar
+    encerra a execução quando o arquivo foi consumido e a fila facial esvaziou.
+    """
+    from face_detector.controllers.detector_controller import DetectorController
+    from face_detector.utils.metricas import registro, ETAPAS_LATENCIA
+    from face_detector.services.frame_recorder import FrameRecording
+    
+    if gravacao is not None:
+        caminho = os.path.abspath(gravacao)
+        total_frames = len(FrameRecording(caminho))
+    else:
+        caminho = os.path.abspath(os.path.join(pasta_temporaria, f"pipeline_{cenario}.avi"))
+        total_frames = gravar_clipe(gerar_clipe(cenario, args.frames, args.resolucao, args.semente, args.faces),
+                                    caminho)
+    
+    # Capturas gravadas na pasta temporária, não no diretório do projeto
+    diretorio_original = os.getcwd()
+    pasta_execucao = os.path.join(pasta_temporaria, f"execucao_{cenario}")
+    os.makedirs(pasta_execucao, exist_ok=True)
+    os.chdir(pasta_execucao)
+    try:
+        camera_id = f"bench_{cenario}"
+        # Sem prazo no escalonador: lido o mais rápido possível, o arquivo chega mais rápido que o estágio
+        # facial, e frames expirados dependeriam da velocidade da máquina (a latência ponta a ponta passa
+        # a incluir a espera na fila facial)
+        detector = DetectorController(cameras=[{"id": camera_id, "fonte": caminho, "taxa_fps": 0, "velocidade": 0,
+                                                "prazo": float('inf')}],
+                                      headless=True)
+        encerrado_por_tempo = []
+        
+        def _aguardar_fim():
+            limite = time.time() + args.tempo_maximo
+            while time.time() < limite:
+                if (detector.running and all(p.fonte_esgotada() for p in detector.pipelines)
+                        and detector.motor_faces.qsize() == 0):
+                    time.sleep(0.5)  # Frames ainda em processamento na thread de movimento/faces
+                    break
+                time.sleep(0.05)
+            else:
+                encerrado_por_tempo.append(True)
+            detector.running = False
+        
+        threading.Thread(target=_aguardar_fim, daemon=True).start()
+        inicio, cpu_inicio = time.perf_counter(), time.process_time()
+        if not detector.iniciar():
+            raise RuntimeError(f"Falha ao iniciar o pipeline com {caminho}")
+        tempo, cpu = time.perf_counter() - inicio, time.process_time() - cpu_inicio
+    finally:
+        os.chdir(diretorio_original)
+    
+    metricas = registro.camera(camera_id)
+    resultado = {
+        'frames_clipe': total_frames,
+        'tempo_s': tempo,
+        'cpu_s': cpu,
+        'fps': metricas.valor('frames_capturados') / tempo if tempo > 0 else 0.0,
+        'encerrado_por_tempo': bool(encerrado_por_tempo),
+        'tempo_primeiro_frame_s': detector.pipelines[0].tempo_primeiro_frame,
+        'tempo_primeira_decisao_s': detector.pipelines[0].tempo_primeira_decisao,
+        'contadores': {nome: metricas.valor(nome) for nome in (
+            'frames_capturados', 'frames_processados', 'movimento_detectado', 'faces_detectadas',
+            'faces_reconhecidas', 'faces_codificadas', 'encodings_evitados', 'frames_duplicados',
+            'salvamentos_suprimidos')},
+        'latencias_ms': {}
+    }
+    for etapa in ETAPAS_LATENCIA:
+        resumo = metricas.histograma(etapa).resumo()
+        if resumo['total'] > 0:
+            resultado['latencias_ms'][etapa] = resumo
+    return resultado
+
+def formatar(resumo):
+    """Linha curta com as medidas principais de um estágio"""
+    if not resumo.get('frames'):
+        return "sem frames medidos"
+    return (f"{resumo['frames']:>5} frames  média {resumo['media_ms']:8.2f} ms  p50 {resumo['p50_ms']:8.2f} ms  "
+            f"p95 {resumo['p95_ms']:8.2f} ms  {resumo['fps']:8.1f} fps")
+
+def ambiente():
+    """Informações da máquina e das bibliotecas, para interpretar a comparação"""
+    return {
+        'python': sys.version.split()[0],
+        'plataforma': platform.platform(),
+        'processador': platform.processor(),
+        'cpus': os.cpu_count(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__
+    }
+
+def main():
+    """Função principal dos benchmarks"""
+    parser = argparse.ArgumentParser(description='Benchmarks dos estágios e do pipeline com vídeo sintético')
+    parser.add_argument('--modo', choices=('estagios', 'pipeline', 'tudo'), default='tudo')
+    parser.add_argument('--cenarios', nargs='+', choices=CENARIOS, default=None,
+                        help='Cenários (padrão: todos; "faces" apenas com --faces)')
+    parser.add_argument('--estagios', nargs='+', choices=list(ESTAGIOS), default=list(ESTAGIOS))
+    parser.add_argument('--frames', type=int, default=150, help='Frames por clipe')
+    parser.add_argument('--resolucao', type=str, default='1280x720', help='Resolução LARGURAxALTURA')
+    parser.add_argument('--semente', type=int, default=0, help='Semente do vídeo sintético')
+    parser.add_argument('--faces', type=str, default=None, help='Pasta com imagens de faces para o cenário "faces"')
+    parser.add_argument('--tempo-maximo', type=float, default=300.0,
+                        help='Tempo máximo de cada execução do pipeline (segundos)')
+    parser.add_argument('--saida', type=str, default=None,
+                        help='Arquivo JSON de resultado (padrão: benchmark_<data>.json)')
+    parser.add_argument('--gravacoes', nargs='+', default=[], metavar='ARQUIVO',
+                        help='Gravações de frames (.frames) executadas também no pipeline completo')
+    args = parser.parse_args()
+    
+    try:
+        largura, altura = (int(valor) for valor in args.resolucao.lower().split('x'))
+    except ValueError:
+        parser.error(f"Resolução inválida: {args.resolucao} (use LARGURAxALTURA)")
+    args.resolucao = (largura, altura)
+    
+    cenarios = args.cenarios or [c for c in CENARIOS if c != 'faces' or args.faces is not None]
+    if 'faces' in cenarios and args.faces is None:
+        parser.error("O cenário 'faces' requer --faces PASTA")
+    
+    resultado = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'ambiente': ambiente(),
+        'parametros': {'frames': args.frames, 'resolucao': args.resolucao, 'semente': args.semente,
+                       'cenarios': cenarios, 'gravacoes': args.gravacoes},
+        'estagios': {},
+        'pipeline': {}
+    }
+    
+    pasta_temporaria = tempfile.mkdtemp(prefix="benchmark_detector_")
+    try:
+        if args.modo in ('estagios', 'tudo'):
+            print("Estágios isolados")
+            resultado['estagios'] = executar_estagios(cenarios, args.estagios, args, pasta_temporaria)
+        if args.modo in ('pipeline', 'tudo'):
+            for cenario in cenarios:
+                print(f"\nPipeline completo: {cenario}")
+                try:
+                    resultado['pipeline'][cenario] = executar_pipeline(cenario, args, pasta_temporaria)
+                    dados = resultado['pipeline'][cenario]
+                    print(f"pipeline/{cenario}: {dados['contadores']['frames_capturados']} frames em "
+                          f"{dados['tempo_s']:.1f}s ({dados['fps']:.1f} fps, CPU {dados['cpu_s']:.1f}s)")
+                except Exception as e:
+                    resultado['pipeline'][cenario] = {'erro': str(e)}
+                    print(f"pipeline/{cenario}: erro: {e}")
+            for numero, gravacao in enumerate(args.gravacoes):
+                nome = f"gravacao_{numero}_{os.path.splitext(os.path.basename(gravacao))[0]}"
+                print(f"\nPipeline completo: {gravacao}")
+                try:
+                    resultado['pipeline'][nome] = executar_pipeline(nome, args, pasta_temporaria, gravacao)
+                    dados = resultado['pipeline'][nome]
+                    print(f"pipeline/{nome}: {dados['contadores']['frames_capturados']} frames em "
+                          f"{dados['tempo_s']:.1f}s ({dados['fps']:.1f} fps, CPU {dados['cpu_s']:.1f}s)")
+                except Exception as e:
+                    resultado['pipeline'][nome] = {'erro': str(e)}
+                    print(f"pipeline/{nome}: erro: {e}")
+    finally:
+        shutil.rmtree(pasta_temporaria, ignore_errors=True)
+    
+    saida = args.saida or f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(saida, 'w') as arquivo:
+        json.dump(resultado, arquivo, indent=2)
+    print(f"\nResultado salvo em {saida}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Simulação do escalonador facial com cargas desbalanceadas entre câmeras.
+Compara uma fila FIFO única (comportamento anterior) com o FaceScheduler em tempo
+simulado, sem câmeras nem modelos: cada frame custa um tempo fixo de processamento.
+
+Uso:
+    python -m benchmarks.simular_escalonador --duracao 120 --tempo-servico 0.12
+"""
+import argparse
+import random
+from collections import deque
+import numpy as np
+from face_detector.services.face_scheduler import FaceScheduler
+
+# Câmeras simuladas: (id, frames/s enviados ao estágio facial, janelas de aparição por minuto)
+CAMERAS_SIMULADAS = [
+    ("doca", 20.0, 30),
+    ("entrada", 2.0, 6),
+    ("corredor", 2.0, 6),
+    ("patio", 1.0, 3),
+]
+
+class RelogioSimulado:
+    """Relógio controlado pela simulação"""
+    
+    def __init__(self):
+        self.agora = 0.0
+    
+    def __call__(self):
+        return self.agora
+
+def gerar_chegadas(duracao, semente):
+    """Gera os frames de todas as câmeras ordenados pelo instante de chegada"""
+    aleatorio = random.Random(semente)
+    chegadas = []
+    for camera_id, taxa, janelas_por_minuto in CAMERAS_SIMULADAS:
+        t = 0.0
+        proxima_janela = 0.0
+        while True:
+            t += aleatorio.expovariate(taxa)
+            if t >= duracao:
+                break
+            # O primeiro frame após o início de uma janela de aparição é prioritário
+            prioritario = t >= proxima_janela
+            if prioritario:
+                proxima_janela = t + aleatorio.expovariate(janelas_por_minuto / 60.0)
+            chegadas.append((t, camera_id, prioritario))
+    chegadas.sort()
+    return chegadas
+
+def simular(chegadas, tempo_servico, usar_escalonador, tamanho_fila, prazo):
+    """
+    Executa a simulação de um estágio facial com um único worker
+    
+    Returns:
+        Dicionário por câmera com atendidos, descartados e latências
+    """
+    relogio = RelogioSimulado()
+    resultado = {camera_id: {'recebidos': 0, 'atendidos': 0, 'descartados': 0,
+                             'latencias': [], 'latencias_prioritarias': []}
+                 for camera_id, _, _ in CAMERAS_SIMULADAS}
+    
+    if usar_escalonador:
+        escalonador = FaceScheduler(tamanho_fila=tamanho_fila, relogio=relogio)
+        for camera_id, _, _ in CAMERAS_SIMULADAS:
+            escalonador.registrar_camera(camera_id, peso=1.0, prazo=prazo)
+    else:
+        # Fila única com a mesma capacidade total; frames novos são descartados quando cheia
+        fifo = deque()
+        capacidade_fifo = tamanho_fila * len(CAMERAS_SIMULADAS)
+    
+    def retirar():
+        if usar_escalonador:
+            camera_id, item = escalonador.proximo()
+            return item
+        return fifo.popleft() if fifo else None
+    
+    indice = 0
+    while True:
+        # Entregar ao estágio facial todos os frames que chegaram até agora
+        while indice < len(chegadas) and chegadas[indice][0] <= relogio.agora:
+            t, camera_id, prioritario = chegadas[indice]
+            resultado[camera_id]['recebidos'] += 1
+            if usar_escalonador:
+                escalonador.submeter(camera_id, (t, camera_id, prioritario), t, prioritario)
+            elif len(fifo) < capacidade_fifo:
+                fifo.append((t, camera_id, prioritario))
+            indice += 1
+        
+        item = retirar()
+        if item is None:
+            # Fila vazia: avançar até a próxima chegada ou encerrar
+            if indice >= len(chegadas):
+                break
+            relogio.agora = chegadas[indice][0]
+            continue
+        
+        # Processar o frame: o worker fica ocupado pelo tempo de serviço
+        t, camera_id, prioritario = item
+        relogio.agora += tempo_servico
+        latencia = relogio.agora - t
+        resultado[camera_id]['atendidos'] += 1
+        resultado[camera_id]['latencias'].append(latencia)
+        if prioritario:
+            resultado[camera_id]['latencias_prioritarias'].append(latencia)
+    
+    for camera_id, dados in resultado.items():
+        dados['descartados'] = dados['recebidos'] - dados['atendidos']
+    return resultado
+
+def imprimir(titulo, resultado):
+    """Imprime a tabela de resultados de uma simulação"""
+    print(f"\n{titulo}")
+    print(f"{'câmera':<10} {'recebidos':>9} {'atendidos':>9} {'descart.':>9} "
+          f"{'lat. p50':>9} {'lat. p95':>9} {'prior. p95':>10}")
+    for camera_id, dados in resultado.items():
+        latencias = dados['latencias'] or [0.0]
+        prioritarias = dados['latencias_prioritarias'] or [0.0]
+        print(f"{camera_id:<10} {dados['recebidos']:>9} {dados['atendidos']:>9} {dados['descartados']:>9} "
+              f"{np.percentile(latencias, 50):>8.2f}s {np.percentile(latencias, 95):>8.2f}s "
+              f"{np.percentile(prioritarias, 95):>9.2f}s")
+
+def main():
+    """Função principal da simulação"""
+    parser = argparse.ArgumentParser(description='Simulação do escalonador facial com cargas desbalanceadas')
+    parser.add_argument('--duracao', type=float, default=120.0, help='Tempo simulado (segundos)')
+    parser.add_argument('--tempo-servico', type=float, default=0.12, help='Tempo de processamento por frame (segundos)')
+    parser.add_argument('--tamanho-fila', type=int, default=4, help='Frames pendentes por câmera')
+    parser.add_argument('--prazo', type=float, default=2.0, help='Idade máxima de um frame (segundos)')
+    parser.add_argument('--semente', type=int, default=42, help='Semente do gerador de chegadas')
+    args = parser.parse_args()
+    
+    chegadas = gerar_chegadas(args.duracao, args.semente)
+    capacidade = 1.0 / args.tempo_servico
+    demanda = len(chegadas) / args.duracao
+    print(f"Demanda: {demanda:.1f} frames/s, capacidade: {capacidade:.1f} frames/s")
+    
+    imprimir("Fila FIFO única", simular(chegadas, args.tempo_servico, False,
+                                        args.tamanho_fila, args.prazo))
+    imprimir("FaceScheduler (déficit + prioridade + prazo)",
+             simular(chegadas, args.tempo_servico, True, args.tamanho_fila, args.prazo))
+
+if __name__ == "__main__":
+    main()
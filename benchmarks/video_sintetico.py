@@ -0,0 +1,131 @@
+"""
+Geração de vídeo sintético determinístico para os benchmarks.
+Cada cenário produz sempre os mesmos frames para a mesma semente, permitindo
+comparar medições entre versões do código:
+
+- estatico: cena parada com ruído leve de sensor
+- ruido: ruído forte em todo o frame (pior caso para movimento e hash)
+- bolhas: círculos em movimento sobre a cena (movimento sem faces)
+- faces: imagens de faces de uma pasta local coladas e deslocadas sobre a cena
+"""
+import os
+import cv2
+import numpy as np
+
+CENARIOS = ('estatico', 'ruido', 'bolhas', 'faces')
+EXTENSOES_IMAGEM = ('.jpg', '.jpeg', '.png', '.bmp')
+
+def gerar_fundo(largura, altura, aleatorio):
+    """Cena de fundo com gradiente e blocos, suavizada para parecer uma imagem de câmera"""
+    gradiente = np.linspace(40, 160, largura, dtype=np.float32)
+    fundo = np.repeat(np.repeat(gradiente[np.newaxis, :, np.newaxis], altura, axis=0), 3, axis=2)
+    for _ in range(12):
+        x, y = int(aleatorio.integers(0, largura)), int(aleatorio.integers(0, altura))
+        w, h = int(aleatorio.integers(40, largura // 4)), int(aleatorio.integers(40, altura // 4))
+        fundo[y:y + h, x:x + w] = aleatorio.integers(0, 255, 3)
+    return cv2.GaussianBlur(fundo.astype(np.uint8), (9, 9), 0)
+
+def carregar_faces(pasta_faces):
+    """Carrega as imagens de faces da pasta, em ordem de nome (para manter o determinismo)"""
+    if pasta_faces is None or not os.path.isdir(pasta_faces):
+        raise ValueError("O cenário 'faces' requer uma pasta com imagens de faces (--faces)")
+    faces = []
+    for nome in sorted(os.listdir(pasta_faces)):
+        if nome.lower().endswith(EXTENSOES_IMAGEM):
+            imagem = cv2.imread(os.path.join(pasta_faces, nome))
+            if imagem is not None:
+                faces.append(imagem)
+    if not faces:
+        raise ValueError(f"Nenhuma imagem de face encontrada em {pasta_faces}")
+    return faces
+
+def _objetos_moveis(quantidade, largura, altura, aleatorio):
+    """Posição, velocidade e tamanho iniciais dos objetos em movimento"""
+    return [{
+        'x': float(aleatorio.integers(0, largura)),
+        'y': float(aleatorio.integers(0, altura)),
+        'vx': float(aleatorio.uniform(-12, 12)),
+        'vy': float(aleatorio.uniform(-8, 8)),
+        'tamanho': int(aleatorio.integers(altura // 10, altura // 4)),
+        'cor': tuple(int(c) for c in aleatorio.integers(0, 255, 3))
+    } for _ in range(quantidade)]
+
+def _mover(objeto, largura, altura):
+    """Avança um objeto um frame, rebatendo nas bordas"""
+    objeto['x'] += objeto['vx']
+    objeto['y'] += objeto['vy']
+    if not 0 <= objeto['x'] <= largura - objeto['tamanho']:
+        objeto['vx'] = -objeto['vx']
+        objeto['x'] = min(max(objeto['x'], 0), largura - objeto['tamanho'])
+    if not 0 <= objeto['y'] <= altura - objeto['tamanho']:
+        objeto['vy'] = -objeto['vy']
+        objeto['y'] = min(max(objeto['y'], 0), altura - objeto['tamanho'])
+
+def gerar_clipe(cenario, num_frames=300, resolucao=(1280, 720), semente=0, pasta_faces=None):
+    """
+    Gera os frames BGR de um cenário sintético (um por vez, sem manter o clipe em memória)
+    
+    Args:
+        cenario: Um dos CENARIOS
+        num_frames: Número de frames do clipe
+        resolucao: Tupla (largura, altura)
+        semente: Semente do gerador aleatório (mesma semente = mesmos frames)
+        pasta_faces: Pasta com imagens de faces (obrigatória no cenário 'faces')
+    """
+    if cenario not in CENARIOS:
+        raise ValueError(f"Cenário desconhecido: {cenario} (use {', '.join(CENARIOS)})")
+    largura, altura = resolucao
+    aleatorio = np.random.default_rng(semente)
+    fundo = gerar_fundo(largura, altura, aleatorio)
+    
+    objetos = []
+    faces = []
+    if cenario == 'bolhas':
+        objetos = _objetos_moveis(4, largura, altura, aleatorio)
+    elif cenario == 'faces':
+        faces = carregar_faces(pasta_faces)
+        objetos = _objetos_moveis(min(len(faces), 3), largura, altura, aleatorio)
+        for objeto in objetos:
+            objeto['tamanho'] = max(objeto['tamanho'], 160)  # Faces com tamanho suficiente para detecção
+    
+    for indice in range(num_frames):
+        if cenario == 'ruido':
+            ruido = aleatorio.normal(0, 25, fundo.shape)
+        else:
+            ruido = aleatorio.normal(0, 2, fundo.shape)  # Ruído de sensor
+        frame = np.clip(fundo + ruido, 0, 255).astype(np.uint8)
+        
+        for numero, objeto in enumerate(objetos):
+            _mover(objeto, largura, altura)
+            x, y, lado = int(objeto['x']), int(objeto['y']), objeto['tamanho']
+            if cenario == 'bolhas':
+                cv2.circle(frame, (x + lado // 2, y + lado // 2), lado // 2, objeto['cor'], -1)
+            else:
+                face = faces[numero % len(faces)]
+                proporcao = face.shape[0] / face.shape[1]
+                altura_face = min(int(lado * proporcao), altura - y)
+                face = cv2.resize(face, (lado, int(lado * proporcao)))[:altura_face, :largura - x]
+                frame[y:y + face.shape[0], x:x + face.shape[1]] = face
+        
+        yield frame
+
+def gravar_clipe(frames, caminho, fps=30):
+    """
+    Grava os frames em um arquivo de vídeo MJPEG (.avi), suportado por qualquer build do OpenCV
+    
+    Returns:
+        Número de frames gravados
+    """
+    gravador = None
+    total = 0
+    try:
+        for frame in frames:
+            if gravador is None:
+                altura, largura = frame.shape[:2]
+                gravador = cv2.VideoWriter(caminho, cv2.VideoWriter_fourcc(*'MJPG'), fps, (largura, altura))
+            gravador.write(frame)
+            total += 1
+    finally:
+        if gravador is not None:
+            gravador.release()
+    return total
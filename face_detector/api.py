@@ -0,0 +1,45 @@
+"""
+API HTTP local de reconhecimento facial, para outros serviços enviarem imagens.
+
+Uso:
+    python -m face_detector.api [--porta 8090] [--workers 2] [--lote 8]
+    curl --data-binary @foto.jpg http://127.0.0.1:8090/reconhecer?prazo_ms=2000
+    curl http://127.0.0.1:8090/saude
+"""
+import asyncio
+import argparse
+from face_detector.config.settings import (
+    ENDERECO_API, PORTA_API, WORKERS_API, TAMANHO_LOTE_API, ESPERA_LOTE_API, MAX_PENDENTES_API, PRAZO_API
+)
+from face_detector.services.modelos import modelos
+from face_detector.services.recognition_api import ServidorReconhecimento
+from face_detector.utils.logger import log_info
+
+def main():
+    """Função principal da API de reconhecimento"""
+    parser = argparse.ArgumentParser(description='API HTTP local de reconhecimento facial')
+    parser.add_argument('--endereco', type=str, default=ENDERECO_API, help='Endereço de escuta')
+    parser.add_argument('--porta', type=int, default=PORTA_API, help='Porta TCP')
+    parser.add_argument('--workers', type=int, default=WORKERS_API, help='Lotes processados em paralelo')
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE_API, help='Imagens por lote')
+    parser.add_argument('--espera-ms', type=float, default=ESPERA_LOTE_API * 1000,
+                        help='Tempo máximo que a primeira imagem aguarda o lote completar')
+    parser.add_argument('--pendentes', type=int, default=MAX_PENDENTES_API,
+                        help='Requisições aguardando um lote antes de recusar com 503')
+    parser.add_argument('--prazo', type=float, default=PRAZO_API,
+                        help='Prazo padrão das requisições em segundos (prazo_ms na URL substitui)')
+    args = parser.parse_args()
+    
+    # Modelos carregados e aquecidos antes de abrir a porta: a primeira requisição não paga a carga
+    modelos.carregar()
+    servidor = ServidorReconhecimento(args.endereco, args.porta, args.workers, args.lote, args.espera_ms / 1000.0,
+                                      args.pendentes, args.prazo)
+    servidor.detector.aquecer()
+    try:
+        asyncio.run(servidor.executar())
+    except KeyboardInterrupt:
+        log_info("API de reconhecimento finalizada")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,102 @@
+"""
+Busca retroativa de uma pessoa no histórico de encodings.
+A consulta é uma foto (o encoding da maior face é calculado) ou um encoding salvo
+(.pickle ou .npy); o resultado são as aparições passadas mais parecidas, com
+instante, câmera e recorte salvo.
+
+Uso:
+    python -m face_detector.busca consultar --imagem foto.jpg [-k 20] [--camera ID] [--desde AAAA-MM-DD]
+    python -m face_detector.busca consultar --encoding encodings/pessoa.pickle
+    python -m face_detector.busca indexar [--listas N]
+"""
+import time
+import pickle
+import argparse
+from datetime import datetime
+import numpy as np
+from face_detector.config.settings import PASTA_HISTORICO, LISTAS_INDICE_BUSCA
+from face_detector.services.encoding_log import HistoricoEncodings
+
+def _data(texto):
+    """Converte AAAA-MM-DD ou AAAA-MM-DD HH:MM:SS em timestamp"""
+    for formato in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(texto, formato).timestamp()
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"data inválida: {texto} (use AAAA-MM-DD ou 'AAAA-MM-DD HH:MM:SS')")
+
+def encoding_consulta(imagem=None, arquivo_encoding=None):
+    """
+    Obtém o encoding procurado
+    
+    Args:
+        imagem: Foto da pessoa (usa a maior face encontrada)
+        arquivo_encoding: Encoding salvo em .pickle ou .npy
+    
+    Returns:
+        Encoding (128 valores) ou None se nenhuma face for encontrada na foto
+    """
+    if arquivo_encoding is not None:
+        if arquivo_encoding.endswith('.npy'):
+            return np.load(arquivo_encoding)
+        with open(arquivo_encoding, 'rb') as f:
+            return np.asarray(pickle.load(f))
+    
+    from face_detector.services.modelos import modelos
+    foto = modelos.api.load_image_file(imagem)
+    faces = modelos.api.face_locations(foto)
+    if not faces:
+        return None
+    maior = max(faces, key=lambda f: (f[2] - f[0]) * (f[1] - f[3]))
+    return modelos.api.face_encodings(foto, [maior])[0]
+
+def main():
+    """Função principal da busca retroativa"""
+    parser = argparse.ArgumentParser(description='Busca retroativa de faces no histórico de encodings')
+    parser.add_argument('--pasta', type=str, default=PASTA_HISTORICO, help='Pasta do histórico de encodings')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    consultar = comandos.add_parser('consultar', help='Aparições passadas mais parecidas com uma foto ou encoding')
+    origem = consultar.add_mutually_exclusive_group(required=True)
+    origem.add_argument('--imagem', type=str, help='Foto da pessoa procurada')
+    origem.add_argument('--encoding', type=str, help='Encoding da pessoa (.pickle ou .npy)')
+    consultar.add_argument('-k', type=int, default=20, help='Número de resultados')
+    consultar.add_argument('--camera', type=str, default=None, help='Limitar a uma câmera')
+    consultar.add_argument('--desde', type=_data, default=None, help='Início do período (AAAA-MM-DD [HH:MM:SS])')
+    consultar.add_argument('--ate', type=_data, default=None, help='Fim do período (AAAA-MM-DD [HH:MM:SS])')
+    consultar.add_argument('--distancia-maxima', type=float, default=None,
+                           help='Omitir resultados mais distantes que isto (ex.: 0.6)')
+    consultar.add_argument('--sem-indice', action='store_true', help='Varrer todo o histórico (busca exata)')
+    indexar = comandos.add_parser('indexar', help='Construir o índice invertido para buscas rápidas')
+    indexar.add_argument('--listas', type=int, default=LISTAS_INDICE_BUSCA, help='Número de listas do índice')
+    args = parser.parse_args()
+    
+    try:
+        historico = HistoricoEncodings(args.pasta)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    
+    if args.comando == 'indexar':
+        caminho = historico.construir_indice(args.listas)
+        print(f"Índice de {historico.total} encodings salvo em {caminho}")
+        return 0
+    
+    consulta = encoding_consulta(args.imagem, args.encoding)
+    if consulta is None:
+        parser.error(f"Nenhuma face encontrada em {args.imagem}")
+    
+    inicio = time.time()
+    resultados = historico.buscar(consulta, args.k, args.camera, args.desde, args.ate,
+                                  usar_indice=not args.sem_indice)
+    if args.distancia_maxima is not None:
+        resultados = [r for r in resultados if r['distancia'] <= args.distancia_maxima]
+    modo = 'índice' if historico.indice is not None and not args.sem_indice else 'varredura completa'
+    print(f"{historico.total} encodings pesquisados em {time.time() - inicio:.2f}s ({modo})")
+    for resultado in resultados:
+        instante = datetime.fromtimestamp(resultado['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+        print(f"{resultado['distancia']:.3f}  {instante}  câmera {resultado['camera'] or '-'}  "
+              f"{resultado['recorte'] or '(recorte não salvo: mesma aparição de um recorte anterior)'}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
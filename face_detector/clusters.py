@@ -0,0 +1,43 @@
+"""
+Consulta e promoção dos clusters de faces desconhecidas.
+Lista os clusters gravados pelo sistema e salva o centróide de um cluster como
+encoding de uma identidade conhecida na pasta de encodings.
+
+Uso:
+    python -m face_detector.clusters listar [--limite N]
+    python -m face_detector.clusters promover ID NOME
+"""
+import argparse
+from datetime import datetime
+from face_detector.config.settings import ARQUIVO_CLUSTERS
+from face_detector.services.face_clusters import AgrupadorDesconhecidos
+
+def main():
+    """Função principal da consulta de clusters"""
+    parser = argparse.ArgumentParser(description='Clusters de faces desconhecidas')
+    parser.add_argument('--arquivo', type=str, default=ARQUIVO_CLUSTERS, help='Arquivo dos clusters')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    listar = comandos.add_parser('listar', help='Listar os clusters, do mais visto para o menos visto')
+    listar.add_argument('--limite', type=int, default=20, help='Número de clusters listados')
+    promover = comandos.add_parser('promover', help='Salvar o centróide de um cluster como identidade conhecida')
+    promover.add_argument('id', type=int, help='ID do cluster')
+    promover.add_argument('nome', type=str, help='Nome da identidade (arquivo encodings/<nome>.pickle)')
+    args = parser.parse_args()
+    
+    agrupador = AgrupadorDesconhecidos(arquivo=args.arquivo)
+    if args.comando == 'listar':
+        print(f"{agrupador.total} clusters")
+        for cluster in agrupador.listar()[:args.limite]:
+            ultima_vez = datetime.fromtimestamp(cluster['ultima_vez']).strftime('%Y-%m-%d %H:%M:%S')
+            print(f"{cluster['id']:>6}  {cluster['faces']:>6} faces  visto em {ultima_vez}  "
+                  f"{cluster['representante'] or '(sem recorte salvo)'}")
+        return 0
+    
+    caminho = agrupador.promover(args.id, f"{args.nome.replace(' ', '_').lower()}.pickle")
+    if caminho is None:
+        parser.error(f"Cluster {args.id} não encontrado em {args.arquivo}")
+    print(f"Cluster {args.id} promovido: {caminho}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
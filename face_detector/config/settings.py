@@ -2,75 +2,206 @@
 Configurações do sistema de detecção de faces.
 Contém todas as constantes e parâmetros utilizados pelo sistema.
 """
-import numpy as np
+import os
 
 # URL RTSP fixa que sabemos que funciona
 RTSP_URL = "rtsp://192.168.0.133:554/0/av0"
 
+# Câmeras do modo multicâmera: lista de dicionários {"id": ..., "fonte": URL RTSP, índice local, arquivo ou gravação}
+# com "peso", "prazo", "taxa_fps", "gravacao" e "velocidade" opcionais (lista vazia = apenas a câmera de RTSP_URL ou a da linha de comando)
+CAMERAS = []
+TAMANHO_FILA_FACE_CAMERA = 4     # Frames aguardando o motor facial por câmera (os mais antigos são descartados)
+PESO_CAMERA_PADRAO = 1.0         # Frames atendidos por rodada do escalonador facial, relativo às outras câmeras
+PRAZO_FACE_CAMERA = 2.0          # Idade máxima de um frame para ainda passar pelo processamento facial (segundos)
+AREA_PRIORIDADE_FACE = 50000     # Área de movimento a partir da qual o frame é atendido com prioridade
+
 # Configurações de detecção de movimento
 MOVIMENTO_THRESHOLD = 15000  # Limiar de detecção de movimento (quanto menor, mais sensível)
 AREA_MINIMA_CONTORNO = 5000  # Área mínima de contorno para considerar como movimento real
 FRAMES_APOS_MOVIMENTO = 5    # Número de frames para processar após detectar movimento
 INTERVALO_MINIMO_MOVIMENTO = 0.5  # Intervalo mínimo entre detecções de movimento (segundos)
+JANELA_POS_MOVIMENTO = 1.0        # Tempo após o movimento em que os FRAMES_APOS_MOVIMENTO são distribuídos (segundos)
+INTERVALO_AMOSTRAGEM_POS_MOVIMENTO = 0.15  # Intervalo mínimo entre frames enviados para faces (segundos)
+SUPRIMIR_FRAMES_DUPLICADOS = True  # Ignorar frames quase idênticos ao último enviado para faces
+LIMIAR_HASH_DUPLICADO = 4         # Distância de Hamming máxima (de 64 bits) para considerar frames duplicados
 
 # Configurações de reconhecimento facial
 FACE_SIMILARITY_THRESHOLD = 0.6  # Limiar de similaridade (quanto menor, mais restritivo)
 FACE_DETECTION_INTERVAL = 30     # Intervalo para detecção de faces (a cada quantos frames)
 INTERVALO_MINIMO_FACE = 0.3      # Intervalo mínimo entre processamentos de face (segundos)
-TEMPO_EXPIRACAO_FACE = 3.0       # Tempo para considerar uma face como "nova" novamente (segundos)
+TEMPO_EXPIRACAO_FACE = 3.0       # Tempo sem ver uma face para considerá-la "nova" novamente (segundos)
 MODELO_FACE = "hog"              # Modelo para detecção facial (hog ou cnn)
 NUM_JITTERS = 3                  # Número de vezes para amostrar a face durante o encoding
+AQUECER_MODELOS = True           # Executar detecção e encoding em um frame sintético antes da captura
+
+# Configurações de deduplicação de faces salvas
+DEDUPLICAR_SALVAMENTOS = True    # Salvar cada pessoa uma vez por aparição (janela TEMPO_EXPIRACAO_FACE)
+DISTANCIA_DEDUP_DESCONHECIDO = 0.5  # Distância máxima entre encodings para tratar desconhecidos como a mesma pessoa
+MARGEM_QUALIDADE_DEDUP = 0.1     # Melhora de qualidade necessária para salvar de novo dentro da janela
+
+# Configurações de agrupamento de faces desconhecidas
+AGRUPAR_DESCONHECIDOS = True     # Agrupar os encodings de desconhecidos em clusters persistidos
+DISTANCIA_CLUSTER_DESCONHECIDO = 0.5  # Distância máxima ao centróide para entrar em um cluster
+DISTANCIA_FUSAO_CLUSTERS = 0.4   # Clusters com centróides mais próximos que isto são fundidos
+DISPERSAO_DIVISAO_CLUSTER = 0.6  # Membro a esta distância do centróide leva a tentar dividir o cluster
+MEMBROS_POR_CLUSTER = 32         # Encodings recentes guardados por cluster (usados na divisão)
+MAX_CLUSTERS_DESCONHECIDOS = 10000  # Clusters mantidos (os vistos há mais tempo são descartados)
+INTERVALO_MANUTENCAO_CLUSTERS = 60.0  # Fusão, divisão e gravação em disco (segundos)
+ARQUIVO_CLUSTERS = "encodings/desconhecidos.npz"
+
+# Configurações do histórico de encodings (busca retroativa)
+REGISTRAR_ENCODINGS = True       # Guardar o encoding e o evento de cada face para buscas posteriores
+PASTA_HISTORICO = "encodings/historico"
+LINHAS_POR_BLOCO_BUSCA = 262144  # Encodings comparados por bloco na varredura (128 MB por bloco)
+LISTAS_INDICE_BUSCA = 1024       # Listas do índice invertido (k-means dos encodings)
+LISTAS_CONSULTADAS_BUSCA = 16    # Listas do índice mais próximas visitadas por consulta
+
+# Configurações do reconhecimento em lote (pastas de imagens)
+PROCESSOS_LOTE = 0               # Processos de reconhecimento (0 = número de CPUs)
+IMAGENS_POR_TAREFA_LOTE = 16     # Imagens enviadas de uma vez a cada processo
+EXTENSOES_IMAGEM_LOTE = (".jpg", ".jpeg", ".png", ".bmp")
+
+# Configurações da API HTTP de reconhecimento
+PASTA_GALERIA = "encodings"      # Encodings .pickle das identidades conhecidas (além de PESSOA_INFO)
+ENDERECO_API = "127.0.0.1"       # Endereço de escuta da API (apenas local por padrão)
+PORTA_API = 8090
+WORKERS_API = 2                  # Lotes processados em paralelo
+TAMANHO_LOTE_API = 8             # Imagens por lote
+ESPERA_LOTE_API = 0.01           # Tempo máximo que a primeira imagem aguarda o lote completar (segundos)
+MAX_PENDENTES_API = 64           # Requisições aguardando um lote (excedentes recebem 503)
+PRAZO_API = 5.0                  # Prazo padrão de uma requisição (segundos; excedido = 504)
+TAMANHO_MAXIMO_IMAGEM_API_MB = 10  # Corpo máximo de uma requisição (excedido = 413)
+
+# Configurações dos workers faciais remotos (encoding em outros processos ou hosts)
+WORKERS_FACIAIS = []             # Endereços "host:porta" dos workers (lista vazia = encoding apenas local)
+ENDERECO_WORKER = "127.0.0.1:7100"  # Escuta do processo worker (0.0.0.0:7100 para aceitar outros hosts)
+MAX_EM_VOO_WORKER = 4            # Pedidos aguardando resposta por worker
+TENTATIVAS_WORKER = 2            # Reenvios de um pedido a outro worker após a perda de um worker
+TIMEOUT_WORKER = 5.0             # Segundos sem resposta antes de considerar o worker perdido
+INTERVALO_RECONEXAO_WORKER = 5.0  # Segundos entre tentativas de reconectar um worker
+FALLBACK_LOCAL_WORKERS = True    # Calcular localmente quando nenhum worker tiver vaga
+QUALIDADE_JPEG_WORKER = 95       # Qualidade JPEG dos recortes de face enviados aos workers
+
+# Configurações de encoding em lote
+USAR_ENCODING_EM_LOTE = True       # Agrupar faces de vários frames em uma única chamada de encoding
+TAMANHO_MAXIMO_LOTE_ENCODING = 8   # Número máximo de faces por lote
+PRAZO_LOTE_ENCODING = 0.05         # Tempo máximo que uma face aguarda o lote completar (segundos)
+
+# Configurações de seleção da melhor face (best-shot)
+SELECAO_MELHOR_FACE = True         # Codificar apenas as melhores faces de cada janela após movimento
+FACES_POR_JANELA = 1               # Número de faces com maior qualidade codificadas por janela
+QUALIDADE_MINIMA_FACE = 0.35       # Pontuação mínima de qualidade (0-1) para considerar uma face
+TAMANHO_FACE_REFERENCIA = 160      # Lado da face (pixels no frame original) considerado tamanho ideal
+NITIDEZ_REFERENCIA = 100.0         # Variância do Laplaciano considerada nitidez ideal
+TEMPO_FECHAMENTO_JANELA = 1.0      # Tempo sem novos frames para encerrar a janela (segundos)
+PESOS_QUALIDADE_FACE = {           # Peso de cada critério na pontuação de qualidade
+    "tamanho": 1.0,
+    "nitidez": 1.0,
+    "brilho": 0.5,
+    "frontalidade": 1.0
+}
+
+# Configurações do controle de carga do processamento facial
+CONTROLE_CARGA_ATIVO = True        # Degradar o processamento facial quando a fila de faces acumula
+ESCALA_DETECCAO_FACE = 0.5         # Escala do frame para detecção facial (0.5 = metade da resolução)
+FILA_FACE_ALTA = 6                 # Tamanho da fila de faces que indica sobrecarga
+FILA_FACE_BAIXA = 1                # Tamanho da fila de faces que indica folga
+TEMPO_FRAME_FACE_ALTO = 0.3        # Tempo médio por frame que indica sobrecarga (segundos)
+TEMPO_FRAME_FACE_BAIXO = 0.1       # Tempo médio por frame que indica folga (segundos)
+INTERVALO_AJUSTE_CARGA = 2.0       # Tempo mínimo entre mudanças de nível (segundos)
+NIVEIS_DEGRADACAO = [              # Do processamento completo (nível 0) ao mais leve
+    {"num_jitters": NUM_JITTERS, "escala_deteccao": ESCALA_DETECCAO_FACE, "melhorar_imagem": True,
+     "passo_frames": 1, "somente_roi": False},
+    {"num_jitters": 1, "escala_deteccao": ESCALA_DETECCAO_FACE, "melhorar_imagem": True,
+     "passo_frames": 1, "somente_roi": False},
+    {"num_jitters": 1, "escala_deteccao": 0.35, "melhorar_imagem": True,
+     "passo_frames": 1, "somente_roi": False},
+    {"num_jitters": 1, "escala_deteccao": 0.35, "melhorar_imagem": False,
+     "passo_frames": 1, "somente_roi": False},
+    {"num_jitters": 1, "escala_deteccao": 0.35, "melhorar_imagem": False,
+     "passo_frames": 2, "somente_roi": False},
+    {"num_jitters": 1, "escala_deteccao": 0.35, "melhorar_imagem": False,
+     "passo_frames": 2, "somente_roi": True},
+]
 
 # Configurações de captura e processamento
 BUFFER_SIZE_CAPTURA = 10         # Tamanho do buffer de frames para captura
 TAXA_FPS_CAPTURA = 30            # Taxa de FPS alvo para captura
 TAXA_FPS_UI = 30                 # Taxa de FPS alvo para interface gráfica
 
+# Configurações da pré-visualização MJPEG (modo sem interface gráfica)
+ENDERECO_PREVIEW = "127.0.0.1"   # Endereço de escuta (apenas local por padrão)
+TAXA_FPS_PREVIEW = 2             # Frames por segundo enviados a cada cliente
+LARGURA_PREVIEW = 640            # Largura dos frames da pré-visualização
+QUALIDADE_JPEG_PREVIEW = 70      # Qualidade JPEG da pré-visualização (0-100)
+
+# Configurações do modo ocioso (sem movimento por um período)
+MODO_OCIOSO_ATIVO = True         # Reduzir captura e detecção de movimento quando a cena está parada
+TEMPO_PARA_OCIOSO = 30.0         # Tempo sem movimento para entrar no modo ocioso (segundos)
+TAXA_FPS_OCIOSO = 5              # Taxa de amostragem de movimento no modo ocioso
+ESCALA_MOVIMENTO_OCIOSO = 0.25   # Escala do frame para detecção de movimento no modo ocioso
+
 # Configurações de qualidade de imagem
 RESOLUCAO_CAPTURA = (1920, 1080)  # HD para melhor desempenho
 QUALIDADE_JPEG = 95               # Qualidade de salvamento (0-100)
 APLICAR_MELHORIA_IMAGEM = True    # Aplicar melhorias de imagem
 USAR_TONS_CINZA = True            # Usar tons de cinza para comparação facial
 
+# Configurações de gravação e reprodução de frames
+FORMATO_GRAVACAO = "jpeg"        # "bruto" (sem perdas e sem decodificação no replay, ~6 MB/frame em 1080p) ou "jpeg"
+QUALIDADE_JPEG_GRAVACAO = 90     # Qualidade JPEG da gravação (0-100)
+TAMANHO_FILA_GRAVACAO = 120      # Frames aguardando gravação (excedentes são descartados e contados)
+EXTENSAO_GRAVACAO = ".frames"    # Fontes com esta extensão são reproduzidas como gravação
+VELOCIDADE_REPLAY = 1.0          # 1.0 = tempo real, 2.0 = o dobro, 0 = o mais rápido possível
+
+# Configurações de clipes de eventos (buffer circular por câmera)
+GRAVAR_CLIPES = True             # Gravar clipes com os segundos antes e depois de movimentos e faces
+SEGUNDOS_ANTES_EVENTO = 5.0      # Frames mantidos em memória para o início do clipe
+SEGUNDOS_APOS_EVENTO = 10.0      # Gravação após o último disparo (novos disparos estendem o clipe)
+DURACAO_MAXIMA_CLIPE = 60.0      # Duração máxima de um clipe (segundos)
+FPS_MAXIMO_CLIPE = 10            # Frames por segundo guardados no buffer (0 = todos)
+QUALIDADE_JPEG_CLIPE = 80        # Qualidade JPEG dos frames do buffer (0-100)
+MEMORIA_MAXIMA_CLIPES_MB = 64    # Limite de memória do buffer de cada câmera
+TAMANHO_FILA_CLIPES = 10         # Frames aguardando compressão (excedentes são descartados e contados)
+PASTA_CLIPES = "capturas/clipes"
+
+# Configurações do armazenamento das imagens salvas
+ARMAZENAMENTO_IMAGENS = "arquivos"  # "arquivos" (um JPEG por imagem) ou "segmentos" (imagens agrupadas em segmentos)
+PASTA_SEGMENTOS = "capturas/segmentos"
+TAMANHO_SEGMENTO_MB = 256        # Tamanho a partir do qual um novo segmento é aberto
+DIAS_RETENCAO_IMAGENS = 0        # Imagens mais antigas são descartadas na compactação (0 = manter)
+OCUPACAO_MINIMA_SEGMENTO = 0.5   # Segmentos fechados com menos dados válidos que isto são reescritos
+
+# Configurações de log
+NIVEL_LOG = "INFO"               # Nível mínimo: "DEBUG", "INFO" ou "ERROR"
+FORMATO_LOG = "texto"            # Terminal: "texto" ([CATEGORIA] [HH:MM:SS] mensagem) ou "json" (JSON Lines)
+ARQUIVO_LOG_JSON = None          # Arquivo JSON Lines com todas as mensagens (None = não gravar)
+LIMITES_LOG_POR_SEGUNDO = {"MOVIMENTO": 2, "FACE": 20}  # Mensagens por segundo de cada categoria (0 = sem limite)
+TAMANHO_FILA_LOG = 10000         # Mensagens aguardando escrita (excedentes são descartados e contados)
+
+# Configurações de métricas
+LIMITES_HISTOGRAMA_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]  # Faixas de latência (ms)
+ENDERECO_METRICAS = "127.0.0.1"  # Endereço de escuta do endpoint Prometheus (apenas local por padrão)
+
+# Configurações do barramento de eventos (assinantes externos)
+ENDERECO_EVENTOS = "127.0.0.1:7070"  # "unix:/caminho/do/socket", "host:porta" ou "porta"
+LIMITE_BUFFER_ASSINANTE_KB = 256  # Dados pendentes por assinante antes de desconectá-lo por lentidão
+TAMANHO_FILA_EVENTOS = 10000     # Eventos aguardando envio (excedentes são descartados e contados)
+
+# Configurações de diagnóstico (rastreamento e perfil sob demanda)
+RASTREAMENTO_ATIVO = False       # Registrar spans das chamadas pesadas (exportáveis como trace do Chrome)
+MAX_SPANS_RASTREAMENTO = 20000   # Spans mantidos em memória (os mais antigos são descartados)
+QUADROS_TRACE = 30               # Frames incluídos no trace exportado
+DURACAO_PERFIL = 10.0            # Duração padrão da captura de perfil com cProfile (segundos)
+PASTA_DIAGNOSTICO = "capturas/diagnostico"  # Destino dos traces e perfis
+
 # Configurações de debug
 MODO_DEBUG = True
 MAX_FRAMES_SEM_DETECCAO = 100
 
-# Encoding real da pessoa para comparação
-PESSOA_CONHECIDA_ENCODING = np.array([
-    -0.05037004500627518, 0.08081860095262527, 0.013230549171566963, -0.058972179889678955,
-    0.031775400042533875, -0.04935765266418457, 0.045750122517347336, -0.10653585940599442,
-    0.1998727023601532, -0.04209068417549133, 0.11739099025726318, 0.05334269255399704,
-    -0.23903197050094604, -0.014060728251934052, 0.03702852874994278, 0.017634190618991852,
-    -0.05829431861639023, -0.10795681923627853, -0.17121778428554535, -0.07984332740306854,
-    -0.019725970923900604, 0.0061602843925356865, 0.011421307921409607, 0.10115454345941544,
-    -0.14343732595443726, -0.22639824450016022, -0.06681777536869049, -0.1025376170873642,
-    0.008905860595405102, -0.13407540321350098, 0.06989164650440216, 0.002723999321460724,
-    -0.1294497847557068, 0.010295376181602478, -0.06715257465839386, 0.03900441154837608,
-    -0.11792229115962982, -0.08725777268409729, 0.259025514125824, 0.07957687228918076,
-    -0.17149513959884644, 0.0065041184425354, -0.04273233190178871, 0.33151888847351074,
-    0.17277418076992035, -0.08130183070898056, 0.04827491194009781, -0.07910497486591339,
-    0.15448616445064545, -0.2834199070930481, 0.041074998676776886, 0.15529049932956696,
-    0.1031646654009819, 0.04282759130001068, 0.14144113659858704, -0.13453440368175507,
-    0.0271356999874115, 0.09792690724134445, -0.27022039890289307, 0.1485123336315155,
-    0.04481695592403412, -0.04401165246963501, -0.08844450861215591, -0.0836171805858612,
-    0.10269097983837128, 0.14938758313655853, -0.11636527627706528, -0.08060094714164734,
-    0.10706610977649689, -0.22144050896167755, 0.0020930320024490356, 0.1379607766866684,
-    -0.05111892521381378, -0.27859172224998474, -0.18193170428276062, 0.048309117555618286,
-    0.37621551752090454, 0.23665854334831238, -0.1806277632713318, 0.01589256525039673,
-    -0.13478127121925354, -0.04998968169093132, 0.1227211207151413, 0.005320116877555847,
-    -0.08633564412593842, 0.0067610591650009155, -0.07683606445789337, 0.06881460547447205,
-    0.1791447401046753, 0.015951231122016907, -0.04933106154203415, 0.2073071300983429,
-    0.04152250289916992, -0.03778393566608429, -0.00926598347723484, -0.0075337886810302734,
-    -0.12055684626102448, 0.028685832396149635, -0.12823981046676636, 0.008179515600204468,
-    0.03266230225563049, -0.11627024412155151, 0.0633450448513031, -0.02620960772037506,
-    -0.16261953115463257, 0.2309507131576538, 0.11812739074230194, -0.04646923020482063,
-    0.0345793291926384, 0.047732606530189514, -0.18671737611293793, -0.02541157603263855,
-    0.20789499580860138, -0.2948143482208252, 0.18943622708320618, 0.13059723377227783,
-    0.005113288294523954, 0.11006122827529907, 0.023252852261066437, 0.08387812972068787,
-    -0.02853265404701233, -0.01336362212896347, -0.08350375294685364, -0.023510165512561798,
-    0.01866171881556511, 0.03550122678279877, 0.06424954533576965, -0.006630636751651764
-], dtype=np.float64)
+# Encoding real da pessoa para comparação (128 valores em arquivo .npy, carregado apenas quando usado)
+ARQUIVO_ENCODING_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pessoa_conhecida.npy")
+ARQUIVO_ENCODING_PESSOA = "encodings/eduardo_nascimento.pickle"  # Encoding salvo da pessoa de referência
 
 # Informações da pessoa para exibição
 PESSOA_INFO = {
@@ -82,4 +213,4 @@ PESSOA_INFO = {
 COR_VERDE = (0, 255, 0)
 COR_VERMELHO = (0, 0, 255)
 COR_AZUL = (255, 0, 0)
-COR_AMARELO = (0, 255, 255) 
\ No newline at end of file
+COR_AMARELO = (0, 255, 255)
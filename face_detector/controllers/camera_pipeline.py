@@ -0,0 +1,457 @@
+"""
+Pipeline de captura e detecção de movimento de uma câmera.
+Cada câmera tem sua própria captura e detecção de movimento; os frames após
+movimento são enviados ao motor facial compartilhado entre as câmeras.
+"""
+import time
+import threading
+from queue import Queue, Full
+from datetime import datetime
+
+from face_detector.config.settings import (
+    MOVIMENTO_THRESHOLD, AREA_MINIMA_CONTORNO, FRAMES_APOS_MOVIMENTO,
+    COR_VERDE, COR_AMARELO, INTERVALO_MINIMO_MOVIMENTO, INTERVALO_MINIMO_FACE,
+    BUFFER_SIZE_CAPTURA, TAXA_FPS_CAPTURA, JANELA_POS_MOVIMENTO, INTERVALO_AMOSTRAGEM_POS_MOVIMENTO,
+    SUPRIMIR_FRAMES_DUPLICADOS, LIMIAR_HASH_DUPLICADO,
+    MODO_OCIOSO_ATIVO, TEMPO_PARA_OCIOSO, TAXA_FPS_OCIOSO, ESCALA_MOVIMENTO_OCIOSO, GRAVAR_CLIPES
+)
+from face_detector.services.motion_detector import MotionDetector
+from face_detector.services.video_capture import VideoCapture
+from face_detector.services.frame_recorder import FrameRecorder, ReplaySource, eh_gravacao
+from face_detector.services.event_clips import GravadorClipes
+from face_detector.services.event_bus import barramento
+from face_detector.utils.logger import log_info, log_movimento, log_error
+from face_detector.utils.metricas import registro
+from face_detector.utils.rastreamento import rastreador
+from face_detector.utils.perfil import perfil
+from face_detector.utils.image_utils import salvar_imagem, calcular_hash_perceptual, distancia_hamming
+from face_detector.models.anotacoes import Anotacoes
+
+class CameraPipeline:
+    """Captura e detecção de movimento de uma câmera, alimentando o motor facial compartilhado"""
+    
+    def __init__(self, camera_id, source, motor_faces, prefixo_arquivo="", ao_alterar_modo_ocioso=None,
+                 exibir=True, taxa_fps=None, gravacao=None, velocidade_replay=None, inicio_processo=None,
+                 clipes=None):
+        """
+        Inicializa o pipeline da câmera
+        
+        Args:
+            camera_id: Identificador da câmera (usado em logs, estatísticas e arquivos)
+            source: URL RTSP, índice da câmera local, arquivo de vídeo ou gravação de frames (EXTENSAO_GRAVACAO)
+            motor_faces: FaceEngine compartilhado que recebe os frames após movimento
+            prefixo_arquivo: Prefixo dos arquivos salvos por esta câmera
+            ao_alterar_modo_ocioso: Função chamada antes de entrar ou sair do modo ocioso
+            exibir: False no modo sem interface gráfica (sem anotações de tela nem fila de exibição)
+            taxa_fps: Taxa máxima de captura (None = TAXA_FPS_CAPTURA, 0 = sem limite)
+            gravacao: Arquivo onde gravar os frames que chegam à detecção de movimento (None = não gravar)
+            velocidade_replay: Velocidade de reprodução quando a fonte é uma gravação (None = VELOCIDADE_REPLAY)
+            inicio_processo: Referência dos tempos até o primeiro frame e a primeira decisão (None = agora)
+            clipes: Gravar clipes de eventos com os segundos antes e depois de movimentos e faces
+                    (None = GRAVAR_CLIPES)
+        """
+        self.camera_id = camera_id
+        self.source = source
+        self.motor_faces = motor_faces
+        self.prefixo_arquivo = prefixo_arquivo
+        self.ao_alterar_modo_ocioso = ao_alterar_modo_ocioso
+        self.exibir = exibir
+        self.taxa_fps = taxa_fps if taxa_fps is not None else TAXA_FPS_CAPTURA
+        self.replay = eh_gravacao(source)
+        self.velocidade_replay = velocidade_replay
+        self.gravador = FrameRecorder(gravacao) if gravacao else None
+        self.motion_detector = MotionDetector(
+            threshold=MOVIMENTO_THRESHOLD,
+            area_minima=AREA_MINIMA_CONTORNO
+        )
+        self.video_capture = None
+        
+        # Variáveis para controle de processamento
+        self.frames_restantes_apos_movimento = 0
+        self.janela_movimento_id = 0  # Identifica a janela de aparição iniciada por cada movimento
+        self.fim_janela_pos_movimento = 0  # Timestamp limite para amostrar frames após o movimento
+        self.frames_sem_deteccao = 0
+        self.ultimo_frame = None
+        self.ultima_face_timestamp = 0
+        self.modo_ocioso = False  # Captura e detecção de movimento reduzidas enquanto nada se move
+        self.running = False
+        
+        # Métricas da câmera (contadores, filas e latências por etapa)
+        self.metricas = registro.camera(camera_id)
+        clipes = clipes if clipes is not None else GRAVAR_CLIPES
+        self.clipes = GravadorClipes(camera_id, prefixo_arquivo, metricas=self.metricas) if clipes else None
+        
+        # Filas para comunicação entre threads
+        self.capture_queue = Queue(maxsize=10)  # Frames capturados
+        self.result_queue = Queue(maxsize=10)   # Frames processados para exibição
+        
+        # Threads
+        self.capture_thread = None
+        self.motion_thread = None
+        
+        self.metricas.medidor('fila_captura', self.capture_queue.qsize)
+        self.metricas.medidor('fila_resultado', self.result_queue.qsize)
+        self.tempo_inicio = time.time()
+        
+        # Tempos de inicialização: do início do processo ao primeiro frame e à primeira identificação
+        self.inicio_processo = inicio_processo if inicio_processo is not None else self.tempo_inicio
+        self.tempo_primeiro_frame = None
+        self.tempo_primeira_decisao = None
+    
+    def iniciar(self):
+        """Inicia a captura de vídeo e as threads de captura e detecção de movimento"""
+        # Inicializar captura de vídeo assíncrona com buffer menor para menor latência
+        # (gravações são reproduzidas com os intervalos e timestamps originais)
+        if self.replay:
+            self.video_capture = ReplaySource(self.source, velocidade=self.velocidade_replay, metricas=self.metricas)
+        else:
+            self.video_capture = VideoCapture(self.source, buffer_size=BUFFER_SIZE_CAPTURA, metricas=self.metricas,
+                                              taxa_fps=self.taxa_fps)
+        if not self.video_capture.start():
+            log_error(f"[{self.camera_id}] Falha ao iniciar captura de vídeo. Verifique a conexão com a câmera.")
+            return False
+        self.metricas.medidor('frames_descartados_captura', self.video_capture.get_drop_count)
+        if self.gravador is not None:
+            self.gravador.iniciar()
+        if self.clipes is not None:
+            self.clipes.iniciar()
+        
+        self.running = True
+        
+        # Thread de captura
+        self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.capture_thread.start()
+        
+        # Thread de detecção de movimento
+        self.motion_thread = threading.Thread(target=self._motion_detection_loop, daemon=True)
+        self.motion_thread.start()
+        
+        return True
+    
+    def _capture_loop(self):
+        """Thread dedicada para captura de frames"""
+        log_info(f"[{self.camera_id}] Thread de captura iniciada")
+        
+        last_frame_time = time.time()
+        frame_interval = 1.0 / self.taxa_fps if self.taxa_fps > 0 else 0.0  # Limitar a taxa de FPS configurada
+        intervalo_ocioso = 1.0 / TAXA_FPS_OCIOSO
+        if self.replay:
+            frame_interval = intervalo_ocioso = 0.0  # A reprodução já segue o ritmo gravado
+        
+        while self.running:
+            perfil.ponto()
+            try:
+                current_time = time.time()
+                elapsed = current_time - last_frame_time
+                
+                # Limitar taxa de captura para não sobrecarregar o sistema
+                if elapsed < (intervalo_ocioso if self.modo_ocioso else frame_interval):
+                    time.sleep(0.001)  # Pequena pausa
+                    continue
+                
+                # Ler o próximo frame
+                ret, frame = self.video_capture.read()
+                
+                if not ret or frame is None:
+                    if not self.video_capture.arquivo:
+                        time.sleep(0.1)  # Em arquivos, a leitura já aguardou o próximo frame
+                    continue
+                
+                # Atualizar timestamp
+                last_frame_time = current_time
+                timestamp = self.video_capture.ultimo_timestamp if self.replay else current_time
+                
+                # Guardar o frame para referência (os pixels não são alterados no pipeline)
+                self.ultimo_frame = frame
+                
+                # Incrementar contador de estatísticas
+                self.metricas.incrementar('frames_capturados')
+                if self.tempo_primeiro_frame is None:
+                    self.tempo_primeiro_frame = self._registrar_marco('tempo_primeiro_frame_segundos', 'Primeiro frame')
+                
+                # Enviar para processamento se a fila não estiver cheia (arquivos aguardam espaço)
+                if self.video_capture.arquivo:
+                    while self.running:
+                        try:
+                            self.capture_queue.put((frame, timestamp), timeout=0.1)
+                            break
+                        except Full:
+                            continue
+                elif not self.capture_queue.full():
+                    self.capture_queue.put((frame, timestamp))
+            
+            except Exception as e:
+                log_error(f"[{self.camera_id}] Erro na thread de captura: {str(e)}")
+                time.sleep(0.1)
+    
+    def _enviar_para_faces(self, frame, timestamp, movimento_area, regiao):
+        """Envia um frame da janela atual ao motor facial compartilhado"""
+        item = (frame, timestamp, movimento_area, self.janela_movimento_id, regiao)
+        self.motor_faces.submeter(self.camera_id, item)
+    
+    def _motion_detection_loop(self):
+        """Thread dedicada para detecção de movimento"""
+        log_info(f"[{self.camera_id}] Thread de detecção de movimento iniciada")
+        
+        frame_anterior = None
+        movimento_count = 0
+        ultimo_movimento = 0  # Timestamp do último movimento detectado
+        ultimo_envio_face = 0  # Timestamp do último frame enviado para processamento facial
+        ultimo_hash_face = None  # Hash perceptual do último frame enviado para processamento facial
+        regiao_movimento = None  # Região do movimento que iniciou a janela atual
+        contador_passo = 0  # Frames elegíveis desde o último envio (passo definido pelo controle de carga)
+        ultima_atividade = time.time()  # Último movimento (para entrar no modo ocioso)
+        
+        while self.running:
+            perfil.ponto()
+            try:
+                # Obter próximo frame para processamento de movimento
+                if self.capture_queue.empty():
+                    time.sleep(0.01)  # Pequena pausa para não consumir CPU
+                    continue
+                
+                frame, timestamp = self.capture_queue.get()
+                rastreador.definir_quadro(self.camera_id, timestamp)
+                if self.gravador is not None:
+                    self.gravador.adicionar(frame, timestamp)
+                if self.clipes is not None:
+                    self.clipes.adicionar(frame, timestamp)
+                
+                # Se for o primeiro frame, inicializar frame_anterior
+                if frame_anterior is None:
+                    frame_anterior = frame
+                    continue
+                
+                # Verificar se já passou tempo suficiente desde a última detecção de movimento
+                tempo_desde_ultimo_movimento = timestamp - ultimo_movimento
+                
+                # Detectar movimento (em resolução reduzida no modo ocioso)
+                escala_movimento = ESCALA_MOVIMENTO_OCIOSO if self.modo_ocioso else 1.0
+                inicio_movimento = time.time()
+                with rastreador.span('detectar_movimento'):
+                    movimento_detectado, movimento_area, anotacoes_movimento = self.motion_detector.detectar(
+                        frame, frame_anterior, escala_movimento)
+                self.metricas.observar('movimento', time.time() - inicio_movimento)
+                
+                # Atualizar frame anterior para próxima detecção de movimento
+                # (as anotações ficam à parte, então o frame não precisa de cópia)
+                frame_anterior = frame
+                
+                # Retomar a taxa completa assim que houver movimento; entrar no modo ocioso após o período sem movimento
+                if movimento_detectado:
+                    ultima_atividade = timestamp
+                    if self.modo_ocioso:
+                        self._alterar_modo_ocioso(False)
+                elif (MODO_OCIOSO_ATIVO and not self.modo_ocioso and self.frames_restantes_apos_movimento == 0
+                        and timestamp - ultima_atividade >= TEMPO_PARA_OCIOSO):
+                    self._alterar_modo_ocioso(True)
+                
+                # Se detectou movimento e passou tempo suficiente desde a última detecção
+                if movimento_detectado and (tempo_desde_ultimo_movimento >= INTERVALO_MINIMO_MOVIMENTO or self.frames_restantes_apos_movimento == 0):
+                    self.frames_sem_deteccao = 0  # Resetar contador de frames sem detecção
+                    self.metricas.incrementar('movimento_detectado')
+                    ultimo_movimento = timestamp  # Atualizar timestamp do último movimento
+                    
+                    # Limitar logs de movimento para reduzir poluição no terminal
+                    movimento_count += 1
+                    if movimento_count % 5 == 0:  # Logar apenas a cada 5 detecções
+                        log_movimento(f"[{self.camera_id}] Movimento detectado (área: {movimento_area:.0f}) - Limiar: {MOVIMENTO_THRESHOLD}")
+                    
+                    # Salvar frame com movimento
+                    timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    movimento_filename = f"capturas/movimento/movimento_{self.prefixo_arquivo}{movimento_area:.0f}_{timestamp_str}.jpg"
+                    salvar_imagem(anotacoes_movimento.renderizar(frame), movimento_filename)
+                    if self.clipes is not None:
+                        self.clipes.disparar(timestamp, 'movimento')
+                    
+                    # Distribuir os frames após movimento ao longo da janela configurada
+                    self.frames_restantes_apos_movimento = FRAMES_APOS_MOVIMENTO
+                    self.fim_janela_pos_movimento = timestamp + JANELA_POS_MOVIMENTO
+                    self.janela_movimento_id += 1
+                    regiao_movimento = self.motion_detector.ultima_regiao
+                    barramento.publicar('movimento', camera=self.camera_id, janela=self.janela_movimento_id,
+                                        area=round(float(movimento_area)),
+                                        regiao=[int(v) for v in regiao_movimento] if regiao_movimento else None,
+                                        ts_frame=timestamp, imagem=movimento_filename)
+                    
+                    # Enviar para processamento facial
+                    ultimo_envio_face = timestamp
+                    ultimo_hash_face = calcular_hash_perceptual(frame, regiao_movimento) if SUPRIMIR_FRAMES_DUPLICADOS else None
+                    contador_passo = 0
+                    self._enviar_para_faces(frame, timestamp, movimento_area, regiao_movimento)
+                    continue
+                
+                # Encerrar a janela se o tempo acabou antes de gastar todos os frames
+                if self.frames_restantes_apos_movimento > 0 and timestamp > self.fim_janela_pos_movimento:
+                    self.frames_restantes_apos_movimento = 0
+                
+                enviar_face = False
+                if (self.frames_restantes_apos_movimento > 0 and
+                        timestamp - ultimo_envio_face >= INTERVALO_AMOSTRAGEM_POS_MOVIMENTO):
+                    enviar_face = True
+                    
+                    # Sob carga, enviar apenas um a cada N frames elegíveis
+                    contador_passo += 1
+                    if contador_passo < self.motor_faces.get_passo_frames():
+                        enviar_face = False
+                    
+                    # Ignorar frames quase idênticos ao último enviado (mesmo trabalho de HOG e encoding)
+                    if enviar_face and SUPRIMIR_FRAMES_DUPLICADOS:
+                        hash_frame = calcular_hash_perceptual(frame, regiao_movimento)
+                        if distancia_hamming(hash_frame, ultimo_hash_face) <= LIMIAR_HASH_DUPLICADO:
+                            enviar_face = False
+                            self.metricas.incrementar('frames_duplicados')
+                        else:
+                            ultimo_hash_face = hash_frame
+                
+                if enviar_face:
+                    # Processar frames restantes após movimento
+                    self.frames_restantes_apos_movimento -= 1
+                    ultimo_envio_face = timestamp
+                    contador_passo = 0
+                    
+                    # Enviar para processamento facial
+                    self._enviar_para_faces(frame, timestamp, movimento_area if movimento_detectado else 0,
+                                            regiao_movimento)
+                else:
+                    if self.frames_restantes_apos_movimento == 0:
+                        self.frames_sem_deteccao += 1
+                    
+                    # Sem atualização de tela no modo ocioso ou sem interface gráfica
+                    if self.modo_ocioso or not self.exibir:
+                        continue
+                    
+                    # Enviar para exibição direta (sem processamento facial)
+                    if not self.result_queue.full():
+                        self.result_queue.put((frame, self._anotacoes_tela(), timestamp))
+            
+            except Exception as e:
+                log_error(f"[{self.camera_id}] Erro na thread de detecção de movimento: {str(e)}")
+                time.sleep(0.1)
+    
+    def _registrar_marco(self, nome, descricao):
+        """Registra no medidor e no log o tempo desde o início do processo até um marco da inicialização"""
+        decorrido = time.time() - self.inicio_processo
+        self.metricas.medidor(nome).definir(decorrido)
+        log_info(f"[{self.camera_id}] {descricao} {decorrido:.2f}s após o início")
+        return decorrido
+    
+    def _alterar_modo_ocioso(self, ocioso):
+        """Entra ou sai do modo ocioso"""
+        if self.ao_alterar_modo_ocioso is not None:
+            self.ao_alterar_modo_ocioso()
+        self.modo_ocioso = ocioso
+        self.video_capture.set_modo_ocioso(ocioso)
+        if ocioso:
+            log_info(f"[{self.camera_id}] Sem movimento há {TEMPO_PARA_OCIOSO:.0f}s. Modo ocioso: "
+                     f"{TAXA_FPS_OCIOSO} FPS, movimento em escala {ESCALA_MOVIMENTO_OCIOSO}")
+        else:
+            log_info(f"[{self.camera_id}] Movimento detectado. Saindo do modo ocioso (taxa completa)")
+    
+    def _anotacoes_tela(self):
+        """Cria as anotações básicas de exibição (informações de tela e FPS)"""
+        anotacoes = Anotacoes()
+        anotacoes.adicionar_info_tela()
+        fps = self.video_capture.get_fps()
+        anotacoes.adicionar_texto(f"FPS: {fps:.1f}", (10, 60), 0.6, COR_VERDE, 2)
+        return anotacoes
+    
+    def concluir_frame_facial(self, frame, anotacoes, face_encontrada, faces_reconhecidas, timestamp,
+                              movimento_area, decisao=False):
+        """
+        Finaliza um frame desta câmera vindo do motor facial e envia para exibição
+        
+        Args:
+            frame: Frame processado (apenas leitura)
+            anotacoes: Anotações do processamento facial (desenhadas somente na exibição)
+            decisao: True quando o frame traz a decisão de uma janela de aparição
+                     (já contabilizado como processado ao ser avaliado)
+        """
+        try:
+            # Se encontrou face, atualizar timestamp
+            if face_encontrada:
+                # Só atualizar o timestamp se passou tempo suficiente ou se é uma nova detecção
+                if timestamp - self.ultima_face_timestamp >= INTERVALO_MINIMO_FACE:
+                    self.ultima_face_timestamp = timestamp
+                
+                if not decisao:
+                    self.metricas.incrementar('faces_detectadas')
+                
+                # Estender (ou abrir) o clipe do evento enquanto houver faces
+                if self.clipes is not None:
+                    self.clipes.disparar(timestamp, 'face')
+            
+            # Com seleção da melhor face, só há encoding nas decisões de janela
+            if decisao or not self.motor_faces.selecao_melhor_face:
+                self.metricas.incrementar('faces_reconhecidas', faces_reconhecidas)
+                # Da captura do frame até a identificação das faces
+                self.metricas.observar('ponta_a_ponta', time.time() - timestamp)
+                if face_encontrada and self.tempo_primeira_decisao is None:
+                    self.tempo_primeira_decisao = self._registrar_marco('tempo_primeira_decisao_segundos',
+                                                                        'Primeira decisão facial')
+            
+            # Incrementar contador de frames processados
+            if not decisao:
+                self.metricas.incrementar('frames_processados')
+            
+            # Sem interface gráfica não há anotações de tela nem exibição
+            if not self.exibir:
+                return
+            
+            # Adicionar informações de tela, FPS e movimento
+            anotacoes.estender(self._anotacoes_tela())
+            anotacoes.adicionar_texto(f"Movimento: {movimento_area}", (10, 90), 0.6, COR_AMARELO, 2)
+            
+            # Enviar frame processado para exibição
+            if not self.result_queue.full():
+                self.result_queue.put((frame, anotacoes, timestamp))
+        
+        except Exception as e:
+            log_error(f"[{self.camera_id}] Erro ao concluir processamento facial: {str(e)}")
+    
+    def obter_frame_preview(self):
+        """Retorna o último frame capturado, sem anotações (pré-visualização sem interface gráfica)"""
+        return self.ultimo_frame
+    
+    def obter_frame_exibicao(self):
+        """
+        Retorna o frame mais recente para exibição, já com as anotações desenhadas
+        (None se não houver ou no modo ocioso)
+        """
+        # Verificar se há resultados processados para exibir (apenas o mais recente é desenhado)
+        resultado = None
+        while not self.result_queue.empty():
+            resultado = self.result_queue.get()
+        
+        if resultado is not None:
+            frame, anotacoes, _ = resultado
+            return anotacoes.renderizar(frame)
+        
+        # Se não houver frame processado, usar o último frame com informações básicas
+        # (no modo ocioso a tela não é atualizada)
+        if self.ultimo_frame is not None and not self.modo_ocioso:
+            return self._anotacoes_tela().renderizar(self.ultimo_frame)
+        
+        return None
+    
+    def fonte_esgotada(self):
+        """True quando a fonte é um arquivo lido até o fim e os frames capturados já foram consumidos"""
+        return (self.video_capture is not None and self.video_capture.fonte_esgotada
+                and self.video_capture.get_queue_size() == 0 and self.capture_queue.empty())
+    
+    def finalizar(self):
+        """Para as threads e a captura de vídeo da câmera"""
+        self.running = False
+        
+        for thread in (self.capture_thread, self.motion_thread):
+            if thread is not None:
+                thread.join(timeout=1.0)
+        
+        if self.video_capture is not None:
+            self.video_capture.stop()
+        
+        if self.gravador is not None:
+            self.gravador.finalizar()
+        
+        if self.clipes is not None:
+            self.clipes.finalizar()
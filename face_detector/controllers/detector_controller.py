@@ -1,36 +1,36 @@
 """
 Controlador principal para detecção de faces e movimento.
 Implementa processamento assíncrono separando captura e processamento.
+Supervisiona uma ou várias câmeras que compartilham um único motor facial.
 """
+import os
 import cv2
 import time
 import threading
-import queue
-from queue import Queue
-from datetime import datetime
-import numpy as np
-import concurrent.futures
 import signal
-import os
 
 from face_detector.config.settings import (
-    RTSP_URL, PESSOA_CONHECIDA_ENCODING, PESSOA_INFO,
-    MOVIMENTO_THRESHOLD, AREA_MINIMA_CONTORNO, FRAMES_APOS_MOVIMENTO,
-    MAX_FRAMES_SEM_DETECCAO, MODO_DEBUG, COR_VERDE, COR_AMARELO,
-    INTERVALO_MINIMO_MOVIMENTO, INTERVALO_MINIMO_FACE, TEMPO_EXPIRACAO_FACE,
-    BUFFER_SIZE_CAPTURA, TAXA_FPS_CAPTURA, TAXA_FPS_UI
+    RTSP_URL, CAMERAS, PESSOA_INFO, FRAMES_APOS_MOVIMENTO, MODO_DEBUG, TAXA_FPS_UI, COR_AMARELO, EXTENSAO_GRAVACAO,
+    AQUECER_MODELOS
 )
-from face_detector.services.face_detector import FaceDetector
-from face_detector.services.motion_detector import MotionDetector
-from face_detector.services.video_capture import VideoCapture
-from face_detector.utils.logger import log_info, log_debug, log_movimento, log_face, log_captura, log_error
+from face_detector.controllers.camera_pipeline import CameraPipeline
+from face_detector.services.face_engine import FaceEngine
+from face_detector.services.preview_server import PreviewServer
+from face_detector.services.metrics_server import MetricsServer
+from face_detector.services.event_bus import barramento
+from face_detector.utils.metricas import registro, ETAPAS_LATENCIA
+from face_detector.utils.rastreamento import rastreador
+from face_detector.utils.perfil import perfil
+from face_detector.utils.logger import log_info, log_error
 from face_detector.utils.file_utils import criar_estrutura_pastas, carregar_encoding_teste
-from face_detector.utils.image_utils import adicionar_info_tela, salvar_imagem
+from face_detector.utils.image_utils import montar_mosaico
 
 class DetectorController:
     """Controlador principal para detecção de faces e movimento com processamento paralelo"""
     
-    def __init__(self, rtsp_url=None, camera_id=0, num_workers=4):
+    def __init__(self, rtsp_url=None, camera_id=0, num_workers=4, cameras=None, headless=False,
+                 preview_porta=None, metricas_porta=None, rastreamento=False, pasta_gravacao=None,
+                 velocidade_replay=None, inicio=None, eventos=None, workers_faciais=None):
         """
         Inicializa o controlador com a fonte de vídeo especificada
         
@@ -38,7 +38,19 @@ class DetectorController:
             rtsp_url: URL RTSP para conexão com câmera IP
             camera_id: ID da câmera local (0 para webcam padrão)
             num_workers: Número de workers para processamento paralelo
+            cameras: Lista de câmeras {"id": ..., "fonte": ...} para o modo multicâmera
+                     (None = CAMERAS das configurações ou a fonte única acima)
+            headless: Executar sem interface gráfica (sem janela, anotações de tela nem fila de exibição)
+            preview_porta: Porta local da pré-visualização MJPEG no modo sem interface (None = desativada)
+            metricas_porta: Porta local do endpoint de métricas Prometheus (None = desativado)
+            rastreamento: Registrar spans das chamadas pesadas para exportação como trace do Chrome
+            pasta_gravacao: Pasta onde gravar os frames de cada câmera para reprodução posterior (None = não gravar)
+            velocidade_replay: Velocidade de reprodução das fontes que são gravações (None = VELOCIDADE_REPLAY)
+            inicio: Instante de início do processo, referência dos tempos de inicialização (None = agora)
+            eventos: Endereço do barramento de eventos para assinantes externos (None = desativado)
+            workers_faciais: Endereços dos workers remotos de encoding (None = WORKERS_FACIAIS)
         """
+        self.inicio = inicio if inicio is not None else time.time()
         log_info("Inicializando sistema de detecção facial com processamento paralelo...")
         
         # Criar estrutura de pastas
@@ -47,294 +59,201 @@ class DetectorController:
         # Carregar encoding da pessoa conhecida
         self.pessoa_conhecida_encoding = carregar_encoding_teste()
         
-        # Fonte de vídeo (RTSP ou câmera)
-        self.rtsp_url = rtsp_url if rtsp_url else RTSP_URL
-        self.camera_id = camera_id
-        self.source = self.rtsp_url if camera_id is None else camera_id
+        # Fontes de vídeo: lista de câmeras ou fonte única (RTSP ou câmera local)
+        if cameras is None:
+            cameras = CAMERAS
+        if not cameras:
+            self.rtsp_url = rtsp_url if rtsp_url else RTSP_URL
+            self.camera_id = camera_id
+            cameras = [{"id": "cam0", "fonte": self.rtsp_url if camera_id is None else camera_id}]
+        self.cameras = cameras
         
         # Número de workers para processamento paralelo
         self.num_workers = num_workers
         
-        # Inicializar serviços
-        self.face_detector = FaceDetector(max_workers=num_workers)
-        self.motion_detector = MotionDetector(
-            threshold=MOVIMENTO_THRESHOLD,
-            area_minima=AREA_MINIMA_CONTORNO
-        )
-        
-        # Variáveis para controle de processamento
-        self.frames_restantes_apos_movimento = 0
-        self.frames_sem_deteccao = 0
-        self.ultimo_frame = None
+        # Modo sem interface gráfica e pré-visualização opcional
+        self.headless = headless
+        self.preview_porta = preview_porta
+        self.preview = None
+        self.metricas_porta = metricas_porta
+        self.servidor_metricas = None
+        self.endereco_eventos = eventos
+        if rastreamento:
+            rastreador.ativo = True
+        
+        # Motor facial único (modelos, pools de threads e lote de encoding compartilhados)
+        self.motor_faces = FaceEngine(self.pessoa_conhecida_encoding, PESSOA_INFO, num_workers=num_workers,
+                                      exibir=not headless, workers_faciais=workers_faciais)
+        
+        # Um pipeline de captura e movimento por câmera
+        self.pipelines = []
+        inicio_gravacao = time.strftime("%Y%m%d_%H%M%S")
+        for camera in cameras:
+            gravacao = camera.get("gravacao")
+            if gravacao is None and pasta_gravacao:
+                gravacao = os.path.join(pasta_gravacao, f"{camera['id']}_{inicio_gravacao}{EXTENSAO_GRAVACAO}")
+            pipeline = CameraPipeline(camera["id"], camera["fonte"], self.motor_faces,
+                                      prefixo_arquivo=f"{camera['id']}_",
+                                      ao_alterar_modo_ocioso=self._contabilizar_uso_cpu,
+                                      exibir=not headless, taxa_fps=camera.get("taxa_fps"), gravacao=gravacao,
+                                      velocidade_replay=camera.get("velocidade", velocidade_replay),
+                                      inicio_processo=self.inicio)
+            self.motor_faces.registrar_camera(camera["id"], pipeline, camera.get("peso"), camera.get("prazo"))
+            self.pipelines.append(pipeline)
+        
+        self.marca_uso_cpu = (time.time(), time.process_time())  # Início da medição do modo atual
+        self.lock_uso_cpu = threading.Lock()
         self.running = False
-        self.connection_errors = 0
-        self.max_connection_errors = 20
-        
-        # Filas para comunicação entre threads
-        self.capture_queue = Queue(maxsize=10)  # Frames capturados
-        self.motion_queue = Queue(maxsize=10)   # Frames com movimento detectado
-        self.face_queue = Queue(maxsize=10)     # Frames para processamento facial
-        self.result_queue = Queue(maxsize=10)   # Frames processados para exibição
-        
-        # Threads
-        self.capture_thread = None
-        self.motion_thread = None
-        self.face_thread = None
-        self.worker_threads = []
-        
-        # Pool de threads para processamento paralelo
-        self.thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=num_workers)
+        self.stats_thread = None
         
-        # Controle de estatísticas
-        self.stats = {
-            'frames_capturados': 0,
-            'frames_processados': 0,
-            'movimento_detectado': 0,
-            'faces_detectadas': 0,
-            'faces_reconhecidas': 0,
-            'tempo_inicio': time.time()
+        # Métricas do processo (uso de CPU por modo); as demais são por câmera
+        self.uso_cpu = {
+            modo: (registro.contador(f'tempo_{modo}_segundos'), registro.contador(f'cpu_{modo}_segundos'))
+            for modo in ('ativo', 'ocioso')
         }
         
         # Flag para controle de finalização
         self.shutdown_requested = False
     
+    @property
+    def modo_ocioso(self):
+        """O processo está ocioso quando todas as câmeras estão no modo ocioso"""
+        return all(pipeline.modo_ocioso for pipeline in self.pipelines)
+    
     def iniciar(self):
         """Inicia o processamento do stream de vídeo com threads separadas"""
-        # Inicializar captura de vídeo assíncrona com buffer menor para menor latência
-        self.video_capture = VideoCapture(self.source, buffer_size=BUFFER_SIZE_CAPTURA)
-        if not self.video_capture.start():
+        # Modelos faciais carregados e aquecidos antes da captura, e não no primeiro movimento
+        if not self.motor_faces.preparar_modelos(aquecer=AQUECER_MODELOS):
+            return False
+        
+        # Inicializar captura de vídeo e detecção de movimento de cada câmera
+        iniciados = [pipeline for pipeline in self.pipelines if pipeline.iniciar()]
+        if not iniciados:
             log_error("Falha ao iniciar captura de vídeo. Verifique a conexão com a câmera.")
             return False
+        self.pipelines = iniciados
         
         # Informações iniciais
         log_info(f"Pessoa de referência: {PESSOA_INFO['nome']} (ID: {PESSOA_INFO['id']})")
-        log_info("Controles: ESC = Sair")
+        log_info("Modo sem interface gráfica (SIGTERM ou Ctrl+C para sair)" if self.headless
+                 else "Controles: ESC = Sair")
         log_info(f"Detecção baseada em movimento: {FRAMES_APOS_MOVIMENTO} frames após movimento")
         log_info(f"Processando e salvando faces APENAS após detecção de movimento")
         log_info(f"Modo de depuração: {MODO_DEBUG}")
         log_info(f"Processamento paralelo com {self.num_workers} workers")
+        log_info(f"Câmeras ativas: {', '.join(str(p.camera_id) for p in self.pipelines)}")
         
         # Iniciar threads de processamento
         self.running = True
         
-        # Thread de captura
-        self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
-        self.capture_thread.start()
-        
-        # Thread de detecção de movimento
-        self.motion_thread = threading.Thread(target=self._motion_detection_loop, daemon=True)
-        self.motion_thread.start()
-        
-        # Thread de processamento facial
-        self.face_thread = threading.Thread(target=self._face_processing_loop, daemon=True)
-        self.face_thread.start()
+        # Motor facial compartilhado entre as câmeras
+        self.motor_faces.iniciar()
         
         # Thread de monitoramento de estatísticas
         self.stats_thread = threading.Thread(target=self._monitor_stats, daemon=True)
         self.stats_thread.start()
         
-        # Criar janela com tamanho ajustável
-        cv2.namedWindow("Detector de Faces por Movimento", cv2.WINDOW_NORMAL)
+        # Endpoint de métricas para coleta externa (Prometheus)
+        if self.metricas_porta is not None:
+            self.servidor_metricas = MetricsServer(self.metricas_porta)
+            self.servidor_metricas.iniciar()
+        
+        # Eventos de movimento e reconhecimento para outros sistemas
+        if self.endereco_eventos is not None:
+            barramento.iniciar(self.endereco_eventos)
         
-        # Configurar handler para SIGINT (Ctrl+C)
+        # Configurar handlers para SIGINT (Ctrl+C) e SIGTERM (parada do serviço)
         self.original_sigint_handler = signal.getsignal(signal.SIGINT)
+        self.original_sigterm_handler = signal.getsignal(signal.SIGTERM)
         signal.signal(signal.SIGINT, self._handle_sigint)
-        
-        # Loop principal (thread principal - UI)
-        self._main_loop()
+        signal.signal(signal.SIGTERM, self._handle_sigint)
+        
+        # Diagnóstico sob demanda (Unix): SIGUSR1 = perfil de CPU, SIGUSR2 = trace dos últimos frames
+        self.original_sigusr_handlers = {}
+        if hasattr(signal, 'SIGUSR1'):
+            for sinal in (signal.SIGUSR1, signal.SIGUSR2):
+                self.original_sigusr_handlers[sinal] = signal.getsignal(sinal)
+                signal.signal(sinal, self._handle_diagnostico)
+        
+        if self.headless:
+            # Pré-visualização MJPEG sob demanda no lugar da janela
+            if self.preview_porta is not None:
+                self.preview = PreviewServer(self.preview_porta, self._obter_frame_preview,
+                                             [pipeline.camera_id for pipeline in self.pipelines])
+                self.preview.iniciar()
+            
+            # Loop principal sem interface: apenas aguardar a finalização
+            self._headless_loop()
+        else:
+            # Criar janela com tamanho ajustável
+            cv2.namedWindow("Detector de Faces por Movimento", cv2.WINDOW_NORMAL)
+            
+            # Loop principal (thread principal - UI)
+            self._main_loop()
         
         return True
     
     def _handle_sigint(self, sig, frame):
-        """Handler para SIGINT (Ctrl+C)"""
-        log_info("Sinal de interrupção recebido (Ctrl+C). Finalizando...")
+        """Handler para SIGINT (Ctrl+C) e SIGTERM"""
+        if sig == signal.SIGTERM:
+            log_info("Sinal de término recebido (SIGTERM). Finalizando...")
+        else:
+            log_info("Sinal de interrupção recebido (Ctrl+C). Finalizando...")
         self.shutdown_requested = True
         self.running = False
     
-    def _capture_loop(self):
-        """Thread dedicada para captura de frames"""
-        log_info("Thread de captura iniciada")
-        
-        last_frame_time = time.time()
-        frame_interval = 1.0 / TAXA_FPS_CAPTURA  # Limitar a taxa de FPS configurada
-        
-        while self.running:
-            try:
-                current_time = time.time()
-                elapsed = current_time - last_frame_time
-                
-                # Limitar taxa de captura para não sobrecarregar o sistema
-                if elapsed < frame_interval:
-                    time.sleep(0.001)  # Pequena pausa
-                    continue
-                
-                # Ler o próximo frame
-                ret, frame = self.video_capture.read()
-                
-                if not ret or frame is None:
-                    time.sleep(0.1)
-                    continue
-                
-                # Atualizar timestamp
-                last_frame_time = current_time
-                
-                # Guardar uma cópia do frame para referência
-                self.ultimo_frame = frame.copy()
-                
-                # Incrementar contador de estatísticas
-                self.stats['frames_capturados'] += 1
-                
-                # Enviar para processamento se a fila não estiver cheia
-                if not self.capture_queue.full():
-                    self.capture_queue.put((frame.copy(), current_time))
-                
-            except Exception as e:
-                log_error(f"Erro na thread de captura: {str(e)}")
-                time.sleep(0.1)
+    def _handle_diagnostico(self, sig, frame):
+        """Handler para SIGUSR1 (perfil de CPU) e SIGUSR2 (trace dos últimos frames)"""
+        if sig == signal.SIGUSR1:
+            if not perfil.solicitar():
+                log_info("Captura de perfil já em andamento")
+        elif not rastreador.ativo:
+            log_info("Rastreamento desativado (use --rastreamento); nenhum trace a salvar")
+        else:
+            # Gravar fora do handler de sinal
+            threading.Thread(target=rastreador.salvar_chrome, daemon=True).start()
     
-    def _motion_detection_loop(self):
-        """Thread dedicada para detecção de movimento"""
-        log_info("Thread de detecção de movimento iniciada")
-        
-        frame_anterior = None
-        movimento_count = 0
-        ultimo_movimento = 0  # Timestamp do último movimento detectado
-        
-        while self.running:
-            try:
-                # Obter próximo frame para processamento de movimento
-                if self.capture_queue.empty():
-                    time.sleep(0.01)  # Pequena pausa para não consumir CPU
-                    continue
-                
-                frame, timestamp = self.capture_queue.get()
-                
-                # Se for o primeiro frame, inicializar frame_anterior
-                if frame_anterior is None:
-                    frame_anterior = frame.copy()
-                    continue
-                
-                # Verificar se já passou tempo suficiente desde a última detecção de movimento
-                tempo_desde_ultimo_movimento = timestamp - ultimo_movimento
-                
-                # Detectar movimento
-                movimento_detectado, movimento_area, frame_com_movimento = self.motion_detector.detectar(
-                    frame.copy(), frame_anterior.copy())
-                
-                # Atualizar frame anterior para próxima detecção de movimento
-                frame_anterior = frame.copy()
-                
-                # Se detectou movimento e passou tempo suficiente desde a última detecção
-                if movimento_detectado and (tempo_desde_ultimo_movimento >= INTERVALO_MINIMO_MOVIMENTO or self.frames_restantes_apos_movimento == 0):
-                    self.frames_sem_deteccao = 0  # Resetar contador de frames sem detecção
-                    self.stats['movimento_detectado'] += 1
-                    ultimo_movimento = timestamp  # Atualizar timestamp do último movimento
-                    
-                    # Limitar logs de movimento para reduzir poluição no terminal
-                    movimento_count += 1
-                    if movimento_count % 5 == 0:  # Logar apenas a cada 5 detecções
-                        log_movimento(f"Movimento detectado (área: {movimento_area:.0f}) - Limiar: {MOVIMENTO_THRESHOLD}")
-                    
-                    # Salvar frame com movimento
-                    timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    movimento_filename = f"capturas/movimento/movimento_{movimento_area:.0f}_{timestamp_str}.jpg"
-                    salvar_imagem(frame_com_movimento, movimento_filename)
-                    
-                    # Configurar para processar 5 frames após movimento (para ambiente de linha de produção)
-                    self.frames_restantes_apos_movimento = FRAMES_APOS_MOVIMENTO  # Voltando para 5 frames
-                    
-                    # Enviar para processamento facial
-                    if not self.face_queue.full():
-                        self.face_queue.put((frame.copy(), timestamp, movimento_area))
-                elif self.frames_restantes_apos_movimento > 0:
-                    # Processar frames restantes após movimento
-                    self.frames_restantes_apos_movimento -= 1
-                    
-                    # Enviar para processamento facial
-                    if not self.face_queue.full():
-                        self.face_queue.put((frame.copy(), timestamp, movimento_area if movimento_detectado else 0))
-                else:
-                    self.frames_sem_deteccao += 1
-                    
-                    # Enviar para exibição direta (sem processamento facial)
-                    frame_processado = frame.copy()
-                    adicionar_info_tela(frame_processado)
-                    
-                    # Adicionar FPS
-                    fps = self.video_capture.get_fps()
-                    cv2.putText(frame_processado, f"FPS: {fps:.1f}", (10, 60), 
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, COR_VERDE, 2)
-                    
-                    # Enviar para exibição
-                    if not self.result_queue.full():
-                        self.result_queue.put((frame_processado, timestamp))
-            
-            except Exception as e:
-                log_error(f"Erro na thread de detecção de movimento: {str(e)}")
-                time.sleep(0.1)
+    def _restaurar_sinais(self):
+        """Restaura os handlers originais de SIGINT, SIGTERM e dos sinais de diagnóstico"""
+        signal.signal(signal.SIGINT, self.original_sigint_handler)
+        signal.signal(signal.SIGTERM, self.original_sigterm_handler)
+        for sinal, handler in self.original_sigusr_handlers.items():
+            signal.signal(sinal, handler)
     
-    def _face_processing_loop(self):
-        """Thread dedicada para processamento facial"""
-        log_info("Thread de processamento facial iniciada")
-        
-        ultima_face_timestamp = 0
-        faces_processadas = {}  # Dicionário para rastrear faces já processadas recentemente
-        
-        while self.running:
-            try:
-                # Obter próximo frame para processamento facial
-                if self.face_queue.empty():
-                    time.sleep(0.01)  # Pequena pausa para não consumir CPU
-                    continue
-                
-                frame, timestamp, movimento_area = self.face_queue.get()
-                
-                # Verificar se já passou tempo suficiente desde o último processamento facial
-                tempo_desde_ultima_face = timestamp - ultima_face_timestamp
-                
-                # Processar faces no frame
-                frame_processado, face_encontrada = self.face_detector.processar_faces_no_frame(
-                    frame, self.pessoa_conhecida_encoding, PESSOA_INFO)
-                
-                # Se encontrou face, atualizar timestamp
-                if face_encontrada:
-                    # Só atualizar o timestamp se passou tempo suficiente ou se é uma nova detecção
-                    if tempo_desde_ultima_face >= INTERVALO_MINIMO_FACE:
-                        ultima_face_timestamp = timestamp
-                    
-                    self.stats['faces_detectadas'] += 1
-                
-                # Adicionar informações na tela
-                adicionar_info_tela(frame_processado)
-                
-                # Adicionar FPS e informações de movimento
-                fps = self.video_capture.get_fps()
-                cv2.putText(frame_processado, f"FPS: {fps:.1f}", (10, 60), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, COR_VERDE, 2)
-                
-                cv2.putText(frame_processado, f"Movimento: {movimento_area}", (10, 90), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, COR_AMARELO, 2)
-                
-                # Enviar frame processado para exibição
-                if not self.result_queue.full():
-                    self.result_queue.put((frame_processado, timestamp))
-                
-                # Decrementar contador de frames após movimento
-                if self.frames_restantes_apos_movimento > 0:
-                    self.frames_restantes_apos_movimento -= 1
-                
-                # Incrementar contador de frames processados
-                self.stats['frames_processados'] += 1
-                
-            except Exception as e:
-                log_error(f"Erro na thread de processamento facial: {str(e)}")
-                time.sleep(0.1)
+    def _obter_frame_preview(self, camera_id):
+        """Retorna o último frame de uma câmera para a pré-visualização"""
+        for pipeline in self.pipelines:
+            if str(pipeline.camera_id) == camera_id:
+                return pipeline.obter_frame_preview()
+        return None
+    
+    def _headless_loop(self):
+        """Loop principal sem interface gráfica: aguarda a finalização por sinal"""
+        try:
+            while self.running and not self.shutdown_requested:
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            log_info("Interrupção de teclado detectada. Encerrando...")
+        finally:
+            self._restaurar_sinais()
+            self.finalizar()
+    
+    def _contabilizar_uso_cpu(self):
+        """Acumula o tempo de parede e de CPU do processo no modo atual (ativo ou ocioso)"""
+        with self.lock_uso_cpu:
+            agora, cpu = time.time(), time.process_time()
+            modo = 'ocioso' if self.modo_ocioso else 'ativo'
+            tempo_modo, cpu_modo = self.uso_cpu[modo]
+            tempo_modo.incrementar(agora - self.marca_uso_cpu[0])
+            cpu_modo.incrementar(cpu - self.marca_uso_cpu[1])
+            self.marca_uso_cpu = (agora, cpu)
     
     def _main_loop(self):
         """Loop principal para exibição de frames processados"""
         try:
             ui_frame_interval = 1.0 / TAXA_FPS_UI
             last_ui_update = time.time()
+            ultimos_frames = [None] * len(self.pipelines)  # Último frame de cada câmera (mosaico)
             
             while self.running and not self.shutdown_requested:
                 current_time = time.time()
@@ -355,24 +274,24 @@ class DetectorController:
                 # Atualizar timestamp da última atualização da UI
                 last_ui_update = current_time
                 
-                # Verificar se há resultados processados para exibir
-                frame_processado = None
-                while not self.result_queue.empty():
-                    frame_processado, _ = self.result_queue.get()
-                
-                # Se não houver frame processado, usar o último frame com informações básicas
-                if frame_processado is None and self.ultimo_frame is not None:
-                    frame_processado = self.ultimo_frame.copy()
-                    # Adicionar informações básicas
-                    adicionar_info_tela(frame_processado)
-                    # Adicionar FPS
-                    fps = self.video_capture.get_fps()
-                    cv2.putText(frame_processado, f"FPS: {fps:.1f}", (10, 60), 
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, COR_VERDE, 2)
-                
-                # Mostrar frame processado se disponível
-                if frame_processado is not None:
-                    cv2.imshow("Detector de Faces por Movimento", frame_processado)
+                # Obter o frame mais recente de cada câmera (no modo ocioso a tela não é atualizada)
+                atualizado = False
+                for i, pipeline in enumerate(self.pipelines):
+                    frame_processado = pipeline.obter_frame_exibicao()
+                    if frame_processado is None:
+                        continue
+                    if len(self.pipelines) > 1:
+                        cv2.putText(frame_processado, str(pipeline.camera_id), (10, 30),
+                                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, COR_AMARELO, 2)
+                    ultimos_frames[i] = frame_processado
+                    atualizado = True
+                
+                # Mostrar a câmera única ou o mosaico das câmeras
+                if atualizado:
+                    if len(self.pipelines) == 1:
+                        cv2.imshow("Detector de Faces por Movimento", ultimos_frames[0])
+                    else:
+                        cv2.imshow("Detector de Faces por Movimento", montar_mosaico(ultimos_frames))
                 
                 # Capturar tecla
                 key = cv2.waitKey(1) & 0xFF
@@ -381,40 +300,94 @@ class DetectorController:
                 if key == 27:
                     log_info("Tecla ESC pressionada. Encerrando...")
                     break
-                
+        
         except KeyboardInterrupt:
             log_info("Interrupção de teclado detectada. Encerrando...")
         except Exception as e:
             log_error(f"Erro no loop principal: {str(e)}")
         finally:
-            # Restaurar o handler original para SIGINT
-            signal.signal(signal.SIGINT, self.original_sigint_handler)
+            # Restaurar os handlers originais de sinais
+            self._restaurar_sinais()
             self.finalizar()
     
     def _monitor_stats(self):
         """Thread para monitorar estatísticas de desempenho"""
         while self.running:
             try:
-                # Calcular estatísticas
-                tempo_total = time.time() - self.stats['tempo_inicio']
-                fps_medio = self.stats['frames_capturados'] / tempo_total if tempo_total > 0 else 0
-                
-                # Tamanhos das filas
-                capture_size = self.capture_queue.qsize()
-                face_size = self.face_queue.qsize()
-                result_size = self.result_queue.qsize()
-                
-                # Logar estatísticas
-                log_info(f"Estatísticas: {self.stats['frames_capturados']} frames capturados, "
-                         f"{self.stats['frames_processados']} processados, "
-                         f"{self.stats['movimento_detectado']} movimentos, "
-                         f"{self.stats['faces_detectadas']} faces. "
-                         f"FPS médio: {fps_medio:.1f}, "
-                         f"Filas: Captura={capture_size}, Face={face_size}, Resultado={result_size}")
+                filas_face = self.motor_faces.get_tamanhos_filas()
+                
+                # Estatísticas de cada câmera
+                for pipeline in self.pipelines:
+                    stats = {nome: pipeline.metricas.valor(nome) for nome in (
+                        'frames_capturados', 'frames_processados', 'movimento_detectado', 'faces_detectadas',
+                        'faces_reconhecidas', 'faces_codificadas', 'encodings_evitados', 'frames_duplicados',
+                        'salvamentos_suprimidos', 'clipes_gravados')}
+                    escalonador = self.motor_faces.get_estatisticas_escalonador(pipeline.camera_id)
+                    tempo_total = time.time() - pipeline.tempo_inicio
+                    fps_medio = stats['frames_capturados'] / tempo_total if tempo_total > 0 else 0
+                    
+                    log_info(f"[{pipeline.camera_id}] Estatísticas: {stats['frames_capturados']} frames capturados, "
+                             f"{stats['frames_processados']} processados, "
+                             f"{stats['movimento_detectado']} movimentos, "
+                             f"{stats['faces_detectadas']} faces, "
+                             f"{stats['faces_reconhecidas']} reconhecidas, "
+                             f"{stats['encodings_evitados']} encodings evitados, "
+                             f"{stats['frames_duplicados']} frames duplicados ignorados, "
+                             f"{stats['salvamentos_suprimidos']} salvamentos repetidos suprimidos, "
+                             f"{stats['clipes_gravados']} clipes, "
+                             f"{escalonador['prioritarios']} prioritários na fila facial, "
+                             f"{escalonador['descartados_fila']} descartados por fila cheia, "
+                             f"{escalonador['expirados']} expirados. "
+                             f"FPS médio: {fps_medio:.1f}{' (modo ocioso)' if pipeline.modo_ocioso else ''}, "
+                             f"Filas: Captura={pipeline.capture_queue.qsize()}, "
+                             f"Face={filas_face.get(pipeline.camera_id, 0)}, "
+                             f"Resultado={pipeline.result_queue.qsize()}")
+                    
+                    # Taxa de reconhecimento entre as faces efetivamente codificadas
+                    if stats['faces_codificadas'] > 0:
+                        taxa = stats['faces_reconhecidas'] / stats['faces_codificadas']
+                        log_info(f"[{pipeline.camera_id}] Melhor face: {stats['faces_codificadas']} codificadas, "
+                                 f"{stats['encodings_evitados']} evitadas, "
+                                 f"taxa de reconhecimento {taxa:.0%}")
+                    
+                    # Latências por etapa (p50/p95/p99 estimados pelos histogramas)
+                    latencias = []
+                    for etapa in ETAPAS_LATENCIA:
+                        resumo = pipeline.metricas.histograma(etapa).resumo()
+                        if resumo['total'] > 0:
+                            latencias.append(f"{etapa} {resumo['p50']:.0f}/{resumo['p95']:.0f}/{resumo['p99']:.0f}")
+                    if latencias:
+                        log_info(f"[{pipeline.camera_id}] Latências p50/p95/p99 (ms): {', '.join(latencias)}")
+                
+                log_info(f"Motor facial: {len(self.pipelines)} câmeras, "
+                         f"fila total {self.motor_faces.qsize()}, "
+                         f"nível de degradação {registro.medidor('nivel_degradacao').valor}")
+                
+                # Uso de CPU (em % de um núcleo) nos modos ativo e ocioso
+                self._contabilizar_uso_cpu()
+                uso_cpu = []
+                for modo, (tempo_modo, cpu_modo) in self.uso_cpu.items():
+                    if tempo_modo.valor > 0:
+                        uso_cpu.append(f"{modo} {cpu_modo.valor / tempo_modo.valor:.0%} "
+                                       f"({tempo_modo.valor:.0f}s)")
+                log_info(f"Uso de CPU{' (modo ocioso)' if self.modo_ocioso else ''}: {', '.join(uso_cpu)}")
+                
+                # Compromisso entre tamanho do lote de encoding e latência adicionada
+                lote = self.motor_faces.get_estatisticas_lote()
+                if lote is not None and lote['lotes'] > 0:
+                    log_info(f"Encoding em lote: {lote['lotes']} lotes, "
+                             f"{lote['tamanho_medio_lote']:.1f} faces/lote (máx. {lote['maior_lote']}), "
+                             f"espera média {lote['espera_media_ms']:.0f} ms, "
+                             f"encoding {lote['encoding_por_lote_ms']:.0f} ms/lote "
+                             f"({lote['encoding_por_face_ms']:.0f} ms/face)")
+                if lote is not None and 'workers' in lote:
+                    log_info(f"Workers faciais: {lote['workers_conectados']}/{lote['workers']} conectados, "
+                             f"{lote['faces_remotas']} faces remotas, {lote['faces_locais']} locais, "
+                             f"{lote['reenvios']} pedidos reenviados")
                 
                 # Aguardar antes da próxima atualização
                 time.sleep(15.0)
-                
+            
             except Exception as e:
                 log_error(f"Erro ao monitorar estatísticas: {str(e)}")
                 time.sleep(5.0)
@@ -425,27 +398,25 @@ class DetectorController:
         self.running = False
         self.shutdown_requested = True
         
-        # Aguardar threads
-        threads = [
-            self.capture_thread,
-            self.motion_thread,
-            self.face_thread,
-            self.stats_thread
-        ]
+        # Parar a pré-visualização e o endpoint de métricas
+        if self.preview is not None:
+            self.preview.finalizar()
+        if self.servidor_metricas is not None:
+            self.servidor_metricas.finalizar()
         
-        for thread in threads:
-            if thread is not None:
-                thread.join(timeout=1.0)
+        # Parar captura e detecção de movimento de cada câmera
+        for pipeline in self.pipelines:
+            pipeline.finalizar()
         
-        # Encerrar pool de threads
-        if hasattr(self, 'thread_pool'):
-            self.thread_pool.shutdown(wait=False)
+        # Parar o motor facial (decide as janelas de aparição pendentes e encerra o lote de encoding)
+        self.motor_faces.finalizar()
         
-        # Parar captura de vídeo
-        if hasattr(self, 'video_capture'):
-            self.video_capture.stop()
+        # Fechar o barramento depois das últimas decisões
+        barramento.finalizar()
         
-        # Fechar janelas
-        cv2.destroyAllWindows()
+        if self.stats_thread is not None:
+            self.stats_thread.join(timeout=1.0)
         
-        log_info("Sistema finalizado.") 
\ No newline at end of file
+        # Fechar janelas
+        if not self.headless:
+            cv2.destroyAllWindows()
@@ -0,0 +1,55 @@
+"""
+Assinante de referência do barramento de eventos.
+Conecta ao detector iniciado com --eventos e escreve cada evento recebido como uma
+linha JSON (ou em texto resumido), reconectando se a conexão cair.
+
+Uso:
+    python -m face_detector.eventos [--endereco 127.0.0.1:7070] [--tipos face] [--camera entrada] [--texto]
+"""
+import json
+import time
+import argparse
+from datetime import datetime
+from face_detector.config.settings import ENDERECO_EVENTOS
+from face_detector.services.event_bus import assinar
+
+def _resumo(evento):
+    """Linha de texto resumida de um evento"""
+    hora = datetime.fromtimestamp(evento.get('ts_frame') or evento['ts']).strftime('%H:%M:%S')
+    if evento['tipo'] == 'face':
+        quem = evento['nome'] or evento['identidade'] or 'desconhecido'
+        return (f"[{hora}] {evento['camera']}: face {quem} (distância {evento['distancia']:.2f}) "
+                f"{evento['imagem'] or ''}")
+    return f"[{hora}] {evento['camera']}: movimento (área {evento['area']}) {evento['imagem'] or ''}"
+
+def main():
+    """Função principal do assinante de eventos"""
+    parser = argparse.ArgumentParser(description='Assinante de eventos do detector facial')
+    parser.add_argument('--endereco', type=str, default=ENDERECO_EVENTOS,
+                        help='Endereço do barramento ("unix:/caminho" ou "host:porta")')
+    parser.add_argument('--tipos', type=str, default=None,
+                        help='Tipos de evento separados por vírgula (face,movimento)')
+    parser.add_argument('--camera', action='append', default=None, help='Câmera desejada (repetir para várias)')
+    parser.add_argument('--texto', action='store_true', help='Escrever um resumo em texto em vez de JSON')
+    args = parser.parse_args()
+    tipos = args.tipos.split(',') if args.tipos else None
+    
+    espera = 1.0
+    while True:
+        try:
+            for evento in assinar(args.endereco, tipos, args.camera):
+                espera = 1.0
+                print(_resumo(evento) if args.texto else json.dumps(evento, ensure_ascii=False), flush=True)
+            print(f"# Conexão encerrada pelo detector; reconectando em {espera:.0f}s", flush=True)
+        except (ConnectionError, FileNotFoundError, OSError) as e:
+            print(f"# Barramento indisponível em {args.endereco} ({e}); nova tentativa em {espera:.0f}s", flush=True)
+        except KeyboardInterrupt:
+            return 0
+        try:
+            time.sleep(espera)
+        except KeyboardInterrupt:
+            return 0
+        espera = min(espera * 2, 30.0)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,81 @@
+"""
+Reconhecimento em lote de uma árvore de imagens (capturas antigas, fotos importadas).
+Cada face encontrada é comparada com a pessoa de referência; os resultados vão para
+um CSV (uma linha por face), um JSON Lines (uma linha por imagem) e/ou o histórico
+de encodings, consultável pela busca retroativa. Uma execução interrompida continua
+de onde parou ao ser repetida com a mesma saída (checkpoint em SAIDA.checkpoint).
+
+Uso:
+    python -m face_detector.lote fotos/ --saida resultados.csv [--processos 8]
+    python -m face_detector.lote fotos/ --saida resultados.jsonl --encoding encodings/maria_silva.pickle
+    python -m face_detector.lote fotos/ --historico --checkpoint lote.checkpoint
+"""
+import os
+import argparse
+from face_detector.config.settings import PESSOA_INFO, PASTA_HISTORICO, PROCESSOS_LOTE, IMAGENS_POR_TAREFA_LOTE
+from face_detector.services.batch_recognizer import ReconhecimentoLote
+from face_detector.utils.file_utils import carregar_encoding_teste
+from face_detector.utils.logger import log_info
+
+def main():
+    """Função principal do reconhecimento em lote"""
+    parser = argparse.ArgumentParser(description='Reconhecimento facial em lote de uma pasta de imagens')
+    parser.add_argument('pasta', type=str, help='Pasta raiz das imagens (subpastas incluídas)')
+    parser.add_argument('--saida', type=str, default=None, help='Arquivo de resultados (.csv ou .jsonl)')
+    parser.add_argument('--historico', action='store_true', help='Registrar as faces no histórico de encodings')
+    parser.add_argument('--checkpoint', type=str, default=None,
+                        help='Arquivo das imagens concluídas (padrão: SAIDA.checkpoint)')
+    referencia = parser.add_mutually_exclusive_group()
+    referencia.add_argument('--imagem', type=str, help='Foto da pessoa de referência')
+    referencia.add_argument('--encoding', type=str, help='Encoding da pessoa de referência (.pickle ou .npy)')
+    parser.add_argument('--pessoa', type=str, default=None,
+                        help='ID da pessoa de referência nos resultados (padrão: PESSOA_INFO)')
+    parser.add_argument('--limiar', type=float, default=None, help='Distância máxima para reconhecer a pessoa')
+    parser.add_argument('--processos', type=int, default=PROCESSOS_LOTE, help='Processos (0 = número de CPUs)')
+    parser.add_argument('--por-tarefa', type=int, default=IMAGENS_POR_TAREFA_LOTE,
+                        help='Imagens enviadas de uma vez a cada processo')
+    args = parser.parse_args()
+    
+    if not os.path.isdir(args.pasta):
+        parser.error(f"Pasta não encontrada: {args.pasta}")
+    if args.saida and not args.saida.endswith(('.csv', '.jsonl')):
+        parser.error("A saída deve ser um arquivo .csv ou .jsonl")
+    if not args.saida and not args.historico:
+        parser.error("Informe --saida e/ou --historico")
+    if not args.saida and not args.checkpoint:
+        args.checkpoint = os.path.join(PASTA_HISTORICO, 'lote.checkpoint')
+    
+    if args.imagem or args.encoding:
+        from face_detector.busca import encoding_consulta
+        encoding = encoding_consulta(args.imagem, args.encoding)
+        if encoding is None:
+            parser.error(f"Nenhuma face encontrada em {args.imagem}")
+    else:
+        encoding = carregar_encoding_teste()
+    pessoa_info = {'id': args.pessoa, 'nome': args.pessoa} if args.pessoa else PESSOA_INFO
+    
+    historico = None
+    if args.historico:
+        from face_detector.services.encoding_log import RegistroEncodings
+        historico = RegistroEncodings(PASTA_HISTORICO)
+    
+    lote = ReconhecimentoLote(encoding, pessoa_info, saida=args.saida, checkpoint=args.checkpoint,
+                              historico=historico, processos=args.processos, imagens_por_tarefa=args.por_tarefa,
+                              limiar=args.limiar)
+    try:
+        estatisticas = lote.executar(args.pasta)
+    except KeyboardInterrupt:
+        log_info(f"Interrompido após {lote.estatisticas['imagens']} imagens; repita o comando para continuar")
+        return 130
+    finally:
+        if historico is not None:
+            historico.finalizar()
+    
+    log_info(f"Lote concluído: {estatisticas['imagens']} imagens ({estatisticas['ignoradas']} já processadas), "
+             f"{estatisticas['faces']} faces, {estatisticas['reconhecidas']} reconhecidas, "
+             f"{estatisticas['erros']} erros em {estatisticas['segundos']:.1f}s "
+             f"({estatisticas['imagens_por_segundo']:.1f} imagens/s)")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
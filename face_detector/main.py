@@ -2,9 +2,12 @@
 Módulo principal do sistema de detecção facial.
 Implementa processamento assíncrono para melhor desempenho.
 """
+import time
+INICIO_PROCESSO = time.time()  # Antes dos demais imports: referência dos tempos de inicialização
+
 import argparse
 from face_detector.controllers.detector_controller import DetectorController
-from face_detector.utils.logger import log_info
+from face_detector.utils.logger import log_info, configurar_logging
 
 def main():
     """Função principal do sistema"""
@@ -12,13 +15,55 @@ def main():
     parser = argparse.ArgumentParser(description='Sistema de Detecção Facial com Processamento Assíncrono')
     parser.add_argument('--rtsp', type=str, help='URL RTSP para conexão com câmera IP')
     parser.add_argument('--camera', type=int, default=None, help='ID da câmera local (0 para webcam padrão)')
+    parser.add_argument('--fonte', action='append', default=[], metavar='ID=URL',
+                        help='Câmera do modo multicâmera (repetir para cada câmera; URL numérica = câmera local)')
+    parser.add_argument('--headless', action='store_true',
+                        help='Executar como serviço, sem janela nem anotações de tela')
+    parser.add_argument('--preview-porta', type=int, default=None,
+                        help='Porta local da pré-visualização MJPEG no modo --headless')
+    parser.add_argument('--metricas-porta', type=int, default=None,
+                        help='Porta local do endpoint de métricas Prometheus (/metrics)')
+    parser.add_argument('--rastreamento', action='store_true',
+                        help='Registrar spans das chamadas pesadas (trace do Chrome via SIGUSR2 ou /trace)')
+    parser.add_argument('--gravar', type=str, default=None, metavar='PASTA',
+                        help='Gravar os frames de cada câmera em PASTA/<id>_<data>.frames para reprodução')
+    parser.add_argument('--velocidade-replay', type=float, default=None,
+                        help='Velocidade de reprodução de fontes .frames (1 = tempo real, 0 = o mais rápido possível)')
+    parser.add_argument('--eventos', type=str, default=None, metavar='ENDERECO',
+                        help='Publicar eventos de movimento e reconhecimento em ENDERECO '
+                             '("unix:/caminho" ou "host:porta", ex.: 127.0.0.1:7070)')
+    parser.add_argument('--worker', action='append', default=None, metavar='HOST:PORTA',
+                        help='Worker facial remoto para o encoding (repetir para cada worker; '
+                             'iniciado com python -m face_detector.worker)')
+    parser.add_argument('--log-nivel', type=str, default=None, choices=['DEBUG', 'INFO', 'ERROR'],
+                        help='Nível mínimo das mensagens de log')
+    parser.add_argument('--log-json', type=str, default=None, metavar='ARQUIVO',
+                        help='Gravar todas as mensagens de log em ARQUIVO (JSON Lines)')
+    parser.add_argument('--log-formato', type=str, default=None, choices=['texto', 'json'],
+                        help='Formato do log no terminal')
     args = parser.parse_args()
+    if args.preview_porta is not None and not args.headless:
+        parser.error("--preview-porta requer --headless")
+    if args.log_nivel or args.log_json or args.log_formato:
+        configurar_logging(args.log_nivel, args.log_formato, args.log_json)
+    
+    # Câmeras informadas na linha de comando (modo multicâmera)
+    cameras = None
+    if args.fonte:
+        cameras = []
+        for fonte in args.fonte:
+            camera, separador, url = fonte.partition('=')
+            if not separador or not camera or not url:
+                parser.error(f"Fonte inválida: {fonte} (use ID=URL)")
+            cameras.append({"id": camera, "fonte": int(url) if url.isdigit() else url})
     
     # Determinar a fonte de vídeo
     rtsp_url = args.rtsp
     camera_id = args.camera
     
-    if rtsp_url:
+    if cameras is not None:
+        log_info(f"Usando {len(cameras)} câmeras: {', '.join(c['id'] for c in cameras)}")
+    elif rtsp_url:
         log_info(f"Usando stream RTSP: {rtsp_url}")
     elif camera_id is not None:
         log_info(f"Usando câmera local ID: {camera_id}")
@@ -29,8 +74,12 @@ def main():
         log_info("Usando configuração padrão de vídeo")
     
     # Inicializar e executar o controlador
-    detector = DetectorController(rtsp_url=rtsp_url, camera_id=camera_id)
+    detector = DetectorController(rtsp_url=rtsp_url, camera_id=camera_id, cameras=cameras,
+                                  headless=args.headless, preview_porta=args.preview_porta,
+                                  metricas_porta=args.metricas_porta, rastreamento=args.rastreamento,
+                                  pasta_gravacao=args.gravar, velocidade_replay=args.velocidade_replay,
+                                  inicio=INICIO_PROCESSO, eventos=args.eventos, workers_faciais=args.worker)
     detector.iniciar()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,58 @@
+"""
+Modelo de anotações de um frame.
+As caixas e textos produzidos pelo pipeline são registrados aqui e só são
+desenhados quando o frame é exibido ou salvo; os pixels do frame original
+não são alterados ao longo do processamento.
+"""
+import cv2
+from face_detector.utils.image_utils import adicionar_info_tela
+from face_detector.utils.rastreamento import rastreador
+
+class Anotacoes:
+    """Registro estruturado das anotações (caixas, textos e cores) de um frame"""
+    
+    def __init__(self):
+        self.retangulos = []  # (x1, y1, x2, y2, cor, espessura)
+        self.textos = []      # (texto, (x, y), escala, cor, espessura)
+        self.info_tela = False
+    
+    def adicionar_retangulo(self, x1, y1, x2, y2, cor, espessura=2):
+        """Registra um retângulo entre os cantos (x1, y1) e (x2, y2)"""
+        self.retangulos.append((x1, y1, x2, y2, cor, espessura))
+    
+    def adicionar_texto(self, texto, posicao, escala, cor, espessura=1):
+        """Registra um texto na posição (x, y)"""
+        self.textos.append((texto, posicao, escala, cor, espessura))
+    
+    def adicionar_face(self, face_location, texto, cor):
+        """Registra a caixa de uma face (top, right, bottom, left) com o rótulo acima dela"""
+        top, right, bottom, left = face_location
+        self.adicionar_retangulo(left, top, right, bottom, cor, 2)
+        self.adicionar_texto(texto, (left, top - 10), 0.5, cor, 1)
+    
+    def adicionar_info_tela(self):
+        """Inclui as informações padrão de tela (data/hora, referência e instruções)"""
+        self.info_tela = True
+    
+    def estender(self, outras):
+        """Acrescenta as anotações de outro registro"""
+        self.retangulos.extend(outras.retangulos)
+        self.textos.extend(outras.textos)
+        self.info_tela = self.info_tela or outras.info_tela
+    
+    def renderizar(self, frame):
+        """
+        Desenha as anotações em uma cópia do frame
+        
+        Returns:
+            Novo frame com as anotações (o frame recebido não é alterado)
+        """
+        with rastreador.span('renderizar_anotacoes'):
+            frame_anotado = frame.copy()
+            for x1, y1, x2, y2, cor, espessura in self.retangulos:
+                cv2.rectangle(frame_anotado, (x1, y1), (x2, y2), cor, espessura)
+            for texto, posicao, escala, cor, espessura in self.textos:
+                cv2.putText(frame_anotado, texto, posicao, cv2.FONT_HERSHEY_SIMPLEX, escala, cor, espessura)
+            if self.info_tela:
+                adicionar_info_tela(frame_anotado)
+        return frame_anotado
@@ -0,0 +1,63 @@
+"""
+Consulta, exportação e compactação das imagens guardadas em segmentos
+(ARMAZENAMENTO_IMAGENS = "segmentos").
+
+Uso:
+    python -m face_detector.segmentos listar [--prefixo capturas/faces/match] [--limite N]
+    python -m face_detector.segmentos exportar DESTINO [CHAVE ...] [--prefixo P] [--desde AAAA-MM-DD]
+    python -m face_detector.segmentos compactar [--dias N]
+"""
+import argparse
+from datetime import datetime
+from face_detector.config.settings import PASTA_SEGMENTOS, DIAS_RETENCAO_IMAGENS
+from face_detector.services.crop_archive import ArquivoRecortes
+
+def _data(texto):
+    """Converte AAAA-MM-DD em timestamp"""
+    try:
+        return datetime.strptime(texto, '%Y-%m-%d').timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida: {texto} (use AAAA-MM-DD)")
+
+def main():
+    """Função principal da ferramenta de segmentos"""
+    parser = argparse.ArgumentParser(description='Imagens guardadas em segmentos')
+    parser.add_argument('--pasta', type=str, default=PASTA_SEGMENTOS, help='Pasta dos segmentos')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    listar = comandos.add_parser('listar', help='Listar as imagens, da mais recente para a mais antiga')
+    listar.add_argument('--prefixo', type=str, default=None, help='Apenas chaves com este prefixo')
+    listar.add_argument('--limite', type=int, default=50, help='Número de imagens listadas')
+    exportar = comandos.add_parser('exportar', help='Extrair imagens como arquivos JPEG individuais')
+    exportar.add_argument('destino', type=str, help='Pasta de destino (o caminho da chave é mantido)')
+    exportar.add_argument('chaves', nargs='*', help='Chaves das imagens (sem chaves, usa os filtros)')
+    exportar.add_argument('--prefixo', type=str, default=None, help='Apenas chaves com este prefixo')
+    exportar.add_argument('--desde', type=_data, default=None, help='Apenas imagens a partir desta data')
+    exportar.add_argument('--ate', type=_data, default=None, help='Apenas imagens até esta data')
+    compactar = comandos.add_parser('compactar', help='Aplicar a retenção e reescrever segmentos pouco ocupados '
+                                                      '(com o detector parado)')
+    compactar.add_argument('--dias', type=int, default=DIAS_RETENCAO_IMAGENS,
+                           help='Retenção em dias (0 = manter todas)')
+    args = parser.parse_args()
+    
+    arquivo = ArquivoRecortes(pasta=args.pasta)
+    try:
+        if args.comando == 'listar':
+            estatisticas = arquivo.estatisticas()
+            print(f"{estatisticas['imagens']} imagens em {estatisticas['segmentos']} segmentos "
+                  f"({estatisticas['bytes'] / (1024 * 1024):.1f} MB)")
+            for chave, timestamp, tamanho in reversed(arquivo.listar(args.prefixo)[-args.limite:]):
+                instante = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+                print(f"{instante}  {tamanho / 1024:>8.1f} KB  {chave}")
+        elif args.comando == 'exportar':
+            chaves = args.chaves or [chave for chave, _, _ in arquivo.listar(args.prefixo, args.desde, args.ate)]
+            print(f"{arquivo.exportar(chaves, args.destino)} imagens exportadas para {args.destino}")
+        else:
+            resultado = arquivo.compactar(args.dias)
+            print(f"{resultado['segmentos_removidos']} segmentos reescritos, {resultado['imagens_expiradas']} "
+                  f"imagens expiradas, {resultado['bytes_liberados'] / (1024 * 1024):.1f} MB liberados")
+    finally:
+        arquivo.fechar()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,235 @@
+"""
+Reconhecimento em lote de imagens paradas (pastas de capturas, fotos de crachá).
+As imagens são distribuídas em tarefas de IMAGENS_POR_TAREFA_LOTE para um pool de
+processos; cada processo tem seu próprio FaceDetector e decodifica a próxima
+imagem da tarefa em uma thread enquanto reconhece a atual. O processo principal
+grava os resultados (CSV, JSON Lines e/ou histórico de encodings) e, depois
+deles, o checkpoint com as imagens concluídas, que permite retomar a execução.
+"""
+import os
+import csv
+import json
+import time
+import multiprocessing
+import concurrent.futures
+import cv2
+import numpy as np
+from face_detector.config.settings import (
+    PROCESSOS_LOTE, IMAGENS_POR_TAREFA_LOTE, EXTENSOES_IMAGEM_LOTE, FACE_SIMILARITY_THRESHOLD
+)
+from face_detector.utils.logger import log_info, log_error
+
+# Estado de cada processo do pool (definido em _iniciar_processo)
+_detector = None
+_referencia = None
+
+def _iniciar_processo(referencia):
+    """Cria o detector do processo e carrega os modelos antes da primeira tarefa"""
+    global _detector, _referencia
+    from face_detector.services.face_detector import FaceDetector
+    from face_detector.services.modelos import modelos
+    modelos.carregar()
+    _detector = FaceDetector(max_workers=1, deduplicar=False)
+    _referencia = np.asarray(referencia)
+
+def _reconhecer_tarefa(caminhos):
+    """
+    Reconhece as faces de uma lista de imagens (executado nos processos do pool)
+    
+    Returns:
+        Lista de (caminho, instante do arquivo, faces, erro); cada face é (bbox, distância, encoding)
+    """
+    from face_detector.services.modelos import modelos
+    resultados = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as leitor:
+        # Decodificar a próxima imagem enquanto a atual é processada
+        proxima = leitor.submit(cv2.imread, caminhos[0]) if caminhos else None
+        for posicao, caminho in enumerate(caminhos):
+            imagem = proxima.result()
+            proxima = leitor.submit(cv2.imread, caminhos[posicao + 1]) if posicao + 1 < len(caminhos) else None
+            try:
+                instante = os.path.getmtime(caminho)
+                if imagem is None:
+                    resultados.append((caminho, instante, [], "imagem ilegível"))
+                    continue
+                face_locations, face_encodings = _detector.detectar_faces(imagem)
+                faces = []
+                for face_location, face_encoding in zip(face_locations, face_encodings):
+                    distancia = float(modelos.api.face_distance([_referencia], face_encoding)[0])
+                    faces.append(([int(v) for v in face_location], distancia, np.asarray(face_encoding, np.float32)))
+                resultados.append((caminho, instante, faces, None))
+            except Exception as e:
+                resultados.append((caminho, None, [], str(e)))
+    return resultados
+
+def listar_imagens(pasta, extensoes=None):
+    """Percorre a árvore de pastas produzindo os caminhos das imagens, em ordem"""
+    extensoes = tuple(extensoes if extensoes is not None else EXTENSOES_IMAGEM_LOTE)
+    for raiz, pastas, arquivos in os.walk(pasta):
+        pastas.sort()
+        for arquivo in sorted(arquivos):
+            if arquivo.lower().endswith(extensoes):
+                yield os.path.join(raiz, arquivo)
+
+class ReconhecimentoLote:
+    """Executa o reconhecimento de uma árvore de imagens com checkpoint e relatório de vazão"""
+    
+    def __init__(self, referencia, pessoa_info, saida=None, checkpoint=None, historico=None, processos=None,
+                 imagens_por_tarefa=None, limiar=None):
+        """
+        Inicializa o lote
+        
+        Args:
+            referencia: Encoding da pessoa de referência
+            pessoa_info: Informações da pessoa de referência (id e nome)
+            saida: Arquivo de resultados, .csv (uma linha por face) ou .jsonl (uma linha por imagem)
+            checkpoint: Arquivo com as imagens concluídas (None = saida + ".checkpoint")
+            historico: RegistroEncodings que recebe as faces, como na detecção ao vivo (None = não registrar)
+            processos: Processos do pool (None = PROCESSOS_LOTE, 0 = número de CPUs)
+            imagens_por_tarefa: Imagens por tarefa enviada a um processo (None = IMAGENS_POR_TAREFA_LOTE)
+            limiar: Distância máxima para reconhecer a pessoa (None = FACE_SIMILARITY_THRESHOLD)
+        """
+        self.referencia = np.asarray(referencia)
+        self.pessoa_info = pessoa_info
+        self.saida = saida
+        self.checkpoint = checkpoint if checkpoint is not None else (saida + '.checkpoint' if saida else None)
+        self.historico = historico
+        processos = processos if processos is not None else PROCESSOS_LOTE
+        self.processos = processos if processos > 0 else (os.cpu_count() or 1)
+        self.imagens_por_tarefa = imagens_por_tarefa if imagens_por_tarefa is not None else IMAGENS_POR_TAREFA_LOTE
+        self.limiar = limiar if limiar is not None else FACE_SIMILARITY_THRESHOLD
+        self.arquivo_saida = None
+        self.escritor_csv = None
+        self.arquivo_checkpoint = None
+        self.estatisticas = {'imagens': 0, 'faces': 0, 'reconhecidas': 0, 'erros': 0, 'ignoradas': 0}
+    
+    def _concluidas(self):
+        """Imagens já processadas em uma execução anterior"""
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return set()
+        with open(self.checkpoint, encoding='utf-8') as arquivo:
+            return {linha.rstrip('\n') for linha in arquivo if linha.endswith('\n')}
+    
+    def _abrir_saidas(self):
+        """Abre a saída e o checkpoint para acréscimo"""
+        for caminho in (self.saida, self.checkpoint):
+            if caminho and os.path.dirname(caminho):
+                os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        if self.saida:
+            novo = not os.path.exists(self.saida) or os.path.getsize(self.saida) == 0
+            self.arquivo_saida = open(self.saida, 'a', newline='', encoding='utf-8')
+            if self.saida.endswith('.csv'):
+                self.escritor_csv = csv.writer(self.arquivo_saida)
+                if novo:
+                    self.escritor_csv.writerow(['arquivo', 'face', 'top', 'right', 'bottom', 'left', 'distancia',
+                                                'reconhecido', 'pessoa', 'erro'])
+        if self.checkpoint:
+            self.arquivo_checkpoint = open(self.checkpoint, 'a', encoding='utf-8')
+    
+    def _gravar(self, caminho, instante, faces, erro):
+        """Grava o resultado de uma imagem e, em seguida, a marca no checkpoint"""
+        reconhecidas = [distancia <= self.limiar for _, distancia, _ in faces]
+        self.estatisticas['imagens'] += 1
+        self.estatisticas['faces'] += len(faces)
+        self.estatisticas['reconhecidas'] += sum(reconhecidas)
+        if erro:
+            self.estatisticas['erros'] += 1
+            log_error(f"Erro ao processar {caminho}: {erro}")
+        
+        if self.escritor_csv is not None:
+            if not faces:
+                self.escritor_csv.writerow([caminho, '', '', '', '', '', '', '', '', erro or ''])
+            for indice, ((top, right, bottom, left), distancia, _) in enumerate(faces):
+                self.escritor_csv.writerow([caminho, indice, top, right, bottom, left, f"{distancia:.4f}",
+                                            int(reconhecidas[indice]),
+                                            self.pessoa_info['id'] if reconhecidas[indice] else '', ''])
+        elif self.arquivo_saida is not None:
+            self.arquivo_saida.write(json.dumps({
+                'arquivo': caminho,
+                'instante': instante,
+                'erro': erro,
+                'faces': [{'bbox': bbox, 'distancia': round(distancia, 4), 'reconhecido': reconhecido,
+                           'pessoa': self.pessoa_info['id'] if reconhecido else None}
+                          for (bbox, distancia, _), reconhecido in zip(faces, reconhecidas)]
+            }, ensure_ascii=False) + '\n')
+        
+        if self.historico is not None:
+            for (_, distancia, encoding), reconhecido in zip(faces, reconhecidas):
+                self.historico.adicionar(encoding, 'lote', 1 - distancia,
+                                         self.pessoa_info['id'] if reconhecido else None, None, caminho, instante)
+        
+        if self.arquivo_saida is not None:
+            self.arquivo_saida.flush()
+        if self.arquivo_checkpoint is not None:
+            self.arquivo_checkpoint.write(caminho + '\n')
+            self.arquivo_checkpoint.flush()
+    
+    def _tarefas(self, pasta, concluidas):
+        """Divide as imagens ainda não processadas em tarefas, à medida que a árvore é percorrida"""
+        tarefa = []
+        for caminho in listar_imagens(pasta):
+            if caminho in concluidas:
+                self.estatisticas['ignoradas'] += 1
+                continue
+            tarefa.append(caminho)
+            if len(tarefa) >= self.imagens_por_tarefa:
+                yield tarefa
+                tarefa = []
+        if tarefa:
+            yield tarefa
+    
+    def executar(self, pasta, intervalo_relatorio=10.0):
+        """
+        Processa a árvore de imagens
+        
+        Args:
+            pasta: Pasta raiz das imagens
+            intervalo_relatorio: Segundos entre os relatórios de progresso
+        
+        Returns:
+            Estatísticas (imagens, faces, reconhecidas, erros, ignoradas, segundos, imagens_por_segundo)
+        """
+        concluidas = self._concluidas()
+        if concluidas:
+            log_info(f"Retomando do checkpoint {self.checkpoint}: {len(concluidas)} imagens já processadas")
+        self._abrir_saidas()
+        log_info(f"Reconhecimento em lote de {pasta} com {self.processos} processos")
+        
+        inicio = time.time()
+        ultimo_relatorio = inicio
+        contexto = multiprocessing.get_context('spawn')  # Processos novos, cada um com seus modelos e seu log
+        try:
+            with concurrent.futures.ProcessPoolExecutor(self.processos, mp_context=contexto,
+                                                        initializer=_iniciar_processo,
+                                                        initargs=(self.referencia,)) as pool:
+                tarefas = self._tarefas(pasta, concluidas)
+                pendentes = set()
+                # Manter duas tarefas por processo em andamento: a árvore é lida aos poucos
+                while True:
+                    while len(pendentes) < self.processos * 2:
+                        tarefa = next(tarefas, None)
+                        if tarefa is None:
+                            break
+                        pendentes.add(pool.submit(_reconhecer_tarefa, tarefa))
+                    if not pendentes:
+                        break
+                    prontas, pendentes = concurrent.futures.wait(pendentes,
+                                                                 return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in prontas:
+                        for resultado in future.result():
+                            self._gravar(*resultado)
+                    
+                    agora = time.time()
+                    if agora - ultimo_relatorio >= intervalo_relatorio:
+                        ultimo_relatorio = agora
+                        log_info(f"Lote: {self.estatisticas['imagens']} imagens, {self.estatisticas['faces']} faces "
+                                 f"({self.estatisticas['imagens'] / (agora - inicio):.1f} imagens/s)")
+        finally:
+            for arquivo in (self.arquivo_saida, self.arquivo_checkpoint):
+                if arquivo is not None:
+                    arquivo.close()
+        
+        segundos = time.time() - inicio
+        self.estatisticas['segundos'] = segundos
+        self.estatisticas['imagens_por_segundo'] = self.estatisticas['imagens'] / segundos if segundos > 0 else 0.0
+        return self.estatisticas
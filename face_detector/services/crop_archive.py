@@ -0,0 +1,309 @@
+"""
+Armazenamento das imagens salvas em segmentos compactados.
+Em vez de um JPEG por evento, cada imagem é acrescentada ao segmento ativo
+(segmento_NNNNNN.dat, trocado ao atingir TAMANHO_SEGMENTO_MB) e registrada em um
+índice somente de acréscimo (chave → segmento, offset, tamanho, instante). A chave
+é o caminho que a imagem teria como arquivo, então as referências já gravadas
+(recortes dos clusters e do histórico de encodings) continuam válidas.
+
+A compactação descarta as imagens além da retenção e reescreve os segmentos
+fechados com pouca ocupação; ela roda em segundo plano a cada troca de segmento.
+"""
+import os
+import time
+import glob
+import struct
+import threading
+import cv2
+import numpy as np
+from face_detector.config.settings import (
+    PASTA_SEGMENTOS, TAMANHO_SEGMENTO_MB, DIAS_RETENCAO_IMAGENS, OCUPACAO_MINIMA_SEGMENTO
+)
+from face_detector.utils.logger import log_info, log_error
+
+ASSINATURA_ENTRADA = b'FDRC'
+FORMATO_ENTRADA = '<4sHId'       # assinatura, tamanho da chave, tamanho dos dados, instante
+TAMANHO_CHAVE = 160
+DTYPE_INDICE_SEGMENTOS = np.dtype([
+    ('chave', f'S{TAMANHO_CHAVE}'), ('segmento', '<u4'), ('offset', '<u8'), ('tamanho', '<u4'),
+    ('timestamp', '<f8')
+])
+ARQUIVO_INDICE = 'indice.bin'
+
+class ArquivoRecortes:
+    """Segmentos somente de acréscimo com as imagens salvas e o índice de acesso aleatório"""
+    
+    def __init__(self, pasta=None, tamanho_segmento_mb=None):
+        """
+        Inicializa o armazenamento (os arquivos são abertos no primeiro uso)
+        
+        Args:
+            pasta: Pasta dos segmentos (None = PASTA_SEGMENTOS)
+            tamanho_segmento_mb: Tamanho a partir do qual um novo segmento é aberto (None = TAMANHO_SEGMENTO_MB)
+        """
+        self.pasta = pasta if pasta is not None else PASTA_SEGMENTOS
+        tamanho_segmento_mb = tamanho_segmento_mb if tamanho_segmento_mb is not None else TAMANHO_SEGMENTO_MB
+        self.tamanho_segmento = int(tamanho_segmento_mb * 1024 * 1024)
+        self.indice = None          # chave -> (segmento, offset, tamanho, timestamp)
+        self.segmento_ativo = None
+        self.arquivo_segmento = None
+        self.arquivo_indice = None
+        self.tamanho_ativo = 0
+        self.lock = threading.RLock()
+        self.compactando = False
+    
+    def _caminho_segmento(self, numero):
+        return os.path.join(self.pasta, f"segmento_{numero:06d}.dat")
+    
+    def _segmentos(self):
+        """Números dos segmentos existentes, em ordem"""
+        return sorted(int(os.path.basename(c)[9:15]) for c in glob.glob(os.path.join(self.pasta, 'segmento_*.dat')))
+    
+    def _abrir(self):
+        """Carrega o índice e abre o segmento ativo para acréscimo (chamado com o lock)"""
+        if self.indice is not None:
+            return
+        os.makedirs(self.pasta, exist_ok=True)
+        caminho_indice = os.path.join(self.pasta, ARQUIVO_INDICE)
+        self.indice = {}
+        if os.path.exists(caminho_indice):
+            # Registros completos; uma chave gravada de novo substitui a anterior
+            total = os.path.getsize(caminho_indice) // DTYPE_INDICE_SEGMENTOS.itemsize
+            registros = np.fromfile(caminho_indice, dtype=DTYPE_INDICE_SEGMENTOS, count=total)
+            for registro in registros:
+                self.indice[registro['chave'].decode('utf-8')] = (
+                    int(registro['segmento']), int(registro['offset']), int(registro['tamanho']),
+                    float(registro['timestamp']))
+        self.arquivo_indice = open(caminho_indice, 'ab')
+        
+        segmentos = self._segmentos()
+        self._abrir_segmento(segmentos[-1] if segmentos else 1)
+    
+    def _abrir_segmento(self, numero):
+        """Passa a acrescentar ao segmento numero (chamado com o lock)"""
+        if self.arquivo_segmento is not None:
+            self.arquivo_segmento.close()
+        self.segmento_ativo = numero
+        self.arquivo_segmento = open(self._caminho_segmento(numero), 'ab')
+        self.tamanho_ativo = self.arquivo_segmento.tell()
+    
+    def adicionar(self, chave, dados, timestamp=None):
+        """
+        Acrescenta uma imagem codificada ao segmento ativo
+        
+        Args:
+            chave: Identificador da imagem (o caminho que ela teria como arquivo)
+            dados: Bytes da imagem (JPEG)
+            timestamp: Instante do evento (None = agora), usado na retenção
+        
+        Returns:
+            True se gravada
+        """
+        chave_bytes = chave.encode('utf-8')
+        if len(chave_bytes) > TAMANHO_CHAVE:
+            log_error(f"Chave com mais de {TAMANHO_CHAVE} bytes não pode ser arquivada: {chave}")
+            return False
+        timestamp = timestamp if timestamp is not None else time.time()
+        cabecalho = struct.pack(FORMATO_ENTRADA, ASSINATURA_ENTRADA, len(chave_bytes), len(dados), timestamp)
+        
+        trocar = False
+        with self.lock:
+            self._abrir()
+            if self.tamanho_ativo > 0 and self.tamanho_ativo + len(cabecalho) + len(chave_bytes) + len(dados) > \
+                    self.tamanho_segmento:
+                self._abrir_segmento(self.segmento_ativo + 1)
+                trocar = True
+            
+            # Dados antes do índice: um registro no índice sempre aponta para bytes já gravados
+            offset = self.tamanho_ativo + len(cabecalho) + len(chave_bytes)
+            self.arquivo_segmento.write(cabecalho + chave_bytes + dados)
+            self.arquivo_segmento.flush()
+            self.tamanho_ativo = offset + len(dados)
+            
+            registro = np.zeros(1, dtype=DTYPE_INDICE_SEGMENTOS)
+            registro['chave'] = chave_bytes
+            registro['segmento'] = self.segmento_ativo
+            registro['offset'] = offset
+            registro['tamanho'] = len(dados)
+            registro['timestamp'] = timestamp
+            self.arquivo_indice.write(registro.tobytes())
+            self.arquivo_indice.flush()
+            self.indice[chave] = (self.segmento_ativo, offset, len(dados), timestamp)
+        
+        # Retenção e compactação dos segmentos fechados a cada troca de segmento
+        if trocar and not self.compactando:
+            threading.Thread(target=self.compactar, daemon=True).start()
+        return True
+    
+    def salvar_imagem(self, imagem, chave, qualidade):
+        """Codifica a imagem em JPEG e a acrescenta com a chave informada"""
+        ok, jpeg = cv2.imencode('.jpg', imagem, [cv2.IMWRITE_JPEG_QUALITY, qualidade])
+        return ok and self.adicionar(chave, jpeg.tobytes())
+    
+    def ler(self, chave):
+        """
+        Lê os bytes de uma imagem arquivada
+        
+        Returns:
+            Bytes da imagem ou None se a chave não existir
+        """
+        with self.lock:
+            self._abrir()
+            entrada = self.indice.get(chave)
+            if entrada is None:
+                return None
+            segmento, offset, tamanho, _ = entrada
+            if segmento == self.segmento_ativo:
+                self.arquivo_segmento.flush()
+            with open(self._caminho_segmento(segmento), 'rb') as arquivo:
+                arquivo.seek(offset)
+                return arquivo.read(tamanho)
+    
+    def ler_imagem(self, chave):
+        """Lê e decodifica uma imagem arquivada (None se a chave não existir)"""
+        dados = self.ler(chave)
+        if dados is None:
+            return None
+        return cv2.imdecode(np.frombuffer(dados, dtype=np.uint8), cv2.IMREAD_COLOR)
+    
+    def listar(self, prefixo=None, desde=None, ate=None):
+        """
+        Lista as imagens arquivadas, da mais antiga à mais recente
+        
+        Returns:
+            Lista de (chave, timestamp, tamanho)
+        """
+        with self.lock:
+            self._abrir()
+            itens = [(chave, ts, tamanho) for chave, (_, _, tamanho, ts) in self.indice.items()
+                     if (prefixo is None or chave.startswith(prefixo)) and (desde is None or ts >= desde)
+                     and (ate is None or ts <= ate)]
+        return sorted(itens, key=lambda item: item[1])
+    
+    def exportar(self, chaves, destino):
+        """
+        Extrai imagens arquivadas como arquivos individuais, mantendo o caminho da chave
+        
+        Args:
+            chaves: Chaves das imagens
+            destino: Pasta onde os arquivos são criados
+        
+        Returns:
+            Número de imagens exportadas
+        """
+        exportadas = 0
+        for chave in chaves:
+            dados = self.ler(chave)
+            if dados is None:
+                log_error(f"Imagem não encontrada no arquivo: {chave}")
+                continue
+            caminho = os.path.join(destino, chave.lstrip('/'))
+            os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+            with open(caminho, 'wb') as arquivo:
+                arquivo.write(dados)
+            exportadas += 1
+        return exportadas
+    
+    def compactar(self, dias_retencao=None, ocupacao_minima=None):
+        """
+        Descarta as imagens além da retenção e reescreve os segmentos fechados com pouca ocupação
+        
+        Args:
+            dias_retencao: Imagens mais antigas que isto são removidas (None = DIAS_RETENCAO_IMAGENS, 0 = manter)
+            ocupacao_minima: Fração mínima de dados válidos para manter um segmento como está
+                             (None = OCUPACAO_MINIMA_SEGMENTO)
+        
+        Returns:
+            Dicionário com segmentos removidos, imagens expiradas e bytes liberados
+        """
+        dias_retencao = dias_retencao if dias_retencao is not None else DIAS_RETENCAO_IMAGENS
+        ocupacao_minima = ocupacao_minima if ocupacao_minima is not None else OCUPACAO_MINIMA_SEGMENTO
+        limite = time.time() - dias_retencao * 86400 if dias_retencao > 0 else None
+        resultado = {'segmentos_removidos': 0, 'imagens_expiradas': 0, 'bytes_liberados': 0}
+        
+        with self.lock:
+            if self.compactando:
+                return resultado
+            self.compactando = True
+            self._abrir()
+            ativo = self.segmento_ativo
+            por_segmento = {}
+            for chave, entrada in self.indice.items():
+                por_segmento.setdefault(entrada[0], []).append((chave, entrada))
+        
+        try:
+            for segmento in self._segmentos():
+                if segmento >= ativo:
+                    continue  # O segmento ativo (e os abertos depois dele) continuam recebendo imagens
+                caminho = self._caminho_segmento(segmento)
+                tamanho_arquivo = os.path.getsize(caminho)
+                entradas = por_segmento.get(segmento, [])
+                validas = [(chave, entrada) for chave, entrada in entradas if limite is None or entrada[3] >= limite]
+                ocupacao = sum(entrada[2] for _, entrada in validas) / tamanho_arquivo if tamanho_arquivo else 0.0
+                if len(validas) == len(entradas) and ocupacao >= ocupacao_minima:
+                    continue
+                
+                # Copiar as imagens válidas para o segmento ativo (se não regravadas nesse meio tempo)
+                # e remover o segmento
+                with open(caminho, 'rb') as arquivo:
+                    for chave, entrada in validas:
+                        _, offset, tamanho, timestamp = entrada
+                        arquivo.seek(offset)
+                        dados = arquivo.read(tamanho)
+                        with self.lock:
+                            if self.indice.get(chave) == entrada:
+                                self.adicionar(chave, dados, timestamp)
+                with self.lock:
+                    for chave, entrada in entradas:
+                        if self.indice.get(chave) == entrada:
+                            del self.indice[chave]
+                    self._reescrever_indice()
+                    os.remove(caminho)
+                resultado['segmentos_removidos'] += 1
+                resultado['imagens_expiradas'] += len(entradas) - len(validas)
+                resultado['bytes_liberados'] += tamanho_arquivo - sum(entrada[2] for _, entrada in validas)
+        except Exception as e:
+            log_error(f"Erro na compactação dos segmentos de imagens: {str(e)}")
+        finally:
+            self.compactando = False
+        
+        if resultado['segmentos_removidos']:
+            log_info(f"Compactação das imagens: {resultado['segmentos_removidos']} segmentos reescritos, "
+                     f"{resultado['imagens_expiradas']} imagens expiradas, "
+                     f"{resultado['bytes_liberados'] / (1024 * 1024):.1f} MB liberados")
+        return resultado
+    
+    def _reescrever_indice(self):
+        """Substitui o índice pelas entradas em memória (chamado com o lock)"""
+        registros = np.zeros(len(self.indice), dtype=DTYPE_INDICE_SEGMENTOS)
+        for posicao, (chave, (segmento, offset, tamanho, timestamp)) in enumerate(self.indice.items()):
+            registros[posicao] = (chave.encode('utf-8'), segmento, offset, tamanho, timestamp)
+        caminho = os.path.join(self.pasta, ARQUIVO_INDICE)
+        temporario = caminho + '.tmp'
+        registros.tofile(temporario)
+        self.arquivo_indice.close()
+        os.replace(temporario, caminho)
+        self.arquivo_indice = open(caminho, 'ab')
+    
+    def estatisticas(self):
+        """Retorna o número de imagens e segmentos e os bytes em disco"""
+        with self.lock:
+            self._abrir()
+            segmentos = self._segmentos()
+            return {
+                'imagens': len(self.indice),
+                'segmentos': len(segmentos),
+                'bytes': sum(os.path.getsize(self._caminho_segmento(s)) for s in segmentos)
+            }
+    
+    def fechar(self):
+        """Fecha o segmento ativo e o índice"""
+        with self.lock:
+            for arquivo in (self.arquivo_segmento, self.arquivo_indice):
+                if arquivo is not None:
+                    arquivo.close()
+            self.arquivo_segmento = self.arquivo_indice = None
+            self.indice = None
+
+# Armazenamento único do processo (usado por salvar_imagem com ARMAZENAMENTO_IMAGENS = "segmentos")
+arquivo_recortes = ArquivoRecortes()
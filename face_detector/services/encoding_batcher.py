@@ -0,0 +1,204 @@
+"""
+Serviço para cálculo de encodings faciais em lote.
+Agrupa recortes alinhados de faces (face chips) de vários frames e câmeras
+e calcula os encodings em uma única chamada ao modelo do dlib.
+"""
+import time
+import threading
+import concurrent.futures
+from queue import Queue, Empty
+import numpy as np
+from face_detector.config.settings import (
+    TAMANHO_MAXIMO_LOTE_ENCODING, PRAZO_LOTE_ENCODING, NUM_JITTERS
+)
+from face_detector.utils.logger import log_info, log_error
+from face_detector.utils.rastreamento import rastreador
+from face_detector.utils.perfil import perfil
+from face_detector.services.modelos import modelos
+
+# Tamanho e margem do recorte alinhado esperado pelo modelo de encoding do dlib
+TAMANHO_CHIP_FACE = 150
+PADDING_CHIP_FACE = 0.25
+
+class EncodingBatcher:
+    """Classe para agrupar faces de múltiplos frames e calcular os encodings em lote"""
+    
+    def __init__(self, tamanho_maximo=None, prazo=None):
+        """
+        Inicializa o agrupador de encodings
+        
+        Args:
+            tamanho_maximo: Número máximo de faces por lote
+            prazo: Tempo máximo (segundos) que uma face aguarda o lote completar
+        """
+        self.tamanho_maximo = tamanho_maximo if tamanho_maximo is not None else TAMANHO_MAXIMO_LOTE_ENCODING
+        self.prazo = prazo if prazo is not None else PRAZO_LOTE_ENCODING
+        self.fila = Queue()
+        self.stopped = True
+        self.thread = None
+        self.lock = threading.Lock()
+        
+        # Estatísticas para avaliar o compromisso entre tamanho do lote e latência
+        self.lotes_processados = 0
+        self.faces_codificadas = 0
+        self.maior_lote = 0
+        self.espera_total = 0.0
+        self.tempo_encoding_total = 0.0
+    
+    def iniciar(self):
+        """Inicia a thread de processamento dos lotes"""
+        if not self.stopped:
+            return
+        self.stopped = False
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        log_info(f"Encoding em lote iniciado (até {self.tamanho_maximo} faces, "
+                 f"prazo de {self.prazo * 1000:.0f} ms)")
+    
+    def extrair_chips(self, rgb_frame, face_locations):
+        """Extrai os recortes alinhados (150x150) das faces para o modelo de encoding"""
+        chips = []
+        for face_location in face_locations:
+            landmarks = modelos.api.pose_predictor_5_point(rgb_frame, modelos.api._css_to_rect(face_location))
+            chips.append(self.extrair_chip(rgb_frame, landmarks))
+        return chips
+    
+    def extrair_chip(self, rgb_frame, landmarks):
+        """Extrai o recorte alinhado de uma face a partir de landmarks já calculados"""
+        return modelos.dlib.get_face_chip(rgb_frame, landmarks, size=TAMANHO_CHIP_FACE, padding=PADDING_CHIP_FACE)
+    
+    def submeter(self, rgb_frame, face_locations, num_jitters=None, contexto=None):
+        """
+        Submete as faces de um frame para encoding em lote
+        
+        Args:
+            rgb_frame: Frame RGB onde as faces foram localizadas
+            face_locations: Localizações das faces (top, right, bottom, left) no frame
+            num_jitters: Número de vezes para amostrar cada face durante o encoding
+            contexto: Dados livres devolvidos junto com o resultado (câmera, frame, track)
+        
+        Returns:
+            Future que resolve para uma tupla (face_encodings, contexto)
+        """
+        try:
+            chips = self.extrair_chips(rgb_frame, face_locations)
+        except Exception as e:
+            future = concurrent.futures.Future()
+            future.set_exception(e)
+            return future
+        
+        return self.submeter_chips(chips, num_jitters, contexto)
+    
+    def submeter_chips(self, chips, num_jitters=None, contexto=None):
+        """Submete recortes alinhados já extraídos; retorna o mesmo Future de submeter"""
+        future = concurrent.futures.Future()
+        num_jitters = num_jitters if num_jitters is not None else NUM_JITTERS
+        
+        if not chips:
+            future.set_result(([], contexto))
+            return future
+        
+        # Verificação e enfileiramento sob o lock: finalizar() não esvazia a fila entre os dois
+        with self.lock:
+            if not self.stopped:
+                self.fila.put((chips, num_jitters, future, contexto, time.time()))
+                return future
+        
+        # Sem thread de lote ativa, calcular imediatamente
+        self._processar_lote([(chips, num_jitters, future, contexto, time.time())])
+        return future
+    
+    def _loop(self):
+        """Coleta itens até atingir o tamanho máximo do lote ou o prazo do item mais antigo"""
+        while not self.stopped:
+            perfil.ponto()
+            try:
+                primeiro = self.fila.get(timeout=0.1)
+            except Empty:
+                continue
+            
+            lote = [primeiro]
+            num_faces = len(primeiro[0])
+            limite = primeiro[4] + self.prazo
+            
+            while num_faces < self.tamanho_maximo:
+                restante = limite - time.time()
+                if restante <= 0:
+                    break
+                try:
+                    item = self.fila.get(timeout=restante)
+                except Empty:
+                    break
+                lote.append(item)
+                num_faces += len(item[0])
+            
+            self._processar_lote(lote)
+    
+    def _processar_lote(self, lote):
+        """Calcula os encodings de um lote e devolve os resultados a cada frame de origem"""
+        # Agrupar por número de jitters, já que o modelo recebe um único valor por chamada
+        grupos = {}
+        for item in lote:
+            grupos.setdefault(item[1], []).append(item)
+        
+        for num_jitters, itens in grupos.items():
+            chips = [chip for item in itens for chip in item[0]]
+            inicio = time.time()
+            try:
+                with rastreador.span('face_encodings_lote'):
+                    descritores = modelos.api.face_encoder.compute_face_descriptor(chips, num_jitters)
+            except Exception as e:
+                log_error(f"Erro ao calcular encodings em lote: {str(e)}")
+                for _, _, future, _, _ in itens:
+                    future.set_exception(e)
+                continue
+            fim = time.time()
+            
+            # Distribuir os encodings de volta para os frames de origem
+            posicao = 0
+            for face_chips, _, future, contexto, criado_em in itens:
+                encodings = [np.array(descritor) for descritor in descritores[posicao:posicao + len(face_chips)]]
+                posicao += len(face_chips)
+                with self.lock:
+                    self.espera_total += (inicio - criado_em) * len(face_chips)  # Apenas a espera pelo lote
+                future.set_result((encodings, contexto))
+            
+            with self.lock:
+                self.lotes_processados += 1
+                self.faces_codificadas += len(chips)
+                self.maior_lote = max(self.maior_lote, len(chips))
+                self.tempo_encoding_total += fim - inicio
+    
+    def get_estatisticas(self):
+        """
+        Retorna estatísticas do agrupamento: tamanho médio do lote, espera na fila até o lote
+        ser calculado (latência adicionada) e o tempo de cálculo, separado da espera
+        """
+        with self.lock:
+            lotes = self.lotes_processados
+            faces = self.faces_codificadas
+            return {
+                'lotes': lotes,
+                'faces': faces,
+                'maior_lote': self.maior_lote,
+                'tamanho_medio_lote': faces / lotes if lotes else 0.0,
+                'espera_media_ms': self.espera_total / faces * 1000 if faces else 0.0,
+                'encoding_por_lote_ms': self.tempo_encoding_total / lotes * 1000 if lotes else 0.0,
+                'encoding_por_face_ms': self.tempo_encoding_total / faces * 1000 if faces else 0.0
+            }
+    
+    def finalizar(self):
+        """Para a thread de lote e calcula imediatamente os itens pendentes"""
+        with self.lock:
+            self.stopped = True  # Novos itens passam a ser calculados na thread de quem os submete
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        
+        pendentes = []
+        while True:
+            try:
+                pendentes.append(self.fila.get_nowait())
+            except Empty:
+                break
+        if pendentes:
+            self._processar_lote(pendentes)
@@ -0,0 +1,282 @@
+"""
+Histórico de encodings para busca retroativa de faces.
+Cada face codificada é acrescentada a dois arquivos somente de acréscimo, ambos
+mapeáveis em memória e alinhados por linha:
+
+- encodings.f32: 128 valores float32 por face
+- eventos.bin: registro fixo por face (instante, câmera, similaridade, pessoa, cluster, recorte)
+
+A busca compara a consulta com todos os encodings em blocos vetorizados ou,
+com o índice invertido (IVF) construído, apenas com as listas mais próximas.
+"""
+import os
+import time
+import threading
+import numpy as np
+from face_detector.config.settings import (
+    PASTA_HISTORICO, LINHAS_POR_BLOCO_BUSCA, LISTAS_INDICE_BUSCA, LISTAS_CONSULTADAS_BUSCA
+)
+from face_detector.utils.logger import log_info, log_error
+
+DIMENSAO_ENCODING = 128
+DTYPE_EVENTO = np.dtype([
+    ('timestamp', '<f8'), ('similaridade', '<f4'), ('cluster', '<i4'),
+    ('camera', 'S32'), ('pessoa', 'S32'), ('recorte', 'S160')
+])
+ARQUIVO_ENCODINGS = 'encodings.f32'
+ARQUIVO_EVENTOS = 'eventos.bin'
+ARQUIVO_INDICE = 'indice_ivf.npz'
+
+def _texto(valor):
+    """Converte um campo de texto do registro (bytes de tamanho fixo) para str"""
+    return valor.decode('utf-8', errors='ignore') if isinstance(valor, bytes) else str(valor)
+
+class RegistroEncodings:
+    """Grava no histórico o encoding e o evento de cada face processada"""
+    
+    def __init__(self, pasta=None):
+        """
+        Inicializa o registro, acrescentando aos arquivos existentes
+        
+        Args:
+            pasta: Pasta do histórico (None = PASTA_HISTORICO)
+        """
+        self.pasta = pasta if pasta is not None else PASTA_HISTORICO
+        os.makedirs(self.pasta, exist_ok=True)
+        self.arquivo_encodings = open(os.path.join(self.pasta, ARQUIVO_ENCODINGS), 'ab')
+        self.arquivo_eventos = open(os.path.join(self.pasta, ARQUIVO_EVENTOS), 'ab')
+        self.lock = threading.Lock()
+        self.registrados = 0
+    
+    def adicionar(self, encoding, camera_id=None, similaridade=0.0, pessoa=None, cluster_id=None, recorte=None,
+                  timestamp=None):
+        """
+        Acrescenta uma face ao histórico
+        
+        Args:
+            encoding: Encoding da face (128 valores)
+            camera_id: Câmera da face
+            similaridade: Similaridade com a pessoa de referência
+            pessoa: ID da pessoa reconhecida (None = desconhecido)
+            cluster_id: Cluster de desconhecidos da face (None = sem cluster)
+            recorte: Caminho do recorte salvo (None = salvamento suprimido)
+            timestamp: Instante da face (None = agora)
+        """
+        evento = np.zeros(1, dtype=DTYPE_EVENTO)
+        evento['timestamp'] = timestamp if timestamp is not None else time.time()
+        evento['similaridade'] = similaridade
+        evento['cluster'] = cluster_id if cluster_id is not None else -1
+        evento['camera'] = str(camera_id if camera_id is not None else '').encode('utf-8')[:32]
+        evento['pessoa'] = str(pessoa if pessoa is not None else '').encode('utf-8')[:32]
+        evento['recorte'] = (recorte or '').encode('utf-8')[:160]
+        dados_encoding = np.asarray(encoding, dtype=np.float32).tobytes()
+        
+        # Encoding antes do evento: a leitura considera apenas linhas completas nos dois arquivos
+        with self.lock:
+            try:
+                self.arquivo_encodings.write(dados_encoding)
+                self.arquivo_encodings.flush()
+                self.arquivo_eventos.write(evento.tobytes())
+                self.arquivo_eventos.flush()
+                self.registrados += 1
+            except Exception as e:
+                log_error(f"Erro ao registrar encoding no histórico: {str(e)}")
+    
+    def finalizar(self):
+        """Fecha os arquivos do histórico"""
+        with self.lock:
+            self.arquivo_encodings.close()
+            self.arquivo_eventos.close()
+        log_info(f"Histórico de encodings: {self.registrados} faces registradas nesta execução")
+
+class HistoricoEncodings:
+    """Leitura e busca do histórico por mapeamento em memória"""
+    
+    def __init__(self, pasta=None):
+        """
+        Abre o histórico
+        
+        Args:
+            pasta: Pasta do histórico (None = PASTA_HISTORICO)
+        """
+        self.pasta = pasta if pasta is not None else PASTA_HISTORICO
+        caminho_encodings = os.path.join(self.pasta, ARQUIVO_ENCODINGS)
+        caminho_eventos = os.path.join(self.pasta, ARQUIVO_EVENTOS)
+        if not os.path.exists(caminho_encodings) or not os.path.exists(caminho_eventos):
+            raise FileNotFoundError(f"Histórico de encodings não encontrado em {self.pasta}")
+        
+        # Apenas as linhas completas nos dois arquivos (uma gravação pode ter sido interrompida)
+        self.total = min(os.path.getsize(caminho_encodings) // (DIMENSAO_ENCODING * 4),
+                         os.path.getsize(caminho_eventos) // DTYPE_EVENTO.itemsize)
+        if self.total > 0:
+            self.encodings = np.memmap(caminho_encodings, dtype=np.float32, mode='r',
+                                       shape=(self.total, DIMENSAO_ENCODING))
+            self.eventos = np.memmap(caminho_eventos, dtype=DTYPE_EVENTO, mode='r', shape=(self.total,))
+        else:
+            self.encodings = np.zeros((0, DIMENSAO_ENCODING), dtype=np.float32)
+            self.eventos = np.zeros(0, dtype=DTYPE_EVENTO)
+        self.indice = self._carregar_indice()
+    
+    def _carregar_indice(self):
+        """Carrega o índice invertido, se existir"""
+        caminho = os.path.join(self.pasta, ARQUIVO_INDICE)
+        if not os.path.exists(caminho):
+            return None
+        with np.load(caminho) as dados:
+            return {chave: dados[chave] for chave in dados.files}
+    
+    @staticmethod
+    def _filtro(eventos, camera, desde, ate):
+        """Máscara dos eventos que atendem aos filtros de câmera e período (None = sem filtros)"""
+        if camera is None and desde is None and ate is None:
+            return None
+        mascara = np.ones(len(eventos), dtype=bool)
+        if camera is not None:
+            mascara &= eventos['camera'] == str(camera).encode('utf-8')
+        if desde is not None:
+            mascara &= eventos['timestamp'] >= desde
+        if ate is not None:
+            mascara &= eventos['timestamp'] <= ate
+        return mascara
+    
+    @staticmethod
+    def _distancias(encodings, consulta):
+        """Distâncias euclidianas de um bloco de encodings à consulta (|x|² - 2x·q + |q|²)"""
+        quadrados = np.einsum('ij,ij->i', encodings, encodings) - 2.0 * (encodings @ consulta) + consulta @ consulta
+        return np.sqrt(np.maximum(quadrados, 0.0))
+    
+    @staticmethod
+    def _melhores(linhas, distancias, k):
+        """As k menores distâncias (linhas e distâncias, em ordem crescente)"""
+        if len(distancias) > k:
+            selecao = np.argpartition(distancias, k)[:k]
+            linhas, distancias = linhas[selecao], distancias[selecao]
+        ordem = np.argsort(distancias)
+        return linhas[ordem], distancias[ordem]
+    
+    def _varrer(self, consulta, k, inicio, fim, camera, desde, ate, tamanho_bloco):
+        """Busca exata nas linhas [inicio, fim), em blocos"""
+        linhas = np.zeros(0, dtype=np.int64)
+        distancias = np.zeros(0, dtype=np.float32)
+        for bloco in range(inicio, fim, tamanho_bloco):
+            final = min(bloco + tamanho_bloco, fim)
+            distancias_bloco = self._distancias(self.encodings[bloco:final], consulta)
+            linhas_bloco = np.arange(bloco, final, dtype=np.int64)
+            mascara = self._filtro(self.eventos[bloco:final], camera, desde, ate)
+            if mascara is not None:
+                linhas_bloco, distancias_bloco = linhas_bloco[mascara], distancias_bloco[mascara]
+            linhas, distancias = self._melhores(np.concatenate([linhas, linhas_bloco]),
+                                                np.concatenate([distancias, distancias_bloco]), k)
+        return linhas, distancias
+    
+    def _buscar_indice(self, consulta, k, camera, desde, ate, listas_consultadas):
+        """Busca nas listas do índice mais próximas da consulta"""
+        indice = self.indice
+        proximas = np.argsort(self._distancias(indice['centroides'], consulta))[:listas_consultadas]
+        candidatas = np.concatenate([indice['linhas'][indice['inicios'][lista]:indice['inicios'][lista + 1]]
+                                     for lista in proximas])
+        candidatas = np.sort(candidatas[candidatas < self.total])  # Leitura em ordem no arquivo mapeado
+        mascara = self._filtro(self.eventos[candidatas], camera, desde, ate)
+        if mascara is not None:
+            candidatas = candidatas[mascara]
+        return self._melhores(candidatas, self._distancias(self.encodings[candidatas], consulta), k)
+    
+    def buscar(self, consulta, k=10, camera=None, desde=None, ate=None, usar_indice=True, tamanho_bloco=None,
+               listas_consultadas=None):
+        """
+        Retorna as k aparições passadas mais próximas de um encoding
+        
+        Args:
+            consulta: Encoding da face procurada
+            k: Número de resultados
+            camera: Limitar a uma câmera (None = todas)
+            desde, ate: Limitar a um período (timestamps; None = sem limite)
+            usar_indice: Usar o índice invertido, se construído (as faces gravadas depois dele são varridas)
+            tamanho_bloco: Linhas comparadas por bloco na varredura (None = LINHAS_POR_BLOCO_BUSCA)
+            listas_consultadas: Listas do índice visitadas (None = LISTAS_CONSULTADAS_BUSCA)
+        
+        Returns:
+            Lista de dicionários (distancia, timestamp, camera, pessoa, cluster, recorte, linha)
+        """
+        consulta = np.asarray(consulta, dtype=np.float32)
+        tamanho_bloco = tamanho_bloco if tamanho_bloco is not None else LINHAS_POR_BLOCO_BUSCA
+        listas_consultadas = listas_consultadas if listas_consultadas is not None else LISTAS_CONSULTADAS_BUSCA
+        
+        inicio_varredura = 0
+        linhas = np.zeros(0, dtype=np.int64)
+        distancias = np.zeros(0, dtype=np.float32)
+        if usar_indice and self.indice is not None:
+            linhas, distancias = self._buscar_indice(consulta, k, camera, desde, ate, listas_consultadas)
+            inicio_varredura = min(int(self.indice['total']), self.total)
+        linhas_varridas, distancias_varridas = self._varrer(consulta, k, inicio_varredura, self.total,
+                                                            camera, desde, ate, tamanho_bloco)
+        linhas, distancias = self._melhores(np.concatenate([linhas, linhas_varridas]),
+                                            np.concatenate([distancias, distancias_varridas]), k)
+        
+        resultados = []
+        for linha, distancia in zip(linhas, distancias):
+            evento = self.eventos[linha]
+            resultados.append({
+                'distancia': float(distancia),
+                'timestamp': float(evento['timestamp']),
+                'camera': _texto(evento['camera']),
+                'pessoa': _texto(evento['pessoa']) or None,
+                'cluster': int(evento['cluster']) if evento['cluster'] >= 0 else None,
+                'recorte': _texto(evento['recorte']) or None,
+                'linha': int(linha)
+            })
+        return resultados
+    
+    def construir_indice(self, num_listas=None, amostra=100000, iteracoes=10, tamanho_bloco=None, semente=0):
+        """
+        Constrói o índice invertido: k-means dos encodings e a lista de linhas de cada centróide
+        
+        Args:
+            num_listas: Número de listas (None = LISTAS_INDICE_BUSCA)
+            amostra: Encodings usados para treinar os centróides
+            iteracoes: Iterações do k-means
+            tamanho_bloco: Linhas atribuídas por bloco (None = LINHAS_POR_BLOCO_BUSCA)
+            semente: Semente da amostragem
+        
+        Returns:
+            Caminho do índice salvo
+        """
+        tamanho_bloco = tamanho_bloco if tamanho_bloco is not None else LINHAS_POR_BLOCO_BUSCA
+        num_listas = min(num_listas if num_listas is not None else LISTAS_INDICE_BUSCA, self.total)
+        if num_listas < 1:
+            raise ValueError("Histórico vazio: nada a indexar")
+        aleatorio = np.random.default_rng(semente)
+        inicio = time.time()
+        
+        # Centróides treinados em uma amostra
+        selecao = np.sort(aleatorio.choice(self.total, min(amostra, self.total), replace=False))
+        dados = np.asarray(self.encodings[selecao])
+        centroides = dados[aleatorio.choice(len(dados), num_listas, replace=False)].copy()
+        for _ in range(iteracoes):
+            rotulos = self._atribuir_listas(dados, centroides)
+            somas = np.zeros_like(centroides)
+            np.add.at(somas, rotulos, dados)
+            contagens = np.bincount(rotulos, minlength=num_listas)
+            ocupadas = contagens > 0
+            centroides[ocupadas] = somas[ocupadas] / contagens[ocupadas, np.newaxis]
+        
+        # Todas as linhas atribuídas às listas, em blocos
+        rotulos = np.concatenate([self._atribuir_listas(np.asarray(self.encodings[bloco:bloco + tamanho_bloco]),
+                                                        centroides)
+                                  for bloco in range(0, self.total, tamanho_bloco)])
+        ordem = np.argsort(rotulos, kind='stable').astype(np.int64)
+        inicios = np.concatenate([[0], np.cumsum(np.bincount(rotulos, minlength=num_listas))]).astype(np.int64)
+        
+        caminho = os.path.join(self.pasta, ARQUIVO_INDICE)
+        temporario = caminho + '.tmp.npz'
+        np.savez(temporario, centroides=centroides, linhas=ordem, inicios=inicios, total=np.int64(self.total))
+        os.replace(temporario, caminho)
+        self.indice = self._carregar_indice()
+        log_info(f"Índice de busca com {num_listas} listas e {self.total} encodings construído em "
+                 f"{time.time() - inicio:.1f}s")
+        return caminho
+    
+    def _atribuir_listas(self, dados, centroides):
+        """Lista (centróide mais próximo) de cada encoding"""
+        normas = np.einsum('ij,ij->i', centroides, centroides)
+        return np.argmin(normas[np.newaxis, :] - 2.0 * (dados @ centroides.T), axis=1)
@@ -0,0 +1,274 @@
+"""
+Barramento de eventos de movimento e reconhecimento para outros sistemas.
+Os eventos são publicados em JSON Lines para qualquer número de assinantes,
+conectados por socket Unix ("unix:/caminho") ou TCP local ("127.0.0.1:7070").
+Publicar apenas enfileira o evento; uma thread serializa e envia para todos os
+assinantes. Cada assinante tem um buffer limitado: quem não acompanha o ritmo é
+desconectado, sem atrasar o pipeline nem os demais assinantes.
+
+Um assinante pode enviar uma linha JSON com filtros, por exemplo
+{"tipos": ["face"], "cameras": ["entrada"]}; sem ela recebe todos os eventos.
+"""
+import os
+import json
+import time
+import queue
+import socket
+import selectors
+import threading
+from face_detector.config.settings import ENDERECO_EVENTOS, LIMITE_BUFFER_ASSINANTE_KB, TAMANHO_FILA_EVENTOS
+from face_detector.utils.logger import log_info, log_error
+
+def _criar_socket(endereco, servidor):
+    """Cria o socket do endereço "unix:/caminho", "host:porta" ou "porta" (conectado ou em escuta)"""
+    if endereco.startswith('unix:'):
+        caminho = endereco[5:]
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if servidor:
+            if os.path.exists(caminho):
+                os.remove(caminho)
+            sock.bind(caminho)
+        else:
+            sock.connect(caminho)
+        return sock
+    
+    host, _, porta = endereco.rpartition(':')
+    alvo = (host or '127.0.0.1', int(porta))
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if servidor:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(alvo)
+    else:
+        sock.connect(alvo)
+    return sock
+
+class _Assinante:
+    """Conexão de um assinante: buffer de saída e filtros"""
+    
+    def __init__(self, sock, nome):
+        self.sock = sock
+        self.nome = nome
+        self.saida = bytearray()
+        self.entrada = b''
+        self.tipos = None
+        self.cameras = None
+    
+    def aceita(self, evento):
+        return ((self.tipos is None or evento['tipo'] in self.tipos)
+                and (self.cameras is None or str(evento.get('camera')) in self.cameras))
+
+class BarramentoEventos:
+    """Publica eventos para os assinantes conectados ao socket do barramento"""
+    
+    def __init__(self, endereco=None, limite_buffer_kb=None, tamanho_fila=None):
+        """
+        Inicializa o barramento (inativo até iniciar())
+        
+        Args:
+            endereco: "unix:/caminho", "host:porta" ou "porta" (None = ENDERECO_EVENTOS)
+            limite_buffer_kb: Bytes pendentes por assinante antes de desconectá-lo (None = LIMITE_BUFFER_ASSINANTE_KB)
+            tamanho_fila: Eventos aguardando envio; excedentes são descartados e contados (None = TAMANHO_FILA_EVENTOS)
+        """
+        self.endereco = endereco if endereco is not None else ENDERECO_EVENTOS
+        limite_buffer_kb = limite_buffer_kb if limite_buffer_kb is not None else LIMITE_BUFFER_ASSINANTE_KB
+        self.limite_buffer = int(limite_buffer_kb * 1024)
+        self.fila = queue.Queue(maxsize=tamanho_fila if tamanho_fila is not None else TAMANHO_FILA_EVENTOS)
+        self.ativo = False
+        self.servidor = None
+        self.seletor = None
+        self.despertador = None  # Par de sockets que acorda a thread a cada evento publicado
+        self.assinantes = {}
+        self.thread = None
+        self.publicados = 0
+        self.descartados = 0
+        self.desconectados = 0
+    
+    def iniciar(self, endereco=None):
+        """Abre o socket do barramento e inicia a thread de envio"""
+        if endereco is not None:
+            self.endereco = endereco
+        try:
+            self.servidor = _criar_socket(self.endereco, servidor=True)
+            self.servidor.listen(16)
+            self.servidor.setblocking(False)
+        except Exception as e:
+            log_error(f"Erro ao abrir o barramento de eventos em {self.endereco}: {str(e)}")
+            return False
+        
+        self.seletor = selectors.DefaultSelector()
+        self.seletor.register(self.servidor, selectors.EVENT_READ, 'servidor')
+        leitura, self.despertador = socket.socketpair()
+        leitura.setblocking(False)
+        self.despertador.setblocking(False)
+        self.seletor.register(leitura, selectors.EVENT_READ, 'despertador')
+        self.ativo = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        log_info(f"Barramento de eventos em {self.endereco}")
+        return True
+    
+    def publicar(self, tipo, **campos):
+        """
+        Publica um evento (sem bloquear; sem barramento ativo não faz nada)
+        
+        Args:
+            tipo: "face" ou "movimento"
+            campos: Campos do evento (valores serializáveis em JSON)
+        """
+        if not self.ativo:
+            return
+        campos['tipo'] = tipo
+        campos['ts'] = time.time()
+        try:
+            self.fila.put_nowait(campos)
+        except queue.Full:
+            self.descartados += 1
+            return
+        try:
+            self.despertador.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass  # Buffer do despertador cheio: a thread já tem o que processar
+    
+    def _loop(self):
+        """Aceita assinantes, lê filtros e envia os eventos pendentes"""
+        while self.ativo:
+            try:
+                for chave, mascara in self.seletor.select(timeout=0.5):
+                    if chave.data == 'servidor':
+                        self._aceitar()
+                    elif chave.data == 'despertador':
+                        try:
+                            chave.fileobj.recv(4096)
+                        except BlockingIOError:
+                            pass
+                    else:
+                        if mascara & selectors.EVENT_READ:
+                            self._ler(chave.data)
+                        if mascara & selectors.EVENT_WRITE and chave.data.sock.fileno() >= 0:
+                            self._enviar(chave.data)
+                self._distribuir()
+            except Exception as e:
+                log_error(f"Erro no barramento de eventos: {str(e)}")
+                time.sleep(0.1)
+    
+    def _aceitar(self):
+        """Registra um novo assinante"""
+        try:
+            sock, origem = self.servidor.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        assinante = _Assinante(sock, str(origem) if origem else 'unix')
+        self.assinantes[sock.fileno()] = assinante
+        self.seletor.register(sock, selectors.EVENT_READ, assinante)
+        log_info(f"Assinante de eventos conectado ({assinante.nome}); {len(self.assinantes)} conectados")
+    
+    def _ler(self, assinante):
+        """Lê os filtros enviados pelo assinante ou detecta a desconexão"""
+        try:
+            dados = assinante.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            dados = b''
+        if not dados:
+            self._desconectar(assinante, "desconectado")
+            return
+        assinante.entrada += dados
+        while b'\n' in assinante.entrada:
+            linha, assinante.entrada = assinante.entrada.split(b'\n', 1)
+            try:
+                filtros = json.loads(linha)
+                assinante.tipos = set(filtros['tipos']) if filtros.get('tipos') else None
+                assinante.cameras = {str(c) for c in filtros['cameras']} if filtros.get('cameras') else None
+            except Exception as e:
+                log_error(f"Filtro inválido do assinante {assinante.nome}: {str(e)}")
+    
+    def _distribuir(self):
+        """Serializa os eventos da fila e os acrescenta aos buffers dos assinantes"""
+        while True:
+            try:
+                evento = self.fila.get_nowait()
+            except queue.Empty:
+                break
+            self.publicados += 1
+            linha = (json.dumps(evento, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+            for assinante in list(self.assinantes.values()):
+                if not assinante.aceita(evento):
+                    continue
+                if len(assinante.saida) + len(linha) > self.limite_buffer:
+                    self._desconectar(assinante, "lento demais (buffer cheio)", lento=True)
+                    continue
+                assinante.saida += linha
+        
+        for assinante in list(self.assinantes.values()):
+            if assinante.saida:
+                self._enviar(assinante)
+    
+    def _enviar(self, assinante):
+        """Envia o que o socket aceitar sem bloquear; o restante aguarda o socket ficar livre"""
+        try:
+            enviados = assinante.sock.send(assinante.saida)
+            del assinante.saida[:enviados]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self._desconectar(assinante, "conexão perdida")
+            return
+        eventos = selectors.EVENT_READ | (selectors.EVENT_WRITE if assinante.saida else 0)
+        self.seletor.modify(assinante.sock, eventos, assinante)
+    
+    def _desconectar(self, assinante, motivo, lento=False):
+        """Remove um assinante (lento = desconectado por não acompanhar os eventos)"""
+        if self.assinantes.pop(assinante.sock.fileno(), None) is None:
+            return
+        if lento:
+            self.desconectados += 1
+        try:
+            self.seletor.unregister(assinante.sock)
+        except Exception:
+            pass
+        assinante.sock.close()
+        log_info(f"Assinante de eventos {assinante.nome} removido: {motivo}")
+    
+    def finalizar(self):
+        """Envia os eventos pendentes possíveis e fecha as conexões"""
+        if not self.ativo:
+            return
+        self.ativo = False
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+        self._distribuir()
+        for assinante in list(self.assinantes.values()):
+            self._desconectar(assinante, "barramento finalizado")
+        self.servidor.close()
+        if self.endereco.startswith('unix:') and os.path.exists(self.endereco[5:]):
+            os.remove(self.endereco[5:])
+        log_info(f"Barramento de eventos: {self.publicados} eventos publicados, {self.descartados} descartados, "
+                 f"{self.desconectados} assinantes lentos desconectados")
+
+def assinar(endereco=None, tipos=None, cameras=None):
+    """
+    Cliente de referência: conecta ao barramento e produz os eventos recebidos
+    
+    Args:
+        endereco: Endereço do barramento (None = ENDERECO_EVENTOS)
+        tipos: Tipos de evento desejados (None = todos)
+        cameras: Câmeras desejadas (None = todas)
+    
+    Yields:
+        Dicionário de cada evento
+    """
+    sock = _criar_socket(endereco if endereco is not None else ENDERECO_EVENTOS, servidor=False)
+    try:
+        if tipos or cameras:
+            filtros = {'tipos': list(tipos) if tipos else None, 'cameras': list(cameras) if cameras else None}
+            sock.sendall((json.dumps(filtros) + '\n').encode('utf-8'))
+        with sock.makefile('rb') as leitor:
+            for linha in leitor:
+                yield json.loads(linha)
+    finally:
+        sock.close()
+
+# Barramento único do processo (inativo até iniciar())
+barramento = BarramentoEventos()
@@ -0,0 +1,176 @@
+"""
+Clipes de eventos com os segundos anteriores e posteriores ao disparo.
+Cada câmera mantém em memória um buffer circular de frames em JPEG, limitado em
+tempo (SEGUNDOS_ANTES_EVENTO) e em bytes (MEMORIA_MAXIMA_CLIPES_MB). Um movimento
+ou uma face abre um clipe com o buffer e os frames seguintes até SEGUNDOS_APOS_EVENTO
+depois do último disparo. A compressão e a gravação acontecem na thread do gravador:
+a captura e a detecção apenas enfileiram a referência do frame.
+
+Os clipes usam o contêiner das gravações de frames e podem ser reproduzidos como fonte.
+"""
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from queue import Queue, Full, Empty
+import cv2
+from face_detector.config.settings import (
+    PASTA_CLIPES, SEGUNDOS_ANTES_EVENTO, SEGUNDOS_APOS_EVENTO, DURACAO_MAXIMA_CLIPE, FPS_MAXIMO_CLIPE,
+    QUALIDADE_JPEG_CLIPE, MEMORIA_MAXIMA_CLIPES_MB, TAMANHO_FILA_CLIPES, EXTENSAO_GRAVACAO
+)
+from face_detector.services.frame_recorder import FrameRecorder
+from face_detector.utils.logger import log_info, log_error
+
+class GravadorClipes:
+    """Buffer circular de frames comprimidos de uma câmera e gravação de clipes de eventos"""
+    
+    def __init__(self, camera_id, prefixo_arquivo="", pasta=None, antes=None, apos=None, duracao_maxima=None,
+                 fps_maximo=None, qualidade=None, memoria_maxima_mb=None, metricas=None):
+        """
+        Inicializa o gravador de clipes
+        
+        Args:
+            camera_id: Identificador da câmera
+            prefixo_arquivo: Prefixo dos arquivos de clipe desta câmera
+            pasta: Pasta dos clipes (None = PASTA_CLIPES)
+            antes: Segundos de frames mantidos antes do disparo (None = SEGUNDOS_ANTES_EVENTO)
+            apos: Segundos gravados após o último disparo (None = SEGUNDOS_APOS_EVENTO)
+            duracao_maxima: Duração máxima de um clipe em segundos (None = DURACAO_MAXIMA_CLIPE)
+            fps_maximo: Frames por segundo guardados no buffer (None = FPS_MAXIMO_CLIPE)
+            qualidade: Qualidade JPEG dos frames (None = QUALIDADE_JPEG_CLIPE)
+            memoria_maxima_mb: Limite de memória do buffer em MB (None = MEMORIA_MAXIMA_CLIPES_MB)
+            metricas: MetricasCamera para publicar memória, clipes e descartes (None = sem métricas)
+        """
+        self.camera_id = camera_id
+        self.prefixo_arquivo = prefixo_arquivo
+        self.pasta = pasta if pasta is not None else PASTA_CLIPES
+        self.antes = antes if antes is not None else SEGUNDOS_ANTES_EVENTO
+        self.apos = apos if apos is not None else SEGUNDOS_APOS_EVENTO
+        self.duracao_maxima = duracao_maxima if duracao_maxima is not None else DURACAO_MAXIMA_CLIPE
+        fps_maximo = fps_maximo if fps_maximo is not None else FPS_MAXIMO_CLIPE
+        self.intervalo_minimo = 1.0 / fps_maximo if fps_maximo > 0 else 0.0
+        self.qualidade = qualidade if qualidade is not None else QUALIDADE_JPEG_CLIPE
+        memoria_maxima_mb = memoria_maxima_mb if memoria_maxima_mb is not None else MEMORIA_MAXIMA_CLIPES_MB
+        self.memoria_maxima = int(memoria_maxima_mb * 1024 * 1024)
+        self.metricas = metricas
+        
+        # Buffer circular: (timestamp, jpeg, forma) do mais antigo ao mais recente
+        self.buffer = deque()
+        self.bytes_buffer = 0
+        self.fila = Queue(maxsize=TAMANHO_FILA_CLIPES)
+        self.disparos = deque()  # (timestamp, motivo) ainda não tratados pela thread
+        self.ultimo_aceito = 0
+        self.clipe = None        # FrameRecorder do clipe em gravação
+        self.fim_clipe = 0
+        self.inicio_clipe = 0
+        self.clipes_gravados = 0
+        self.descartados = 0
+        self.thread = None
+        self.running = False
+        
+        if metricas is not None:
+            metricas.medidor('memoria_buffer_clipes_bytes', lambda: self.bytes_buffer)
+            metricas.medidor('frames_buffer_clipes', lambda: len(self.buffer))
+    
+    def iniciar(self):
+        """Inicia a thread de compressão e gravação"""
+        os.makedirs(self.pasta, exist_ok=True)
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        log_info(f"[{self.camera_id}] Clipes de eventos: {self.antes:g}s antes e {self.apos:g}s após cada disparo, "
+                 f"buffer de até {self.memoria_maxima / (1024 * 1024):.0f} MB")
+    
+    def adicionar(self, frame, timestamp):
+        """Enfileira um frame para o buffer (o frame é apenas lido; excedentes são descartados e contados)"""
+        if timestamp - self.ultimo_aceito < self.intervalo_minimo:
+            return
+        self.ultimo_aceito = timestamp
+        try:
+            self.fila.put_nowait((frame, timestamp))
+        except Full:
+            self.descartados += 1
+            if self.metricas is not None:
+                self.metricas.incrementar('frames_descartados_clipes')
+    
+    def disparar(self, timestamp, motivo):
+        """
+        Solicita um clipe em torno de um evento (ou estende o clipe em gravação)
+        
+        Args:
+            timestamp: Timestamp do frame do evento
+            motivo: Texto usado no nome do arquivo ("movimento", "face")
+        """
+        self.disparos.append((timestamp, motivo))
+    
+    def _loop(self):
+        """Comprime os frames no buffer e grava os clipes disparados"""
+        while self.running or not self.fila.empty():
+            try:
+                frame, timestamp = self.fila.get(timeout=0.1)
+            except Empty:
+                continue
+            try:
+                self._tratar_disparos()
+                self._guardar(frame, timestamp)
+            except Exception as e:
+                log_error(f"[{self.camera_id}] Erro no gravador de clipes: {str(e)}")
+        
+        self._tratar_disparos()
+        self._encerrar_clipe()
+    
+    def _guardar(self, frame, timestamp):
+        """Comprime o frame, acrescenta ao buffer e, com um clipe aberto, ao clipe"""
+        ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.qualidade])
+        if not ok:
+            return
+        dados = jpeg.tobytes()
+        self.buffer.append((timestamp, dados, frame.shape))
+        self.bytes_buffer += len(dados)
+        
+        # Limites do buffer: segundos antes do evento e memória
+        while self.buffer and (timestamp - self.buffer[0][0] > self.antes or self.bytes_buffer > self.memoria_maxima):
+            self.bytes_buffer -= len(self.buffer.popleft()[1])
+        
+        if self.clipe is not None:
+            if timestamp > self.fim_clipe:
+                self._encerrar_clipe()
+            else:
+                self.clipe.gravar_codificado(dados, frame.shape, timestamp)
+    
+    def _tratar_disparos(self):
+        """Abre um clipe com o buffer ou estende o clipe em gravação"""
+        while self.disparos:
+            timestamp, motivo = self.disparos.popleft()
+            if self.clipe is None:
+                self._abrir_clipe(timestamp, motivo)
+            # O clipe termina SEGUNDOS_APOS_EVENTO após o último disparo, até a duração máxima
+            self.fim_clipe = min(max(self.fim_clipe, timestamp + self.apos), self.inicio_clipe + self.duracao_maxima)
+    
+    def _abrir_clipe(self, timestamp, motivo):
+        """Cria o arquivo do clipe e grava os frames do buffer a partir de SEGUNDOS_ANTES_EVENTO"""
+        instante = datetime.fromtimestamp(timestamp).strftime("%Y%m%d_%H%M%S")
+        caminho = os.path.join(self.pasta, f"clipe_{self.prefixo_arquivo}{motivo}_{instante}{EXTENSAO_GRAVACAO}")
+        self.clipe = FrameRecorder(caminho, formato='jpeg')
+        self.inicio_clipe = timestamp - self.antes
+        self.fim_clipe = 0
+        for ts, dados, forma in list(self.buffer):
+            if ts >= self.inicio_clipe:
+                self.clipe.gravar_codificado(dados, forma, ts)
+    
+    def _encerrar_clipe(self):
+        """Fecha o clipe em gravação"""
+        if self.clipe is None:
+            return
+        self.clipe.fechar()
+        self.clipes_gravados += 1
+        if self.metricas is not None:
+            self.metricas.incrementar('clipes_gravados')
+        log_info(f"[{self.camera_id}] Clipe salvo: {self.clipe.caminho} ({self.clipe.gravados} frames)")
+        self.clipe = None
+    
+    def finalizar(self):
+        """Comprime os frames pendentes, encerra o clipe em gravação e para a thread"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=10.0)
@@ -0,0 +1,349 @@
+"""
+Agrupamento incremental das faces desconhecidas.
+Cada encoding desconhecido é atribuído ao cluster de centróide mais próximo com
+uma única operação vetorizada sobre a matriz de centróides (ou abre um cluster
+novo). Uma thread de manutenção funde clusters próximos, divide clusters que
+cresceram demais e grava o estado em disco, de onde um cluster pode ser
+promovido a identidade conhecida.
+"""
+import os
+import json
+import time
+import threading
+from collections import deque
+import numpy as np
+from face_detector.config.settings import (
+    DISTANCIA_CLUSTER_DESCONHECIDO, DISTANCIA_FUSAO_CLUSTERS, DISPERSAO_DIVISAO_CLUSTER, MEMBROS_POR_CLUSTER,
+    MAX_CLUSTERS_DESCONHECIDOS, INTERVALO_MANUTENCAO_CLUSTERS, ARQUIVO_CLUSTERS
+)
+from face_detector.utils.logger import log_info, log_error
+from face_detector.utils.file_utils import salvar_encoding
+
+DIMENSAO_ENCODING = 128
+CAPACIDADE_INICIAL = 256
+MIN_MEMBROS_DIVISAO = 8  # Membros recentes necessários para tentar dividir um cluster
+
+def _dois_grupos(membros, iteracoes=5):
+    """
+    Divide os membros em dois grupos (2-means iniciado pelos pontos mais afastados)
+    
+    Returns:
+        Tupla (rótulos 0/1 por membro, centróide do grupo 0, centróide do grupo 1)
+    """
+    centro = membros.mean(axis=0)
+    a = membros[np.argmax(np.linalg.norm(membros - centro, axis=1))]
+    b = membros[np.argmax(np.linalg.norm(membros - a, axis=1))]
+    for _ in range(iteracoes):
+        rotulos = (np.linalg.norm(membros - b, axis=1) < np.linalg.norm(membros - a, axis=1)).astype(np.int64)
+        if rotulos.all() or not rotulos.any():
+            break
+        a, b = membros[rotulos == 0].mean(axis=0), membros[rotulos == 1].mean(axis=0)
+    return rotulos, a, b
+
+class AgrupadorDesconhecidos:
+    """Clusters de faces desconhecidas mantidos em memória e persistidos periodicamente"""
+    
+    def __init__(self, arquivo=None, distancia=None, distancia_fusao=None, dispersao_divisao=None,
+                 max_clusters=None, intervalo_manutencao=None):
+        """
+        Inicializa o agrupador, carregando os clusters salvos
+        
+        Args:
+            arquivo: Arquivo .npz dos clusters (None = ARQUIVO_CLUSTERS)
+            distancia: Distância máxima ao centróide para entrar em um cluster
+            distancia_fusao: Centróides mais próximos que isto são fundidos na manutenção
+            dispersao_divisao: Distância de um membro ao centróide que leva a tentar dividir o cluster
+            max_clusters: Número máximo de clusters (os vistos há mais tempo são descartados)
+            intervalo_manutencao: Intervalo entre fusão, divisão e gravação em disco (segundos)
+        """
+        self.arquivo = arquivo if arquivo is not None else ARQUIVO_CLUSTERS
+        self.distancia = distancia if distancia is not None else DISTANCIA_CLUSTER_DESCONHECIDO
+        self.distancia_fusao = distancia_fusao if distancia_fusao is not None else DISTANCIA_FUSAO_CLUSTERS
+        self.dispersao_divisao = dispersao_divisao if dispersao_divisao is not None else DISPERSAO_DIVISAO_CLUSTER
+        self.max_clusters = max_clusters if max_clusters is not None else MAX_CLUSTERS_DESCONHECIDOS
+        self.intervalo_manutencao = (intervalo_manutencao if intervalo_manutencao is not None
+                                     else INTERVALO_MANUTENCAO_CLUSTERS)
+        
+        # Uma linha por cluster nas matrizes; info[i] guarda os dados do cluster da linha i
+        self.centroides = np.zeros((CAPACIDADE_INICIAL, DIMENSAO_ENCODING), dtype=np.float64)
+        self.normas = np.zeros(CAPACIDADE_INICIAL, dtype=np.float64)  # Quadrado da norma dos centróides
+        self.contagens = np.zeros(CAPACIDADE_INICIAL, dtype=np.int64)
+        self.info = []
+        self.linhas = {}  # id do cluster -> linha
+        self.proximo_id = 1
+        self.alterados = set()  # Clusters que receberam faces desde a última manutenção
+        
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+        self.carregar()
+    
+    @property
+    def total(self):
+        return len(self.info)
+    
+    def _garantir_capacidade(self):
+        """Dobra as matrizes quando estão cheias"""
+        if self.total < len(self.centroides):
+            return
+        capacidade = len(self.centroides) * 2
+        self.centroides = np.resize(self.centroides, (capacidade, DIMENSAO_ENCODING))
+        self.normas = np.resize(self.normas, capacidade)
+        self.contagens = np.resize(self.contagens, capacidade)
+    
+    def _novo_cluster(self, centroide, contagem, membros, agora, dados=None):
+        """Acrescenta um cluster na última linha e retorna o seu id (o de dados, se houver, ou um novo)"""
+        self._garantir_capacidade()
+        linha = self.total
+        if dados and 'id' in dados:
+            cluster_id = dados['id']
+        else:
+            cluster_id = self.proximo_id
+            self.proximo_id += 1
+        self.centroides[linha] = centroide
+        self.normas[linha] = centroide @ centroide
+        self.contagens[linha] = contagem
+        info = {'id': cluster_id, 'criado_em': agora, 'ultima_vez': agora, 'representante': None,
+                'qualidade': 0.0, 'membros': deque(membros, maxlen=MEMBROS_POR_CLUSTER)}
+        if dados:
+            info.update(dados)
+        self.info.append(info)
+        self.linhas[cluster_id] = linha
+        self.alterados.add(cluster_id)
+        return cluster_id
+    
+    def _remover(self, linha):
+        """Remove o cluster da linha, movendo o último cluster para o lugar dele"""
+        ultima = self.total - 1
+        removido = self.info[linha]
+        if linha != ultima:
+            self.centroides[linha] = self.centroides[ultima]
+            self.normas[linha] = self.normas[ultima]
+            self.contagens[linha] = self.contagens[ultima]
+            self.info[linha] = self.info[ultima]
+            self.linhas[self.info[linha]['id']] = linha
+        self.info.pop()
+        del self.linhas[removido['id']]
+        self.alterados.discard(removido['id'])
+    
+    def _descartar_antigos(self):
+        """Descarta de uma vez o 1% de clusters vistos há mais tempo (custo diluído entre as atribuições)"""
+        quantidade = max(1, self.max_clusters // 100)
+        antigos = sorted(self.info, key=lambda info: info['ultima_vez'])[:quantidade]
+        for info in antigos:
+            self._remover(self.linhas[info['id']])
+    
+    def _distancias(self, encoding):
+        """Distâncias do encoding a todos os centróides (|c|² - 2c·e + |e|², sem matriz de diferenças)"""
+        n = self.total
+        quadrados = self.normas[:n] - 2.0 * (self.centroides[:n] @ encoding) + encoding @ encoding
+        return np.sqrt(np.maximum(quadrados, 0.0))
+    
+    def atribuir(self, encoding, agora=None):
+        """
+        Atribui um encoding desconhecido a um cluster
+        
+        Args:
+            encoding: Encoding da face (128 valores)
+            agora: Instante da detecção (None = agora)
+        
+        Returns:
+            ID do cluster (existente ou criado para o encoding)
+        """
+        agora = agora if agora is not None else time.time()
+        encoding = np.asarray(encoding, dtype=np.float64)
+        with self.lock:
+            if self.total > 0:
+                distancias = self._distancias(encoding)
+                linha = int(np.argmin(distancias))
+                if distancias[linha] <= self.distancia:
+                    # Média incremental: o centróide acompanha todos os membros já vistos
+                    self.contagens[linha] += 1
+                    self.centroides[linha] += (encoding - self.centroides[linha]) / self.contagens[linha]
+                    self.normas[linha] = self.centroides[linha] @ self.centroides[linha]
+                    info = self.info[linha]
+                    info['ultima_vez'] = agora
+                    info['membros'].append(encoding)
+                    self.alterados.add(info['id'])
+                    return info['id']
+            
+            if self.total >= self.max_clusters:
+                self._descartar_antigos()
+            return self._novo_cluster(encoding, 1, [encoding], agora)
+    
+    def definir_representante(self, cluster_id, caminho, qualidade):
+        """Guarda o recorte salvo como representante do cluster, se for o de melhor qualidade"""
+        with self.lock:
+            linha = self.linhas.get(cluster_id)
+            if linha is not None and (self.info[linha]['representante'] is None
+                                      or qualidade > self.info[linha]['qualidade']):
+                self.info[linha]['representante'] = caminho
+                self.info[linha]['qualidade'] = qualidade
+    
+    def manter(self):
+        """Funde clusters próximos e divide clusters dispersos entre os que receberam faces"""
+        with self.lock:
+            fundidos = self._fundir()
+            divididos = self._dividir()
+            self.alterados = set()
+        if fundidos or divididos:
+            log_info(f"Clusters de desconhecidos: {fundidos} fundidos, {divididos} divididos, {self.total} no total")
+    
+    def _fundir(self):
+        """Funde cada cluster alterado ao cluster mais próximo, se os centróides estiverem perto"""
+        fundidos = 0
+        for cluster_id in list(self.alterados):
+            linha = self.linhas.get(cluster_id)
+            if linha is None or self.total < 2:
+                continue
+            distancias = self._distancias(self.centroides[linha])
+            distancias[linha] = np.inf
+            outra = int(np.argmin(distancias))
+            if distancias[outra] > self.distancia_fusao:
+                continue
+            
+            # O cluster mais antigo permanece (mantém o id já conhecido fora do processo)
+            destino, origem = (outra, linha) if self.info[outra]['id'] < cluster_id else (linha, outra)
+            total = self.contagens[destino] + self.contagens[origem]
+            self.centroides[destino] = (self.centroides[destino] * self.contagens[destino] +
+                                        self.centroides[origem] * self.contagens[origem]) / total
+            self.normas[destino] = self.centroides[destino] @ self.centroides[destino]
+            self.contagens[destino] = total
+            info_destino, info_origem = self.info[destino], self.info[origem]
+            info_destino['membros'].extend(info_origem['membros'])
+            info_destino['criado_em'] = min(info_destino['criado_em'], info_origem['criado_em'])
+            info_destino['ultima_vez'] = max(info_destino['ultima_vez'], info_origem['ultima_vez'])
+            if info_origem['qualidade'] > info_destino['qualidade']:
+                info_destino['representante'] = info_origem['representante']
+                info_destino['qualidade'] = info_origem['qualidade']
+            self._remover(origem)
+            fundidos += 1
+        return fundidos
+    
+    def _dividir(self):
+        """Divide em dois os clusters alterados cujos membros recentes formam grupos separados"""
+        divididos = 0
+        for cluster_id in list(self.alterados):
+            linha = self.linhas.get(cluster_id)
+            if linha is None or len(self.info[linha]['membros']) < MIN_MEMBROS_DIVISAO:
+                continue
+            membros = np.array(self.info[linha]['membros'])
+            if np.linalg.norm(membros - self.centroides[linha], axis=1).max() < self.dispersao_divisao:
+                continue
+            rotulos, centro_a, centro_b = _dois_grupos(membros)
+            if rotulos.all() or not rotulos.any() or np.linalg.norm(centro_a - centro_b) <= self.distancia:
+                continue
+            
+            # O grupo maior permanece no cluster; o outro vira um cluster novo com parte da contagem
+            maior = 0 if (rotulos == 0).sum() >= (rotulos == 1).sum() else 1
+            centros = (centro_a, centro_b)
+            fracao = (rotulos != maior).mean()
+            contagem_nova = max(1, int(round(self.contagens[linha] * fracao)))
+            info = self.info[linha]
+            self.centroides[linha] = centros[maior]
+            self.normas[linha] = centros[maior] @ centros[maior]
+            self.contagens[linha] = max(1, self.contagens[linha] - contagem_nova)
+            info['membros'] = deque(membros[rotulos == maior], maxlen=MEMBROS_POR_CLUSTER)
+            self._novo_cluster(centros[1 - maior], contagem_nova, membros[rotulos != maior], info['ultima_vez'],
+                               {'criado_em': info['criado_em']})
+            divididos += 1
+        return divididos
+    
+    def listar(self):
+        """Resumo dos clusters, do mais visto para o menos visto"""
+        with self.lock:
+            clusters = [{'id': info['id'], 'faces': int(self.contagens[linha]), 'criado_em': info['criado_em'],
+                         'ultima_vez': info['ultima_vez'], 'representante': info['representante']}
+                        for linha, info in enumerate(self.info)]
+        return sorted(clusters, key=lambda c: c['faces'], reverse=True)
+    
+    def promover(self, cluster_id, nome_arquivo):
+        """
+        Salva o centróide de um cluster como encoding de uma identidade conhecida
+        
+        Args:
+            cluster_id: Cluster a promover
+            nome_arquivo: Arquivo do encoding na pasta de encodings (ex.: "maria_silva.pickle")
+        
+        Returns:
+            Caminho do encoding salvo ou None se o cluster não existir
+        """
+        with self.lock:
+            linha = self.linhas.get(cluster_id)
+            if linha is None:
+                return None
+            centroide = self.centroides[linha].copy()
+        return salvar_encoding(centroide, nome_arquivo)
+    
+    def salvar(self):
+        """Grava os clusters em disco (arquivo temporário e troca atômica)"""
+        with self.lock:
+            n = self.total
+            membros = [np.array(info['membros']).reshape(-1, DIMENSAO_ENCODING) for info in self.info]
+            metadados = [{chave: valor for chave, valor in info.items() if chave != 'membros'} for info in self.info]
+            dados = {
+                'centroides': self.centroides[:n].copy(),
+                'contagens': self.contagens[:n].copy(),
+                'membros': np.concatenate(membros) if membros else np.zeros((0, DIMENSAO_ENCODING)),
+                'membros_por_cluster': np.array([len(m) for m in membros], dtype=np.int64),
+                'metadados': np.array(json.dumps({'proximo_id': self.proximo_id, 'clusters': metadados}))
+            }
+        try:
+            pasta = os.path.dirname(self.arquivo)
+            if pasta:
+                os.makedirs(pasta, exist_ok=True)
+            temporario = self.arquivo + '.tmp.npz'
+            np.savez(temporario, **dados)
+            os.replace(temporario, self.arquivo)
+        except Exception as e:
+            log_error(f"Erro ao salvar clusters de desconhecidos: {str(e)}")
+    
+    def carregar(self):
+        """Carrega os clusters salvos, se o arquivo existir"""
+        if not os.path.exists(self.arquivo):
+            return
+        try:
+            with np.load(self.arquivo) as dados:
+                metadados = json.loads(str(dados['metadados']))
+                centroides, contagens = dados['centroides'], dados['contagens']
+                membros = np.split(dados['membros'], np.cumsum(dados['membros_por_cluster'])[:-1])
+            with self.lock:
+                for centroide, contagem, membros_cluster, info in zip(centroides, contagens, membros,
+                                                                      metadados['clusters']):
+                    self._novo_cluster(centroide, int(contagem), list(membros_cluster), info['ultima_vez'], info)
+                self.proximo_id = metadados['proximo_id']
+                self.alterados = set()
+            log_info(f"{self.total} clusters de desconhecidos carregados de {self.arquivo}")
+        except Exception as e:
+            log_error(f"Erro ao carregar clusters de desconhecidos: {str(e)}")
+    
+    def iniciar(self):
+        """Inicia a thread de manutenção e gravação periódica"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+    
+    def _loop(self):
+        """Manutenção e gravação a cada intervalo, enquanto houver mudanças"""
+        proxima = time.time() + self.intervalo_manutencao
+        while self.running:
+            if time.time() < proxima:
+                time.sleep(0.5)
+                continue
+            proxima = time.time() + self.intervalo_manutencao
+            if self.alterados:
+                try:
+                    self.manter()
+                    self.salvar()
+                except Exception as e:
+                    log_error(f"Erro na manutenção dos clusters de desconhecidos: {str(e)}")
+    
+    def finalizar(self):
+        """Para a thread de manutenção e grava o estado final"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+        self.manter()
+        self.salvar()
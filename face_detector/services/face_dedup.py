@@ -0,0 +1,76 @@
+"""
+Deduplicação das faces salvas.
+Uma pessoa parada diante da câmera gera dezenas de recortes quase idênticos;
+aqui cada aparição (pessoa reconhecida ou desconhecido com encoding próximo)
+é salva na primeira detecção e de novo apenas se surgir uma captura melhor.
+A aparição termina depois de TEMPO_EXPIRACAO_FACE sem a pessoa ser vista.
+"""
+import time
+import threading
+import numpy as np
+from face_detector.config.settings import (
+    TEMPO_EXPIRACAO_FACE, DISTANCIA_DEDUP_DESCONHECIDO, MARGEM_QUALIDADE_DEDUP
+)
+
+class DeduplicadorSalvamento:
+    """Decide se uma face identificada deve ser salva ou é repetição da mesma aparição"""
+    
+    def __init__(self, janela=None, distancia_maxima=None, margem_qualidade=None):
+        """
+        Inicializa o deduplicador
+        
+        Args:
+            janela: Tempo sem ver a pessoa para encerrar a aparição (None = TEMPO_EXPIRACAO_FACE)
+            distancia_maxima: Distância máxima entre encodings de desconhecidos da mesma aparição
+            margem_qualidade: Melhora de qualidade necessária para salvar de novo na mesma aparição
+        """
+        self.janela = janela if janela is not None else TEMPO_EXPIRACAO_FACE
+        self.distancia_maxima = distancia_maxima if distancia_maxima is not None else DISTANCIA_DEDUP_DESCONHECIDO
+        self.margem_qualidade = margem_qualidade if margem_qualidade is not None else MARGEM_QUALIDADE_DEDUP
+        self.aparicoes = {}  # camera_id -> lista de aparições em andamento
+        self.lock = threading.Lock()
+    
+    def _encontrar(self, aparicoes, identidade, encoding):
+        """Aparição da mesma pessoa: mesma identidade ou, para desconhecidos, o encoding mais próximo"""
+        if identidade is not None:
+            return next((a for a in aparicoes if a['identidade'] == identidade), None)
+        
+        desconhecidas = [a for a in aparicoes if a['identidade'] is None]
+        if not desconhecidas:
+            return None
+        distancias = np.linalg.norm(np.array([a['encoding'] for a in desconhecidas]) - encoding, axis=1)
+        mais_proxima = int(np.argmin(distancias))
+        return desconhecidas[mais_proxima] if distancias[mais_proxima] <= self.distancia_maxima else None
+    
+    def avaliar(self, camera_id, identidade, encoding, qualidade, agora=None):
+        """
+        Registra uma face identificada e indica se ela deve ser salva
+        
+        Args:
+            camera_id: Câmera da face (as aparições são separadas por câmera)
+            identidade: ID da pessoa reconhecida ou None para desconhecidos
+            encoding: Encoding da face (usado para agrupar desconhecidos)
+            qualidade: Pontuação de qualidade da captura (0-1)
+            agora: Instante da detecção (None = agora)
+        
+        Returns:
+            True para a primeira captura da aparição ou uma captura melhor que a última salva
+        """
+        agora = agora if agora is not None else time.time()
+        with self.lock:
+            aparicoes = [a for a in self.aparicoes.get(camera_id, []) if agora - a['ultima_vez'] <= self.janela]
+            self.aparicoes[camera_id] = aparicoes
+            
+            aparicao = self._encontrar(aparicoes, identidade, encoding)
+            if aparicao is None:
+                aparicoes.append({'identidade': identidade, 'encoding': encoding, 'ultima_vez': agora,
+                                  'qualidade': qualidade})
+                return True
+            
+            # Acompanhar a pessoa pelo encoding mais recente (a pose muda ao longo da aparição)
+            aparicao['ultima_vez'] = agora
+            aparicao['encoding'] = encoding
+            if qualidade >= aparicao['qualidade'] + self.margem_qualidade:
+                aparicao['qualidade'] = qualidade
+                return True
+            return False
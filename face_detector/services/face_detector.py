@@ -2,22 +2,31 @@
 Serviço para detecção e reconhecimento facial.
 Implementa processamento paralelo para melhor desempenho.
 """
+import time
 import cv2
-import face_recognition
 from datetime import datetime
 import concurrent.futures
 import numpy as np
 from face_detector.config.settings import (
-    FACE_SIMILARITY_THRESHOLD, MODELO_FACE, NUM_JITTERS,
-    COR_VERDE, COR_VERMELHO, QUALIDADE_JPEG
+    FACE_SIMILARITY_THRESHOLD, MODELO_FACE, NUM_JITTERS, ESCALA_DETECCAO_FACE,
+    APLICAR_MELHORIA_IMAGEM, COR_VERDE, COR_VERMELHO, QUALIDADE_JPEG, RESOLUCAO_CAPTURA, DEDUPLICAR_SALVAMENTOS
 )
 from face_detector.utils.logger import log_face, log_captura
 from face_detector.utils.image_utils import melhorar_imagem, salvar_imagem
+from face_detector.utils.metricas import registro
+from face_detector.utils.rastreamento import rastreador
+from face_detector.utils.perfil import perfil
+from face_detector.models.anotacoes import Anotacoes
+from face_detector.services.modelos import modelos
+from face_detector.services.face_dedup import DeduplicadorSalvamento
+from face_detector.services.face_quality import qualidade_recorte
+from face_detector.services.event_bus import barramento
 
 class FaceDetector:
     """Classe para detecção e reconhecimento facial com processamento paralelo"""
     
-    def __init__(self, similarity_threshold=None, modelo=None, num_jitters=None, max_workers=4):
+    def __init__(self, similarity_threshold=None, modelo=None, num_jitters=None, max_workers=4, batcher=None,
+                 deduplicar=None, agrupador=None, historico=None):
         """
         Inicializa o detector facial com os parâmetros especificados
         
@@ -26,47 +35,107 @@ class FaceDetector:
             modelo: Modelo de detecção (hog ou cnn)
             num_jitters: Número de vezes para amostrar a face durante o encoding
             max_workers: Número máximo de threads para processamento paralelo
+            batcher: EncodingBatcher para calcular encodings em lote (None = encoding por frame)
+            deduplicar: Salvar cada pessoa uma vez por aparição (None = DEDUPLICAR_SALVAMENTOS)
+            agrupador: AgrupadorDesconhecidos que agrupa os encodings de desconhecidos (None = não agrupar)
+            historico: RegistroEncodings que guarda o encoding de cada face (None = não registrar)
         """
         self.similarity_threshold = similarity_threshold if similarity_threshold is not None else FACE_SIMILARITY_THRESHOLD
         self.modelo = modelo if modelo is not None else MODELO_FACE
         self.num_jitters = num_jitters if num_jitters is not None else NUM_JITTERS
         self.max_workers = max_workers
         self.thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self.batcher = batcher
+        deduplicar = deduplicar if deduplicar is not None else DEDUPLICAR_SALVAMENTOS
+        self.deduplicador = DeduplicadorSalvamento() if deduplicar else None
+        self.agrupador = agrupador
+        self.historico = historico
+        
+        # Parâmetros ajustáveis em tempo de execução pelo controle de carga
+        self.escala_deteccao = ESCALA_DETECCAO_FACE
+        self.aplicar_melhoria = APLICAR_MELHORIA_IMAGEM
     
-    def detectar_faces(self, frame):
-        """Detecta faces em um frame e retorna as localizações e encodings"""
+    def _observar(self, etapa, camera_id, inicio):
+        """Registra no histograma da etapa o tempo decorrido desde inicio"""
+        registro.histograma(etapa, camera_id).observar(time.time() - inicio)
+    
+    def localizar_faces(self, frame, regiao=None, camera_id=None):
+        """
+        Localiza faces em um frame
+        
+        Args:
+            frame: Frame BGR
+            regiao: Região (x, y, w, h) à qual limitar a busca (None = frame inteiro)
+            camera_id: Câmera de origem do frame (para as métricas de latência)
+        
+        Returns:
+            Tupla com (frame RGB reduzido, localizações nele, transformação para o frame original)
+        """
+        # Limitar a busca à região de movimento, com margem para não cortar a cabeça
+        origem_x, origem_y = 0, 0
+        if regiao is not None:
+            x, y, w, h = regiao
+            margem_x, margem_y = int(w * 0.2), int(h * 0.2)
+            origem_x, origem_y = max(0, x - margem_x), max(0, y - margem_y)
+            frame = frame[origem_y:y + h + margem_y, origem_x:x + w + margem_x]
+        
         # Aplicar melhorias na imagem antes da detecção
-        frame_melhorado = melhorar_imagem(frame)
+        inicio = time.time()
+        with rastreador.span('melhorar_imagem'):
+            frame_melhorado = melhorar_imagem(frame, self.aplicar_melhoria)
         
         # Reduzir o tamanho do frame para processamento mais rápido
         # Usando 0.5 em vez de 0.25 para melhor qualidade
-        small_frame = cv2.resize(frame_melhorado, (0, 0), fx=0.5, fy=0.5)
+        escala = self.escala_deteccao
+        small_frame = cv2.resize(frame_melhorado, (0, 0), fx=escala, fy=escala)
         
         # Converter de BGR (OpenCV) para RGB (face_recognition)
         rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
         
         # Encontrar todas as faces no frame com mais precisão
-        face_locations = face_recognition.face_locations(rgb_small_frame, 
-                                                        model=self.modelo, 
-                                                        number_of_times_to_upsample=1)
+        with rastreador.span('face_locations'):
+            face_locations = modelos.api.face_locations(rgb_small_frame, 
+                                                            model=self.modelo, 
+                                                            number_of_times_to_upsample=1)
+        self._observar('deteccao', camera_id, inicio)
         
         # Logar quando encontrar faces (importante para ambiente de linha de produção)
         if face_locations:
             log_face(f"✅ ENCONTRADAS {len(face_locations)} FACES")
         
+        return rgb_small_frame, face_locations, (escala, origem_x, origem_y)
+    
+    def detectar_faces(self, frame, regiao=None, camera_id=None):
+        """Detecta faces em um frame e retorna as localizações e encodings"""
+        rgb_small_frame, face_locations, transformacao = self.localizar_faces(frame, regiao, camera_id)
+        
         # Calcular os encodings das faces com mais precisão
-        face_encodings = face_recognition.face_encodings(rgb_small_frame, 
-                                                        face_locations, 
+        inicio = time.time()
+        with rastreador.span('face_encodings'):
+            face_encodings = modelos.api.face_encodings(rgb_small_frame,
+                                                        face_locations,
                                                         num_jitters=self.num_jitters)
+        if face_locations:
+            self._observar('encoding', camera_id, inicio)
         
-        # Ajustar as localizações das faces para o tamanho original do frame
+        return self.ajustar_localizacoes(face_locations, transformacao), face_encodings
+    
+    def ajustar_localizacoes(self, face_locations, transformacao):
+        """
+        Ajusta as localizações das faces para o tamanho original do frame
+        
+        Args:
+            face_locations: Localizações no frame reduzido
+            transformacao: Tupla (escala, origem_x, origem_y) retornada por localizar_faces
+        """
+        escala, origem_x, origem_y = transformacao
         original_face_locations = []
         for (top, right, bottom, left) in face_locations:
-            # Multiplicar por 2 porque usamos fx=0.5
-            top *= 2
-            right *= 2
-            bottom *= 2
-            left *= 2
+            # Desfazer a redução de escala e o recorte da região
+            top = int(top / escala) + origem_y
+            right = int(right / escala) + origem_x
+            bottom = int(bottom / escala) + origem_y
+            left = int(left / escala) + origem_x
             
             # Expandir um pouco a área da face para capturar melhor
             height = bottom - top
@@ -80,38 +149,107 @@ class FaceDetector:
             
             original_face_locations.append((top, right, bottom, left))
         
-        return original_face_locations, face_encodings
+        return original_face_locations
+    
+    def aquecer(self, resolucao=None):
+        """
+        Executa detecção e encoding em um frame sintético, antes da captura
+        
+        As primeiras chamadas dos modelos pagam a carga e as alocações iniciais;
+        feitas na inicialização, não atrasam a primeira pessoa que passar.
+        
+        Args:
+            resolucao: Tupla (largura, altura) do frame sintético (None = RESOLUCAO_CAPTURA)
+        
+        Returns:
+            Duração do aquecimento (segundos)
+        """
+        inicio = time.time()
+        api = modelos.carregar()
+        largura, altura = resolucao if resolucao is not None else RESOLUCAO_CAPTURA
+        frame = np.full((altura, largura, 3), 128, dtype=np.uint8)
+        
+        # Mesmo caminho da localização, sem métricas nem spans
+        frame_melhorado = melhorar_imagem(frame, self.aplicar_melhoria)
+        small_frame = cv2.resize(frame_melhorado, (0, 0), fx=self.escala_deteccao, fy=self.escala_deteccao)
+        rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+        api.face_locations(rgb_small_frame, model=self.modelo, number_of_times_to_upsample=1)
+        
+        # O frame não tem faces: o encoding é calculado sobre uma região central fixa
+        altura_small, largura_small = rgb_small_frame.shape[:2]
+        lado = min(altura_small, largura_small) // 3
+        top, left = (altura_small - lado) // 2, (largura_small - lado) // 2
+        face_locations = [(top, left + lado, top + lado, left)]
+        if self.batcher is not None:
+            chips = self.batcher.extrair_chips(rgb_small_frame, face_locations)
+            api.face_encoder.compute_face_descriptor(chips, self.num_jitters)
+        else:
+            api.face_encodings(rgb_small_frame, face_locations, num_jitters=self.num_jitters)
+        
+        return time.time() - inicio
     
     def _processar_face_individual(self, args):
         """
         Processa uma face individual (para execução paralela)
         
         Args:
-            args: Tupla contendo (frame, face_location, face_encoding, pessoa_conhecida_encoding, pessoa_info, index)
+            args: Tupla contendo (frame, face_location, face_encoding, pessoa_conhecida_encoding, pessoa_info, index,
+                  camera_id, timestamp)
         
         Returns:
             Tupla com (face_location, match, similarity, face_filename, index)
         """
-        frame, face_location, face_encoding, pessoa_conhecida_encoding, pessoa_info, index = args
+        frame, face_location, face_encoding, pessoa_conhecida_encoding, pessoa_info, index, camera_id, timestamp = args
         
         # Calcular a distância entre os encodings (menor = mais similar)
-        face_distances = face_recognition.face_distance([pessoa_conhecida_encoding], face_encoding)
+        inicio = time.time()
+        with rastreador.span('face_distance'):
+            face_distances = modelos.api.face_distance([pessoa_conhecida_encoding], face_encoding)
         
         # Verificar se a face é similar o suficiente
         match = face_distances[0] <= self.similarity_threshold
         similarity = 1 - face_distances[0]  # Converter distância para similaridade (0-1)
+        self._observar('comparacao', camera_id, inicio)
+        
+        # Desconhecidos são identificados pelo cluster do encoding
+        identidade = pessoa_info['id'] if match else None
+        cluster_id = None
+        if not match and self.agrupador is not None:
+            cluster_id = self.agrupador.atribuir(face_encoding)
+            identidade = f"desconhecido_{cluster_id}"
+        
+        # Salvar a face (uma vez por aparição da pessoa, ou de novo se a captura for melhor)
+        face_filename = None
+        qualidade = qualidade_recorte(frame, face_location)
+        if self.deduplicador is None or self.deduplicador.avaliar(camera_id, identidade, face_encoding, qualidade):
+            inicio = time.time()
+            face_filename = self.salvar_face(
+                frame, face_location, match, similarity, pessoa_info if match else None, camera_id, cluster_id)
+            self._observar('salvamento', camera_id, inicio)
+            if cluster_id is not None:
+                self.agrupador.definir_representante(cluster_id, face_filename, qualidade)
+        else:
+            registro.contador('salvamentos_suprimidos', camera_id).incrementar()
+        
+        # Registrar toda face no histórico, mesmo sem recorte salvo, para a busca retroativa
+        if self.historico is not None:
+            self.historico.adicionar(face_encoding, camera_id, similarity, pessoa_info['id'] if match else None,
+                                     cluster_id, face_filename, timestamp)
         
-        # Salvar a face
-        face_filename = self.salvar_face(
-            frame, face_location, match, similarity, pessoa_info if match else None)
+        # Publicar o reconhecimento para os assinantes externos
+        barramento.publicar('face', camera=camera_id, identidade=identidade,
+                            nome=pessoa_info['nome'] if match else None, reconhecido=bool(match),
+                            distancia=round(float(face_distances[0]), 4), bbox=[int(v) for v in face_location],
+                            cluster=cluster_id, ts_frame=timestamp, imagem=face_filename)
         
         # Logar resultado para todas as faces (importante em ambiente de linha de produção)
+        prefixo = f"[{camera_id}] " if camera_id is not None else ""
         if match:
-            log_face(f"👤 Face {index+1}: {pessoa_info['nome']} RECONHECIDO "
+            log_face(f"{prefixo}👤 Face {index+1}: {pessoa_info['nome']} RECONHECIDO "
                   f"(Similaridade: {similarity:.2f})")
         else:
-            log_face(f"👤 Face {index+1}: PESSOA DESCONHECIDA "
-                  f"(Similaridade: {similarity:.2f})")
+            log_face(f"{prefixo}👤 Face {index+1}: PESSOA DESCONHECIDA "
+                  f"(Similaridade: {similarity:.2f}{f', cluster {cluster_id}' if cluster_id is not None else ''})")
         
         return (face_location, match, similarity, face_filename, index)
     
@@ -121,7 +259,7 @@ class FaceDetector:
         
         for face_encoding in face_encodings:
             # Calcular a distância entre os encodings (menor = mais similar)
-            face_distances = face_recognition.face_distance([pessoa_conhecida_encoding], face_encoding)
+            face_distances = modelos.api.face_distance([pessoa_conhecida_encoding], face_encoding)
             
             # Verificar se a face é similar o suficiente
             match = face_distances[0] <= self.similarity_threshold
@@ -131,8 +269,8 @@ class FaceDetector:
         
         return resultados
     
-    def salvar_face(self, frame, face_location, match, similarity, pessoa_info=None):
-        """Salva uma face detectada"""
+    def salvar_face(self, frame, face_location, match, similarity, pessoa_info=None, camera_id=None, cluster_id=None):
+        """Salva uma face detectada (com o ID da câmera e o cluster de desconhecidos no nome do arquivo, se informados)"""
         top, right, bottom, left = face_location
         
         # Recortar a face
@@ -146,6 +284,8 @@ class FaceDetector:
         
         # Criar nome do arquivo
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if camera_id is not None:
+            timestamp = f"{camera_id}_{timestamp}"
         
         # Adicionar informação de match ao nome do arquivo
         if match:
@@ -154,32 +294,160 @@ class FaceDetector:
             filename = f"capturas/faces/match/{nome_pessoa}_{similarity:.2f}_{timestamp}.jpg"
         else:
             status = "desconhecido"
-            filename = f"capturas/faces/desconhecido/desconhecido_{similarity:.2f}_{timestamp}.jpg"
+            cluster = f"c{cluster_id}_" if cluster_id is not None else ""
+            filename = f"capturas/faces/desconhecido/desconhecido_{cluster}{similarity:.2f}_{timestamp}.jpg"
         
         # Salvar imagem com alta qualidade
         salvar_imagem(face_img, filename, QUALIDADE_JPEG)
         
-        # Salvar também o frame completo com a anotação
+        # Salvar também o frame completo com a anotação (desenhada apenas na cópia salva)
+        anotacoes = Anotacoes()
+        anotacoes.adicionar_face(face_location, self._rotulo_face(match, similarity, pessoa_info),
+                                 COR_VERDE if match else COR_VERMELHO)
         frame_filename = f"capturas/frames/frame_{status}_{timestamp}.jpg"
-        salvar_imagem(frame, frame_filename, QUALIDADE_JPEG)
+        salvar_imagem(anotacoes.renderizar(frame), frame_filename, QUALIDADE_JPEG)
         
         return filename
     
-    def processar_faces_no_frame(self, frame, pessoa_conhecida_encoding, pessoa_info):
-        """Processa faces em um único frame usando processamento paralelo"""
+    def _rotulo_face(self, match, similarity, pessoa_info):
+        """Texto exibido sobre uma face identificada"""
+        if match:
+            return f"{pessoa_info['nome']}: {similarity:.2f}"
+        return f"Desconhecido: {similarity:.2f}"
+    
+    def processar_faces_no_frame(self, frame, pessoa_conhecida_encoding, pessoa_info, regiao=None):
+        """Processa faces em um único frame usando processamento paralelo (retorna o frame anotado)"""
         # Detectar faces
-        face_locations, face_encodings = self.detectar_faces(frame)
+        face_locations, face_encodings = self.detectar_faces(frame, regiao)
+        
+        frame, anotacoes, face_encontrada, _ = self._processar_resultados(frame, face_locations, face_encodings,
+                                                                          pessoa_conhecida_encoding, pessoa_info)
+        return anotacoes.renderizar(frame), face_encontrada
+    
+    def processar_faces_no_frame_em_lote(self, frame, pessoa_conhecida_encoding, pessoa_info, callback,
+                                         regiao=None, camera_id=None, timestamp=None):
+        """
+        Processa faces em um frame calculando os encodings no agrupador em lote
+        
+        A localização das faces acontece na thread chamadora; o encoding é feito junto
+        com faces de outros frames e o resultado é entregue de forma assíncrona.
+        
+        Args:
+            frame: Frame BGR a ser processado
+            pessoa_conhecida_encoding: Encoding da pessoa de referência
+            pessoa_info: Informações da pessoa de referência
+            callback: Função chamada com (frame, anotacoes, face_encontrada, faces_reconhecidas) ao concluir
+            regiao: Região (x, y, w, h) à qual limitar a busca (None = frame inteiro)
+            camera_id: Câmera de origem do frame (para logs e arquivos salvos)
+            timestamp: Instante de captura do frame (para o histórico e os eventos publicados)
+        """
+        if self.batcher is None:
+            face_locations, face_encodings = self.detectar_faces(frame, regiao, camera_id)
+            callback(*self._processar_resultados(frame, face_locations, face_encodings,
+                                                 pessoa_conhecida_encoding, pessoa_info, camera_id, timestamp))
+            return
+        
+        rgb_small_frame, face_locations, transformacao = self.localizar_faces(frame, regiao, camera_id)
+        
+        # Sem faces, não há o que aguardar no lote
+        if not face_locations:
+            callback(frame, Anotacoes(), False, 0)
+            return
+        
+        inicio = time.time()
+        future = self.batcher.submeter(rgb_small_frame, face_locations, self.num_jitters)
+        face_locations = self.ajustar_localizacoes(face_locations, transformacao)
+        
+        def _ao_concluir(future_lote):
+            # Espera no lote incluída: é a latência de encoding percebida pelo frame
+            self._observar('encoding', camera_id, inicio)
+            # Não bloquear a thread do lote com comparação e salvamento das faces
+            self.thread_pool.submit(self._concluir_lote, future_lote, frame, face_locations,
+                                    pessoa_conhecida_encoding, pessoa_info, callback, camera_id, timestamp)
+        
+        future.add_done_callback(_ao_concluir)
+    
+    def _concluir_lote(self, future_lote, frame, face_locations, pessoa_conhecida_encoding, pessoa_info, callback,
+                       camera_id=None, timestamp=None):
+        """Finaliza o processamento de um frame após o cálculo dos encodings em lote"""
+        perfil.ponto()
+        try:
+            face_encodings, _ = future_lote.result()
+            resultado = self._processar_resultados(frame, face_locations, face_encodings,
+                                                   pessoa_conhecida_encoding, pessoa_info, camera_id, timestamp)
+        except Exception as e:
+            log_face(f"Erro ao processar faces em lote: {str(e)}")
+            resultado = (frame, Anotacoes(), False, 0)
+        
+        callback(*resultado)
+    
+    def processar_melhores_faces(self, candidatos, pessoa_conhecida_encoding, pessoa_info, callback, camera_id=None):
+        """
+        Calcula encodings, compara e salva apenas as faces selecionadas de uma janela de aparição
+        
+        Args:
+            candidatos: Lista de CandidatoFace escolhidos pelo SeletorMelhorFace
+            pessoa_conhecida_encoding: Encoding da pessoa de referência
+            pessoa_info: Informações da pessoa de referência
+            callback: Função chamada por frame com (frame, anotacoes, face_encontrada, faces_reconhecidas)
+            camera_id: Câmera de origem das faces (para logs e arquivos salvos)
+        """
+        # Agrupar candidatos do mesmo frame para salvar e anotar o frame uma única vez
+        grupos = {}
+        for candidato in candidatos:
+            grupos.setdefault(id(candidato.frame), []).append(candidato)
+        
+        for grupo in grupos.values():
+            frame = grupo[0].frame
+            rgb_small_frame = grupo[0].rgb_small_frame
+            face_locations = [c.face_location for c in grupo]
+            face_locations_originais = self.ajustar_localizacoes(face_locations, grupo[0].transformacao)
+            
+            if self.batcher is None:
+                inicio = time.time()
+                with rastreador.span('face_encodings'):
+                    face_encodings = modelos.api.face_encodings(rgb_small_frame, face_locations,
+                                                                num_jitters=self.num_jitters)
+                self._observar('encoding', camera_id, inicio)
+                callback(*self._processar_resultados(frame, face_locations_originais, face_encodings,
+                                                     pessoa_conhecida_encoding, pessoa_info, camera_id,
+                                                     grupo[0].timestamp))
+                continue
+            
+            # Reaproveitar os landmarks calculados na avaliação de qualidade
+            chips = [self.batcher.extrair_chip(rgb_small_frame, c.landmarks) for c in grupo]
+            inicio = time.time()
+            future = self.batcher.submeter_chips(chips, self.num_jitters)
+            
+            def _ao_concluir(future_lote, frame=frame, face_locations=face_locations_originais, inicio=inicio,
+                             timestamp=grupo[0].timestamp):
+                self._observar('encoding', camera_id, inicio)
+                self.thread_pool.submit(self._concluir_lote, future_lote, frame, face_locations,
+                                        pessoa_conhecida_encoding, pessoa_info, callback, camera_id, timestamp)
+            
+            future.add_done_callback(_ao_concluir)
+    
+    def _processar_resultados(self, frame, face_locations, face_encodings, pessoa_conhecida_encoding, pessoa_info,
+                              camera_id=None, timestamp=None):
+        """
+        Compara, salva e anota as faces de um frame a partir dos encodings calculados
+        
+        Returns:
+            Tupla com (frame, anotacoes, face_encontrada, faces_reconhecidas); o frame não é alterado
+        """
+        anotacoes = Anotacoes()
         
         # Se não encontrou faces, retornar o frame original
         if not face_locations:
-            return frame, False
+            return frame, anotacoes, False, 0
         
         # Logar quantidade de faces detectadas (importante para ambiente de linha de produção)
-        log_face(f"Detectadas {len(face_locations)} faces na imagem")
+        prefixo = f"[{camera_id}] " if camera_id is not None else ""
+        log_face(f"{prefixo}Detectadas {len(face_locations)} faces na imagem")
         
-        # Preparar argumentos para processamento paralelo
+        # Preparar argumentos para processamento paralelo (o frame é apenas lido)
         args_list = [
-            (frame.copy(), face_location, face_encoding, pessoa_conhecida_encoding, pessoa_info, i)
+            (frame, face_location, face_encoding, pessoa_conhecida_encoding, pessoa_info, i, camera_id, timestamp)
             for i, (face_location, face_encoding) in enumerate(zip(face_locations, face_encodings))
         ]
         
@@ -196,26 +464,14 @@ class FaceDetector:
         # Ordenar resultados pelo índice original
         resultados.sort(key=lambda x: x[4])
         
-        # Desenhar resultados no frame
+        # Anotar resultados (desenhados somente na exibição)
         for face_location, match, similarity, _, _ in resultados:
-            top, right, bottom, left = face_location
-            
-            # Desenhar retângulo na face
-            color = COR_VERDE if match else COR_VERMELHO
-            cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
-            
-            # Adicionar texto com similaridade e nome se reconhecido
-            if match:
-                texto = f"{pessoa_info['nome']}: {similarity:.2f}"
-            else:
-                texto = f"Desconhecido: {similarity:.2f}"
-            
-            cv2.putText(frame, texto, (left, top - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+            anotacoes.adicionar_face(face_location, self._rotulo_face(match, similarity, pessoa_info),
+                                     COR_VERDE if match else COR_VERMELHO)
         
-        return frame, len(resultados) > 0
+        return frame, anotacoes, len(resultados) > 0, sum(1 for r in resultados if r[1])
     
     def __del__(self):
         """Destrutor para garantir que o pool de threads seja encerrado corretamente"""
         if hasattr(self, 'thread_pool'):
-            self.thread_pool.shutdown(wait=False) 
\ No newline at end of file
+            self.thread_pool.shutdown(wait=False)
@@ -0,0 +1,289 @@
+"""
+Motor de processamento facial compartilhado entre câmeras.
+Concentra detector facial, encoding em lote, seleção da melhor face e controle
+de carga em um único estágio, alimentado pelos pipelines de todas as câmeras.
+"""
+import time
+import threading
+from face_detector.config.settings import (
+    USAR_ENCODING_EM_LOTE, SELECAO_MELHOR_FACE, CONTROLE_CARGA_ATIVO, AREA_PRIORIDADE_FACE, COR_AMARELO,
+    AGRUPAR_DESCONHECIDOS, REGISTRAR_ENCODINGS, WORKERS_FACIAIS
+)
+from face_detector.models.anotacoes import Anotacoes
+from face_detector.services.face_detector import FaceDetector
+from face_detector.services.face_scheduler import FaceScheduler
+from face_detector.services.encoding_batcher import EncodingBatcher
+from face_detector.services.face_workers import PoolWorkersFaciais
+from face_detector.services.face_clusters import AgrupadorDesconhecidos
+from face_detector.services.encoding_log import RegistroEncodings
+from face_detector.services.face_quality import SeletorMelhorFace
+from face_detector.services.load_governor import LoadGovernor
+from face_detector.services.modelos import modelos
+from face_detector.utils.logger import log_info, log_error
+from face_detector.utils.metricas import registro
+from face_detector.utils.rastreamento import rastreador
+from face_detector.utils.perfil import perfil
+
+class FaceEngine:
+    """Estágio facial único que atende várias câmeras por meio de um escalonador justo entre elas"""
+    
+    def __init__(self, pessoa_conhecida_encoding, pessoa_info, num_workers=4, exibir=True, workers_faciais=None):
+        """
+        Inicializa o motor facial
+        
+        Args:
+            pessoa_conhecida_encoding: Encoding da pessoa de referência
+            pessoa_info: Informações da pessoa de referência
+            num_workers: Número de workers para processamento paralelo
+            exibir: False no modo sem interface gráfica (sem anotações de avaliação)
+            workers_faciais: Endereços dos workers remotos de encoding (None = WORKERS_FACIAIS; vazio = local)
+        """
+        self.pessoa_conhecida_encoding = pessoa_conhecida_encoding
+        self.pessoa_info = pessoa_info
+        workers_faciais = workers_faciais if workers_faciais is not None else WORKERS_FACIAIS
+        if workers_faciais:
+            # Workers remotos no lugar do lote local, que passa a ser a reserva
+            self.encoding_batcher = PoolWorkersFaciais(workers_faciais)
+        else:
+            self.encoding_batcher = EncodingBatcher() if USAR_ENCODING_EM_LOTE else None
+        self.agrupador = AgrupadorDesconhecidos() if AGRUPAR_DESCONHECIDOS else None
+        self.historico = RegistroEncodings() if REGISTRAR_ENCODINGS else None
+        self.face_detector = FaceDetector(max_workers=num_workers, batcher=self.encoding_batcher,
+                                          agrupador=self.agrupador, historico=self.historico)
+        self.exibir = exibir
+        self.selecao_melhor_face = SELECAO_MELHOR_FACE
+        self.governador = LoadGovernor() if CONTROLE_CARGA_ATIVO else None
+        
+        # Estado por câmera: pipeline de destino, janela de aparição e última janela recebida
+        self.escalonador = FaceScheduler()
+        self.pipelines = {}
+        self.seletores = {}
+        self.ultima_janela = {}
+        
+        self.running = False
+        self.thread = None
+        self.medidor_nivel = registro.medidor('nivel_degradacao')
+    
+    def registrar_camera(self, camera_id, pipeline, peso=None, prazo=None):
+        """
+        Registra uma câmera e o pipeline que recebe os frames processados dela
+        
+        Args:
+            camera_id: Identificador da câmera
+            pipeline: CameraPipeline que recebe os frames processados
+            peso: Peso da câmera no escalonador (None = PESO_CAMERA_PADRAO)
+            prazo: Idade máxima dos frames da câmera (None = PRAZO_FACE_CAMERA)
+        """
+        self.pipelines[camera_id] = pipeline
+        self.ultima_janela[camera_id] = None
+        if self.selecao_melhor_face:
+            self.seletores[camera_id] = SeletorMelhorFace()
+        self.escalonador.registrar_camera(camera_id, peso, prazo)
+        pipeline.metricas.medidor('fila_face', lambda: self.escalonador.get_tamanhos_filas()[camera_id])
+        pipeline.metricas.medidor('frames_descartados_fila_face',
+                                  lambda: self.escalonador.get_estatisticas(camera_id)['descartados_fila'])
+        pipeline.metricas.medidor('frames_expirados_fila_face',
+                                  lambda: self.escalonador.get_estatisticas(camera_id)['expirados'])
+    
+    def submeter(self, camera_id, item):
+        """
+        Enfileira um frame de uma câmera para processamento facial
+        
+        O primeiro frame de cada janela de aparição e frames com movimento grande
+        são atendidos com prioridade, dentro da fatia do peso da câmera.
+        
+        Args:
+            camera_id: Câmera de origem
+            item: Tupla (frame, timestamp, movimento_area, janela_id, regiao)
+        """
+        _, timestamp, movimento_area, janela_id, _ = item
+        prioritario = janela_id != self.ultima_janela[camera_id] or movimento_area >= AREA_PRIORIDADE_FACE
+        self.ultima_janela[camera_id] = janela_id
+        self.escalonador.submeter(camera_id, item, timestamp, prioritario)
+    
+    def qsize(self):
+        """Retorna o total de frames aguardando processamento facial"""
+        return self.escalonador.qsize()
+    
+    def get_tamanhos_filas(self):
+        """Retorna o tamanho da fila de cada câmera"""
+        return self.escalonador.get_tamanhos_filas()
+    
+    def get_estatisticas_escalonador(self, camera_id):
+        """Retorna os contadores do escalonador para uma câmera"""
+        return self.escalonador.get_estatisticas(camera_id)
+    
+    def get_passo_frames(self):
+        """Retorna quantos frames elegíveis as câmeras devem pular entre envios (controle de carga)"""
+        if self.governador is None:
+            return 1
+        return self.governador.get_parametros()['passo_frames']
+    
+    def preparar_modelos(self, aquecer=True):
+        """
+        Carrega os modelos faciais e, opcionalmente, aquece detecção e encoding
+        
+        Chamado antes da captura, para que nenhum custo de inicialização caia
+        sobre o primeiro frame com movimento.
+        
+        Returns:
+            False se os modelos não puderam ser carregados
+        """
+        try:
+            modelos.carregar()
+        except Exception as e:
+            log_error(f"Erro ao carregar os modelos faciais: {str(e)}")
+            return False
+        registro.medidor('tempo_carregamento_modelos_segundos').definir(modelos.tempo_carregamento)
+        
+        if aquecer:
+            try:
+                duracao = self.face_detector.aquecer()
+                registro.medidor('tempo_aquecimento_segundos').definir(duracao)
+                log_info(f"Detecção e encoding aquecidos em {duracao:.2f}s")
+            except Exception as e:
+                log_error(f"Erro no aquecimento dos modelos faciais: {str(e)}")
+        return True
+    
+    def iniciar(self):
+        """Inicia o agrupador de encodings e a thread de processamento facial"""
+        self.running = True
+        
+        # Agrupador de encodings em lote (compartilhado por todas as câmeras)
+        if self.encoding_batcher is not None:
+            self.encoding_batcher.iniciar()
+        
+        # Manutenção e gravação periódica dos clusters de desconhecidos
+        if self.agrupador is not None:
+            self.agrupador.iniciar()
+        
+        self.thread = threading.Thread(target=self._face_processing_loop, daemon=True)
+        self.thread.start()
+    
+    def _face_processing_loop(self):
+        """Thread dedicada para processamento facial"""
+        log_info("Thread de processamento facial iniciada")
+        
+        while self.running:
+            perfil.ponto()
+            try:
+                # Obter próximo frame para processamento facial (frames vencidos já foram descartados)
+                camera_id, item = self.escalonador.proximo()
+                
+                if item is None:
+                    # Encerrar as janelas de aparição que não recebem mais frames
+                    for camera_seletor, seletor in self.seletores.items():
+                        if seletor.janela_expirada():
+                            self._fechar_janela_faces(camera_seletor)
+                    time.sleep(0.01)  # Pequena pausa para não consumir CPU
+                    continue
+                
+                frame, timestamp, movimento_area, janela_id, regiao = item
+                inicio_processamento = time.time()
+                rastreador.definir_quadro(camera_id, timestamp)
+                
+                # Ajustar o nível de degradação conforme a fila de faces e o tempo por frame
+                if self.governador is not None:
+                    if self.governador.avaliar(self.qsize()):
+                        self._aplicar_nivel_carga()
+                    if not self.governador.get_parametros()['somente_roi']:
+                        regiao = None
+                else:
+                    regiao = None
+                
+                pipeline = self.pipelines[camera_id]
+                if self.selecao_melhor_face:
+                    # Avaliar qualidade e codificar apenas as melhores faces da janela
+                    self._avaliar_frame_facial(camera_id, frame, timestamp, movimento_area, janela_id, regiao)
+                else:
+                    # Localizar faces aqui e calcular os encodings em lote junto com outros frames;
+                    # o resultado volta para o pipeline da câmera
+                    self.face_detector.processar_faces_no_frame_em_lote(
+                        frame, self.pessoa_conhecida_encoding, self.pessoa_info,
+                        lambda frame_processado, anotacoes, face_encontrada, reconhecidas,
+                               pipeline=pipeline, timestamp=timestamp, movimento_area=movimento_area:
+                            pipeline.concluir_frame_facial(frame_processado, anotacoes, face_encontrada, reconhecidas,
+                                                           timestamp, movimento_area),
+                        regiao, camera_id=camera_id, timestamp=timestamp)
+                
+                if self.governador is not None:
+                    self.governador.registrar_tempo(time.time() - inicio_processamento)
+            
+            except Exception as e:
+                log_error(f"Erro na thread de processamento facial: {str(e)}")
+                time.sleep(0.1)
+        
+        # Não perder as últimas janelas ao encerrar
+        for camera_id, seletor in self.seletores.items():
+            if seletor.janela_id is not None:
+                self._fechar_janela_faces(camera_id)
+    
+    def _aplicar_nivel_carga(self):
+        """Aplica os parâmetros do nível de degradação atual ao detector facial"""
+        parametros = self.governador.get_parametros()
+        self.face_detector.num_jitters = parametros['num_jitters']
+        self.face_detector.escala_deteccao = parametros['escala_deteccao']
+        self.face_detector.aplicar_melhoria = parametros['melhorar_imagem']
+        self.medidor_nivel.definir(self.governador.get_nivel())
+    
+    def _avaliar_frame_facial(self, camera_id, frame, timestamp, movimento_area, janela_id, regiao=None):
+        """Localiza e pontua as faces de um frame, mantendo as melhores da janela de aparição"""
+        seletor = self.seletores[camera_id]
+        
+        # Um novo movimento inicia uma nova janela: decidir a anterior antes
+        if janela_id != seletor.janela_id:
+            if seletor.janela_id is not None:
+                self._fechar_janela_faces(camera_id)
+            seletor.abrir_janela(janela_id)
+        
+        rgb_small_frame, face_locations, transformacao = self.face_detector.localizar_faces(frame, regiao, camera_id)
+        pontuacoes = seletor.adicionar(frame, rgb_small_frame, face_locations, transformacao,
+                                       timestamp, movimento_area)
+        
+        # Anotar as faces avaliadas; a identificação sai ao fechar a janela
+        anotacoes = Anotacoes()
+        if self.exibir:
+            for face_location, pontuacao in zip(self.face_detector.ajustar_localizacoes(face_locations, transformacao),
+                                                pontuacoes):
+                anotacoes.adicionar_face(face_location, f"Qualidade: {pontuacao:.2f}", COR_AMARELO)
+        
+        self.pipelines[camera_id].concluir_frame_facial(frame, anotacoes, bool(face_locations), 0,
+                                                        timestamp, movimento_area)
+    
+    def _fechar_janela_faces(self, camera_id):
+        """Encerra a janela de aparição de uma câmera e codifica somente as melhores faces dela"""
+        pipeline = self.pipelines[camera_id]
+        melhores, evitados = self.seletores[camera_id].fechar_janela()
+        pipeline.metricas.incrementar('encodings_evitados', evitados)
+        if not melhores:
+            return
+        pipeline.metricas.incrementar('faces_codificadas', len(melhores))
+        
+        self.face_detector.processar_melhores_faces(
+            melhores, self.pessoa_conhecida_encoding, self.pessoa_info,
+            lambda frame_processado, anotacoes, face_encontrada, reconhecidas,
+                   timestamp=melhores[0].timestamp, movimento_area=melhores[0].movimento_area:
+                pipeline.concluir_frame_facial(frame_processado, anotacoes, face_encontrada, reconhecidas,
+                                               timestamp, movimento_area, decisao=True),
+            camera_id=camera_id)
+    
+    def get_estatisticas_lote(self):
+        """Retorna as estatísticas do encoding em lote (None se desativado)"""
+        if self.encoding_batcher is None:
+            return None
+        return self.encoding_batcher.get_estatisticas()
+    
+    def finalizar(self):
+        """Para a thread de processamento facial, o agrupador e o histórico de encodings"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        
+        if self.encoding_batcher is not None:
+            self.encoding_batcher.finalizar()
+        
+        if self.agrupador is not None:
+            self.agrupador.finalizar()
+        
+        if self.historico is not None:
+            self.historico.finalizar()
@@ -0,0 +1,81 @@
+"""
+Galeria de identidades conhecidas.
+Reúne a pessoa de referência (PESSOA_INFO) e os encodings salvos na pasta de
+encodings, como os promovidos a partir dos clusters de desconhecidos
+("maria_silva.pickle" vira a identidade "maria_silva", exibida como "Maria Silva").
+A identificação compara todos os encodings de uma vez com toda a galeria.
+"""
+import os
+import pickle
+import numpy as np
+from face_detector.config.settings import PASTA_GALERIA, PESSOA_INFO, ARQUIVO_ENCODING_PESSOA, FACE_SIMILARITY_THRESHOLD
+from face_detector.utils.file_utils import carregar_encoding_teste
+from face_detector.utils.logger import log_info, log_error
+
+class Galeria:
+    """Encodings e informações das identidades conhecidas"""
+    
+    def __init__(self, pasta=None, limiar=None):
+        """
+        Inicializa a galeria (vazia até carregar())
+        
+        Args:
+            pasta: Pasta dos encodings .pickle (None = PASTA_GALERIA)
+            limiar: Distância máxima para reconhecer uma identidade (None = FACE_SIMILARITY_THRESHOLD)
+        """
+        self.pasta = pasta if pasta is not None else PASTA_GALERIA
+        self.limiar = limiar if limiar is not None else FACE_SIMILARITY_THRESHOLD
+        self.encodings = np.zeros((0, 128))
+        self.identidades = []
+    
+    @property
+    def total(self):
+        return len(self.identidades)
+    
+    def carregar(self):
+        """Carrega a pessoa de referência e os encodings da pasta"""
+        encodings = [np.asarray(carregar_encoding_teste(), dtype=np.float64)]
+        identidades = [dict(PESSOA_INFO)]
+        referencia = os.path.abspath(ARQUIVO_ENCODING_PESSOA)
+        
+        if os.path.isdir(self.pasta):
+            for arquivo in sorted(os.listdir(self.pasta)):
+                caminho = os.path.join(self.pasta, arquivo)
+                if not arquivo.endswith('.pickle') or os.path.abspath(caminho) == referencia:
+                    continue
+                try:
+                    with open(caminho, 'rb') as f:
+                        encoding = np.asarray(pickle.load(f), dtype=np.float64).reshape(-1)
+                    if encoding.shape != (128,):
+                        raise ValueError(f"encoding com {encoding.size} valores")
+                except Exception as e:
+                    log_error(f"Encoding ignorado na galeria ({caminho}): {str(e)}")
+                    continue
+                nome = arquivo[:-len('.pickle')]
+                encodings.append(encoding)
+                identidades.append({'id': nome, 'nome': nome.replace('_', ' ').title()})
+        
+        self.encodings = np.stack(encodings)
+        self.identidades = identidades
+        log_info(f"Galeria com {self.total} identidades carregada")
+        return self
+    
+    def identificar(self, encodings):
+        """
+        Identifica cada encoding pela identidade mais próxima da galeria
+        
+        Args:
+            encodings: Lista de encodings (128 valores cada)
+        
+        Returns:
+            Lista de (identidade ou None se nenhuma estiver dentro do limiar, distância da mais próxima)
+        """
+        if len(encodings) == 0 or self.total == 0:
+            return [(None, None) for _ in encodings]
+        distancias = np.linalg.norm(np.asarray(encodings)[:, None, :] - self.encodings[None, :, :], axis=2)
+        mais_proximas = np.argmin(distancias, axis=1)
+        resultados = []
+        for linha, indice in enumerate(mais_proximas):
+            distancia = float(distancias[linha, indice])
+            resultados.append((self.identidades[indice] if distancia <= self.limiar else None, distancia))
+        return resultados
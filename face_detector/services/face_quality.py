@@ -0,0 +1,184 @@
+"""
+Serviço para avaliação de qualidade de faces e seleção da melhor captura.
+Permite calcular o encoding apenas das melhores faces de cada janela de aparição
+(os frames processados após um movimento) em vez de todas as faces de todos os frames.
+"""
+import time
+import cv2
+import numpy as np
+from face_detector.config.settings import (
+    FACES_POR_JANELA, QUALIDADE_MINIMA_FACE, TAMANHO_FACE_REFERENCIA,
+    NITIDEZ_REFERENCIA, TEMPO_FECHAMENTO_JANELA, PESOS_QUALIDADE_FACE
+)
+from face_detector.utils.rastreamento import rastreador
+from face_detector.services.modelos import modelos
+
+def _medidas_recorte(frame, face_location, escala, conversao_cinza):
+    """
+    Tamanho, nitidez e brilho (0-1) do recorte de uma face
+    
+    Returns:
+        Tupla (tamanho, nitidez, brilho) ou None se o recorte for vazio
+    """
+    top, right, bottom, left = face_location
+    altura = bottom - top
+    largura = right - left
+    if altura <= 0 or largura <= 0:
+        return None
+    
+    # Tamanho: faces pequenas geram encodings ruins
+    tamanho = min(1.0, min(altura, largura) / escala / TAMANHO_FACE_REFERENCIA)
+    
+    # Nitidez e brilho calculados sobre o recorte em tons de cinza
+    recorte = frame[max(0, top):bottom, max(0, left):right]
+    if recorte.size == 0:
+        return None
+    gray = cv2.cvtColor(recorte, conversao_cinza)
+    nitidez = min(1.0, cv2.Laplacian(gray, cv2.CV_64F).var() / NITIDEZ_REFERENCIA)
+    brilho = 1.0 - abs(float(gray.mean()) - 128.0) / 128.0
+    return tamanho, nitidez, brilho
+
+def qualidade_recorte(frame, face_location):
+    """
+    Pontuação de qualidade (0-1) de uma face no frame BGR original, sem landmarks
+    
+    Usa apenas tamanho, nitidez e brilho, com os mesmos pesos de avaliar_qualidade_face,
+    para comparar capturas da mesma pessoa sem uma nova chamada ao dlib.
+    """
+    medidas = _medidas_recorte(frame, face_location, 1.0, cv2.COLOR_BGR2GRAY)
+    if medidas is None:
+        return 0.0
+    tamanho, nitidez, brilho = medidas
+    pesos = PESOS_QUALIDADE_FACE
+    return ((pesos['tamanho'] * tamanho + pesos['nitidez'] * nitidez + pesos['brilho'] * brilho) /
+            (pesos['tamanho'] + pesos['nitidez'] + pesos['brilho']))
+
+def avaliar_qualidade_face(rgb_frame, face_location, escala=1.0):
+    """
+    Calcula uma pontuação de qualidade (0-1) para uma face localizada
+    
+    Combina tamanho da face, nitidez (variância do Laplaciano), brilho e
+    frontalidade estimada a partir dos 5 pontos faciais.
+    
+    Args:
+        rgb_frame: Frame RGB onde a face foi localizada
+        face_location: Localização da face (top, right, bottom, left)
+        escala: Escala do frame RGB em relação ao frame original
+    
+    Returns:
+        Tupla com (pontuacao, landmarks) - os landmarks podem ser reaproveitados no encoding
+    """
+    medidas = _medidas_recorte(rgb_frame, face_location, escala, cv2.COLOR_RGB2GRAY)
+    if medidas is None:
+        return 0.0, None
+    tamanho, nitidez, brilho = medidas
+    
+    # Frontalidade: nariz centralizado entre os olhos indica face de frente
+    with rastreador.span('landmarks_qualidade'):
+        landmarks = modelos.api.pose_predictor_5_point(rgb_frame, modelos.api._css_to_rect(face_location))
+    pontos = np.array([(p.x, p.y) for p in landmarks.parts()], dtype=np.float64)
+    olho_direito = pontos[0:2].mean(axis=0)
+    olho_esquerdo = pontos[2:4].mean(axis=0)
+    distancia_olhos = np.linalg.norm(olho_esquerdo - olho_direito)
+    if distancia_olhos > 0:
+        centro_olhos = (olho_esquerdo + olho_direito) / 2
+        desvio = abs(pontos[4][0] - centro_olhos[0]) / distancia_olhos
+        frontalidade = max(0.0, 1.0 - 2.0 * desvio)
+    else:
+        frontalidade = 0.0
+    
+    pesos = PESOS_QUALIDADE_FACE
+    pontuacao = (pesos['tamanho'] * tamanho + pesos['nitidez'] * nitidez +
+                 pesos['brilho'] * brilho + pesos['frontalidade'] * frontalidade)
+    pontuacao /= sum(pesos.values())
+    
+    return pontuacao, landmarks
+
+class CandidatoFace:
+    """Face candidata ao encoding dentro de uma janela de aparição"""
+    
+    def __init__(self, pontuacao, frame, rgb_small_frame, face_location, transformacao, landmarks,
+                 timestamp, movimento_area):
+        self.pontuacao = pontuacao
+        self.frame = frame
+        self.rgb_small_frame = rgb_small_frame
+        self.face_location = face_location
+        self.transformacao = transformacao
+        self.landmarks = landmarks
+        self.timestamp = timestamp
+        self.movimento_area = movimento_area
+
+class SeletorMelhorFace:
+    """Mantém as melhores faces de cada janela de aparição para encoding"""
+    
+    def __init__(self, faces_por_janela=None, qualidade_minima=None, tempo_fechamento=None):
+        """
+        Inicializa o seletor
+        
+        Args:
+            faces_por_janela: Número de faces com maior pontuação a codificar por janela
+            qualidade_minima: Pontuação mínima para uma face ser considerada
+            tempo_fechamento: Tempo sem novos frames (segundos) para encerrar a janela
+        """
+        self.faces_por_janela = faces_por_janela if faces_por_janela is not None else FACES_POR_JANELA
+        self.qualidade_minima = qualidade_minima if qualidade_minima is not None else QUALIDADE_MINIMA_FACE
+        self.tempo_fechamento = tempo_fechamento if tempo_fechamento is not None else TEMPO_FECHAMENTO_JANELA
+        self.janela_id = None
+        self.candidatos = []
+        self.faces_na_janela = 0
+        self.ultima_atualizacao = 0
+    
+    def abrir_janela(self, janela_id):
+        """Inicia uma nova janela de aparição"""
+        self.janela_id = janela_id
+        self.candidatos = []
+        self.faces_na_janela = 0
+        self.ultima_atualizacao = time.time()
+    
+    def adicionar(self, frame, rgb_small_frame, face_locations, transformacao, timestamp, movimento_area):
+        """
+        Avalia as faces de um frame e mantém apenas as melhores da janela
+        
+        Returns:
+            Lista de pontuações na mesma ordem de face_locations
+        """
+        self.ultima_atualizacao = time.time()
+        pontuacoes = []
+        
+        for face_location in face_locations:
+            self.faces_na_janela += 1
+            pontuacao, landmarks = avaliar_qualidade_face(rgb_small_frame, face_location, transformacao[0])
+            pontuacoes.append(pontuacao)
+            
+            if pontuacao < self.qualidade_minima:
+                continue
+            if (len(self.candidatos) >= self.faces_por_janela and
+                    pontuacao <= self.candidatos[-1].pontuacao):
+                continue
+            
+            # O frame não é alterado no pipeline (anotações ficam à parte), então basta a referência
+            self.candidatos.append(CandidatoFace(pontuacao, frame, rgb_small_frame, face_location,
+                                                 transformacao, landmarks, timestamp, movimento_area))
+            self.candidatos.sort(key=lambda c: c.pontuacao, reverse=True)
+            del self.candidatos[self.faces_por_janela:]
+        
+        return pontuacoes
+    
+    def janela_expirada(self):
+        """Verifica se a janela atual está aberta sem receber frames há mais que o tempo de fechamento"""
+        return (self.janela_id is not None and
+                time.time() - self.ultima_atualizacao >= self.tempo_fechamento)
+    
+    def fechar_janela(self):
+        """
+        Encerra a janela atual
+        
+        Returns:
+            Tupla com (melhores candidatos, número de encodings evitados)
+        """
+        melhores = self.candidatos
+        evitados = self.faces_na_janela - len(melhores)
+        self.janela_id = None
+        self.candidatos = []
+        self.faces_na_janela = 0
+        return melhores, evitados
@@ -0,0 +1,168 @@
+"""
+Escalonador de trabalho facial entre câmeras.
+Mantém uma fila por câmera e decide qual frame o motor facial processa a seguir,
+com revezamento ponderado por déficit, prioridade para frames importantes
+(limitada à fatia do peso da câmera) e descarte de frames que passaram do
+prazo antes de gastar processamento com eles.
+"""
+import time
+import threading
+from collections import deque
+from face_detector.config.settings import TAMANHO_FILA_FACE_CAMERA, PESO_CAMERA_PADRAO, PRAZO_FACE_CAMERA
+
+class FaceScheduler:
+    """Classe para escalonar frames de várias câmeras com justiça ponderada, prioridade e prazo"""
+    
+    def __init__(self, tamanho_fila=None, relogio=None):
+        """
+        Inicializa o escalonador
+        
+        Args:
+            tamanho_fila: Número máximo de frames pendentes por câmera (os mais antigos são descartados)
+            relogio: Função que retorna o tempo atual em segundos (permite simulação)
+        """
+        self.tamanho_fila = tamanho_fila if tamanho_fila is not None else TAMANHO_FILA_FACE_CAMERA
+        self.relogio = relogio if relogio is not None else time.time
+        self.cameras = {}
+        self.ordem_cameras = []
+        self.posicao = 0  # Câmera em atendimento no revezamento por déficit
+        self.visita_iniciada = False
+        self.posicao_prioritaria = 0
+        self.lock = threading.Lock()
+    
+    def registrar_camera(self, camera_id, peso=None, prazo=None):
+        """
+        Registra uma câmera no escalonador
+        
+        Args:
+            camera_id: Identificador da câmera
+            peso: Frames atendidos por rodada em relação às outras câmeras (maior que zero)
+            prazo: Idade máxima de um frame (segundos) para ainda ser processado
+        """
+        peso = peso if peso is not None else PESO_CAMERA_PADRAO
+        # Sem créditos positivos o revezamento por déficit nunca atenderia a câmera
+        if peso <= 0:
+            raise ValueError(f"Peso inválido para a câmera {camera_id}: {peso} (deve ser maior que zero)")
+        with self.lock:
+            self.cameras[camera_id] = {
+                'peso': peso,
+                'prazo': prazo if prazo is not None else PRAZO_FACE_CAMERA,
+                'deficit': 0.0,
+                'normal': deque(),
+                'prioritaria': deque(),
+                'stats': {
+                    'recebidos': 0,
+                    'atendidos': 0,
+                    'prioritarios': 0,
+                    'descartados_fila': 0,
+                    'expirados': 0
+                }
+            }
+            self.ordem_cameras.append(camera_id)
+    
+    def submeter(self, camera_id, item, timestamp, prioritario=False):
+        """
+        Enfileira um frame de uma câmera
+        
+        Args:
+            camera_id: Câmera de origem
+            item: Trabalho a ser entregue por proximo()
+            timestamp: Momento de captura do frame (base do prazo)
+            prioritario: True para atender antes dos frames normais (movimento grande, nova janela)
+        """
+        with self.lock:
+            camera = self.cameras[camera_id]
+            camera['stats']['recebidos'] += 1
+            
+            # Fila cheia: descartar o frame normal mais antigo (o mais novo vale mais)
+            if len(camera['normal']) + len(camera['prioritaria']) >= self.tamanho_fila:
+                fila = camera['normal'] if camera['normal'] else camera['prioritaria']
+                fila.popleft()
+                camera['stats']['descartados_fila'] += 1
+            
+            if prioritario:
+                camera['prioritaria'].append((timestamp, item))
+                camera['stats']['prioritarios'] += 1
+            else:
+                camera['normal'].append((timestamp, item))
+    
+    def _descartar_expirados(self, camera, agora):
+        """Remove da câmera os frames que já passaram do prazo"""
+        for fila in (camera['prioritaria'], camera['normal']):
+            while fila and agora - fila[0][0] > camera['prazo']:
+                fila.popleft()
+                camera['stats']['expirados'] += 1
+    
+    def proximo(self):
+        """
+        Retira o próximo frame a processar
+        
+        Os normais seguem revezamento por déficit, onde cada câmera recebe créditos
+        proporcionais ao seu peso a cada rodada e cada frame atendido custa um crédito.
+        Frames prioritários furam a fila (em revezamento entre as câmeras), mas também
+        custam um crédito e só furam enquanto a câmera não estiver devendo: uma câmera
+        com movimento grande contínuo não passa da fatia do seu peso.
+        
+        Returns:
+            Tupla (camera_id, item) ou (None, None) se não houver frames pendentes
+        """
+        with self.lock:
+            if not self.ordem_cameras:
+                return None, None
+            
+            agora = self.relogio()
+            for camera in self.cameras.values():
+                self._descartar_expirados(camera, agora)
+            
+            total = len(self.ordem_cameras)
+            
+            # Prioritários: revezamento simples entre as câmeras sem créditos em débito
+            for i in range(total):
+                camera_id = self.ordem_cameras[(self.posicao_prioritaria + i) % total]
+                camera = self.cameras[camera_id]
+                if camera['prioritaria'] and camera['deficit'] >= 0.0:
+                    self.posicao_prioritaria = (self.posicao_prioritaria + i + 1) % total
+                    camera['deficit'] -= 1.0
+                    return self._atender(camera_id, camera['prioritaria'])
+            
+            # Revezamento por déficit, cada visita credita o peso da câmera
+            # (prioritários que não puderam furar a fila saem antes dos normais da câmera)
+            if not any(camera['normal'] or camera['prioritaria'] for camera in self.cameras.values()):
+                return None, None
+            while True:
+                camera = self.cameras[self.ordem_cameras[self.posicao]]
+                if camera['normal'] or camera['prioritaria']:
+                    if not self.visita_iniciada:
+                        camera['deficit'] += camera['peso']
+                        self.visita_iniciada = True
+                    if camera['deficit'] >= 1.0:
+                        camera['deficit'] -= 1.0
+                        fila = camera['prioritaria'] if camera['prioritaria'] else camera['normal']
+                        return self._atender(self.ordem_cameras[self.posicao], fila)
+                else:
+                    # Câmera sem trabalho não acumula créditos, mas quita a cada rodada o que deve
+                    camera['deficit'] = min(camera['deficit'] + camera['peso'], 0.0)
+                self.posicao = (self.posicao + 1) % total
+                self.visita_iniciada = False
+    
+    def _atender(self, camera_id, fila):
+        """Retira o primeiro frame da fila e contabiliza o atendimento"""
+        _, item = fila.popleft()
+        self.cameras[camera_id]['stats']['atendidos'] += 1
+        return camera_id, item
+    
+    def qsize(self):
+        """Retorna o total de frames pendentes"""
+        with self.lock:
+            return sum(len(c['normal']) + len(c['prioritaria']) for c in self.cameras.values())
+    
+    def get_tamanhos_filas(self):
+        """Retorna o número de frames pendentes de cada câmera"""
+        with self.lock:
+            return {camera_id: len(c['normal']) + len(c['prioritaria'])
+                    for camera_id, c in self.cameras.items()}
+    
+    def get_estatisticas(self, camera_id):
+        """Retorna os contadores de uma câmera (recebidos, atendidos, prioritários, descartados, expirados)"""
+        with self.lock:
+            return dict(self.cameras[camera_id]['stats'])
@@ -0,0 +1,509 @@
+"""
+Workers faciais remotos: encoding das faces em outros processos ou hosts.
+O detector continua localizando as faces e extraindo os recortes alinhados
+(150x150) localmente; apenas os recortes, em JPEG, viajam por TCP até os workers,
+que calculam os encodings em lote (com os jitters pedidos) e os devolvem; a
+comparação com a pessoa de referência continua no detector.
+
+PoolWorkersFaciais tem a mesma interface do EncodingBatcher e o substitui no
+FaceDetector: cada pedido vai para o worker conectado com menos pedidos em voo
+(até MAX_EM_VOO_WORKER por worker; com todos ocupados, o pedido aguarda a primeira
+vaga). Se um worker cai ou não responde em TIMEOUT_WORKER, seus pedidos são
+reenviados a outro worker (até TENTATIVAS_WORKER vezes) e ele é reconectado
+periodicamente. Sem nenhum worker conectado, o encoding é calculado localmente
+(FALLBACK_LOCAL_WORKERS).
+
+Protocolo: mensagens com cabeçalho '<4sBII' (FDWK, tipo, id do pedido, tamanho).
+    OLA      worker -> cliente ao conectar: JSON com a versão do protocolo
+    PEDIDO   '<HH' (jitters, número de recortes) + para cada recorte '<I' tamanho + JPEG
+    RESPOSTA '<H' número de faces + encodings float32
+    ERRO     mensagem em UTF-8
+"""
+import json
+import time
+import struct
+import socket
+import itertools
+import threading
+import concurrent.futures
+from collections import deque
+import cv2
+import numpy as np
+from face_detector.config.settings import (
+    ENDERECO_WORKER, MAX_EM_VOO_WORKER, TENTATIVAS_WORKER, TIMEOUT_WORKER, INTERVALO_RECONEXAO_WORKER,
+    FALLBACK_LOCAL_WORKERS, QUALIDADE_JPEG_WORKER, NUM_JITTERS
+)
+from face_detector.services.encoding_batcher import EncodingBatcher
+from face_detector.utils.metricas import registro
+from face_detector.utils.logger import log_info, log_error
+
+MAGICO = b'FDWK'
+VERSAO_PROTOCOLO = 2
+CABECALHO = struct.Struct('<4sBII')
+OLA, PEDIDO, RESPOSTA, ERRO = 1, 2, 3, 4
+DIMENSAO_ENCODING = 128
+
+def _endereco(texto):
+    """Converte "host:porta" ou "porta" em (host, porta)"""
+    host, _, porta = texto.rpartition(':')
+    return host or '127.0.0.1', int(porta)
+
+def _receber_exato(sock, tamanho):
+    """Lê exatamente tamanho bytes (ConnectionError se a conexão fechar antes)"""
+    dados = bytearray()
+    while len(dados) < tamanho:
+        parte = sock.recv(min(tamanho - len(dados), 1 << 20))
+        if not parte:
+            raise ConnectionError("conexão fechada")
+        dados += parte
+    return bytes(dados)
+
+def receber_mensagem(sock):
+    """Lê uma mensagem do protocolo e retorna (tipo, id, payload)"""
+    magico, tipo, id_pedido, tamanho = CABECALHO.unpack(_receber_exato(sock, CABECALHO.size))
+    if magico != MAGICO:
+        raise ConnectionError("mensagem fora do protocolo de workers faciais")
+    return tipo, id_pedido, _receber_exato(sock, tamanho) if tamanho else b''
+
+def montar_mensagem(tipo, id_pedido, payload=b''):
+    """Monta uma mensagem do protocolo"""
+    return CABECALHO.pack(MAGICO, tipo, id_pedido, len(payload)) + payload
+
+def codificar_pedido(chips, num_jitters, qualidade=None):
+    """Comprime os recortes alinhados em JPEG e monta o payload de um pedido"""
+    qualidade = qualidade if qualidade is not None else QUALIDADE_JPEG_WORKER
+    partes = [struct.pack('<HH', num_jitters, len(chips))]
+    for chip in chips:
+        # O recorte é RGB; a ordem dos canais é preservada na ida e na volta
+        ok, jpeg = cv2.imencode('.jpg', chip, [cv2.IMWRITE_JPEG_QUALITY, qualidade])
+        if not ok:
+            raise ValueError("falha ao comprimir recorte de face")
+        partes.append(struct.pack('<I', len(jpeg)))
+        partes.append(jpeg.tobytes())
+    return b''.join(partes)
+
+def decodificar_pedido(payload):
+    """Retorna (número de jitters, recortes RGB) de um pedido"""
+    num_jitters, quantidade = struct.unpack_from('<HH', payload)
+    posicao = 4
+    chips = []
+    for _ in range(quantidade):
+        (tamanho,) = struct.unpack_from('<I', payload, posicao)
+        posicao += 4
+        chip = cv2.imdecode(np.frombuffer(payload, np.uint8, tamanho, posicao), cv2.IMREAD_COLOR)
+        if chip is None:
+            raise ValueError("recorte de face inválido")
+        chips.append(chip)
+        posicao += tamanho
+    return num_jitters, chips
+
+def codificar_resposta(encodings):
+    """Monta o payload de uma resposta a partir dos encodings"""
+    return (struct.pack('<H', len(encodings))
+            + np.asarray(encodings, dtype=np.float32).reshape(-1, DIMENSAO_ENCODING).tobytes())
+
+def decodificar_resposta(payload):
+    """Retorna os encodings de uma resposta"""
+    (quantidade,) = struct.unpack_from('<H', payload)
+    matriz = np.frombuffer(payload, np.float32, quantidade * DIMENSAO_ENCODING, 2)
+    return [linha.astype(np.float64) for linha in matriz.reshape(quantidade, DIMENSAO_ENCODING)]
+
+class ServidorWorkerFacial:
+    """Processo worker: recebe recortes de faces, calcula os encodings em lote e responde"""
+    
+    def __init__(self, endereco=None, batcher=None):
+        """
+        Inicializa o worker
+        
+        Args:
+            endereco: "host:porta" de escuta (None = ENDERECO_WORKER)
+            batcher: EncodingBatcher que agrupa os recortes de todos os clientes (None = padrão)
+        """
+        self.endereco = endereco if endereco is not None else ENDERECO_WORKER
+        self.batcher = batcher if batcher is not None else EncodingBatcher()
+        self.servidor = None
+        self.clientes = set()  # Conexões abertas, encerradas em finalizar()
+        self.lock = threading.Lock()
+        self.running = False
+        self.pedidos = 0
+        self.faces = 0
+    
+    def executar(self):
+        """Aceita clientes até finalizar() (bloqueia a thread chamadora)"""
+        self.servidor = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.servidor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.servidor.bind(_endereco(self.endereco))
+        self.servidor.listen(16)
+        self.running = True
+        self.batcher.iniciar()
+        log_info(f"Worker facial em {self.endereco} (lotes de até {self.batcher.tamanho_maximo} faces)")
+        while self.running:
+            try:
+                sock, origem = self.servidor.accept()
+            except OSError:
+                break
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._atender, args=(sock, origem), daemon=True).start()
+    
+    def _atender(self, sock, origem):
+        """Lê os pedidos de um cliente; as respostas são enviadas ao concluir cada lote"""
+        lock_envio = threading.Lock()
+        with self.lock:
+            self.clientes.add(sock)
+        log_info(f"Cliente do worker facial conectado: {origem[0]}:{origem[1]}")
+        try:
+            ola = {'versao': VERSAO_PROTOCOLO}
+            sock.sendall(montar_mensagem(OLA, 0, json.dumps(ola).encode('utf-8')))
+            while self.running:
+                tipo, id_pedido, payload = receber_mensagem(sock)
+                if tipo != PEDIDO:
+                    continue
+                try:
+                    num_jitters, chips = decodificar_pedido(payload)
+                except Exception as e:
+                    self._enviar(sock, lock_envio, montar_mensagem(ERRO, id_pedido, str(e).encode('utf-8')))
+                    continue
+                future = self.batcher.submeter_chips(chips, num_jitters)
+                future.add_done_callback(
+                    lambda f, id_pedido=id_pedido: self._responder(sock, lock_envio, id_pedido, f))
+        except (ConnectionError, OSError):
+            pass
+        except Exception as e:
+            log_error(f"Erro na conexão do worker facial com {origem[0]}: {str(e)}")
+        finally:
+            with self.lock:
+                self.clientes.discard(sock)
+            sock.close()
+            log_info(f"Cliente do worker facial desconectado: {origem[0]}:{origem[1]}")
+    
+    def _responder(self, sock, lock_envio, id_pedido, future):
+        """Envia os encodings calculados (ou o erro) ao cliente do pedido"""
+        try:
+            encodings, _ = future.result()
+            mensagem = montar_mensagem(RESPOSTA, id_pedido, codificar_resposta(encodings))
+            self.pedidos += 1
+            self.faces += len(encodings)
+        except Exception as e:
+            mensagem = montar_mensagem(ERRO, id_pedido, str(e).encode('utf-8'))
+        self._enviar(sock, lock_envio, mensagem)
+    
+    def _enviar(self, sock, lock_envio, mensagem):
+        """Envia uma mensagem ao cliente (ignorando clientes já desconectados)"""
+        try:
+            with lock_envio:
+                sock.sendall(mensagem)
+        except OSError:
+            pass
+    
+    def finalizar(self):
+        """Para de aceitar clientes, encerra as conexões (os clientes reenviam os pedidos) e finaliza o lote"""
+        self.running = False
+        if self.servidor is not None:
+            try:
+                self.servidor.shutdown(socket.SHUT_RDWR)  # Desbloqueia o accept() de executar()
+            except OSError:
+                pass
+            self.servidor.close()
+        with self.lock:
+            clientes = list(self.clientes)
+        for sock in clientes:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.batcher.finalizar()
+        log_info(f"Worker facial finalizado: {self.pedidos} pedidos, {self.faces} faces")
+
+class _Pedido:
+    """Recortes de faces aguardando encoding e o Future de quem os submeteu"""
+    
+    def __init__(self, future, chips, payload, num_jitters, contexto):
+        self.future = future
+        self.chips = chips
+        self.payload = payload
+        self.num_jitters = num_jitters
+        self.contexto = contexto
+        self.tentativas = 0
+        self.enviado_em = 0.0
+
+class _Worker:
+    """Conexão do cliente com um worker e os pedidos em voo nela"""
+    
+    def __init__(self, endereco):
+        self.endereco = endereco
+        self.sock = None
+        self.conectado = False
+        self.pendentes = {}
+        self.lock = threading.Lock()        # Estado da conexão e pedidos em voo
+        self.lock_envio = threading.Lock()  # Envio (separado: um envio travado não impede a perda do worker)
+        self.proxima_tentativa = 0.0
+        self.indisponivel = False  # Falha de conexão já registrada no log
+
+class PoolWorkersFaciais:
+    """Distribui o encoding das faces entre workers remotos, com reenvio e cálculo local de reserva"""
+    
+    def __init__(self, enderecos, local=None, max_em_voo=None, tentativas=None, timeout=None, fallback_local=None,
+                 qualidade=None):
+        """
+        Inicializa o pool (sem conexões até iniciar())
+        
+        Args:
+            enderecos: Endereços "host:porta" dos workers
+            local: EncodingBatcher para extrair os recortes e calcular localmente (None = padrão)
+            max_em_voo: Pedidos aguardando resposta por worker (None = MAX_EM_VOO_WORKER)
+            tentativas: Reenvios de um pedido após a perda de um worker (None = TENTATIVAS_WORKER)
+            timeout: Segundos sem resposta antes de considerar o worker perdido (None = TIMEOUT_WORKER)
+            fallback_local: Calcular localmente sem worker conectado (None = FALLBACK_LOCAL_WORKERS)
+            qualidade: Qualidade JPEG dos recortes enviados (None = QUALIDADE_JPEG_WORKER)
+        """
+        self.workers = [_Worker(endereco) for endereco in enderecos]
+        self.local = local if local is not None else EncodingBatcher()
+        self.max_em_voo = max_em_voo if max_em_voo is not None else MAX_EM_VOO_WORKER
+        self.tentativas = tentativas if tentativas is not None else TENTATIVAS_WORKER
+        self.timeout = timeout if timeout is not None else TIMEOUT_WORKER
+        self.fallback_local = fallback_local if fallback_local is not None else FALLBACK_LOCAL_WORKERS
+        self.qualidade = qualidade if qualidade is not None else QUALIDADE_JPEG_WORKER
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()  # Escolha do worker, reserva da vaga em voo e fila de espera
+        self.espera = deque()         # Pedidos aguardando vaga com todos os workers ocupados
+        self.running = False
+        self.monitor = None
+        
+        self.faces_remotas = registro.contador('faces_encoding_remoto')
+        self.faces_locais = registro.contador('faces_encoding_local_reserva')
+        self.reenvios = registro.contador('pedidos_reenviados_workers')
+        self.perdas = registro.contador('workers_faciais_perdidos')
+        registro.medidor('workers_faciais_conectados', funcao=lambda: sum(w.conectado for w in self.workers))
+        registro.medidor('pedidos_em_voo_workers', funcao=lambda: sum(len(w.pendentes) for w in self.workers))
+        registro.medidor('pedidos_aguardando_workers', funcao=lambda: len(self.espera))
+    
+    def iniciar(self):
+        """Conecta aos workers e inicia o monitor de prazos e reconexões"""
+        self.running = True
+        if self.fallback_local:
+            self.local.iniciar()
+        for worker in self.workers:
+            self._conectar(worker)
+        self.monitor = threading.Thread(target=self._monitorar, daemon=True)
+        self.monitor.start()
+        conectados = sum(w.conectado for w in self.workers)
+        log_info(f"Workers faciais: {conectados} de {len(self.workers)} conectados "
+                 f"(até {self.max_em_voo} pedidos em voo por worker)")
+    
+    def extrair_chips(self, rgb_frame, face_locations):
+        """Extrai localmente os recortes alinhados (o que viaja até os workers)"""
+        return self.local.extrair_chips(rgb_frame, face_locations)
+    
+    def extrair_chip(self, rgb_frame, landmarks):
+        return self.local.extrair_chip(rgb_frame, landmarks)
+    
+    def submeter(self, rgb_frame, face_locations, num_jitters=None, contexto=None):
+        """Mesma interface do EncodingBatcher: Future que resolve para (face_encodings, contexto)"""
+        try:
+            chips = self.extrair_chips(rgb_frame, face_locations)
+        except Exception as e:
+            future = concurrent.futures.Future()
+            future.set_exception(e)
+            return future
+        return self.submeter_chips(chips, num_jitters, contexto)
+    
+    def submeter_chips(self, chips, num_jitters=None, contexto=None):
+        """
+        Envia recortes já extraídos a um worker
+        
+        Returns:
+            Future que resolve para (face_encodings, contexto)
+        """
+        future = concurrent.futures.Future()
+        num_jitters = num_jitters if num_jitters is not None else NUM_JITTERS
+        if not chips:
+            future.set_result(([], contexto))
+            return future
+        try:
+            payload = codificar_pedido(chips, num_jitters, self.qualidade)
+        except Exception as e:
+            future.set_exception(e)
+            return future
+        self._despachar(_Pedido(future, chips, payload, num_jitters, contexto))
+        return future
+    
+    def _despachar(self, pedido):
+        """Envia o pedido ao worker menos ocupado, aguarda uma vaga ou, sem workers, calcula localmente"""
+        while True:
+            with self.lock:
+                livres = [w for w in self.workers if w.conectado and len(w.pendentes) < self.max_em_voo]
+                if not livres:
+                    if any(w.conectado for w in self.workers):
+                        self.espera.append(pedido)
+                        return
+                    break
+                worker = min(livres, key=lambda w: len(w.pendentes))
+                id_pedido = next(self.ids)
+                with worker.lock:
+                    if not worker.conectado:
+                        continue
+                    pedido.enviado_em = time.time()
+                    worker.pendentes[id_pedido] = pedido
+            try:
+                with worker.lock_envio:
+                    worker.sock.sendall(montar_mensagem(PEDIDO, id_pedido, pedido.payload))
+                return
+            except OSError as e:
+                # O pedido volta para este laço pelo reenvio da perda do worker
+                self._perder(worker, f"falha no envio: {str(e)}")
+                return
+        self._calcular_localmente(pedido)
+    
+    def _liberar_espera(self):
+        """Despacha os pedidos em espera: para as vagas livres ou, sem workers conectados, localmente"""
+        while True:
+            with self.lock:
+                conectados = [w for w in self.workers if w.conectado]
+                vaga = any(len(w.pendentes) < self.max_em_voo for w in conectados)
+                if not self.espera or (conectados and not vaga):
+                    return
+                pedido = self.espera.popleft()
+            if conectados:
+                self._despachar(pedido)
+            else:
+                self._calcular_localmente(pedido)
+    
+    def _calcular_localmente(self, pedido):
+        """Calcula o pedido no processo (reserva) ou falha o Future se a reserva estiver desativada"""
+        if not self.fallback_local:
+            pedido.future.set_exception(ConnectionError("nenhum worker facial disponível"))
+            return
+        self.faces_locais.incrementar(len(pedido.chips))
+        
+        def _repassar(future_local):
+            try:
+                pedido.future.set_result(future_local.result())
+            except Exception as e:
+                pedido.future.set_exception(e)
+        
+        self.local.submeter_chips(pedido.chips, pedido.num_jitters, pedido.contexto).add_done_callback(_repassar)
+    
+    def _conectar(self, worker):
+        """Tenta conectar a um worker e iniciar a leitura das respostas"""
+        try:
+            sock = socket.create_connection(_endereco(worker.endereco), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            tipo, _, payload = receber_mensagem(sock)
+            if tipo != OLA or json.loads(payload).get('versao') != VERSAO_PROTOCOLO:
+                raise ConnectionError("versão do protocolo incompatível")
+            sock.settimeout(None)  # Respostas lentas são tratadas pelo monitor de prazos
+        except Exception as e:
+            worker.proxima_tentativa = time.time() + INTERVALO_RECONEXAO_WORKER
+            if not worker.indisponivel:
+                worker.indisponivel = True
+                log_error(f"Worker facial {worker.endereco} indisponível: {str(e)} "
+                          f"(nova tentativa a cada {INTERVALO_RECONEXAO_WORKER:g}s)")
+            return False
+        with worker.lock:
+            worker.sock = sock
+            worker.conectado = True
+            worker.indisponivel = False
+        threading.Thread(target=self._ler, args=(worker, sock), daemon=True).start()
+        log_info(f"Worker facial {worker.endereco} conectado")
+        return True
+    
+    def _ler(self, worker, sock):
+        """Recebe as respostas de um worker e resolve os Futures dos pedidos"""
+        try:
+            while True:
+                tipo, id_pedido, payload = receber_mensagem(sock)
+                with worker.lock:
+                    pedido = worker.pendentes.pop(id_pedido, None)
+                if pedido is None:
+                    continue
+                if tipo == RESPOSTA:
+                    encodings = decodificar_resposta(payload)
+                    registro.histograma('encoding_remoto').observar(time.time() - pedido.enviado_em)
+                    self.faces_remotas.incrementar(len(encodings))
+                    pedido.future.set_result((encodings, pedido.contexto))
+                elif tipo == ERRO:
+                    motivo = payload.decode('utf-8', 'replace')
+                    log_error(f"Worker facial {worker.endereco} recusou um pedido: {motivo}")
+                    self._repetir(pedido)
+                self._liberar_espera()
+        except (ConnectionError, OSError) as e:
+            if sock is worker.sock:
+                self._perder(worker, str(e) or "conexão perdida")
+        except Exception as e:
+            log_error(f"Erro ao ler respostas do worker facial {worker.endereco}: {str(e)}")
+            if sock is worker.sock:
+                self._perder(worker, "resposta inválida")
+    
+    def _perder(self, worker, motivo):
+        """Desconecta um worker e reenvia os pedidos que estavam com ele"""
+        with worker.lock:
+            if not worker.conectado:
+                return
+            worker.conectado = False
+            pendentes = list(worker.pendentes.values())
+            worker.pendentes.clear()
+            worker.proxima_tentativa = time.time() + INTERVALO_RECONEXAO_WORKER
+            try:
+                worker.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            worker.sock.close()
+        self.perdas.incrementar()
+        log_error(f"Worker facial {worker.endereco} perdido ({motivo}); {len(pendentes)} pedidos reenviados")
+        for pedido in pendentes:
+            self._repetir(pedido)
+        self._liberar_espera()
+    
+    def _repetir(self, pedido):
+        """Reenvia um pedido a outro worker ou, esgotadas as tentativas, calcula localmente"""
+        pedido.tentativas += 1
+        if pedido.tentativas > self.tentativas:
+            self._calcular_localmente(pedido)
+            return
+        self.reenvios.incrementar()
+        self._despachar(pedido)
+    
+    def _monitorar(self):
+        """Detecta workers sem resposta dentro do prazo e reconecta os desconectados"""
+        while self.running:
+            agora = time.time()
+            for worker in self.workers:
+                if worker.conectado:
+                    with worker.lock:
+                        mais_antigo = min((p.enviado_em for p in worker.pendentes.values()), default=agora)
+                    if agora - mais_antigo > self.timeout:
+                        self._perder(worker, f"sem resposta em {self.timeout:g}s")
+                elif agora >= worker.proxima_tentativa and self._conectar(worker):
+                    self._liberar_espera()
+            time.sleep(0.2)
+    
+    def get_estatisticas(self):
+        """Estatísticas do lote local acrescidas das contagens dos workers remotos"""
+        estatisticas = self.local.get_estatisticas()
+        estatisticas.update({
+            'workers': len(self.workers),
+            'workers_conectados': sum(w.conectado for w in self.workers),
+            'faces_remotas': self.faces_remotas.valor,
+            'faces_locais': self.faces_locais.valor,
+            'reenvios': self.reenvios.valor
+        })
+        return estatisticas
+    
+    def finalizar(self):
+        """Fecha as conexões; pedidos ainda em voo são calculados localmente"""
+        self.running = False
+        if self.monitor is not None:
+            self.monitor.join(timeout=1.0)
+        with self.lock:
+            pendentes = list(self.espera)
+            self.espera.clear()
+        for worker in self.workers:
+            with worker.lock:
+                pendentes.extend(worker.pendentes.values())
+                worker.pendentes.clear()
+                worker.conectado = False
+                if worker.sock is not None:
+                    worker.sock.close()
+        for pedido in pendentes:
+            self._calcular_localmente(pedido)
+        self.local.finalizar()
@@ -0,0 +1,311 @@
+"""
+Gravação e reprodução dos frames que chegam à detecção de movimento.
+O contêiner tem dois arquivos somente de acréscimo, ambos mapeáveis em memória:
+
+- <nome>.frames: cabeçalho de 64 bytes (formato e dimensões) seguido dos frames,
+  brutos (BGR contíguo) ou em JPEG
+- <nome>.frames.idx: um registro de 24 bytes por frame (offset, tamanho, timestamp)
+
+Uma gravação interrompida continua legível até o último registro completo.
+"""
+import os
+import time
+import struct
+import threading
+from queue import Queue, Full
+import cv2
+import numpy as np
+from face_detector.config.settings import (
+    FORMATO_GRAVACAO, QUALIDADE_JPEG_GRAVACAO, TAMANHO_FILA_GRAVACAO, EXTENSAO_GRAVACAO, VELOCIDADE_REPLAY
+)
+from face_detector.utils.logger import log_info, log_error
+
+ASSINATURA_GRAVACAO = b'FDFRAME1'
+FORMATO_CABECALHO = '<8sIIII'    # assinatura, formato, altura, largura, canais
+TAMANHO_CABECALHO = 64
+FORMATOS = {'bruto': 0, 'jpeg': 1}
+DTYPE_INDICE = np.dtype([('offset', '<u8'), ('tamanho', '<u8'), ('timestamp', '<f8')])
+
+def eh_gravacao(fonte):
+    """Indica se a fonte de vídeo é uma gravação de frames"""
+    return isinstance(fonte, str) and fonte.endswith(EXTENSAO_GRAVACAO)
+
+class FrameRecorder:
+    """Grava frames e timestamps em segundo plano, sem bloquear a thread que os produz"""
+    
+    def __init__(self, caminho, formato=None, qualidade=None, tamanho_fila=None):
+        """
+        Inicializa o gravador
+        
+        Args:
+            caminho: Arquivo de dados (EXTENSAO_GRAVACAO); o índice fica em caminho + ".idx"
+            formato: "bruto" ou "jpeg" (None = FORMATO_GRAVACAO)
+            qualidade: Qualidade JPEG (None = QUALIDADE_JPEG_GRAVACAO)
+            tamanho_fila: Frames aguardando gravação; excedentes são descartados e contados
+        """
+        self.caminho = caminho
+        self.formato = formato if formato is not None else FORMATO_GRAVACAO
+        if self.formato not in FORMATOS:
+            raise ValueError(f"Formato de gravação inválido: {self.formato} (use {', '.join(FORMATOS)})")
+        self.qualidade = qualidade if qualidade is not None else QUALIDADE_JPEG_GRAVACAO
+        self.fila = Queue(maxsize=tamanho_fila if tamanho_fila is not None else TAMANHO_FILA_GRAVACAO)
+        self.arquivo_dados = None
+        self.arquivo_indice = None
+        self.forma = None
+        self.offset = TAMANHO_CABECALHO
+        self.gravados = 0
+        self.descartados = 0
+        self.thread = None
+    
+    def iniciar(self):
+        """Inicia a thread de gravação"""
+        pasta = os.path.dirname(self.caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        log_info(f"Gravando frames em {self.caminho} ({self.formato})")
+    
+    def adicionar(self, frame, timestamp):
+        """Enfileira um frame para gravação (o frame é apenas lido)"""
+        try:
+            self.fila.put_nowait((frame, timestamp))
+        except Full:
+            self.descartados += 1
+            if self.descartados % 100 == 1:
+                log_error(f"Gravação de {self.caminho} atrasada: {self.descartados} frames descartados")
+    
+    def _loop(self):
+        """Grava os frames da fila até receber o sinal de término"""
+        while True:
+            item = self.fila.get()
+            if item is None:
+                break
+            try:
+                self._gravar(*item)
+            except Exception as e:
+                log_error(f"Erro ao gravar frame em {self.caminho}: {str(e)}")
+        self.fechar()
+    
+    def _gravar(self, frame, timestamp):
+        """Codifica um frame no formato da gravação e o acrescenta"""
+        if self.forma is not None and frame.shape != self.forma:
+            self.descartados += 1
+            log_error(f"Frame com dimensões {frame.shape} diferentes da gravação {self.forma}; ignorado")
+            return
+        
+        if self.formato == 'bruto':
+            dados = np.ascontiguousarray(frame).tobytes()
+        else:
+            ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.qualidade])
+            if not ok:
+                raise RuntimeError("falha na codificação JPEG")
+            dados = jpeg.tobytes()
+        self.gravar_codificado(dados, frame.shape, timestamp)
+    
+    def gravar_codificado(self, dados, forma, timestamp):
+        """
+        Acrescenta um frame já codificado no formato da gravação (sem a thread de gravação)
+        
+        Args:
+            dados: Bytes do frame (JPEG ou BGR contíguo)
+            forma: Dimensões do frame decodificado
+            timestamp: Timestamp de captura do frame
+        
+        Returns:
+            False se as dimensões diferirem das da gravação (frame ignorado)
+        """
+        if self.arquivo_dados is None:
+            # O primeiro frame define as dimensões da gravação
+            self.forma = tuple(forma)
+            altura, largura = forma[:2]
+            canais = forma[2] if len(forma) == 3 else 1
+            self.arquivo_dados = open(self.caminho, 'wb')
+            cabecalho = struct.pack(FORMATO_CABECALHO, ASSINATURA_GRAVACAO, FORMATOS[self.formato],
+                                    altura, largura, canais)
+            self.arquivo_dados.write(cabecalho.ljust(TAMANHO_CABECALHO, b'\0'))
+            self.arquivo_indice = open(self.caminho + '.idx', 'wb')
+        elif tuple(forma) != self.forma:
+            self.descartados += 1
+            return False
+        
+        # Dados antes do índice: um registro no índice sempre aponta para bytes já gravados
+        self.arquivo_dados.write(dados)
+        self.arquivo_dados.flush()
+        self.arquivo_indice.write(struct.pack('<QQd', self.offset, len(dados), timestamp))
+        self.arquivo_indice.flush()
+        self.offset += len(dados)
+        self.gravados += 1
+        return True
+    
+    def fechar(self):
+        """Fecha os arquivos da gravação"""
+        for arquivo in (self.arquivo_dados, self.arquivo_indice):
+            if arquivo is not None:
+                arquivo.close()
+        self.arquivo_dados = self.arquivo_indice = None
+    
+    def finalizar(self):
+        """Grava os frames pendentes e fecha os arquivos"""
+        if self.thread is None:
+            return
+        self.fila.put(None)
+        self.thread.join(timeout=10.0)
+        log_info(f"Gravação {self.caminho}: {self.gravados} frames gravados, {self.descartados} descartados")
+
+class FrameRecording:
+    """Leitura de uma gravação por mapeamento em memória"""
+    
+    def __init__(self, caminho):
+        """
+        Abre uma gravação
+        
+        Args:
+            caminho: Arquivo de dados gravado pelo FrameRecorder
+        """
+        self.caminho = caminho
+        with open(caminho, 'rb') as arquivo:
+            assinatura, formato, altura, largura, canais = struct.unpack(
+                FORMATO_CABECALHO, arquivo.read(struct.calcsize(FORMATO_CABECALHO)))
+        if assinatura != ASSINATURA_GRAVACAO:
+            raise ValueError(f"{caminho} não é uma gravação de frames")
+        self.bruto = formato == FORMATOS['bruto']
+        self.forma = (altura, largura, canais) if canais > 1 else (altura, largura)
+        self.dados = np.memmap(caminho, dtype=np.uint8, mode='r')
+        
+        # Registros completos do índice (uma gravação interrompida pode ter um registro parcial)
+        total = os.path.getsize(caminho + '.idx') // DTYPE_INDICE.itemsize
+        self.indice = (np.memmap(caminho + '.idx', dtype=DTYPE_INDICE, mode='r', shape=(total,))
+                       if total > 0 else np.zeros(0, dtype=DTYPE_INDICE))
+        # Frames cujos dados também foram gravados por completo
+        while total > 0 and self.indice[total - 1]['offset'] + self.indice[total - 1]['tamanho'] > len(self.dados):
+            total -= 1
+        self.total = total
+    
+    def __len__(self):
+        return self.total
+    
+    def timestamp(self, posicao):
+        """Timestamp original de captura do frame"""
+        return float(self.indice[posicao]['timestamp'])
+    
+    def fps(self):
+        """Taxa média de frames da gravação, pelos timestamps de captura (0 com menos de dois frames)"""
+        if self.total < 2:
+            return 0.0
+        duracao = self.timestamp(self.total - 1) - self.timestamp(0)
+        return (self.total - 1) / duracao if duracao > 0 else 0.0
+    
+    def ler(self, posicao):
+        """
+        Lê um frame
+        
+        Returns:
+            Frame BGR; no formato bruto é uma visão somente leitura do arquivo mapeado (sem cópia)
+        """
+        registro = self.indice[posicao]
+        inicio = int(registro['offset'])
+        dados = self.dados[inicio:inicio + int(registro['tamanho'])]
+        if self.bruto:
+            return dados.reshape(self.forma)
+        return cv2.imdecode(dados, cv2.IMREAD_COLOR)
+
+class ReplaySource:
+    """Fonte de vídeo que reproduz uma gravação com a mesma interface de leitura do VideoCapture"""
+    
+    def __init__(self, caminho, velocidade=None, metricas=None):
+        """
+        Inicializa a reprodução
+        
+        Args:
+            caminho: Gravação a reproduzir
+            velocidade: 1.0 = tempo real, 2.0 = o dobro, 0 = o mais rápido possível (None = VELOCIDADE_REPLAY)
+            metricas: MetricasCamera para registrar o tempo de decodificação (None = sem métricas)
+        
+        Os timestamps gravados são deslocados para o início da reprodução e os intervalos
+        entre frames divididos pela velocidade, acompanhando o relógio; com velocidade 0
+        cada frame recebe o instante da sua leitura.
+        """
+        self.source = caminho
+        self.velocidade = velocidade if velocidade is not None else VELOCIDADE_REPLAY
+        self.metricas = metricas
+        self.gravacao = None
+        self.posicao = 0
+        self.inicio = None
+        self.ultimo_timestamp = None
+        self.arquivo = True  # Sem descarte de frames, como em arquivos de vídeo
+        self.fonte_esgotada = False
+        self.stopped = True
+        
+        # FPS de reprodução: medido apenas com velocidade 0 (sem o ritmo da gravação)
+        self.fps = 0.0
+        self.fps_counter = 0
+        self.fps_start_time = time.time()
+    
+    def start(self):
+        """Abre a gravação"""
+        try:
+            self.gravacao = FrameRecording(self.source)
+        except Exception as e:
+            log_error(f"Erro ao abrir gravação {self.source}: {str(e)}")
+            return False
+        log_info(f"Reproduzindo {self.source}: {len(self.gravacao)} frames "
+                 f"({'o mais rápido possível' if self.velocidade <= 0 else f'velocidade {self.velocidade:g}x'})")
+        self.stopped = False
+        self.fonte_esgotada = len(self.gravacao) == 0
+        if self.velocidade > 0:
+            self.fps = self.gravacao.fps() * self.velocidade
+        return True
+    
+    def read(self):
+        """Lê o próximo frame, aguardando o seu instante na velocidade configurada"""
+        if self.stopped or self.fonte_esgotada:
+            return False, None
+        
+        gravacao = self.gravacao
+        if self.inicio is None:
+            self.inicio = time.time()
+        deslocamento = gravacao.timestamp(self.posicao) - gravacao.timestamp(0)
+        if self.velocidade > 0:
+            espera = self.inicio + deslocamento / self.velocidade - time.time()
+            if espera > 0:
+                time.sleep(espera)
+        
+        inicio_leitura = time.time()
+        frame = gravacao.ler(self.posicao)
+        if self.metricas is not None:
+            self.metricas.observar('decodificacao', time.time() - inicio_leitura)
+        
+        # Timestamp no relógio da reprodução (o mesmo dos prazos e latências do pipeline)
+        self.ultimo_timestamp = self.inicio + deslocamento / self.velocidade if self.velocidade > 0 else time.time()
+        self.posicao += 1
+        if self.velocidade <= 0:
+            self.fps_counter += 1
+            if (time.time() - self.fps_start_time) > 1:
+                self.fps = self.fps_counter / (time.time() - self.fps_start_time)
+                self.fps_counter = 0
+                self.fps_start_time = time.time()
+        if self.posicao >= len(gravacao):
+            self.fonte_esgotada = True
+            log_info(f"Fim da gravação: {self.source} ({self.posicao} frames)")
+        return frame is not None, frame
+    
+    def set_modo_ocioso(self, ocioso, taxa_fps=None):
+        """Sem efeito: todos os frames gravados são reproduzidos"""
+        pass
+    
+    def get_fps(self):
+        """Retorna o FPS de reprodução (o da gravação ajustado pela velocidade)"""
+        return self.fps
+    
+    def get_drop_count(self):
+        """A reprodução não descarta frames"""
+        return 0
+    
+    def get_queue_size(self):
+        """A reprodução lê os frames sob demanda, sem fila"""
+        return 0
+    
+    def stop(self):
+        """Encerra a reprodução"""
+        self.stopped = True
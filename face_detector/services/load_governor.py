@@ -0,0 +1,90 @@
+"""
+Serviço de controle de carga do processamento facial.
+Observa a fila de faces e o tempo de processamento por frame e percorre uma
+escada de degradação configurável quando o estágio facial não acompanha o fluxo.
+"""
+import time
+import threading
+from face_detector.config.settings import (
+    NIVEIS_DEGRADACAO, FILA_FACE_ALTA, FILA_FACE_BAIXA,
+    TEMPO_FRAME_FACE_ALTO, TEMPO_FRAME_FACE_BAIXO, INTERVALO_AJUSTE_CARGA
+)
+from face_detector.utils.logger import log_info
+
+class LoadGovernor:
+    """Classe para ajustar o nível de degradação do processamento facial conforme a carga"""
+    
+    def __init__(self, niveis=None, fila_alta=None, fila_baixa=None,
+                 tempo_alto=None, tempo_baixo=None, intervalo_ajuste=None):
+        """
+        Inicializa o controlador de carga
+        
+        Args:
+            niveis: Lista de parâmetros de processamento, do mais completo ao mais leve
+            fila_alta: Tamanho da fila de faces que indica sobrecarga
+            fila_baixa: Tamanho da fila de faces que indica folga
+            tempo_alto: Tempo médio por frame (segundos) que indica sobrecarga
+            tempo_baixo: Tempo médio por frame (segundos) que indica folga
+            intervalo_ajuste: Tempo mínimo entre mudanças de nível (segundos)
+        """
+        self.niveis = niveis if niveis is not None else NIVEIS_DEGRADACAO
+        self.fila_alta = fila_alta if fila_alta is not None else FILA_FACE_ALTA
+        self.fila_baixa = fila_baixa if fila_baixa is not None else FILA_FACE_BAIXA
+        self.tempo_alto = tempo_alto if tempo_alto is not None else TEMPO_FRAME_FACE_ALTO
+        self.tempo_baixo = tempo_baixo if tempo_baixo is not None else TEMPO_FRAME_FACE_BAIXO
+        self.intervalo_ajuste = intervalo_ajuste if intervalo_ajuste is not None else INTERVALO_AJUSTE_CARGA
+        self.nivel = 0
+        self.tempo_medio = 0.0
+        self.ultima_mudanca = 0
+        self.lock = threading.Lock()
+    
+    def registrar_tempo(self, duracao):
+        """Registra o tempo de processamento de um frame (média móvel exponencial)"""
+        with self.lock:
+            if self.tempo_medio == 0.0:
+                self.tempo_medio = duracao
+            else:
+                self.tempo_medio = 0.8 * self.tempo_medio + 0.2 * duracao
+    
+    def avaliar(self, tamanho_fila):
+        """
+        Avalia a carga atual e muda de nível se necessário
+        
+        Args:
+            tamanho_fila: Número de frames aguardando o processamento facial
+        
+        Returns:
+            True se o nível mudou
+        """
+        agora = time.time()
+        with self.lock:
+            if agora - self.ultima_mudanca < self.intervalo_ajuste:
+                return False
+            
+            sobrecarga = tamanho_fila >= self.fila_alta or self.tempo_medio >= self.tempo_alto
+            folga = tamanho_fila <= self.fila_baixa and self.tempo_medio <= self.tempo_baixo
+            
+            nivel_anterior = self.nivel
+            if sobrecarga and self.nivel < len(self.niveis) - 1:
+                self.nivel += 1
+            elif folga and self.nivel > 0:
+                self.nivel -= 1
+            else:
+                return False
+            
+            self.ultima_mudanca = agora
+            tempo_medio = self.tempo_medio
+        
+        direcao = "aumentado" if self.nivel > nivel_anterior else "reduzido"
+        log_info(f"Nível de degradação {direcao}: {nivel_anterior} -> {self.nivel} "
+                 f"(fila de faces: {tamanho_fila}, tempo médio: {tempo_medio * 1000:.0f} ms) "
+                 f"{self.niveis[self.nivel]}")
+        return True
+    
+    def get_nivel(self):
+        """Retorna o nível de degradação atual (0 = processamento completo)"""
+        return self.nivel
+    
+    def get_parametros(self):
+        """Retorna os parâmetros de processamento do nível atual"""
+        return self.niveis[self.nivel]
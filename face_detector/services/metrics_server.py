@@ -0,0 +1,162 @@
+"""
+Servidor de métricas no formato texto do Prometheus.
+Lê o registro de métricas sob demanda a cada coleta, em uma thread própria; as
+threads do pipeline não são bloqueadas além do lock curto de cada métrica.
+Também expõe os disparos de diagnóstico: /perfil (cProfile por N segundos) e
+/trace (últimos frames no formato de trace do Chrome).
+"""
+import json
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from face_detector.config.settings import ENDERECO_METRICAS
+from face_detector.utils.metricas import registro
+from face_detector.utils.rastreamento import rastreador
+from face_detector.utils.perfil import perfil
+from face_detector.utils.logger import log_info, log_error
+
+PREFIXO_METRICAS = "detector_"
+TIPO_CONTEUDO = "text/plain; version=0.0.4; charset=utf-8"
+
+def _rotulos(pares):
+    """Formata os rótulos {nome="valor"} ignorando os vazios"""
+    itens = []
+    for nome, valor in pares:
+        if valor is None:
+            continue
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        itens.append(f'{nome}="{valor}"')
+    return "{" + ",".join(itens) + "}" if itens else ""
+
+def formatar_prometheus(registro_metricas=None):
+    """
+    Gera o texto de exposição do Prometheus a partir do registro de métricas
+    
+    Contadores viram <nome>_total, medidores mantêm o nome e os histogramas de
+    latência formam a família latencia_segundos, rotulada por etapa e câmera.
+    
+    Args:
+        registro_metricas: RegistroMetricas a exportar (None = registro do processo)
+    """
+    registro_metricas = registro_metricas if registro_metricas is not None else registro
+    linhas = []
+    
+    familias = {}
+    for (nome, camera), contador in registro_metricas.itens(registro_metricas.contadores):
+        familias.setdefault(f"{PREFIXO_METRICAS}{nome}_total", []).append((camera, contador.valor))
+    for nome, amostras in sorted(familias.items()):
+        linhas.append(f"# TYPE {nome} counter")
+        for camera, valor in amostras:
+            linhas.append(f"{nome}{_rotulos([('camera', camera)])} {valor}")
+    
+    familias = {}
+    for (nome, camera), medidor in registro_metricas.itens(registro_metricas.medidores):
+        familias.setdefault(f"{PREFIXO_METRICAS}{nome}", []).append((camera, medidor.valor))
+    for nome, amostras in sorted(familias.items()):
+        linhas.append(f"# TYPE {nome} gauge")
+        for camera, valor in amostras:
+            linhas.append(f"{nome}{_rotulos([('camera', camera)])} {valor}")
+    
+    histogramas = registro_metricas.itens(registro_metricas.histogramas)
+    if histogramas:
+        nome = f"{PREFIXO_METRICAS}latencia_segundos"
+        linhas.append(f"# TYPE {nome} histogram")
+        for (etapa, camera), histograma in sorted(histogramas, key=lambda item: (item[0][0], str(item[0][1]))):
+            contagens, soma_ms, total = histograma.copia()
+            acumulado = 0
+            for limite_ms, contagem in zip(histograma.limites, contagens):
+                acumulado += contagem
+                rotulos = _rotulos([('etapa', etapa), ('camera', camera), ('le', f"{limite_ms / 1000.0:g}")])
+                linhas.append(f"{nome}_bucket{rotulos} {acumulado}")
+            rotulos = _rotulos([('etapa', etapa), ('camera', camera), ('le', '+Inf')])
+            linhas.append(f"{nome}_bucket{rotulos} {total}")
+            rotulos = _rotulos([('etapa', etapa), ('camera', camera)])
+            linhas.append(f"{nome}_sum{rotulos} {soma_ms / 1000.0}")
+            linhas.append(f"{nome}_count{rotulos} {total}")
+    
+    return "\n".join(linhas) + "\n"
+
+class MetricsServer:
+    """Servidor HTTP que expõe o registro de métricas em /metrics e os disparos de diagnóstico"""
+    
+    def __init__(self, porta, endereco=None, registro_metricas=None):
+        """
+        Inicializa o servidor de métricas
+        
+        Args:
+            porta: Porta TCP local
+            endereco: Endereço de escuta (None = ENDERECO_METRICAS)
+            registro_metricas: RegistroMetricas a exportar (None = registro do processo)
+        """
+        self.porta = porta
+        self.endereco = endereco if endereco is not None else ENDERECO_METRICAS
+        self.registro_metricas = registro_metricas
+        self.servidor = None
+        self.thread = None
+    
+    def iniciar(self):
+        """Inicia o servidor em uma thread separada"""
+        servidor_metricas = self
+        
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                servidor_metricas._atender(self)
+            
+            def log_message(self, formato, *args):
+                pass  # Sem log por coleta
+        
+        try:
+            self.servidor = ThreadingHTTPServer((self.endereco, self.porta), _Handler)
+            self.servidor.daemon_threads = True
+        except Exception as e:
+            log_error(f"Erro ao iniciar servidor de métricas na porta {self.porta}: {str(e)}")
+            return False
+        
+        self.thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        self.thread.start()
+        log_info(f"Métricas Prometheus em http://{self.endereco}:{self.porta}/metrics")
+        return True
+    
+    def _atender(self, requisicao):
+        """Responde a uma coleta de métricas ou a um disparo de diagnóstico"""
+        url = urlparse(requisicao.path)
+        parametros = parse_qs(url.query)
+        try:
+            if url.path == '/metrics':
+                corpo = formatar_prometheus(self.registro_metricas).encode('utf-8')
+                tipo = TIPO_CONTEUDO
+            elif url.path == '/perfil':
+                # O perfil é salvo em arquivo ao final; a resposta só confirma o disparo
+                segundos = float(parametros['segundos'][0]) if 'segundos' in parametros else None
+                iniciado = perfil.solicitar(segundos)
+                corpo = ("Captura de perfil iniciada\n" if iniciado else "Captura de perfil já em andamento\n").encode()
+                tipo = 'text/plain; charset=utf-8'
+            elif url.path == '/trace':
+                num_quadros = int(parametros['quadros'][0]) if 'quadros' in parametros else None
+                corpo = json.dumps(rastreador.exportar_chrome(num_quadros)).encode('utf-8')
+                tipo = 'application/json'
+            else:
+                requisicao.send_error(404)
+                return
+        except ValueError:
+            requisicao.send_error(400)
+            return
+        except Exception as e:
+            log_error(f"Erro ao atender {url.path}: {str(e)}")
+            requisicao.send_error(500)
+            return
+        
+        requisicao.send_response(200)
+        requisicao.send_header('Content-Type', tipo)
+        requisicao.send_header('Content-Length', str(len(corpo)))
+        requisicao.end_headers()
+        try:
+            requisicao.wfile.write(corpo)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Coletor desconectou
+    
+    def finalizar(self):
+        """Para o servidor"""
+        if self.servidor is not None:
+            self.servidor.shutdown()
+            self.servidor.server_close()
@@ -0,0 +1,52 @@
+"""
+Carregamento sob demanda dos modelos faciais.
+Importar o face_recognition carrega todos os modelos do dlib (detector HOG e CNN,
+preditores de landmarks e rede de encoding). Aqui a importação acontece apenas em
+carregar(), chamado explicitamente na inicialização, ou no primeiro uso.
+"""
+import time
+import threading
+from face_detector.utils.logger import log_info
+
+class ModelosFaciais:
+    """Acesso aos módulos face_recognition.api e dlib, importados uma única vez"""
+    
+    def __init__(self):
+        self._api = None
+        self._dlib = None
+        self.lock = threading.Lock()
+        self.tempo_carregamento = None
+    
+    def carregar(self):
+        """
+        Importa o face_recognition e o dlib (e com eles os modelos), se ainda não importados
+        
+        Returns:
+            Módulo face_recognition.api
+        """
+        if self._api is not None:
+            return self._api
+        with self.lock:
+            if self._api is None:
+                inicio = time.time()
+                import dlib
+                from face_recognition import api
+                self._dlib = dlib
+                self._api = api
+                self.tempo_carregamento = time.time() - inicio
+                log_info(f"Modelos faciais carregados em {self.tempo_carregamento:.2f}s")
+        return self._api
+    
+    @property
+    def api(self):
+        """Módulo face_recognition.api (face_locations, face_encodings, preditores, encoder)"""
+        return self._api if self._api is not None else self.carregar()
+    
+    @property
+    def dlib(self):
+        if self._dlib is None:
+            self.carregar()
+        return self._dlib
+
+# Modelos únicos do processo
+modelos = ModelosFaciais()
@@ -8,6 +8,7 @@ from face_detector.config.settings import (
 )
 from face_detector.utils.logger import log_movimento, log_captura
 from face_detector.utils.image_utils import salvar_imagem
+from face_detector.models.anotacoes import Anotacoes
 
 class MotionDetector:
     """Classe para detecção de movimento em frames de vídeo"""
@@ -16,16 +17,35 @@ class MotionDetector:
         """Inicializa o detector de movimento com os parâmetros especificados"""
         self.threshold = threshold if threshold is not None else MOVIMENTO_THRESHOLD
         self.area_minima = area_minima if area_minima is not None else AREA_MINIMA_CONTORNO
+        self.ultima_regiao = None  # Retângulo (x, y, w, h) que envolve o último movimento
     
-    def detectar(self, frame1, frame2):
-        """Detecta movimento entre dois frames consecutivos"""
+    def detectar(self, frame1, frame2, escala=1.0):
+        """
+        Detecta movimento entre dois frames consecutivos
+        
+        Args:
+            frame1: Frame atual (apenas leitura)
+            frame2: Frame anterior (apenas leitura)
+            escala: Escala de redução para a comparação (1.0 = resolução original);
+                    áreas e regiões retornadas continuam em pixels do frame original
+        
+        Returns:
+            Tupla com (movimento_detectado, movimento_area, anotações do movimento para frame1)
+        """
+        if escala != 1.0:
+            frame1_comparacao = cv2.resize(frame1, (0, 0), fx=escala, fy=escala, interpolation=cv2.INTER_AREA)
+            frame2_comparacao = cv2.resize(frame2, (0, 0), fx=escala, fy=escala, interpolation=cv2.INTER_AREA)
+        else:
+            frame1_comparacao, frame2_comparacao = frame1, frame2
+        
         # Converter para escala de cinza
-        gray1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.cvtColor(frame2, cv2.COLOR_BGR2GRAY)
+        gray1 = cv2.cvtColor(frame1_comparacao, cv2.COLOR_BGR2GRAY)
+        gray2 = cv2.cvtColor(frame2_comparacao, cv2.COLOR_BGR2GRAY)
         
-        # Aplicar blur para reduzir ruído
-        gray1 = cv2.GaussianBlur(gray1, (21, 21), 0)
-        gray2 = cv2.GaussianBlur(gray2, (21, 21), 0)
+        # Aplicar blur para reduzir ruído (kernel proporcional à escala, sempre ímpar)
+        kernel = max(3, int(21 * escala) | 1)
+        gray1 = cv2.GaussianBlur(gray1, (kernel, kernel), 0)
+        gray2 = cv2.GaussianBlur(gray2, (kernel, kernel), 0)
         
         # Calcular diferença absoluta entre os frames
         frame_diff = cv2.absdiff(gray1, gray2)
@@ -41,24 +61,37 @@ class MotionDetector:
         
         movimento_detectado = False
         movimento_area = 0
+        regioes = []
+        anotacoes = Anotacoes()
         
         # Verificar se há contornos significativos
         for contour in contours:
-            area = cv2.contourArea(contour)
+            # Converter a área para pixels do frame original
+            area = cv2.contourArea(contour) / (escala * escala)
             if area > self.area_minima:  # Filtrar contornos pequenos (ruído)
                 movimento_area += area
-                # Desenhar retângulo ao redor do movimento
-                (x, y, w, h) = cv2.boundingRect(contour)
-                cv2.rectangle(frame1, (x, y), (x + w, y + h), COR_VERDE, 2)
+                # Marcar retângulo ao redor do movimento
+                (x, y, w, h) = (int(v / escala) for v in cv2.boundingRect(contour))
+                anotacoes.adicionar_retangulo(x, y, x + w, y + h, COR_VERDE, 2)
+                regioes.append((x, y, x + w, y + h))
+        
+        # Guardar o retângulo que envolve todas as regiões com movimento
+        if regioes:
+            x1 = min(r[0] for r in regioes)
+            y1 = min(r[1] for r in regioes)
+            x2 = max(r[2] for r in regioes)
+            y2 = max(r[3] for r in regioes)
+            self.ultima_regiao = (x1, y1, x2 - x1, y2 - y1)
+        else:
+            self.ultima_regiao = None
         
         # Verificar se a área total de movimento é significativa
         if movimento_area > self.threshold:
             movimento_detectado = True
             # Adicionar texto indicando movimento
-            cv2.putText(frame1, f"Movimento: {movimento_area}", (10, 30), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, COR_VERMELHO, 2)
+            anotacoes.adicionar_texto(f"Movimento: {movimento_area}", (10, 30), 1, COR_VERMELHO, 2)
         
-        return movimento_detectado, movimento_area, frame1
+        return movimento_detectado, movimento_area, anotacoes
     
     def salvar_frame_movimento(self, frame, movimento_area):
         """Salva o frame com movimento detectado"""
@@ -70,4 +103,4 @@ class MotionDetector:
         log_movimento(f"Movimento detectado (área: {movimento_area:.0f}) - Limiar: {self.threshold}")
         log_captura(f"Frame de movimento salvo: {movimento_filename}")
         
-        return movimento_filename 
\ No newline at end of file
+        return movimento_filename
@@ -0,0 +1,102 @@
+"""
+Servidor de pré-visualização MJPEG para o modo sem interface gráfica.
+Os frames só são codificados enquanto houver algum cliente conectado e a uma
+taxa reduzida, para não competir com a detecção.
+"""
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import cv2
+from face_detector.config.settings import ENDERECO_PREVIEW, TAXA_FPS_PREVIEW, LARGURA_PREVIEW, QUALIDADE_JPEG_PREVIEW
+from face_detector.utils.logger import log_info, log_error
+
+class PreviewServer:
+    """Servidor HTTP que transmite os frames de uma câmera como MJPEG sob demanda"""
+    
+    def __init__(self, porta, obter_frame, cameras, endereco=None, taxa_fps=None):
+        """
+        Inicializa o servidor de pré-visualização
+        
+        Args:
+            porta: Porta TCP local
+            obter_frame: Função que recebe o ID da câmera e retorna o frame BGR mais recente (ou None)
+            cameras: IDs das câmeras disponíveis (a primeira é a padrão)
+            endereco: Endereço de escuta (None = ENDERECO_PREVIEW)
+            taxa_fps: Taxa máxima de frames enviados por cliente
+        """
+        self.porta = porta
+        self.obter_frame = obter_frame
+        self.cameras = [str(camera) for camera in cameras]
+        self.endereco = endereco if endereco is not None else ENDERECO_PREVIEW
+        self.intervalo = 1.0 / (taxa_fps if taxa_fps is not None else TAXA_FPS_PREVIEW)
+        self.servidor = None
+        self.thread = None
+        self.running = False
+    
+    def iniciar(self):
+        """Inicia o servidor em uma thread separada"""
+        servidor_preview = self
+        
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                servidor_preview._atender(self)
+            
+            def log_message(self, formato, *args):
+                pass  # Sem log por requisição
+        
+        try:
+            self.servidor = ThreadingHTTPServer((self.endereco, self.porta), _Handler)
+            self.servidor.daemon_threads = True
+        except Exception as e:
+            log_error(f"Erro ao iniciar pré-visualização na porta {self.porta}: {str(e)}")
+            return False
+        
+        self.running = True
+        self.thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        self.thread.start()
+        log_info(f"Pré-visualização MJPEG em http://{self.endereco}:{self.porta}/?camera={self.cameras[0]}")
+        return True
+    
+    def _atender(self, requisicao):
+        """Transmite os frames da câmera pedida até o cliente desconectar"""
+        url = urlparse(requisicao.path)
+        if url.path != '/':
+            requisicao.send_error(404)
+            return
+        camera_id = parse_qs(url.query).get('camera', [self.cameras[0]])[0]
+        if camera_id not in self.cameras:
+            requisicao.send_error(404, f"Câmera desconhecida: {camera_id}")
+            return
+        
+        requisicao.send_response(200)
+        requisicao.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=frame')
+        requisicao.send_header('Cache-Control', 'no-cache')
+        requisicao.end_headers()
+        
+        try:
+            while self.running:
+                inicio = time.time()
+                frame = self.obter_frame(camera_id)
+                if frame is not None:
+                    # Reduzir antes de codificar: a pré-visualização não precisa da resolução completa
+                    altura, largura = frame.shape[:2]
+                    if largura > LARGURA_PREVIEW:
+                        frame = cv2.resize(frame, (LARGURA_PREVIEW, altura * LARGURA_PREVIEW // largura),
+                                           interpolation=cv2.INTER_AREA)
+                    ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, QUALIDADE_JPEG_PREVIEW])
+                    if ok:
+                        requisicao.wfile.write(b'--frame\r\nContent-Type: image/jpeg\r\n'
+                                               b'Content-Length: ' + str(len(jpeg)).encode() + b'\r\n\r\n')
+                        requisicao.wfile.write(jpeg.tobytes())
+                        requisicao.wfile.write(b'\r\n')
+                time.sleep(max(0.0, self.intervalo - (time.time() - inicio)))
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Cliente desconectou
+    
+    def finalizar(self):
+        """Para o servidor"""
+        self.running = False
+        if self.servidor is not None:
+            self.servidor.shutdown()
+            self.servidor.server_close()
@@ -0,0 +1,293 @@
+"""
+API HTTP local de reconhecimento, sem pipeline de câmera.
+POST /reconhecer recebe uma imagem (JPEG, PNG, ...) no corpo e responde com as faces
+e identidades da galeria em JSON; GET /saude e GET /metrics informam o estado.
+
+O servidor é um único loop asyncio: as requisições entram em uma fila limitada
+(cheia = 503) e são agrupadas em lotes de até TAMANHO_LOTE_API imagens, esperando
+no máximo ESPERA_LOTE_API pela primeira. Cada lote roda em uma das WORKERS_API
+threads: a detecção é feita imagem a imagem e os encodings de todas as faces do
+lote em uma única chamada ao modelo. Requisições cujo prazo vence antes do
+resultado recebem 504 e são retiradas dos lotes ainda não iniciados.
+"""
+import json
+import time
+import asyncio
+import concurrent.futures
+from urllib.parse import urlparse, parse_qs
+import cv2
+import numpy as np
+from face_detector.config.settings import (
+    ENDERECO_API, PORTA_API, WORKERS_API, TAMANHO_LOTE_API, ESPERA_LOTE_API, MAX_PENDENTES_API, PRAZO_API,
+    TAMANHO_MAXIMO_IMAGEM_API_MB
+)
+from face_detector.services.face_detector import FaceDetector
+from face_detector.services.encoding_batcher import EncodingBatcher
+from face_detector.services.face_gallery import Galeria
+from face_detector.services.metrics_server import formatar_prometheus, TIPO_CONTEUDO
+from face_detector.utils.metricas import registro
+from face_detector.utils.logger import log_info, log_error
+
+TEMPO_OCIOSO_CONEXAO = 30.0  # Segundos sem nova requisição antes de fechar uma conexão keep-alive
+MOTIVOS_HTTP = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable',
+                504: 'Gateway Timeout'}
+
+class ImagemInvalida(ValueError):
+    """Corpo da requisição que não pôde ser decodificado como imagem"""
+
+class ServidorReconhecimento:
+    """Servidor asyncio que reconhece as faces das imagens recebidas em lotes"""
+    
+    def __init__(self, endereco=None, porta=None, workers=None, tamanho_lote=None, espera_lote=None,
+                 max_pendentes=None, prazo=None, galeria=None, detector=None):
+        """
+        Inicializa o servidor (inativo até executar())
+        
+        Args:
+            endereco: Endereço de escuta (None = ENDERECO_API)
+            porta: Porta TCP (None = PORTA_API)
+            workers: Lotes processados em paralelo (None = WORKERS_API)
+            tamanho_lote: Imagens por lote (None = TAMANHO_LOTE_API)
+            espera_lote: Segundos que a primeira imagem aguarda o lote completar (None = ESPERA_LOTE_API)
+            max_pendentes: Requisições aguardando um lote antes de recusar com 503 (None = MAX_PENDENTES_API)
+            prazo: Prazo padrão das requisições em segundos (None = PRAZO_API)
+            galeria: Galeria de identidades (None = galeria padrão, carregada em executar())
+            detector: FaceDetector usado na detecção (None = detector próprio)
+        """
+        self.endereco = endereco if endereco is not None else ENDERECO_API
+        self.porta = porta if porta is not None else PORTA_API
+        self.workers = workers if workers is not None else WORKERS_API
+        self.tamanho_lote = tamanho_lote if tamanho_lote is not None else TAMANHO_LOTE_API
+        self.espera_lote = espera_lote if espera_lote is not None else ESPERA_LOTE_API
+        self.max_pendentes = max_pendentes if max_pendentes is not None else MAX_PENDENTES_API
+        self.prazo = prazo if prazo is not None else PRAZO_API
+        self.tamanho_maximo = int(TAMANHO_MAXIMO_IMAGEM_API_MB * 1024 * 1024)
+        self.galeria = galeria
+        self.detector = detector if detector is not None else FaceDetector(max_workers=1, deduplicar=False)
+        self.batcher = EncodingBatcher()  # Sem thread própria: cada lote calcula os encodings na hora
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='api')
+        self.fila = None
+        self.vagas = None
+        self.lotes_em_andamento = 0
+        self.servidor = None
+        
+        self.metricas = registro.camera('api')
+        self.metricas.medidor('requisicoes_pendentes', lambda: self.fila.qsize() if self.fila is not None else 0)
+        self.metricas.medidor('lotes_em_andamento', lambda: self.lotes_em_andamento)
+    
+    async def executar(self):
+        """Carrega a galeria, abre a porta e atende até ser cancelado"""
+        if self.galeria is None:
+            self.galeria = Galeria().carregar()
+        self.fila = asyncio.Queue(maxsize=self.max_pendentes)
+        self.vagas = asyncio.Semaphore(self.workers)
+        self.servidor = await asyncio.start_server(self._conexao, self.endereco, self.porta)
+        formador = asyncio.create_task(self._formar_lotes())
+        log_info(f"API de reconhecimento em http://{self.endereco}:{self.porta}/reconhecer "
+                 f"({self.workers} workers, lotes de até {self.tamanho_lote} imagens)")
+        try:
+            async with self.servidor:
+                await self.servidor.serve_forever()
+        finally:
+            formador.cancel()
+            self.pool.shutdown(wait=False, cancel_futures=True)
+    
+    async def _formar_lotes(self):
+        """Agrupa as requisições da fila em lotes assim que houver um worker livre"""
+        loop = asyncio.get_running_loop()
+        while True:
+            # Enquanto todos os workers estão ocupados, a fila cresce e o próximo lote sai maior
+            await self.vagas.acquire()
+            lote = [await self.fila.get()]
+            limite = loop.time() + self.espera_lote
+            while len(lote) < self.tamanho_lote:
+                if not self.fila.empty():
+                    lote.append(self.fila.get_nowait())
+                    continue
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self.fila.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Requisições já respondidas com 504 (ou de clientes desconectados) não entram no lote
+            lote = [(imagem, future) for imagem, future in lote if not future.done()]
+            if not lote:
+                self.vagas.release()
+                continue
+            asyncio.create_task(self._executar_lote(lote))
+    
+    async def _executar_lote(self, lote):
+        """Processa um lote em um worker e entrega o resultado de cada requisição"""
+        loop = asyncio.get_running_loop()
+        self.lotes_em_andamento += 1
+        try:
+            resultados = await loop.run_in_executor(self.pool, self._processar_lote, [imagem for imagem, _ in lote])
+        except Exception as e:
+            resultados = [e] * len(lote)
+        finally:
+            self.lotes_em_andamento -= 1
+            self.vagas.release()
+        self.metricas.incrementar('lotes')
+        self.metricas.incrementar('imagens', len(lote))
+        for (_, future), resultado in zip(lote, resultados):
+            if future.done():
+                continue
+            if isinstance(resultado, Exception):
+                future.set_exception(resultado)
+            else:
+                future.set_result(resultado)
+    
+    def _processar_lote(self, imagens):
+        """
+        Detecta as faces de cada imagem e calcula os encodings do lote inteiro de uma vez (em um worker)
+        
+        Returns:
+            Para cada imagem, a lista de faces ou a exceção que impediu o processamento
+        """
+        resultados = []
+        chips = []
+        for dados in imagens:
+            try:
+                frame = cv2.imdecode(np.frombuffer(dados, np.uint8), cv2.IMREAD_COLOR)
+                if frame is None:
+                    raise ImagemInvalida("o corpo não é uma imagem válida")
+                rgb_frame, face_locations, transformacao = self.detector.localizar_faces(frame, camera_id='api')
+                altura, largura = frame.shape[:2]
+                localizacoes = [(top, min(right, largura), min(bottom, altura), left) for top, right, bottom, left
+                                in self.detector.ajustar_localizacoes(face_locations, transformacao)]
+                resultados.append((localizacoes, len(chips)))
+                chips.extend(self.batcher.extrair_chips(rgb_frame, face_locations))
+            except Exception as e:
+                resultados.append(e)
+        
+        encodings = []
+        if chips:
+            inicio = time.time()
+            encodings, _ = self.batcher.submeter_chips(chips, self.detector.num_jitters).result()
+            self.metricas.observar('encoding', time.time() - inicio)
+        identificacoes = self.galeria.identificar(encodings)
+        
+        respostas = []
+        for resultado in resultados:
+            if isinstance(resultado, Exception):
+                respostas.append(resultado)
+                continue
+            localizacoes, primeiro = resultado
+            faces = []
+            for posicao, localizacao in enumerate(localizacoes):
+                identidade, distancia = identificacoes[primeiro + posicao]
+                faces.append({
+                    'bbox': [int(v) for v in localizacao],
+                    'identidade': identidade['id'] if identidade else None,
+                    'nome': identidade['nome'] if identidade else None,
+                    'reconhecido': identidade is not None,
+                    'distancia': round(distancia, 4) if distancia is not None else None
+                })
+            respostas.append(faces)
+        return respostas
+    
+    async def _reconhecer(self, corpo, parametros):
+        """Enfileira a imagem e aguarda o resultado dentro do prazo"""
+        try:
+            prazo = float(parametros['prazo_ms'][0]) / 1000.0 if 'prazo_ms' in parametros else self.prazo
+        except ValueError:
+            return 400, {'erro': 'prazo_ms inválido'}
+        if not corpo:
+            return 400, {'erro': 'envie a imagem no corpo da requisição'}
+        
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.fila.put_nowait((corpo, future))
+        except asyncio.QueueFull:
+            self.metricas.incrementar('requisicoes_recusadas')
+            return 503, {'erro': 'servidor sobrecarregado'}
+        
+        try:
+            faces = await asyncio.wait_for(future, prazo)
+        except asyncio.TimeoutError:
+            self.metricas.incrementar('requisicoes_expiradas')
+            return 504, {'erro': f'prazo de {prazo * 1000:.0f} ms excedido'}
+        except ImagemInvalida as e:
+            return 400, {'erro': str(e)}
+        except Exception as e:
+            self.metricas.incrementar('erros_requisicao')
+            log_error(f"Erro ao reconhecer imagem na API: {str(e)}")
+            return 500, {'erro': 'erro interno'}
+        return 200, {'faces': faces}
+    
+    async def _atender(self, metodo, alvo, corpo):
+        """Roteia uma requisição e retorna (status, tipo, corpo da resposta)"""
+        url = urlparse(alvo)
+        if url.path == '/reconhecer':
+            if metodo != 'POST':
+                return 405, 'application/json', b'{"erro": "use POST"}'
+            inicio = time.time()
+            status, resposta = await self._reconhecer(corpo, parse_qs(url.query))
+            self.metricas.incrementar('requisicoes')
+            self.metricas.observar('requisicao', time.time() - inicio)
+            resposta['tempo_ms'] = round((time.time() - inicio) * 1000, 1)
+            return status, 'application/json', json.dumps(resposta, ensure_ascii=False).encode('utf-8')
+        if url.path == '/saude' and metodo == 'GET':
+            resposta = {'status': 'ok', 'galeria': self.galeria.total, 'pendentes': self.fila.qsize(),
+                        'lotes_em_andamento': self.lotes_em_andamento, 'workers': self.workers}
+            return 200, 'application/json', json.dumps(resposta).encode('utf-8')
+        if url.path == '/metrics' and metodo == 'GET':
+            return 200, TIPO_CONTEUDO, formatar_prometheus().encode('utf-8')
+        return 404, 'application/json', b'{"erro": "rota desconhecida"}'
+    
+    async def _conexao(self, leitor, escritor):
+        """Atende as requisições HTTP/1.1 de uma conexão (com keep-alive)"""
+        try:
+            while True:
+                try:
+                    cabecalho = await asyncio.wait_for(leitor.readuntil(b'\r\n\r\n'), TEMPO_OCIOSO_CONEXAO)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                        ConnectionError):
+                    break
+                linhas = cabecalho.decode('latin-1').split('\r\n')
+                try:
+                    metodo, alvo, versao = linhas[0].split(' ', 2)
+                    cabecalhos = {}
+                    for linha in linhas[1:]:
+                        if linha:
+                            nome, _, valor = linha.partition(':')
+                            cabecalhos[nome.strip().lower()] = valor.strip()
+                    tamanho = int(cabecalhos.get('content-length', 0))
+                except ValueError:
+                    await self._responder(escritor, 400, 'application/json', b'{"erro": "requisicao invalida"}',
+                                          False)
+                    break
+                if tamanho > self.tamanho_maximo:
+                    await self._responder(escritor, 413, 'application/json', b'{"erro": "imagem grande demais"}',
+                                          False)
+                    break
+                try:
+                    corpo = await leitor.readexactly(tamanho)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                
+                manter = versao == 'HTTP/1.1' and cabecalhos.get('connection', '').lower() != 'close'
+                status, tipo, resposta = await self._atender(metodo, alvo, corpo)
+                await self._responder(escritor, status, tipo, resposta, manter)
+                if not manter:
+                    break
+        except ConnectionError:
+            pass
+        except Exception as e:
+            log_error(f"Erro na conexão da API: {str(e)}")
+        finally:
+            escritor.close()
+    
+    async def _responder(self, escritor, status, tipo, corpo, manter):
+        """Escreve uma resposta HTTP/1.1"""
+        cabecalho = (f"HTTP/1.1 {status} {MOTIVOS_HTTP.get(status, '')}\r\n"
+                     f"Content-Type: {tipo}\r\nContent-Length: {len(corpo)}\r\n"
+                     f"Connection: {'keep-alive' if manter else 'close'}\r\n")
+        if status == 503:
+            cabecalho += "Retry-After: 1\r\n"
+        escritor.write(cabecalho.encode('latin-1') + b'\r\n' + corpo)
+        await escritor.drain()
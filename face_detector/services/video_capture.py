@@ -6,17 +6,19 @@ import cv2
 import os
 import time
 import threading
-from queue import Queue
+from queue import Queue, Empty, Full
 import numpy as np
 from face_detector.config.settings import (
-    RESOLUCAO_CAPTURA, BUFFER_SIZE_CAPTURA, TAXA_FPS_CAPTURA
+    RESOLUCAO_CAPTURA, BUFFER_SIZE_CAPTURA, TAXA_FPS_CAPTURA, TAXA_FPS_OCIOSO
 )
 from face_detector.utils.logger import log_info, log_error
+from face_detector.utils.rastreamento import rastreador
+from face_detector.utils.perfil import perfil
 
 class VideoCapture:
     """Classe para captura de vídeo assíncrona otimizada para baixa latência"""
     
-    def __init__(self, source, buffer_size=None, resize_width=None):
+    def __init__(self, source, buffer_size=None, resize_width=None, metricas=None, taxa_fps=None):
         """
         Inicializa o capturador de vídeo
         
@@ -24,10 +26,20 @@ class VideoCapture:
             source: URL RTSP ou índice da câmera
             buffer_size: Tamanho máximo do buffer de frames (menor = menor latência)
             resize_width: Largura para redimensionar frames (None = sem redimensionamento)
+            metricas: MetricasCamera para registrar o tempo de decodificação (None = sem métricas)
+            taxa_fps: Taxa máxima de leitura (None = TAXA_FPS_CAPTURA, 0 = sem limite)
+        
+        Fontes que são arquivos de vídeo não são tratadas como transmissão ao vivo: nenhum
+        frame é descartado por buffer cheio e a leitura termina no fim do arquivo.
         """
         self.source = source
         self.buffer_size = buffer_size if buffer_size is not None else BUFFER_SIZE_CAPTURA
         self.resize_width = resize_width
+        self.metricas = metricas
+        taxa_fps = taxa_fps if taxa_fps is not None else TAXA_FPS_CAPTURA
+        self.intervalo_frames = 1.0 / taxa_fps if taxa_fps > 0 else 0.0
+        self.arquivo = isinstance(source, str) and os.path.isfile(source)
+        self.fonte_esgotada = False  # Fim do arquivo de vídeo alcançado
         self.frame_queue = Queue(maxsize=self.buffer_size)
         self.stopped = False
         self.cap = None
@@ -41,6 +53,9 @@ class VideoCapture:
         self.max_reconnect_attempts = 10
         self.reconnect_delay = 2  # segundos
         self.drop_count = 0  # Contador de frames descartados
+        self.modo_ocioso = False  # Em modo ocioso, apenas alguns frames são decodificados
+        self.intervalo_ocioso = 1.0 / TAXA_FPS_OCIOSO
+        self.ultima_amostra_ociosa = 0
     
     def start(self):
         """Inicia a captura de vídeo em uma thread separada"""
@@ -106,7 +121,7 @@ class VideoCapture:
         consecutive_errors = 0
         max_consecutive_errors = 5
         last_drop_log = 0
-        frame_interval = 1.0 / TAXA_FPS_CAPTURA  # Limitar a taxa de FPS configurada
+        frame_interval = self.intervalo_frames  # Limitar a taxa de FPS configurada
         last_frame_time = time.time()
         
         while not self.stopped:
@@ -134,9 +149,25 @@ class VideoCapture:
                         else:
                             time.sleep(self.reconnect_delay)
                         continue
-            
+                
+                # Em modo ocioso, avançar o stream sem converter/copiar frames até a próxima amostra
+                if self.modo_ocioso and current_time - self.ultima_amostra_ociosa < self.intervalo_ocioso:
+                    self.cap.grab()
+                    continue
+                self.ultima_amostra_ociosa = current_time
+                
                 # Ler o próximo frame
-                ret, frame = self.cap.read()
+                perfil.ponto()
+                inicio_leitura = time.time()
+                with rastreador.span('decodificar_frame'):
+                    ret, frame = self.cap.read()
+                if ret and self.metricas is not None:
+                    self.metricas.observar('decodificacao', time.time() - inicio_leitura)
+                
+                if not ret and self.arquivo:
+                    log_info(f"Fim do arquivo de vídeo: {self.source} ({self.frame_count} frames)")
+                    self.fonte_esgotada = True
+                    break
                 
                 if not ret:
                     consecutive_errors += 1
@@ -170,6 +201,17 @@ class VideoCapture:
                 # Incrementar contador de frames
                 self.frame_count += 1
                 
+                # Arquivo: aguardar espaço no buffer em vez de descartar
+                if self.arquivo:
+                    while not self.stopped:
+                        try:
+                            self.frame_queue.put(frame, timeout=0.1)
+                            self.last_frame = frame
+                            break
+                        except Full:
+                            continue
+                    continue
+                
                 # Se o buffer estiver cheio, remover o frame mais antigo e contar como descartado
                 if self.frame_queue.full():
                     try:
@@ -197,10 +239,18 @@ class VideoCapture:
         """Lê o próximo frame do buffer com verificações de validade"""
         if self.stopped:
             return False, None
-            
+        
+        # Arquivo: entregar cada frame uma única vez (sem repetir o último)
+        if self.arquivo:
+            try:
+                return True, self.frame_queue.get(timeout=0.1)
+            except Empty:
+                return False, None
+        
         if self.frame_queue.empty():
             if self.last_frame is not None:
-                return True, self.last_frame.copy()  # Retornar o último frame válido se o buffer estiver vazio
+                with rastreador.span('copiar_ultimo_frame'):
+                    return True, self.last_frame.copy()  # Retornar o último frame válido se o buffer estiver vazio
             return False, None
         
         # Obter o próximo frame do buffer
@@ -218,6 +268,18 @@ class VideoCapture:
                 return True, self.last_frame.copy()
             return False, None
     
+    def set_modo_ocioso(self, ocioso, taxa_fps=None):
+        """
+        Ativa ou desativa o modo ocioso
+        
+        Args:
+            ocioso: True para entregar frames apenas na taxa ociosa
+            taxa_fps: Taxa de amostragem no modo ocioso (None = TAXA_FPS_OCIOSO)
+        """
+        if taxa_fps is not None:
+            self.intervalo_ocioso = 1.0 / taxa_fps
+        self.modo_ocioso = ocioso
+    
     def get_fps(self):
         """Retorna o FPS atual"""
         return self.fps
@@ -244,4 +306,4 @@ class VideoCapture:
                 self.cap.release()
             log_info("Captura de vídeo encerrada")
         except Exception as e:
-            log_error(f"Erro ao encerrar captura de vídeo: {str(e)}") 
\ No newline at end of file
+            log_error(f"Erro ao encerrar captura de vídeo: {str(e)}")
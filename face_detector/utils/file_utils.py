@@ -5,7 +5,7 @@ import os
 import pickle
 import numpy as np
 from face_detector.utils.logger import log_info
-from face_detector.config.settings import PESSOA_CONHECIDA_ENCODING, PESSOA_INFO
+from face_detector.config.settings import ARQUIVO_ENCODING_PADRAO, ARQUIVO_ENCODING_PESSOA, PESSOA_INFO
 
 def criar_estrutura_pastas():
     """Cria a estrutura de pastas para organizar as imagens"""
@@ -19,6 +19,7 @@ def criar_estrutura_pastas():
     os.makedirs("capturas/faces/desconhecido", exist_ok=True)  # Faces desconhecidas
     os.makedirs("capturas/frames", exist_ok=True)     # Frames completos com anotações
     os.makedirs("capturas/manual", exist_ok=True)     # Capturas manuais
+    os.makedirs("capturas/clipes", exist_ok=True)     # Clipes de eventos
     
     # Pasta para encodings
     os.makedirs("encodings", exist_ok=True)
@@ -46,23 +47,28 @@ def carregar_encoding(nome_arquivo, diretorio="encodings"):
         log_info(f"Arquivo de encoding '{caminho_completo}' não encontrado.")
         return None
 
-def salvar_encoding_teste():
+def carregar_encoding_padrao():
+    """Carrega o encoding padrão da pessoa de referência, distribuído com o pacote"""
+    return np.load(ARQUIVO_ENCODING_PADRAO)
+
+def salvar_encoding_teste(encoding=None):
     """Salva o encoding real para comparação"""
-    os.makedirs("encodings", exist_ok=True)
+    os.makedirs(os.path.dirname(ARQUIVO_ENCODING_PESSOA), exist_ok=True)
     
     # Salvar o encoding real
-    with open("encodings/eduardo_nascimento.pickle", "wb") as f:
-        pickle.dump(PESSOA_CONHECIDA_ENCODING, f)
+    with open(ARQUIVO_ENCODING_PESSOA, "wb") as f:
+        pickle.dump(encoding if encoding is not None else carregar_encoding_padrao(), f)
     
-    log_info(f"Encoding de {PESSOA_INFO['nome']} salvo em 'encodings/eduardo_nascimento.pickle'")
+    log_info(f"Encoding de {PESSOA_INFO['nome']} salvo em '{ARQUIVO_ENCODING_PESSOA}'")
 
 def carregar_encoding_teste():
     """Carrega o encoding real"""
     try:
-        with open("encodings/eduardo_nascimento.pickle", "rb") as f:
+        with open(ARQUIVO_ENCODING_PESSOA, "rb") as f:
             return pickle.load(f)
     except FileNotFoundError:
-        log_info(f"Arquivo de encoding 'encodings/eduardo_nascimento.pickle' não encontrado.")
+        log_info(f"Arquivo de encoding '{ARQUIVO_ENCODING_PESSOA}' não encontrado.")
         log_info(f"Usando encoding padrão para {PESSOA_INFO['nome']}...")
-        salvar_encoding_teste()
-        return PESSOA_CONHECIDA_ENCODING 
\ No newline at end of file
+        encoding = carregar_encoding_padrao()
+        salvar_encoding_teste(encoding)
+        return encoding
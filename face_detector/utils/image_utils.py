@@ -7,12 +7,27 @@ from datetime import datetime
 from face_detector.config.settings import (
     COR_VERDE, COR_VERMELHO, COR_AZUL, COR_AMARELO,
     QUALIDADE_JPEG, APLICAR_MELHORIA_IMAGEM, USAR_TONS_CINZA,
-    PESSOA_INFO
+    PESSOA_INFO, ARMAZENAMENTO_IMAGENS
 )
+from face_detector.utils.metricas import registro
+from face_detector.utils.rastreamento import rastreador
+from face_detector.services.crop_archive import arquivo_recortes
 
-def melhorar_imagem(imagem):
-    """Aplica técnicas de processamento para melhorar a qualidade da imagem"""
-    if not APLICAR_MELHORIA_IMAGEM:
+# Gravações de imagens em disco (todas as câmeras)
+gravacoes_disco = registro.contador('gravacoes_disco')
+falhas_gravacao_disco = registro.contador('falhas_gravacao_disco')
+
+def melhorar_imagem(imagem, aplicar=None):
+    """
+    Aplica técnicas de processamento para melhorar a qualidade da imagem
+    
+    Args:
+        imagem: Imagem BGR
+        aplicar: Força a aplicação ou não da melhoria (None = APLICAR_MELHORIA_IMAGEM)
+    """
+    if aplicar is None:
+        aplicar = APLICAR_MELHORIA_IMAGEM
+    if not aplicar:
         return imagem
     
     # Converter para escala de cinza para processamento
@@ -61,10 +76,69 @@ def adicionar_info_tela(frame):
     cv2.putText(frame, "ESC: Sair", (largura - 300, 30), 
                 cv2.FONT_HERSHEY_SIMPLEX, 0.6, COR_AMARELO, 1)
 
+def calcular_hash_perceptual(imagem, regiao=None):
+    """
+    Calcula o hash perceptual (dHash de 64 bits) de uma imagem ou de uma região dela
+    
+    Args:
+        imagem: Imagem BGR
+        regiao: Região (x, y, w, h) a considerar (None = imagem inteira)
+    """
+    if regiao is not None:
+        x, y, w, h = regiao
+        recorte = imagem[y:y + h, x:x + w]
+        if recorte.size > 0:
+            imagem = recorte
+    
+    gray = cv2.cvtColor(imagem, cv2.COLOR_BGR2GRAY)
+    reduzida = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    
+    # Cada bit indica se o pixel é mais claro que o vizinho à direita
+    bits = (reduzida[:, 1:] > reduzida[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+def distancia_hamming(hash1, hash2):
+    """Retorna o número de bits diferentes entre dois hashes perceptuais"""
+    return bin(hash1 ^ hash2).count("1")
+
+def montar_mosaico(frames, largura_celula=640):
+    """
+    Monta um mosaico com os frames de várias câmeras para exibição em uma única janela
+    
+    Args:
+        frames: Lista de frames BGR (None = célula vazia)
+        largura_celula: Largura de cada célula do mosaico
+    """
+    colunas = int(np.ceil(np.sqrt(len(frames))))
+    linhas = int(np.ceil(len(frames) / colunas))
+    altura_celula = largura_celula * 9 // 16
+    mosaico = np.zeros((linhas * altura_celula, colunas * largura_celula, 3), dtype=np.uint8)
+    
+    for i, frame in enumerate(frames):
+        if frame is None:
+            continue
+        y = (i // colunas) * altura_celula
+        x = (i % colunas) * largura_celula
+        mosaico[y:y + altura_celula, x:x + largura_celula] = cv2.resize(
+            frame, (largura_celula, altura_celula), interpolation=cv2.INTER_AREA)
+    
+    return mosaico
+
 def salvar_imagem(imagem, caminho, qualidade=None):
-    """Salva uma imagem com a qualidade especificada"""
+    """
+    Salva uma imagem com a qualidade especificada
+    (com ARMAZENAMENTO_IMAGENS = "segmentos", o caminho é a chave da imagem nos segmentos)
+    """
     if qualidade is None:
         qualidade = QUALIDADE_JPEG
     
-    cv2.imwrite(caminho, imagem, [cv2.IMWRITE_JPEG_QUALITY, qualidade])
-    return caminho 
\ No newline at end of file
+    with rastreador.span('salvar_imagem'):
+        if ARMAZENAMENTO_IMAGENS == "segmentos":
+            gravado = arquivo_recortes.salvar_imagem(imagem, caminho, qualidade)
+        else:
+            gravado = cv2.imwrite(caminho, imagem, [cv2.IMWRITE_JPEG_QUALITY, qualidade])
+    if gravado:
+        gravacoes_disco.incrementar()
+    else:
+        falhas_gravacao_disco.incrementar()
+    return caminho
@@ -1,41 +1,231 @@
 """
 Módulo de logging para o sistema de detecção facial.
 Fornece funções para registrar diferentes tipos de eventos.
+
+As funções apenas criam o registro e o colocam em uma fila limitada (sem bloquear
+se ela estiver cheia); a formatação e a escrita no terminal e no arquivo JSON
+Lines acontecem na thread do QueueListener. Mensagens de movimento e de face são
+limitadas por categoria (LIMITES_LOG_POR_SEGUNDO) e a próxima mensagem emitida
+informa quantas foram suprimidas.
 """
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from face_detector.config.settings import NIVEL_LOG, FORMATO_LOG, ARQUIVO_LOG_JSON, LIMITES_LOG_POR_SEGUNDO, \
+    TAMANHO_FILA_LOG
+
+TEMPO_ENCERRAMENTO_LOG = 5.0  # Espera máxima por vaga na fila para o sinal de término do listener (segundos)
+
+# Nível de cada categoria de mensagem
+NIVEIS_CATEGORIA = {
+    'INFO': logging.INFO, 'MOVIMENTO': logging.INFO, 'FACE': logging.INFO, 'CAPTURA': logging.INFO,
+    'DEBUG': logging.DEBUG, 'ERRO': logging.ERROR
+}
+
+class LimitadorTaxa:
+    """Balde de fichas: até taxa mensagens por segundo, com rajadas de até um segundo"""
+    
+    def __init__(self, taxa):
+        self.taxa = taxa
+        self.capacidade = max(1.0, taxa)
+        self.fichas = self.capacidade
+        self.ultimo = time.monotonic()
+        self.suprimidas = 0
+        self.lock = threading.Lock()
+    
+    def permitir(self):
+        """
+        Consome uma ficha
+        
+        Returns:
+            Número de mensagens suprimidas desde a última permitida, ou None se esta deve ser suprimida
+        """
+        with self.lock:
+            agora = time.monotonic()
+            self.fichas = min(self.capacidade, self.fichas + (agora - self.ultimo) * self.taxa)
+            self.ultimo = agora
+            if self.fichas < 1.0:
+                self.suprimidas += 1
+                return None
+            self.fichas -= 1.0
+            suprimidas, self.suprimidas = self.suprimidas, 0
+            return suprimidas
+
+class FilaSemBloqueio(QueueHandler):
+    """QueueHandler que descarta (e conta) registros com a fila cheia e adia a formatação ao listener"""
+    
+    def __init__(self, fila):
+        super().__init__(fila)
+        self.descartados = 0
+        self.descartados_pendentes = 0
+    
+    def prepare(self, record):
+        return record
+    
+    def enqueue(self, record):
+        if self.descartados_pendentes:
+            record.descartados = self.descartados_pendentes
+        try:
+            self.queue.put_nowait(record)
+            if self.descartados_pendentes:
+                self.descartados_pendentes = 0
+        except queue.Full:
+            self.descartados += 1
+            self.descartados_pendentes += 1
+
+def _avisos(record):
+    """Texto dos avisos de mensagens suprimidas e descartadas anexados ao registro"""
+    avisos = []
+    if getattr(record, 'suprimidas', 0):
+        avisos.append(f"+{record.suprimidas} mensagens {record.categoria} suprimidas")
+    if getattr(record, 'descartados', 0):
+        avisos.append(f"{record.descartados} mensagens descartadas com a fila de log cheia")
+    return f" ({'; '.join(avisos)})" if avisos else ""
+
+class FormatadorTexto(logging.Formatter):
+    """Formato de terminal: [CATEGORIA] [HH:MM:SS] mensagem"""
+    
+    def format(self, record):
+        hora = datetime.fromtimestamp(record.created).strftime("%H:%M:%S")
+        return f"[{record.categoria}] [{hora}] {record.getMessage()}{_avisos(record)}"
+
+class FormatadorJson(logging.Formatter):
+    """Uma linha JSON por mensagem, para consumo por outras ferramentas"""
+    
+    def format(self, record):
+        evento = {
+            'timestamp': record.created,
+            'hora': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'categoria': record.categoria,
+            'thread': record.threadName,
+            'mensagem': record.getMessage()
+        }
+        if getattr(record, 'suprimidas', 0):
+            evento['suprimidas'] = record.suprimidas
+        if getattr(record, 'descartados', 0):
+            evento['descartados'] = record.descartados
+        return json.dumps(evento, ensure_ascii=False)
+
+class ListenerFila(QueueListener):
+    """QueueListener cujo sinal de término aguarda vaga na fila em vez de falhar com ela cheia"""
+    
+    def enqueue_sentinel(self):
+        # O listener continua esvaziando a fila enquanto o sinal aguarda; queue.Full só se ele estiver travado
+        self.queue.put(self._sentinel, timeout=TEMPO_ENCERRAMENTO_LOG)
+
+_logger = logging.getLogger('face_detector')
+_logger.propagate = False
+_fila_handler = None
+_listener = None
+_limitadores = {}
+_nivel = logging.INFO
+
+def configurar_logging(nivel=None, formato=None, arquivo_json=None, limites=None):
+    """
+    Configura (ou reconfigura) a saída de log
+    
+    Args:
+        nivel: Nível mínimo ("DEBUG", "INFO", "ERROR"; None = NIVEL_LOG)
+        formato: Formato do terminal, "texto" ou "json" (None = FORMATO_LOG)
+        arquivo_json: Arquivo JSON Lines que recebe todas as mensagens (None = ARQUIVO_LOG_JSON)
+        limites: Mensagens por segundo de cada categoria limitada (None = LIMITES_LOG_POR_SEGUNDO)
+    """
+    global _fila_handler, _listener, _limitadores, _nivel
+    parar_logging()
+    
+    _nivel = logging.getLevelName((nivel if nivel is not None else NIVEL_LOG).upper())
+    formato = formato if formato is not None else FORMATO_LOG
+    arquivo_json = arquivo_json if arquivo_json is not None else ARQUIVO_LOG_JSON
+    limites = limites if limites is not None else LIMITES_LOG_POR_SEGUNDO
+    _limitadores = {categoria: LimitadorTaxa(taxa) for categoria, taxa in limites.items() if taxa > 0}
+    
+    terminal = logging.StreamHandler(sys.stdout)
+    terminal.setFormatter(FormatadorJson() if formato == 'json' else FormatadorTexto())
+    saidas = [terminal]
+    if arquivo_json:
+        arquivo = logging.FileHandler(arquivo_json, encoding='utf-8')
+        arquivo.setFormatter(FormatadorJson())
+        saidas.append(arquivo)
+    
+    _fila_handler = FilaSemBloqueio(queue.Queue(maxsize=TAMANHO_FILA_LOG))
+    _logger.handlers = [_fila_handler]
+    _logger.setLevel(_nivel)
+    _listener = ListenerFila(_fila_handler.queue, *saidas, respect_handler_level=False)
+    _listener.start()
+
+def parar_logging():
+    """Escreve as mensagens pendentes e encerra a thread de log"""
+    global _listener
+    if _listener is not None:
+        try:
+            _listener.stop()
+        except queue.Full:
+            sys.stderr.write(f"Log: fila cheia sem escrita por {TEMPO_ENCERRAMENTO_LOG:g}s; "
+                             f"mensagens pendentes descartadas\n")
+        for saida in _listener.handlers:
+            saida.close()
+        _listener = None
+
+def estatisticas_log():
+    """Retorna as mensagens descartadas com a fila cheia e as suprimidas pelo limite de cada categoria"""
+    return {
+        'descartadas': _fila_handler.descartados if _fila_handler is not None else 0,
+        'suprimidas': {categoria: limitador.suprimidas for categoria, limitador in _limitadores.items()}
+    }
+
+def _registrar(categoria, mensagem):
+    """Enfileira a mensagem da categoria, respeitando o nível e o limite de taxa"""
+    nivel = NIVEIS_CATEGORIA[categoria]
+    if nivel < _nivel:
+        return
+    suprimidas = 0
+    limitador = _limitadores.get(categoria)
+    if limitador is not None:
+        suprimidas = limitador.permitir()
+        if suprimidas is None:
+            return
+    # Registro montado diretamente (sem a busca do chamador feita por Logger.log)
+    record = _logger.makeRecord(_logger.name, nivel, '', 0, mensagem, None, None,
+                                extra={'categoria': categoria, 'suprimidas': suprimidas})
+    _logger.handle(record)
 
 def log_info(mensagem):
-    """Exibe log de informação com timestamp"""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    print(f"[INFO] [{timestamp}] {mensagem}")
+    """Registra log de informação com timestamp"""
+    _registrar('INFO', mensagem)
 
 def log_movimento(mensagem):
-    """Exibe log de detecção de movimento com timestamp"""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    print(f"[MOVIMENTO] [{timestamp}] {mensagem}")
+    """Registra log de detecção de movimento com timestamp (limitado por segundo)"""
+    _registrar('MOVIMENTO', mensagem)
 
 def log_face(mensagem):
-    """Exibe log de detecção de face com timestamp"""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    print(f"[FACE] [{timestamp}] {mensagem}")
+    """Registra log de detecção de face com timestamp (limitado por segundo)"""
+    _registrar('FACE', mensagem)
 
 def log_captura(mensagem):
-    """Exibe log específico para capturas com timestamp"""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    print(f"[CAPTURA] [{timestamp}] {mensagem}")
+    """Registra log específico para capturas com timestamp"""
+    _registrar('CAPTURA', mensagem)
 
 def log_debug(mensagem, modo_debug=True):
-    """Exibe log de depuração apenas se o modo debug estiver ativado"""
+    """Registra log de depuração se o modo debug estiver ativado e o nível for DEBUG"""
     if modo_debug:
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[DEBUG] [{timestamp}] {mensagem}")
+        _registrar('DEBUG', mensagem)
 
 def log_error(mensagem):
-    """Exibe log de erro com timestamp"""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    print(f"[ERRO] [{timestamp}] {mensagem}")
+    """Registra log de erro com timestamp (nunca limitado)"""
+    _registrar('ERRO', mensagem)
 
 def log_processamento(mensagem):
     """Exibe log de processamento com timestamp"""
     # Função modificada para não exibir nada
-    pass 
\ No newline at end of file
+    pass
+
+# Saída padrão configurada na importação; as mensagens pendentes são escritas ao sair
+configurar_logging()
+atexit.register(parar_logging)
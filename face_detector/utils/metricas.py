@@ -0,0 +1,187 @@
+"""
+Métricas de desempenho do sistema de detecção facial.
+Contadores atômicos, medidores (gauges) e histogramas de latência com faixas
+fixas, organizados por câmera em um registro compartilhado entre as threads.
+"""
+import bisect
+import threading
+from face_detector.config.settings import LIMITES_HISTOGRAMA_MS
+
+# Etapas com histograma de latência
+ETAPAS_LATENCIA = (
+    'decodificacao', 'movimento', 'deteccao', 'encoding', 'comparacao', 'salvamento', 'ponta_a_ponta'
+)
+
+class Contador:
+    """Contador incrementado por várias threads"""
+    
+    def __init__(self):
+        self._valor = 0
+        self._lock = threading.Lock()
+    
+    def incrementar(self, quantidade=1):
+        """Soma a quantidade ao contador"""
+        with self._lock:
+            self._valor += quantidade
+    
+    @property
+    def valor(self):
+        return self._valor
+
+class Medidor:
+    """Valor instantâneo (ex.: tamanho de fila), definido diretamente ou lido de uma função"""
+    
+    def __init__(self, funcao=None):
+        self._valor = 0
+        self._funcao = funcao
+    
+    def definir(self, valor):
+        """Define o valor atual"""
+        self._valor = valor
+    
+    @property
+    def valor(self):
+        if self._funcao is not None:
+            try:
+                return self._funcao()
+            except Exception:
+                return 0
+        return self._valor
+
+class Histograma:
+    """Histograma de latências com faixas fixas (em milissegundos)"""
+    
+    def __init__(self, limites_ms=None):
+        """
+        Inicializa o histograma
+        
+        Args:
+            limites_ms: Limites superiores das faixas em ms, crescentes (None = LIMITES_HISTOGRAMA_MS)
+        """
+        self.limites = list(limites_ms if limites_ms is not None else LIMITES_HISTOGRAMA_MS)
+        self.contagens = [0] * (len(self.limites) + 1)  # Última faixa: acima do maior limite
+        self.soma = 0.0
+        self.total = 0
+        self._lock = threading.Lock()
+    
+    def observar(self, segundos):
+        """Registra uma duração em segundos"""
+        ms = segundos * 1000.0
+        indice = bisect.bisect_left(self.limites, ms)
+        with self._lock:
+            self.contagens[indice] += 1
+            self.soma += ms
+            self.total += 1
+    
+    def copia(self):
+        """Retorna (contagens, soma_ms, total) consistentes entre si"""
+        with self._lock:
+            return list(self.contagens), self.soma, self.total
+    
+    def percentil(self, p, contagens=None, total=None):
+        """
+        Estima o percentil p (0-100) em ms por interpolação linear dentro da faixa
+        
+        Returns:
+            Latência estimada em ms (0 se não houver observações)
+        """
+        if contagens is None:
+            contagens, _, total = self.copia()
+        if total == 0:
+            return 0.0
+        
+        alvo = total * p / 100.0
+        acumulado = 0
+        for indice, contagem in enumerate(contagens):
+            if contagem and acumulado + contagem >= alvo:
+                inferior = self.limites[indice - 1] if indice > 0 else 0.0
+                if indice >= len(self.limites):
+                    return float(self.limites[-1])  # Acima da maior faixa: limite conhecido
+                fracao = (alvo - acumulado) / contagem
+                return inferior + (self.limites[indice] - inferior) * fracao
+            acumulado += contagem
+        return float(self.limites[-1])
+    
+    def resumo(self):
+        """Retorna total, média e p50/p95/p99 em ms"""
+        contagens, soma, total = self.copia()
+        return {
+            'total': total,
+            'media': soma / total if total else 0.0,
+            'p50': self.percentil(50, contagens, total),
+            'p95': self.percentil(95, contagens, total),
+            'p99': self.percentil(99, contagens, total)
+        }
+
+class RegistroMetricas:
+    """Registro de métricas nomeadas, opcionalmente associadas a uma câmera"""
+    
+    def __init__(self):
+        self.contadores = {}
+        self.medidores = {}
+        self.histogramas = {}
+        self._lock = threading.Lock()
+    
+    def _obter(self, tabela, nome, camera, fabrica):
+        """Retorna a métrica (nome, camera), criando-a na primeira vez"""
+        chave = (nome, camera)
+        metrica = tabela.get(chave)
+        if metrica is None:
+            with self._lock:
+                metrica = tabela.get(chave)
+                if metrica is None:
+                    metrica = fabrica()
+                    tabela[chave] = metrica
+        return metrica
+    
+    def contador(self, nome, camera=None):
+        """Retorna o contador nome (da câmera, se informada)"""
+        return self._obter(self.contadores, nome, camera, Contador)
+    
+    def medidor(self, nome, camera=None, funcao=None):
+        """Retorna o medidor nome; com funcao, o valor é lido dela a cada consulta"""
+        return self._obter(self.medidores, nome, camera, lambda: Medidor(funcao))
+    
+    def histograma(self, nome, camera=None):
+        """Retorna o histograma de latência nome (da câmera, se informada)"""
+        return self._obter(self.histogramas, nome, camera, Histograma)
+    
+    def camera(self, camera_id):
+        """Retorna uma visão das métricas de uma câmera"""
+        return MetricasCamera(self, camera_id)
+    
+    def itens(self, tabela):
+        """Retorna uma cópia das entradas ((nome, camera), métrica) de uma tabela"""
+        with self._lock:
+            return list(tabela.items())
+
+class MetricasCamera:
+    """Métricas de uma câmera (substitui o dicionário de estatísticas por câmera)"""
+    
+    def __init__(self, registro, camera_id):
+        self.registro = registro
+        self.camera_id = camera_id
+    
+    def contador(self, nome):
+        return self.registro.contador(nome, self.camera_id)
+    
+    def medidor(self, nome, funcao=None):
+        return self.registro.medidor(nome, self.camera_id, funcao)
+    
+    def histograma(self, nome):
+        return self.registro.histograma(nome, self.camera_id)
+    
+    def incrementar(self, nome, quantidade=1):
+        """Atalho para incrementar um contador da câmera"""
+        self.registro.contador(nome, self.camera_id).incrementar(quantidade)
+    
+    def observar(self, nome, segundos):
+        """Atalho para registrar uma latência da câmera"""
+        self.registro.histograma(nome, self.camera_id).observar(segundos)
+    
+    def valor(self, nome):
+        """Valor atual de um contador da câmera"""
+        return self.registro.contador(nome, self.camera_id).valor
+
+# Registro único do processo
+registro = RegistroMetricas()
@@ -0,0 +1,120 @@
+"""
+Captura de perfil (cProfile) sob demanda.
+O cProfile mede apenas a thread em que foi ativado, então cada loop do pipeline
+chama perfil.ponto() a cada iteração: durante a captura, a thread ativa o próprio
+perfil e o entrega ao final; os perfis de todas as threads são combinados em um
+único arquivo .prof. Fora da captura, ponto() custa apenas uma verificação.
+"""
+import io
+import os
+import time
+import pstats
+import cProfile
+import threading
+from datetime import datetime
+from face_detector.config.settings import DURACAO_PERFIL, PASTA_DIAGNOSTICO
+from face_detector.utils.logger import log_info, log_error
+
+TEMPO_ENTREGA_PERFIL = 2.0  # Tempo extra para as threads entregarem seus perfis (segundos)
+
+class PerfilSobDemanda:
+    """Perfil de CPU das threads do pipeline por um período, disparado por sinal ou endpoint"""
+    
+    def __init__(self):
+        self.fim = 0.0           # Fim da captura em andamento (0 = nenhuma)
+        self.geracao = 0         # Identifica a captura, para descartar perfis entregues atrasados
+        self.ativos = 0          # Threads com perfil ativo da captura atual
+        self.concluidos = []     # (nome da thread, perfil) entregues
+        self.nao_entregues = 0   # Perfis perdidos por threads que não voltaram a ponto() a tempo
+        self.local = threading.local()
+        self.lock = threading.Lock()
+    
+    def solicitar(self, segundos=None):
+        """
+        Inicia uma captura de perfil de todas as threads instrumentadas
+        
+        Args:
+            segundos: Duração da captura (None = DURACAO_PERFIL)
+        
+        Returns:
+            True se a captura foi iniciada, False se já havia uma em andamento
+        """
+        segundos = segundos if segundos is not None else DURACAO_PERFIL
+        with self.lock:
+            if self.fim:
+                return False
+            self.fim = time.time() + segundos
+            self.geracao += 1
+            self.ativos = 0  # Perfis de capturas anteriores são descartados sem entrar na contagem
+            self.concluidos = []
+        log_info(f"Capturando perfil de CPU por {segundos:.0f}s...")
+        threading.Thread(target=self._concluir, args=(segundos,), daemon=True).start()
+        return True
+    
+    def ponto(self):
+        """Chamado a cada iteração dos loops: ativa ou entrega o perfil da thread atual"""
+        perfil_thread = getattr(self.local, 'perfil', None)
+        if not self.fim and perfil_thread is None:
+            return
+        
+        # Perfil de uma captura anterior ou da atual já encerrada: desativar e entregar (ou descartar)
+        geracao_thread = getattr(self.local, 'geracao', None)
+        if perfil_thread is not None and (geracao_thread != self.geracao or time.time() >= self.fim):
+            perfil_thread.disable()
+            self.local.perfil = None
+            with self.lock:
+                if geracao_thread == self.geracao:
+                    self.ativos -= 1
+                    if self.fim:
+                        self.concluidos.append((threading.current_thread().name, perfil_thread))
+            perfil_thread = None
+        
+        if perfil_thread is None and time.time() < self.fim:
+            with self.lock:
+                self.ativos += 1
+                self.local.geracao = self.geracao
+            self.local.perfil = cProfile.Profile()
+            self.local.perfil.enable()
+    
+    def _concluir(self, segundos):
+        """Aguarda o fim da captura, combina os perfis entregues e salva o resultado"""
+        time.sleep(segundos)
+        limite = time.time() + TEMPO_ENTREGA_PERFIL
+        while self.ativos > 0 and time.time() < limite:
+            time.sleep(0.05)
+        
+        # Captura encerrada: threads que ainda têm perfil o desativam no próximo ponto(), sem entregá-lo
+        with self.lock:
+            concluidos = self.concluidos
+            pendentes = self.ativos
+            self.concluidos = []
+            self.nao_entregues += pendentes
+            self.fim = 0.0
+        if pendentes:
+            log_error(f"{pendentes} threads não entregaram o perfil em {TEMPO_ENTREGA_PERFIL:g}s após a captura "
+                      f"(sem passar por perfil.ponto()); seus dados foram descartados")
+        
+        if not concluidos:
+            log_error("Nenhuma thread instrumentada registrou perfil no período")
+            return
+        
+        try:
+            estatisticas = pstats.Stats(concluidos[0][1])
+            for _, perfil_thread in concluidos[1:]:
+                estatisticas.add(perfil_thread)
+            
+            os.makedirs(PASTA_DIAGNOSTICO, exist_ok=True)
+            caminho = os.path.join(PASTA_DIAGNOSTICO, f"perfil_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prof")
+            estatisticas.dump_stats(caminho)
+            
+            # Resumo das funções mais caras no log
+            saida = io.StringIO()
+            estatisticas.stream = saida
+            estatisticas.sort_stats('cumulative').print_stats(15)
+            log_info(f"Perfil de {len(concluidos)} threads ({', '.join(nome for nome, _ in concluidos)}) "
+                     f"salvo em {caminho}\n{saida.getvalue()}")
+        except Exception as e:
+            log_error(f"Erro ao salvar perfil: {str(e)}")
+
+# Perfil único do processo
+perfil = PerfilSobDemanda()
@@ -0,0 +1,159 @@
+"""
+Rastreamento das chamadas mais pesadas do pipeline.
+Intervalos de tempo (spans) registrados em memória e associados ao frame em
+processamento em cada thread, exportados no formato JSON de trace do Chrome
+(chrome://tracing ou Perfetto). Desativado, cada span custa apenas uma
+verificação de flag.
+"""
+import os
+import json
+import time
+import threading
+from collections import deque
+from datetime import datetime
+from face_detector.config.settings import RASTREAMENTO_ATIVO, MAX_SPANS_RASTREAMENTO, QUADROS_TRACE, PASTA_DIAGNOSTICO
+from face_detector.utils.logger import log_info, log_error
+
+
+class _SpanNulo:
+    """Span sem efeito usado quando o rastreamento está desativado"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        return False
+
+_SPAN_NULO = _SpanNulo()
+
+class _Span:
+    """Intervalo de tempo de uma chamada, registrado ao sair do bloco"""
+    
+    __slots__ = ('rastreador', 'nome', 'inicio')
+    
+    def __init__(self, rastreador, nome):
+        self.rastreador = rastreador
+        self.nome = nome
+    
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+    
+    def __exit__(self, *args):
+        fim = time.perf_counter()
+        self.rastreador._registrar(self.nome, self.inicio, fim)
+        return False
+
+class Rastreador:
+    """Registro dos spans das últimas operações, associados ao frame de cada thread"""
+    
+    def __init__(self, ativo=None, max_spans=None):
+        """
+        Inicializa o rastreador
+        
+        Args:
+            ativo: Registrar spans (None = RASTREAMENTO_ATIVO)
+            max_spans: Número máximo de spans mantidos em memória (os mais antigos são descartados)
+        """
+        self.ativo = ativo if ativo is not None else RASTREAMENTO_ATIVO
+        self.spans = deque(maxlen=max_spans if max_spans is not None else MAX_SPANS_RASTREAMENTO)
+        self.local = threading.local()
+        self.origem = time.perf_counter()
+    
+    def span(self, nome):
+        """
+        Retorna um gerenciador de contexto que mede o bloco
+        
+        Uso: with rastreador.span('face_locations'): ...
+        """
+        if not self.ativo:
+            return _SPAN_NULO
+        return _Span(self, nome)
+    
+    def definir_quadro(self, camera_id, timestamp):
+        """Associa os próximos spans desta thread ao frame (camera_id, timestamp)"""
+        if self.ativo:
+            self.local.quadro = (camera_id, timestamp)
+    
+    def _registrar(self, nome, inicio, fim):
+        """Guarda um span concluído (deque.append é seguro entre threads)"""
+        thread = threading.current_thread()
+        self.spans.append((nome, inicio, fim, thread.ident, thread.name, getattr(self.local, 'quadro', None)))
+    
+    def exportar_chrome(self, num_quadros=None):
+        """
+        Monta o trace dos últimos frames no formato JSON do Chrome
+        
+        Inclui os spans dos num_quadros frames mais recentes e os spans sem
+        frame associado (ex.: lote de encoding) ocorridos no mesmo intervalo.
+        
+        Args:
+            num_quadros: Número de frames incluídos (None = QUADROS_TRACE)
+        
+        Returns:
+            Dicionário com traceEvents, pronto para json.dump
+        """
+        num_quadros = num_quadros if num_quadros is not None else QUADROS_TRACE
+        spans = list(self.spans)
+        
+        # Últimos frames distintos e o instante do primeiro span deles
+        quadros = []
+        for span in reversed(spans):
+            quadro = span[5]
+            if quadro is not None and quadro not in quadros:
+                quadros.append(quadro)
+                if len(quadros) >= num_quadros:
+                    break
+        quadros = set(quadros)
+        inicio_janela = min((s[1] for s in spans if s[5] in quadros), default=None)
+        
+        eventos = []
+        threads = {}
+        for nome, inicio, fim, thread_id, thread_nome, quadro in spans:
+            if quadro is None:
+                if inicio_janela is None or inicio < inicio_janela:
+                    continue
+            elif quadro not in quadros:
+                continue
+            threads[thread_id] = thread_nome
+            evento = {
+                'name': nome,
+                'cat': 'pipeline',
+                'ph': 'X',
+                'ts': (inicio - self.origem) * 1e6,
+                'dur': (fim - inicio) * 1e6,
+                'pid': os.getpid(),
+                'tid': thread_id
+            }
+            if quadro is not None:
+                evento['args'] = {'camera': str(quadro[0]), 'frame': quadro[1]}
+            eventos.append(evento)
+        
+        for thread_id, thread_nome in threads.items():
+            eventos.append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': thread_id,
+                            'args': {'name': thread_nome}})
+        
+        return {'traceEvents': eventos, 'displayTimeUnit': 'ms'}
+    
+    def salvar_chrome(self, num_quadros=None, caminho=None):
+        """
+        Salva o trace dos últimos frames em arquivo JSON
+        
+        Returns:
+            Caminho do arquivo salvo ou None em caso de erro
+        """
+        try:
+            if caminho is None:
+                os.makedirs(PASTA_DIAGNOSTICO, exist_ok=True)
+                caminho = os.path.join(PASTA_DIAGNOSTICO,
+                                       f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            with open(caminho, 'w') as arquivo:
+                json.dump(self.exportar_chrome(num_quadros), arquivo)
+            log_info(f"Trace salvo em {caminho} (abrir em chrome://tracing ou ui.perfetto.dev)")
+            return caminho
+        except Exception as e:
+            log_error(f"Erro ao salvar trace: {str(e)}")
+            return None
+
+# Rastreador único do processo
+rastreador = Rastreador()
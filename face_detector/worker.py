@@ -0,0 +1,36 @@
+"""
+Worker facial remoto: calcula os encodings dos recortes enviados pelos detectores.
+Pode rodar em outros hosts (com --endereco 0.0.0.0:PORTA) ou em vários processos
+no mesmo host, um por porta; os detectores o usam com --worker HOST:PORTA.
+
+Uso:
+    python -m face_detector.worker [--endereco 127.0.0.1:7100] [--lote 8]
+"""
+import argparse
+from face_detector.config.settings import ENDERECO_WORKER, TAMANHO_MAXIMO_LOTE_ENCODING, PRAZO_LOTE_ENCODING
+from face_detector.services.modelos import modelos
+from face_detector.services.encoding_batcher import EncodingBatcher
+from face_detector.services.face_workers import ServidorWorkerFacial
+
+def main():
+    """Função principal do worker facial"""
+    parser = argparse.ArgumentParser(description='Worker facial remoto (encoding em lote dos recortes recebidos)')
+    parser.add_argument('--endereco', type=str, default=ENDERECO_WORKER, help='Endereço de escuta HOST:PORTA')
+    parser.add_argument('--lote', type=int, default=TAMANHO_MAXIMO_LOTE_ENCODING,
+                        help='Máximo de faces por chamada ao modelo de encoding')
+    parser.add_argument('--espera-ms', type=float, default=PRAZO_LOTE_ENCODING * 1000,
+                        help='Tempo máximo que uma face aguarda o lote completar')
+    args = parser.parse_args()
+    
+    modelos.carregar()
+    servidor = ServidorWorkerFacial(args.endereco, EncodingBatcher(args.lote, args.espera_ms / 1000.0))
+    try:
+        servidor.executar()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.finalizar()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
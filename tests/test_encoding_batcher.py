@@ -0,0 +1,66 @@
+"""
+Agrupamento de encodings em lote: estatísticas de espera e finalização
+"""
+import time
+import threading
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from face_detector.services.encoding_batcher import EncodingBatcher
+from face_detector.services.modelos import modelos
+
+TEMPO_ENCODING = 0.05
+
+@pytest.fixture(autouse=True)
+def encoder_falso(monkeypatch):
+    """Substitui o modelo de encoding por um que leva TEMPO_ENCODING por lote"""
+    def calcular(chips, num_jitters):
+        time.sleep(TEMPO_ENCODING)
+        return [np.full(128, chip.mean()) for chip in chips]
+    
+    monkeypatch.setattr(modelos, '_api', SimpleNamespace(face_encoder=SimpleNamespace(
+        compute_face_descriptor=calcular)))
+
+def _recorte(valor):
+    return np.full((150, 150, 3), valor, dtype=np.uint8)
+
+def test_espera_media_nao_inclui_o_calculo():
+    batcher = EncodingBatcher(tamanho_maximo=8, prazo=0.0)
+    batcher.iniciar()
+    try:
+        for valor in range(5):
+            encodings, contexto = batcher.submeter_chips([_recorte(valor)], contexto=valor).result(timeout=5.0)
+            assert contexto == valor and encodings[0][0] == valor
+    finally:
+        batcher.finalizar()
+    
+    estatisticas = batcher.get_estatisticas()
+    assert estatisticas['faces'] == 5
+    assert estatisticas['encoding_por_lote_ms'] >= TEMPO_ENCODING * 1000
+    assert estatisticas['espera_media_ms'] < TEMPO_ENCODING * 1000
+
+def test_itens_submetidos_durante_finalizacao_sao_resolvidos():
+    batcher = EncodingBatcher(tamanho_maximo=4, prazo=0.01)
+    batcher.iniciar()
+    futures = []
+    parar = threading.Event()
+    
+    def submeter():
+        valor = 0
+        while not parar.is_set():
+            futures.append(batcher.submeter_chips([_recorte(valor % 256)], contexto=valor))
+            valor += 1
+            time.sleep(0.001)
+    
+    produtor = threading.Thread(target=submeter)
+    produtor.start()
+    time.sleep(0.1)
+    batcher.finalizar()
+    time.sleep(0.1)
+    parar.set()
+    produtor.join()
+    
+    # Antes e depois da finalização, nenhum Future fica sem resultado
+    for future in futures:
+        encodings, contexto = future.result(timeout=5.0)
+        assert encodings[0][0] == contexto % 256
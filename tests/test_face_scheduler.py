@@ -0,0 +1,103 @@
+"""
+Ordem de atendimento do escalonador facial
+"""
+import pytest
+from face_detector.services.face_scheduler import FaceScheduler
+
+def _escalonador(pesos):
+    """Escalonador com relógio fixo (nenhum frame expira) e uma câmera por peso"""
+    escalonador = FaceScheduler(tamanho_fila=100, relogio=lambda: 0.0)
+    for camera_id, peso in pesos.items():
+        escalonador.registrar_camera(camera_id, peso=peso, prazo=10.0)
+    return escalonador
+
+def _esvaziar(escalonador):
+    """Retira todos os frames pendentes, na ordem de atendimento"""
+    ordem = []
+    while True:
+        camera_id, item = escalonador.proximo()
+        if camera_id is None:
+            return ordem
+        ordem.append(item)
+
+def test_revezamento_ponderado():
+    escalonador = _escalonador({'a': 2.0, 'b': 1.0})
+    for indice in range(4):
+        escalonador.submeter('a', f'a{indice}', 0.0)
+        escalonador.submeter('b', f'b{indice}', 0.0)
+    
+    # Peso 2 atende dois frames por rodada; sem frames de "a", "b" segue sozinha
+    assert _esvaziar(escalonador) == ['a0', 'a1', 'b0', 'a2', 'a3', 'b1', 'b2', 'b3']
+
+def test_peso_fracionario_acumula_creditos():
+    escalonador = _escalonador({'a': 0.5, 'b': 1.0})
+    for indice in range(2):
+        escalonador.submeter('a', f'a{indice}', 0.0)
+    for indice in range(4):
+        escalonador.submeter('b', f'b{indice}', 0.0)
+    
+    assert _esvaziar(escalonador) == ['b0', 'a0', 'b1', 'b2', 'a1', 'b3']
+
+def test_prioritarios_antes_dos_normais_em_revezamento():
+    escalonador = _escalonador({'a': 1.0, 'b': 1.0})
+    escalonador.submeter('a', 'a_normal', 0.0)
+    escalonador.submeter('a', 'a_prioritario1', 0.0, prioritario=True)
+    escalonador.submeter('a', 'a_prioritario2', 0.0, prioritario=True)
+    escalonador.submeter('b', 'b_prioritario', 0.0, prioritario=True)
+    
+    assert _esvaziar(escalonador) == ['a_prioritario1', 'b_prioritario', 'a_prioritario2', 'a_normal']
+
+def test_frames_expirados_sao_descartados():
+    agora = [0.0]
+    escalonador = FaceScheduler(tamanho_fila=100, relogio=lambda: agora[0])
+    escalonador.registrar_camera('a', peso=1.0, prazo=1.0)
+    escalonador.submeter('a', 'antigo', 0.0)
+    escalonador.submeter('a', 'recente', 1.5)
+    agora[0] = 2.0
+    
+    assert _esvaziar(escalonador) == ['recente']
+    assert escalonador.get_estatisticas('a')['expirados'] == 1
+
+@pytest.mark.parametrize('peso', [0, 0.0, -1.0])
+def test_peso_nao_positivo_rejeitado(peso):
+    escalonador = _escalonador({'a': 1.0})
+    with pytest.raises(ValueError):
+        escalonador.registrar_camera('b', peso=peso)
+    
+    # A câmera inválida não entra no revezamento, que continua atendendo as demais
+    escalonador.submeter('a', 'a0', 0.0)
+    assert escalonador.proximo() == ('a', 'a0')
+    assert escalonador.proximo() == (None, None)
+
+def test_prioridade_continua_nao_toma_a_fatia_das_outras_cameras():
+    # "a" tem movimento grande contínuo (todos os frames prioritários); "b" tem peso 3 e frames normais
+    escalonador = FaceScheduler(tamanho_fila=10, relogio=lambda: 0.0)
+    escalonador.registrar_camera('a', peso=1.0, prazo=10.0)
+    escalonador.registrar_camera('b', peso=3.0, prazo=10.0)
+    
+    # Chegam dois frames (um de cada câmera) para cada frame que o estágio facial atende
+    atendidos = {'a': 0, 'b': 0}
+    for indice in range(1000):
+        escalonador.submeter('a', indice, 0.0, prioritario=True)
+        escalonador.submeter('b', indice, 0.0)
+        camera_id, _ = escalonador.proximo()
+        atendidos[camera_id] += 1
+    
+    assert atendidos['a'] == pytest.approx(250, abs=5)
+    assert atendidos['b'] == pytest.approx(750, abs=5)
+
+def test_prioritario_de_camera_esporadica_fura_a_fila():
+    escalonador = _escalonador({'a': 1.0, 'b': 1.0})
+    for indice in range(3):
+        escalonador.submeter('a', f'a{indice}', 0.0)
+    
+    # Uma janela nova em "b" é atendida antes dos frames acumulados de "a"
+    escalonador.submeter('b', 'b_janela1', 0.0, prioritario=True)
+    assert escalonador.proximo() == ('b', 'b_janela1')
+    
+    # O crédito usado é quitado na rodada seguinte, e a próxima janela volta a furar a fila
+    assert escalonador.proximo() == ('a', 'a0')
+    assert escalonador.proximo() == ('a', 'a1')
+    escalonador.submeter('b', 'b_janela2', 0.0, prioritario=True)
+    assert escalonador.proximo() == ('b', 'b_janela2')
+    assert escalonador.proximo() == ('a', 'a2')
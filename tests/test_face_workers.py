@@ -0,0 +1,148 @@
+"""
+Workers faciais remotos de ponta a ponta, no mesmo processo: servidores com um
+lote de encodings falso (o encoding de um recorte é o seu valor médio) e o pool
+de clientes conectado a eles por TCP
+"""
+import time
+import threading
+import numpy as np
+import pytest
+from face_detector.services.encoding_batcher import EncodingBatcher
+from face_detector.services.face_workers import ServidorWorkerFacial, PoolWorkersFaciais
+
+class BatcherFalso(EncodingBatcher):
+    """Lote de encodings sem o modelo: cada encoding repete o valor médio do recorte"""
+    
+    def __init__(self, atraso=0.01, liberacao=None):
+        super().__init__(tamanho_maximo=8, prazo=0.005)
+        self.atraso = atraso
+        self.liberacao = liberacao  # Event que segura as respostas (worker travado) até ser sinalizado
+    
+    def _processar_lote(self, lote):
+        if self.liberacao is not None:
+            self.liberacao.wait()
+        time.sleep(self.atraso)
+        for chips, _, future, contexto, _ in lote:
+            future.set_result(([np.full(128, chip.mean() / 255.0) for chip in chips], contexto))
+
+def _recortes(indice, quantidade=2):
+    """Recortes uniformes cujo valor identifica o pedido e a face"""
+    return [np.full((150, 150, 3), 10 + (indice * 3 + face * 40) % 230, dtype=np.uint8) for face in range(quantidade)]
+
+def _conferir(future, indice, quantidade=2, timeout=10.0):
+    """Confere que o Future resolveu com os encodings dos recortes do pedido, na ordem"""
+    encodings, contexto = future.result(timeout=timeout)
+    assert contexto == indice
+    assert len(encodings) == quantidade
+    for encoding, chip in zip(encodings, _recortes(indice, quantidade)):
+        assert abs(encoding[0] - chip.mean() / 255.0) < 2 / 255.0
+
+def _servidor(batcher):
+    """Inicia um worker em uma porta livre e retorna (servidor, endereço)"""
+    servidor = ServidorWorkerFacial('127.0.0.1:0', batcher)
+    threading.Thread(target=servidor.executar, daemon=True).start()
+    limite = time.time() + 5.0
+    while not servidor.running:
+        assert time.time() < limite, "worker não iniciou"
+        time.sleep(0.01)
+    return servidor, f"127.0.0.1:{servidor.servidor.getsockname()[1]}"
+
+def _endereco_fechado():
+    """Endereço sem nenhum worker escutando"""
+    servidor, endereco = _servidor(BatcherFalso())
+    servidor.finalizar()
+    return endereco
+
+@pytest.fixture
+def servidores():
+    """Cria workers sob demanda e os finaliza ao fim do teste"""
+    criados = []
+    
+    def criar(batcher=None):
+        servidor, endereco = _servidor(batcher if batcher is not None else BatcherFalso())
+        criados.append(servidor)
+        return servidor, endereco
+    
+    yield criar
+    for servidor in criados:
+        servidor.finalizar()
+
+def test_resultados_na_ordem_dos_pedidos(servidores):
+    enderecos = [servidores()[1], servidores()[1]]
+    pool = PoolWorkersFaciais(enderecos, local=BatcherFalso(), max_em_voo=2, fallback_local=False)
+    pool.iniciar()
+    try:
+        assert pool.get_estatisticas()['workers_conectados'] == 2
+        futures = [pool.submeter_chips(_recortes(indice, 1 + indice % 3), contexto=indice) for indice in range(40)]
+        for indice, future in enumerate(futures):
+            _conferir(future, indice, 1 + indice % 3)
+        assert pool.submeter_chips([], contexto='vazio').result(timeout=1.0) == ([], 'vazio')
+    finally:
+        pool.finalizar()
+
+def test_worker_perdido_durante_execucao_reenvia_ao_outro(servidores):
+    perdido, endereco_perdido = servidores(BatcherFalso(atraso=0.05))
+    restante, endereco_restante = servidores(BatcherFalso(atraso=0.05))
+    # Sem reserva local: um pedido só pode terminar em um worker remoto
+    pool = PoolWorkersFaciais([endereco_perdido, endereco_restante], local=BatcherFalso(), max_em_voo=2,
+                              fallback_local=False)
+    pool.iniciar()
+    try:
+        reenvios = pool.reenvios.valor
+        futures = [pool.submeter_chips(_recortes(indice), contexto=indice) for indice in range(30)]
+        limite = time.time() + 5.0
+        while not pool.workers[0].pendentes:
+            assert time.time() < limite, "nenhum pedido em voo no worker"
+            time.sleep(0.005)
+        perdido.finalizar()
+        
+        for indice, future in enumerate(futures):
+            _conferir(future, indice)
+        assert pool.reenvios.valor > reenvios
+        assert not pool.workers[0].conectado
+        assert restante.faces > 0
+        assert perdido.faces + restante.faces >= 60
+    finally:
+        pool.finalizar()
+
+def test_worker_travado_detectado_pelo_prazo(servidores):
+    liberacao = threading.Event()
+    travado, endereco_travado = servidores(BatcherFalso(liberacao=liberacao))
+    _, endereco_restante = servidores()
+    pool = PoolWorkersFaciais([endereco_travado, endereco_restante], local=BatcherFalso(), max_em_voo=2,
+                              timeout=0.5, fallback_local=False)
+    pool.iniciar()
+    try:
+        perdas = pool.perdas.valor
+        inicio = time.time()
+        futures = [pool.submeter_chips(_recortes(indice), contexto=indice) for indice in range(10)]
+        for indice, future in enumerate(futures):
+            _conferir(future, indice)
+        
+        # Os pedidos do worker travado terminam no outro após o prazo (e não antes)
+        assert 0.5 <= time.time() - inicio < 5.0
+        assert pool.perdas.valor == perdas + 1
+        assert not pool.workers[0].conectado
+        assert travado.faces == 0
+    finally:
+        pool.finalizar()
+        liberacao.set()
+
+def test_sem_workers_e_sem_reserva_local_falha_o_pedido():
+    pool = PoolWorkersFaciais([_endereco_fechado()], local=BatcherFalso(), timeout=0.5, fallback_local=False)
+    pool.iniciar()
+    try:
+        with pytest.raises(ConnectionError):
+            pool.submeter_chips(_recortes(0), contexto=0).result(timeout=1.0)
+    finally:
+        pool.finalizar()
+
+def test_sem_workers_calcula_localmente_com_reserva():
+    pool = PoolWorkersFaciais([_endereco_fechado()], local=BatcherFalso(), timeout=0.5, fallback_local=True)
+    pool.iniciar()
+    try:
+        faces_locais = pool.faces_locais.valor
+        _conferir(pool.submeter_chips(_recortes(0), contexto=0), 0)
+        assert pool.faces_locais.valor == faces_locais + 2
+    finally:
+        pool.finalizar()
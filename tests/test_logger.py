@@ -0,0 +1,35 @@
+"""
+Encerramento do log com a fila cheia
+"""
+import time
+import json
+import pytest
+from face_detector.utils import logger
+
+@pytest.fixture
+def log_lento(tmp_path, monkeypatch):
+    """Log com fila pequena e escrita lenta no arquivo JSON Lines (a fila enche antes do encerramento)"""
+    formatar = logger.FormatadorJson.format
+    
+    def formatar_devagar(self, record):
+        time.sleep(0.02)
+        return formatar(self, record)
+    
+    monkeypatch.setattr(logger, 'TAMANHO_FILA_LOG', 5)
+    monkeypatch.setattr(logger.FormatadorJson, 'format', formatar_devagar)
+    arquivo = tmp_path / 'log.jsonl'
+    logger.configurar_logging(arquivo_json=str(arquivo), limites={})
+    yield arquivo
+    monkeypatch.undo()
+    logger.configurar_logging()
+
+def test_encerramento_com_fila_cheia_escreve_as_pendentes(log_lento):
+    for indice in range(20):
+        logger.log_info(f"mensagem {indice}")
+    assert logger._fila_handler.queue.full()
+    descartadas = logger.estatisticas_log()['descartadas']
+    
+    logger.parar_logging()
+    
+    mensagens = [json.loads(linha)['mensagem'] for linha in log_lento.read_text(encoding='utf-8').splitlines()]
+    assert len(mensagens) == 20 - descartadas
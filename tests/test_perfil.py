@@ -0,0 +1,94 @@
+"""
+Captura de perfil sob demanda com threads que param de chamar perfil.ponto()
+"""
+import time
+import threading
+import pytest
+from face_detector.utils import perfil as modulo_perfil
+from face_detector.utils.perfil import PerfilSobDemanda
+
+@pytest.fixture
+def perfil(tmp_path, monkeypatch):
+    monkeypatch.setattr(modulo_perfil, 'PASTA_DIAGNOSTICO', str(tmp_path))
+    monkeypatch.setattr(modulo_perfil, 'TEMPO_ENTREGA_PERFIL', 0.2)
+    return PerfilSobDemanda()
+
+class ThreadInstrumentada:
+    """Thread que chama perfil.ponto() apenas quando solicitada (como um worker ocioso na sua fila)"""
+    
+    def __init__(self, perfil):
+        self.perfil = perfil
+        self.pedidos = []
+        self.evento = threading.Event()
+        self.concluido = threading.Event()
+        self.estado = None
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+    
+    def _loop(self):
+        while True:
+            self.evento.wait()
+            self.evento.clear()
+            if self.pedidos.pop() is None:
+                return
+            self.perfil.ponto()
+            self.estado = (getattr(self.perfil.local, 'perfil', None), getattr(self.perfil.local, 'geracao', None))
+            self.concluido.set()
+    
+    def ponto(self):
+        """Executa perfil.ponto() na thread e retorna (perfil ativo, geração)"""
+        self.concluido.clear()
+        self.pedidos.append(True)
+        self.evento.set()
+        assert self.concluido.wait(5.0)
+        return self.estado
+    
+    def parar(self):
+        self.pedidos.append(None)
+        self.evento.set()
+        self.thread.join(5.0)
+
+def _aguardar_conclusao(perfil):
+    limite = time.time() + 5.0
+    while perfil.fim:
+        assert time.time() < limite, "captura não concluída"
+        time.sleep(0.02)
+
+def test_thread_que_nao_volta_ao_ponto_e_contada_e_desativa_depois(perfil):
+    thread = ThreadInstrumentada(perfil)
+    try:
+        assert perfil.solicitar(0.1)
+        ativo, _ = thread.ponto()
+        assert ativo is not None
+        _aguardar_conclusao(perfil)
+        assert perfil.nao_entregues == 1
+        
+        # Após a captura, o próximo ponto() desativa o perfil sem entregá-lo
+        ativo, _ = thread.ponto()
+        assert ativo is None
+        assert perfil.concluidos == []
+    finally:
+        thread.parar()
+
+def test_perfil_de_captura_anterior_e_substituido(perfil, tmp_path):
+    thread = ThreadInstrumentada(perfil)
+    try:
+        assert perfil.solicitar(0.1)
+        antigo, geracao_antiga = thread.ponto()
+        _aguardar_conclusao(perfil)
+        
+        # Nova captura com a thread ainda segurando o perfil da anterior
+        assert perfil.solicitar(0.3)
+        novo, geracao = thread.ponto()
+        assert novo is not None and novo is not antigo
+        assert geracao == geracao_antiga + 1
+        
+        # Ao fim, o perfil novo é entregue e salvo
+        time.sleep(0.35)
+        ativo, _ = thread.ponto()
+        assert ativo is None
+        _aguardar_conclusao(perfil)
+        assert perfil.nao_entregues == 1
+        assert list(tmp_path.glob('perfil_*.prof'))
+    finally:
+        thread.parar()
@@ -0,0 +1,67 @@
+"""
+Reprodução de gravações de frames pelo pipeline da câmera
+"""
+import time
+import numpy as np
+import pytest
+from face_detector.controllers.camera_pipeline import CameraPipeline
+from face_detector.services.frame_recorder import FrameRecorder, ReplaySource
+
+def _gravar(caminho, total=5, intervalo=0.1):
+    """Grava frames sintéticos com intervalo fixo entre os timestamps (10 FPS por padrão)"""
+    gravador = FrameRecorder(caminho, formato='bruto')
+    for indice in range(total):
+        frame = np.full((48, 64, 3), indice * 40, dtype=np.uint8)
+        gravador.gravar_codificado(frame.tobytes(), frame.shape, 1000.0 + indice * intervalo)
+    gravador.fechar()
+
+def test_fps_da_gravacao_ajustado_pela_velocidade(tmp_path):
+    caminho = str(tmp_path / 'camera.frames')
+    _gravar(caminho)
+    
+    fonte = ReplaySource(caminho, velocidade=2.0)
+    assert fonte.get_fps() == 0.0
+    assert fonte.start()
+    assert abs(fonte.get_fps() - 20.0) < 1e-6
+    fonte.stop()
+
+def test_frame_exibicao_durante_replay(tmp_path):
+    caminho = str(tmp_path / 'camera.frames')
+    _gravar(caminho)
+    
+    pipeline = CameraPipeline('replay', caminho, motor_faces=None, clipes=False)
+    pipeline.video_capture = ReplaySource(caminho, velocidade=0)
+    assert pipeline.video_capture.start()
+    ok, frame = pipeline.video_capture.read()
+    assert ok
+    pipeline.ultimo_frame = frame
+    
+    # Sem resultado do motor facial, o último frame é exibido com as anotações de tela (incluindo o FPS)
+    exibicao = pipeline.obter_frame_exibicao()
+    assert exibicao is not None
+    assert exibicao.shape == frame.shape
+    assert not np.array_equal(exibicao, frame)
+    pipeline.video_capture.stop()
+
+@pytest.mark.parametrize('velocidade', [0, 2.0])
+def test_timestamps_acompanham_o_relogio_da_reproducao(tmp_path, velocidade):
+    caminho = str(tmp_path / 'camera.frames')
+    _gravar(caminho, total=4, intervalo=0.1)
+    
+    fonte = ReplaySource(caminho, velocidade=velocidade)
+    assert fonte.start()
+    timestamps = []
+    for _ in range(4):
+        ok, _ = fonte.read()
+        assert ok
+        # A idade do frame (base dos prazos e da latência ponta a ponta) começa em zero, nunca negativa
+        idade = time.time() - fonte.ultimo_timestamp
+        assert 0.0 <= idade < 0.05
+        timestamps.append(fonte.ultimo_timestamp)
+    fonte.stop()
+    
+    intervalos = np.diff(timestamps)
+    if velocidade > 0:
+        assert intervalos == pytest.approx([0.1 / velocidade] * 3, abs=1e-6)
+    else:
+        assert (intervalos >= 0).all()